@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Offline benchmark for the AI drug-information path using LocalAIClient.
+
+Drives ``get_drug_information`` from concurrent threads against the local
+stand-in provider (lognormal latency, optional injected errors) and reports
+throughput and latency percentiles for:
+  1. No cache, no coalescing (every call reaches the provider)
+  2. Single-flight coalescing of identical concurrent prompts
+  3. Two-tier response cache (local LRU + Django cache)
+
+The workload repeats a small set of medications, like real traffic where a
+few drugs dominate lookups.
+
+Usage:
+    PYTHONPATH=src python scripts/benchmark_ai_endpoints.py [requests] [threads]
+"""
+
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "src.healthcoreapi.settings.test")
+os.environ.setdefault("SECRET_KEY", "benchmark-only")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+
+from src.apps.core import ai_cache  # noqa: E402
+from src.apps.core.ai_client import get_ai_client  # noqa: E402
+from src.apps.pharmacy.ai_service import get_drug_information  # noqa: E402
+
+MEDICATIONS = ["Metformin", "Lisinopril", "Atorvastatin", "Amoxicillin", "Warfarin"]
+
+
+def run(requests: int, threads: int) -> dict[str, float]:
+    """Return throughput, error count and latency percentiles in ms."""
+    get_ai_client.cache_clear()
+    ai_cache.get_response_cache.cache_clear()
+    cache.clear()
+
+    def call(i: int) -> tuple[float, bool]:
+        start = time.perf_counter()
+        result = get_drug_information(MEDICATIONS[i % len(MEDICATIONS)])
+        return (time.perf_counter() - start) * 1000, result.success
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(call, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(ms for ms, _ in results)
+    return {
+        "rps": requests / elapsed,
+        "errors": sum(1 for _, ok in results if not ok),
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+    }
+
+
+def main() -> None:
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    settings.AI_PROVIDERS = ["LocalAIClient"]
+    settings.AI_LOCAL_LATENCY_DISTRIBUTION = "lognormal"
+    settings.AI_LOCAL_LATENCY_MEDIAN_SECONDS = float(
+        os.environ.get("AI_LOCAL_LATENCY_MEDIAN_SECONDS", 0.2)
+    )
+    settings.AI_LOCAL_ERROR_RATE = float(os.environ.get("AI_LOCAL_ERROR_RATE", 0.0))
+    settings.AI_RATE_LIMIT_ENABLED = False
+
+    configurations = {
+        "no cache, no coalescing": (False, False),
+        "single-flight": (False, True),
+        "response cache": (True, False),
+    }
+    results: dict[str, dict[str, float]] = {}
+    for name, (cached, coalesced) in configurations.items():
+        settings.AI_CACHE_ENABLED = cached
+        settings.AI_SINGLE_FLIGHT_ENABLED = coalesced
+        results[name] = run(requests, threads)
+
+    print(
+        f"\n📊 AI drug info via LocalAIClient ({requests} requests, {threads} threads)"
+    )
+    print(f"  {'':<26} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} errors")
+    for name, r in results.items():
+        print(
+            f"  {name:<26} {r['rps']:8.1f} {r['p50']:8.1f} {r['p95']:8.1f} "
+            f"{r['p99']:8.1f} {int(r['errors']):6d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Benchmark of the vectorized consumption forecast.
+
+Times the two in-process steps of ``pharmacy.forecasting`` on synthetic
+history: scattering aggregated (medication, day, quantity) rows into the
+daily matrix, and projecting days of cover and reorder dates for every
+medication. The aggregated query itself is not included; it returns at
+most one row per medication and day.
+
+Usage:
+    PYTHONPATH=src python scripts/benchmark_forecast.py [medications] [days]
+"""
+
+import os
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "src.healthcoreapi.settings.test")
+os.environ.setdefault("SECRET_KEY", "benchmark-only")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+from src.apps.pharmacy import forecasting  # noqa: E402
+
+
+def main() -> None:
+    medications = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 730
+    settings.PHARMACY_FORECAST_HISTORY_DAYS = days
+
+    rng = np.random.default_rng(42)
+    today = date.today()
+    start = today - timedelta(days=days)
+    # About 60% of medication-days have dispensations
+    daily = rng.poisson(rng.uniform(0.5, 20, (medications, 1)), (medications, days))
+    daily[rng.random((medications, days)) < 0.4] = 0
+    dates = [start + timedelta(days=d) for d in range(days)]
+    rows = [
+        (int(m) + 1, dates[d], int(daily[m, d])) for m, d in zip(*np.nonzero(daily))
+    ]
+
+    began = time.perf_counter()
+    ids, consumption = forecasting.consumption_matrix(rows, start, days)
+    scattered = time.perf_counter()
+    projection = forecasting.project(
+        consumption,
+        start,
+        rng.integers(0, 5000, len(ids)).astype(float),
+        np.full(len(ids), 50.0),
+        today,
+    )
+    projected = time.perf_counter()
+
+    running_out = int((projection["days_of_cover"] >= 0).sum())
+    print(
+        f"\n📊 Consumption forecast ({medications} medications x {days} days, "
+        f"{len(rows)} aggregated rows)"
+    )
+    print(f"  Rows -> matrix:  {scattered - began:7.3f}s")
+    print(f"  Projection:      {projected - scattered:7.3f}s")
+    print(
+        f"  Running out within {settings.PHARMACY_FORECAST_HORIZON_DAYS} days: "
+        f"{running_out}"
+    )
+
+
+if __name__ == "__main__":
+    main()
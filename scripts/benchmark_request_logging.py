@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+"""
+Microbenchmark for RequestLoggingMiddleware per-request logging overhead.
+
+Compares the following configurations writing JSON lines:
+  1. Logger disabled (pure middleware cost, baseline)
+  2. Synchronous FileHandler (I/O on the request thread)
+  3. QueueListenerHandler (request thread only enqueues)
+  4. QueueListenerHandler with 2xx sampling at 10%
+  5/6. Sync vs queue handler against a slow sink (simulates a blocked
+       stdout pipe or a saturated log volume, 200 µs per write)
+
+Usage:
+    PYTHONPATH=src python scripts/benchmark_request_logging.py [iterations]
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "src.healthcoreapi.settings.test")
+os.environ.setdefault("SECRET_KEY", "benchmark-only")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import django  # noqa: E402
+
+django.setup()
+
+import logging  # noqa: E402
+
+from django.http import HttpResponse  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+from src.apps.core.logging import OrjsonFormatter, QueueListenerHandler  # noqa: E402
+from src.apps.core.middleware import RequestLoggingMiddleware  # noqa: E402
+
+
+class SlowStream(io.StringIO):
+    """Stream whose writes block, like a congested pipe or disk."""
+
+    def write(self, s: str) -> int:
+        time.sleep(0.0002)
+        return super().write(s)
+
+
+def run(middleware: RequestLoggingMiddleware, iterations: int) -> float:
+    """Return mean microseconds spent in the middleware per request."""
+    factory = RequestFactory()
+    response = HttpResponse(status=200)
+    requests = [
+        factory.get("/api/v1/patients/", {"page": "1"}) for _ in range(iterations)
+    ]
+
+    start = time.perf_counter()
+    for request in requests:
+        middleware.process_request(request)
+        middleware.process_response(request, response)
+    elapsed = time.perf_counter() - start
+    return elapsed / iterations * 1_000_000
+
+
+def with_handler(
+    handler: logging.Handler,
+    body: Callable[[], float],
+    teardown: Callable[[], None],
+    level: int = logging.INFO,
+) -> float:
+    """Attach handler to the middleware logger for the duration of body()."""
+    logger = logging.getLogger("src.apps.core.middleware")
+    previous_level = logger.level
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    try:
+        return body()
+    finally:
+        teardown()
+        logger.removeHandler(handler)
+        logger.setLevel(previous_level)
+        logger.propagate = True
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    middleware = RequestLoggingMiddleware(get_response=lambda r: HttpResponse())
+    results: dict[str, float] = {}
+
+    # 1. Baseline: nothing enabled for INFO
+    results["logger disabled"] = with_handler(
+        logging.NullHandler(),
+        lambda: run(middleware, iterations),
+        lambda: None,
+        level=logging.ERROR,
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 2. Synchronous file handler
+        sync_handler = logging.FileHandler(os.path.join(tmp, "sync.log"))
+        sync_handler.setFormatter(OrjsonFormatter())
+        results["sync file handler"] = with_handler(
+            sync_handler, lambda: run(middleware, iterations), sync_handler.close
+        )
+
+        # 3. Queue handler
+        target = logging.FileHandler(os.path.join(tmp, "queue.log"))
+        target.setFormatter(OrjsonFormatter())
+        queue_handler = QueueListenerHandler([target], queue_size=iterations + 1)
+        results["queue handler"] = with_handler(
+            queue_handler, lambda: run(middleware, iterations), queue_handler.stop
+        )
+
+        # 4. Queue handler + 10% sampling of successful requests
+        middleware.sample_rate = 0.1
+        target = logging.FileHandler(os.path.join(tmp, "sampled.log"))
+        target.setFormatter(OrjsonFormatter())
+        sampled_handler = QueueListenerHandler([target], queue_size=iterations + 1)
+        results["queue handler, 10% sampling"] = with_handler(
+            sampled_handler, lambda: run(middleware, iterations), sampled_handler.stop
+        )
+
+    # 5/6. Slow sink: sync handler blocks the request thread, queue does not
+    middleware.sample_rate = 1.0
+    slow_iterations = min(iterations, 2000)
+    slow_sync = logging.StreamHandler(SlowStream())
+    slow_sync.setFormatter(OrjsonFormatter())
+    results["sync handler, slow sink"] = with_handler(
+        slow_sync, lambda: run(middleware, slow_iterations), lambda: None
+    )
+    slow_target = logging.StreamHandler(SlowStream())
+    slow_target.setFormatter(OrjsonFormatter())
+    slow_queue = QueueListenerHandler([slow_target], queue_size=slow_iterations + 1)
+    results["queue handler, slow sink"] = with_handler(
+        slow_queue, lambda: run(middleware, slow_iterations), lambda: None
+    )
+    slow_queue.stop()
+
+    print(f"\n📊 RequestLoggingMiddleware overhead ({iterations} requests)")
+    for name, micros in results.items():
+        print(f"  {name:<30} {micros:8.1f} µs/request")
+
+
+if __name__ == "__main__":
+    main()
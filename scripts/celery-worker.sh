@@ -53,14 +53,18 @@ wait_for_postgres() {
     exit 1
 }
 
+start_celery_worker() {
     log "Starting Celery worker..."
-    log "Configuration: concurrency=2, loglevel=info"
+    CELERY_QUEUES=${CELERY_QUEUES:-celery}
+    CELERY_CONCURRENCY=${CELERY_CONCURRENCY:-2}
+    log "Configuration: queues=${CELERY_QUEUES}, concurrency=${CELERY_CONCURRENCY}, loglevel=info"
 
     mkdir -p logs
 
     exec celery -A healthcoreapi worker \
         --loglevel=info \
-        --concurrency=2 \
+        --queues="${CELERY_QUEUES}" \
+        --concurrency="${CELERY_CONCURRENCY}" \
         --without-gossip \
         --without-mingle \
         --without-heartbeat
@@ -165,13 +165,15 @@ start_server() {
     if [ "${APP_ENV}" = "production" ]; then
         # Default to 2 workers if not specified (safe for 0.5GB/0.25vCPU)
         WEB_CONCURRENCY=${WEB_CONCURRENCY:-2}
+        # Threads give ConcurrencyLimitMiddleware room to queue and shed
+        GUNICORN_THREADS=${GUNICORN_THREADS:-8}
         log "Starting Gunicorn server for production with ${WEB_CONCURRENCY} workers..."
         # Ensure logs directory exists to prevent FileHandler crash
         mkdir -p logs
         exec gunicorn healthcoreapi.wsgi:application \
             --bind 0.0.0.0:8000 \
             --workers ${WEB_CONCURRENCY} \
-            --threads 2 \
+            --threads ${GUNICORN_THREADS} \
             --timeout 60 \
             --log-level info \
             --access-logfile '-' \
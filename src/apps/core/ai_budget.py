@@ -0,0 +1,258 @@
+"""Prompt size budgeting and per-call token/latency metrics for AI calls.
+
+Each cache use case (``ai_cache.use_case``) has a prompt budget in tokens
+(``AI_PROMPT_BUDGETS``, system prompt included). Prompt builders describe
+their variable parts as ``PromptSection`` objects; ``fit_sections`` condenses
+whitespace and then trims the lowest-priority sections first, keeping the
+head and tail of each trimmed text (report conclusions usually come last),
+until the prompt fits.
+
+Tokens are estimated from the character count (``AI_CHARS_PER_TOKEN``), the
+same way for every provider: clients return text only, and a provider
+tokenizer would cost more than the estimate is off by.
+
+``metered_ai_call``/``metered_ai_stream`` record prompt and response token
+estimates and provider latency for every call that reaches a provider.
+``round_trips`` collects the latency of the successful ones, so callers can
+tell a provider round trip from a cache hit or a coalesced wait.
+"""
+
+import contextvars
+import functools
+import logging
+import math
+import re
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, TypeVar, cast
+
+from django.conf import settings
+from prometheus_client import Counter, Histogram
+
+from .ai_cache import DEFAULT_USE_CASE, current_use_case
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+TRUNCATION_MARKER = "\n[...]\n"
+
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+_round_trips: contextvars.ContextVar[list[float] | None] = contextvars.ContextVar(
+    "ai_round_trips", default=None
+)
+
+AI_PROMPT_TOKENS = Histogram(
+    "healthcore_ai_prompt_tokens",
+    "Estimated prompt tokens (system prompt included) per AI provider call.",
+    ["provider", "use_case"],
+    buckets=TOKEN_BUCKETS,
+)
+AI_RESPONSE_TOKENS = Histogram(
+    "healthcore_ai_response_tokens",
+    "Estimated response tokens per AI provider call.",
+    ["provider", "use_case"],
+    buckets=TOKEN_BUCKETS,
+)
+AI_CALL_DURATION = Histogram(
+    "healthcore_ai_call_duration_seconds",
+    "AI provider call latency (full stream for streaming calls).",
+    ["provider", "use_case", "outcome"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60),
+)
+AI_PROMPT_TRUNCATED = Counter(
+    "healthcore_ai_prompt_truncated_total",
+    "Prompt sections trimmed to fit the use-case prompt budget.",
+    ["use_case", "section"],
+)
+AI_PROMPT_OVER_BUDGET = Counter(
+    "healthcore_ai_prompt_over_budget_total",
+    "AI calls sent with a prompt larger than the use-case budget.",
+    ["use_case"],
+)
+
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+_SPACES = re.compile(r"[ \t\r\f\v]+")
+
+
+@dataclass
+class PromptSection:
+    """A variable part of a prompt; lower ``priority`` is trimmed last."""
+
+    name: str
+    text: str
+    priority: int = 0
+    min_tokens: int = 0
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of ``text``."""
+    return math.ceil(len(text) / float(settings.AI_CHARS_PER_TOKEN))
+
+
+def budget_for(name: str | None = None) -> int:
+    """Prompt budget in tokens for a use case (the current one by default)."""
+    budgets: dict[str, int] = settings.AI_PROMPT_BUDGETS
+    name = name or current_use_case()
+    return int(budgets.get(name, budgets[DEFAULT_USE_CASE]))
+
+
+def condense(text: str) -> str:
+    """Collapse runs of spaces and blank lines, which cost tokens for nothing."""
+    lines = (_SPACES.sub(" ", line).strip() for line in text.strip().splitlines())
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines))
+
+
+def truncate_middle(text: str, max_tokens: int) -> str:
+    """Cut ``text`` to about ``max_tokens``, keeping its head and tail."""
+    max_chars = int(max_tokens * float(settings.AI_CHARS_PER_TOKEN))
+    if len(text) <= max_chars:
+        return text
+    available = max_chars - len(TRUNCATION_MARKER)
+    if available <= 0:
+        return ""
+    head = text[: available * 2 // 3]
+    tail = text[len(text) - (available - len(head)) :]
+    # Cut on word boundaries
+    head = head[: head.rfind(" ")] if " " in head else head
+    tail = tail[tail.find(" ") + 1 :] if " " in tail else tail
+    return f"{head.rstrip()}{TRUNCATION_MARKER}{tail.lstrip()}"
+
+
+def fit_sections(
+    sections: Sequence[PromptSection], reserved: str = ""
+) -> dict[str, str]:
+    """
+    Fit prompt sections into the current use case's budget.
+
+    Args:
+        sections: Variable prompt parts
+        reserved: Fixed text sent with them (system prompt, template)
+
+    Returns:
+        Section name -> text to use in the prompt.
+    """
+    if not settings.AI_PROMPT_BUDGET_ENABLED:
+        return {section.name: section.text for section in sections}
+
+    use_case = current_use_case()
+    texts = {section.name: condense(section.text) for section in sections}
+    over = (
+        estimate_tokens(reserved)
+        + sum(estimate_tokens(text) for text in texts.values())
+        - budget_for(use_case)
+    )
+    for section in sorted(sections, key=lambda s: s.priority, reverse=True):
+        if over <= 0:
+            break
+        tokens = estimate_tokens(texts[section.name])
+        keep = max(section.min_tokens, tokens - over)
+        if keep >= tokens:
+            continue
+        texts[section.name] = truncate_middle(texts[section.name], keep)
+        over -= tokens - estimate_tokens(texts[section.name])
+        AI_PROMPT_TRUNCATED.labels(use_case, section.name).inc()
+        logger.info(
+            f"Trimmed prompt section '{section.name}' from {tokens} to "
+            f"~{keep} tokens for use case '{use_case}'"
+        )
+    return texts
+
+
+def _observe_prompt(
+    provider: str, use_case: str, prompt: str, system_instruction: str
+) -> None:
+    tokens = estimate_tokens(system_instruction) + estimate_tokens(prompt)
+    AI_PROMPT_TOKENS.labels(provider, use_case).observe(tokens)
+    if tokens > budget_for(use_case):
+        AI_PROMPT_OVER_BUDGET.labels(use_case).inc()
+
+
+@contextmanager
+def round_trips() -> Iterator[list[float]]:
+    """Collect the latency of successful ``generate_content`` provider calls
+    made in the block; cache hits and coalesced waits add nothing.
+    """
+    samples: list[float] = []
+    token = _round_trips.set(samples)
+    try:
+        yield samples
+    finally:
+        _round_trips.reset(token)
+
+
+def metered_ai_call(func: F) -> F:
+    """Record token estimates and latency of a ``generate_content`` call."""
+
+    @functools.wraps(func)
+    def wrapper(
+        self: Any,
+        prompt: str,
+        system_instruction: str = "",
+        temperature: float = 0.7,
+    ) -> str:
+        provider, use_case = type(self).__name__, current_use_case()
+        _observe_prompt(provider, use_case, prompt, system_instruction)
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response: str = func(self, prompt, system_instruction, temperature)
+            outcome = "success"
+        finally:
+            elapsed = time.perf_counter() - start
+            AI_CALL_DURATION.labels(provider, use_case, outcome).observe(elapsed)
+        samples = _round_trips.get()
+        if samples is not None:
+            samples.append(elapsed)
+        AI_RESPONSE_TOKENS.labels(provider, use_case).observe(estimate_tokens(response))
+        return response
+
+    return cast(F, wrapper)
+
+
+def metered_ai_stream(func: F) -> F:
+    """Record token estimates and latency of a ``stream_content`` call.
+
+    The use case is read when the stream is created, not when consumed.
+    """
+
+    @functools.wraps(func)
+    def wrapper(
+        self: Any,
+        prompt: str,
+        system_instruction: str = "",
+        temperature: float = 0.7,
+    ) -> Iterator[str]:
+        provider, use_case = type(self).__name__, current_use_case()
+        _observe_prompt(provider, use_case, prompt, system_instruction)
+        return _metered_chunks(
+            func(self, prompt, system_instruction, temperature), provider, use_case
+        )
+
+    return cast(F, wrapper)
+
+
+def _metered_chunks(
+    chunks: Iterator[str], provider: str, use_case: str
+) -> Iterator[str]:
+    start = time.perf_counter()
+    characters = 0
+    outcome = "error"
+    try:
+        for chunk in chunks:
+            characters += len(chunk)
+            yield chunk
+        outcome = "success"
+    except GeneratorExit:
+        outcome = "cancelled"
+        raise
+    finally:
+        AI_CALL_DURATION.labels(provider, use_case, outcome).observe(
+            time.perf_counter() - start
+        )
+        AI_RESPONSE_TOKENS.labels(provider, use_case).observe(
+            math.ceil(characters / float(settings.AI_CHARS_PER_TOKEN))
+        )
@@ -0,0 +1,288 @@
+"""Two-tier response cache for AI provider calls.
+
+``generate_content`` results are cached under a SHA-256 digest of
+(provider, model, system prompt, prompt, temperature):
+
+- L1: a process-local LRU (``AI_CACHE_LOCAL_MAX_ENTRIES``), answering
+  repeated calls without a network round trip;
+- L2: the Django cache (Redis), shared by all workers.
+
+Callers tag calls with a use case (``with use_case("drug_info"): ...``) whose
+TTL comes from ``AI_CACHE_TTLS``. Untagged calls are only cached when they are
+near-deterministic (``temperature <= AI_CACHE_MAX_TEMPERATURE``).
+``invalidate_use_case`` drops every entry of a use case by bumping its
+version in L2; other workers' L1 entries expire within
+``AI_CACHE_LOCAL_TTL_SECONDS``.
+"""
+
+import contextvars
+import functools
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any, TypeVar, cast
+
+from django.conf import settings
+from django.core.cache import cache
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+DEFAULT_USE_CASE = "default"
+
+_use_case: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "ai_cache_use_case", default=None
+)
+
+AI_CACHE_REQUESTS = Counter(
+    "healthcore_ai_cache_requests_total",
+    "AI response cache lookups by result (local_hit, shared_hit, miss, bypass).",
+    ["use_case", "result"],
+)
+AI_CACHE_LOCAL_ENTRIES = Gauge(
+    "healthcore_ai_cache_local_entries", "Entries in the process-local AI cache."
+)
+
+
+@contextmanager
+def use_case(name: str) -> Iterator[None]:
+    """Tag AI calls made inside the block with a cache use case."""
+    token = _use_case.set(name)
+    try:
+        yield
+    finally:
+        _use_case.reset(token)
+
+
+def current_use_case() -> str:
+    """Use case of the AI calls made in this context."""
+    return _use_case.get() or DEFAULT_USE_CASE
+
+
+def cache_key(
+    provider: str, model: str, system_prompt: str, prompt: str, temperature: float
+) -> str:
+    """Return the content hash identifying one AI request."""
+    digest = hashlib.sha256()
+    for part in (provider, model, system_prompt, prompt, f"{temperature:.3f}"):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class LocalLRUCache:
+    """Thread-safe LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class AIResponseCache:
+    """L1 (process LRU) + L2 (Django cache) store for AI responses."""
+
+    def __init__(self) -> None:
+        self.local = LocalLRUCache(settings.AI_CACHE_LOCAL_MAX_ENTRIES)
+
+    @staticmethod
+    def ttl_for(name: str) -> int:
+        """Configured TTL in seconds for a use case (0 disables caching)."""
+        ttls: dict[str, int] = settings.AI_CACHE_TTLS
+        return int(ttls.get(name, ttls.get(DEFAULT_USE_CASE, 0)))
+
+    @staticmethod
+    def _version(name: str) -> int:
+        return int(cache.get(f"ai:version:{name}") or 0)
+
+    def _keys(self, name: str, digest: str) -> tuple[str, str]:
+        # The L1 key omits the version so a lookup needs no round trip
+        return f"{name}:{digest}", f"ai:{name}:v{self._version(name)}:{digest}"
+
+    def get(self, name: str, digest: str) -> tuple[str | None, str]:
+        """Return (value, result label) for a cached response."""
+        local_key = f"{name}:{digest}"
+        value = self.local.get(local_key)
+        if value is not None:
+            return value, "local_hit"
+        _, shared_key = self._keys(name, digest)
+        value = cache.get(shared_key)
+        if value is None:
+            return None, "miss"
+        self.local.set(local_key, value, self._local_ttl(name))
+        return value, "shared_hit"
+
+    def set(self, name: str, digest: str, value: str) -> None:
+        local_key, shared_key = self._keys(name, digest)
+        cache.set(shared_key, value, self.ttl_for(name))
+        self.local.set(local_key, value, self._local_ttl(name))
+        AI_CACHE_LOCAL_ENTRIES.set(len(self.local))
+
+    def invalidate(self, name: str, digest: str) -> None:
+        """Drop one cached response."""
+        local_key, shared_key = self._keys(name, digest)
+        cache.delete(shared_key)
+        self.local.delete(local_key)
+
+    def invalidate_use_case(self, name: str) -> None:
+        """Drop every cached response of a use case."""
+        version_key = f"ai:version:{name}"
+        try:
+            cache.incr(version_key)
+        except ValueError:
+            cache.set(version_key, 1, None)
+        self.local.delete_prefix(f"{name}:")
+        AI_CACHE_LOCAL_ENTRIES.set(len(self.local))
+        logger.info(f"AI response cache invalidated for use case: {name}")
+
+    def _local_ttl(self, name: str) -> float:
+        return min(self.ttl_for(name), settings.AI_CACHE_LOCAL_TTL_SECONDS)
+
+
+@functools.lru_cache(maxsize=1)
+def get_response_cache() -> AIResponseCache:
+    """Get the process-wide AI response cache."""
+    return AIResponseCache()
+
+
+def _lookup(
+    client: Any, prompt: str, system_instruction: str, temperature: float
+) -> tuple[AIResponseCache, str, str | None]:
+    """Return (cache, use case, digest); digest is None when not cacheable."""
+    tagged = _use_case.get()
+    name = tagged or DEFAULT_USE_CASE
+    response_cache = get_response_cache()
+    if (
+        not settings.AI_CACHE_ENABLED
+        or response_cache.ttl_for(name) <= 0
+        or (tagged is None and temperature > settings.AI_CACHE_MAX_TEMPERATURE)
+    ):
+        AI_CACHE_REQUESTS.labels(name, "bypass").inc()
+        return response_cache, name, None
+    digest = cache_key(
+        type(client).__name__,
+        str(client.model_name),
+        system_instruction,
+        prompt,
+        temperature,
+    )
+    return response_cache, name, digest
+
+
+def cached_ai_call(func: F) -> F:
+    """Serve ``generate_content`` from the response cache when allowed."""
+
+    @functools.wraps(func)
+    def wrapper(
+        self: Any,
+        prompt: str,
+        system_instruction: str = "",
+        temperature: float = 0.7,
+    ) -> str:
+        response_cache, name, digest = _lookup(
+            self, prompt, system_instruction, temperature
+        )
+        if digest is None:
+            response: str = func(self, prompt, system_instruction, temperature)
+            return response
+
+        value, result = response_cache.get(name, digest)
+        AI_CACHE_REQUESTS.labels(name, result).inc()
+        if value is not None:
+            return value
+
+        response = func(self, prompt, system_instruction, temperature)
+        if response:
+            response_cache.set(name, digest, response)
+        return response
+
+    return cast(F, wrapper)
+
+
+def cached_ai_stream(func: F) -> F:
+    """Cache-aware ``stream_content``: hits are replayed as one chunk and
+    completed streams populate the same entry ``generate_content`` uses.
+
+    The use case is read when the stream is created, not when consumed.
+    """
+
+    @functools.wraps(func)
+    def wrapper(
+        self: Any,
+        prompt: str,
+        system_instruction: str = "",
+        temperature: float = 0.7,
+    ) -> Iterator[str]:
+        response_cache, name, digest = _lookup(
+            self, prompt, system_instruction, temperature
+        )
+        if digest is None:
+            chunks: Iterator[str] = func(self, prompt, system_instruction, temperature)
+            return chunks
+
+        value, result = response_cache.get(name, digest)
+        AI_CACHE_REQUESTS.labels(name, result).inc()
+        if value is not None:
+            return iter([value])
+        return _store_when_complete(
+            func(self, prompt, system_instruction, temperature),
+            response_cache,
+            name,
+            digest,
+        )
+
+    return cast(F, wrapper)
+
+
+def _store_when_complete(
+    chunks: Iterator[str], response_cache: AIResponseCache, name: str, digest: str
+) -> Iterator[str]:
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    # Only reached when the stream finished without error
+    value = "".join(parts).strip()
+    if value:
+        response_cache.set(name, digest, value)
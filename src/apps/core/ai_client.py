@@ -4,17 +4,35 @@ Supports multiple AI providers: Google Gemini (default) and OpenAI.
 
 === HOW TO SWITCH PROVIDERS ===
 1. Set the appropriate API key in .env
-2. Change the AIClient alias at the bottom of this file:
-   - AIClient = GeminiClient   (default - free tier)
-   - AIClient = OpenAIClient   (alternative - paid)
+2. List providers in priority order in AI_PROVIDERS, e.g.
+   AI_PROVIDERS=AzureClient,GeminiClient,OpenAIClient
+   With more than one, get_ai_client() returns a FailoverAIClient
+   (see core.ai_failover); unconfigured providers are skipped.
+3. AI_PROVIDERS=LocalAIClient runs a deterministic offline stand-in with
+   injected latency and errors (AI_LOCAL_*), for benchmarks and load tests.
 """
 
+import hashlib
 import logging
+import math
+import random
+import threading
+import time
+from collections.abc import Iterator
 from functools import lru_cache
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Optional
 
 from django.conf import settings
 
+from .ai_budget import PromptSection, fit_sections, metered_ai_call, metered_ai_stream
+from .ai_cache import cached_ai_call, cached_ai_stream
+from .ai_limits import coalesced_ai_call, throttled_ai_call
+from .deadline import bounded_timeout
+from .tracing import traced_ai_call, traced_ai_stream
+
+if TYPE_CHECKING:
+    from .ai_failover import FailoverAIClient
+
 logger = logging.getLogger(__name__)
 
 
@@ -41,6 +59,66 @@ class AIServiceUnavailableError(AIClientError):
     pass
 
 
+class AIRateLimitExceededError(AIServiceUnavailableError):
+    """Raised when a provider's rate limit left no capacity in time.
+
+    The provider was not called, so this is not a provider failure.
+    """
+
+    pass
+
+
+# =============================================================================
+# SHARED PROMPTS
+# =============================================================================
+
+LIFESTYLE_SYSTEM_PROMPT = (
+    "You are a helpful medical assistant focusing on LIFESTYLE changes only. "
+    "Do NOT recommend medications. Do NOT override doctor's orders. "
+    "Suggest diet, exercise, and sleep improvements based on the diagnosis. "
+    "Keep it encouraging and actionable."
+)
+
+
+LIFESTYLE_PROMPT_TEMPLATE = (
+    "Patient Context: {patient_context}\n"
+    "Diagnostic Report: {diagnostic_report}\n\n"
+    "Please provide lifestyle and diet suggestions."
+)
+
+
+def lifestyle_advice_prompt(diagnostic_report_text: str, patient_context: str) -> str:
+    """Build the user prompt for lifestyle advice within the prompt budget.
+
+    Long reports are trimmed in the middle; the patient context is kept.
+    """
+    fitted = fit_sections(
+        [
+            PromptSection("patient_context", patient_context, priority=0),
+            PromptSection("diagnostic_report", diagnostic_report_text, priority=1),
+        ],
+        reserved=LIFESTYLE_SYSTEM_PROMPT + LIFESTYLE_PROMPT_TEMPLATE,
+    )
+    return LIFESTYLE_PROMPT_TEMPLATE.format(
+        patient_context=fitted["patient_context"],
+        diagnostic_report=fitted["diagnostic_report"],
+    )
+
+
+def response_prompt(user_query: str, context: str, system_prompt: str) -> str:
+    """Build a query prompt, trimming the context to the prompt budget."""
+    if not context:
+        return user_query
+    fitted = fit_sections(
+        [
+            PromptSection("user_query", user_query, priority=0),
+            PromptSection("context", context, priority=1),
+        ],
+        reserved=system_prompt,
+    )
+    return f"{fitted['context']}\n\n{fitted['user_query']}"
+
+
 # =============================================================================
 # GOOGLE GEMINI CLIENT (Default - Free Tier Available)
 # Free tier: 15 requests/minute, 1M tokens/month
@@ -56,6 +134,7 @@ class GeminiClient:
             settings, "GEMINI_MODEL", "models/gemini-2.5-flash"
         )
         self._api_key: Optional[str] = getattr(settings, "GEMINI_API_KEY", None)
+        self._timeout = float(getattr(settings, "AI_REQUEST_TIMEOUT_SECONDS", 45.0))
 
     @property
     def model(self) -> Any:
@@ -94,10 +173,16 @@ class GeminiClient:
         """Check if client is properly configured."""
         return bool(self._api_key)
 
+    @cached_ai_call
+    @coalesced_ai_call
+    @throttled_ai_call
+    @metered_ai_call
+    @traced_ai_call
     def generate_content(
         self, prompt: str, system_instruction: str = "", temperature: float = 0.7
     ) -> str:
         """Generate content using Gemini."""
+        timeout = bounded_timeout(self._timeout)
         try:
             full_prompt = (
                 f"{system_instruction}\n\n{prompt}" if system_instruction else prompt
@@ -108,12 +193,41 @@ class GeminiClient:
                     "temperature": temperature,
                     "max_output_tokens": 1000,
                 },
+                request_options={"timeout": timeout},
             )
             return response.text.strip() if response.text else ""
         except Exception as e:
             logger.error(f"Gemini API call failed: {e}")
             raise AIServiceUnavailableError(f"AI service error: {e}") from None
 
+    @cached_ai_stream
+    @throttled_ai_call
+    @metered_ai_stream
+    @traced_ai_stream
+    def stream_content(
+        self, prompt: str, system_instruction: str = "", temperature: float = 0.7
+    ) -> Iterator[str]:
+        """Stream generated text chunks from Gemini as they arrive."""
+        try:
+            full_prompt = (
+                f"{system_instruction}\n\n{prompt}" if system_instruction else prompt
+            )
+            response = self.model.generate_content(
+                full_prompt,
+                generation_config={
+                    "temperature": temperature,
+                    "max_output_tokens": 1000,
+                },
+                request_options={"timeout": self._timeout},
+                stream=True,
+            )
+            for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+        except Exception as e:
+            logger.error(f"Gemini streaming call failed: {e}")
+            raise AIServiceUnavailableError(f"AI service error: {e}") from None
+
     def analyze_text(
         self, text: str, system_prompt: str, temperature: float = 0.3
     ) -> str:
@@ -126,18 +240,17 @@ class GeminiClient:
         patient_context: str = "",
     ) -> str:
         """Generate lifestyle advice based on diagnostic report."""
-        system_prompt = (
-            "You are a helpful medical assistant focusing on LIFESTYLE changes only. "
-            "Do NOT recommend medications. Do NOT override doctor's orders. "
-            "Suggest diet, exercise, and sleep improvements based on the diagnosis. "
-            "Keep it encouraging and actionable."
-        )
-        prompt = (
-            f"Patient Context: {patient_context}\n"
-            f"Diagnostic Report: {diagnostic_report_text}\n\n"
-            "Please provide lifestyle and diet suggestions."
-        )
-        return self.generate_content(prompt, system_prompt)
+        prompt = lifestyle_advice_prompt(diagnostic_report_text, patient_context)
+        return self.generate_content(prompt, LIFESTYLE_SYSTEM_PROMPT)
+
+    def stream_lifestyle_advice(
+        self,
+        diagnostic_report_text: str,
+        patient_context: str = "",
+    ) -> Iterator[str]:
+        """Stream lifestyle advice based on diagnostic report."""
+        prompt = lifestyle_advice_prompt(diagnostic_report_text, patient_context)
+        return self.stream_content(prompt, LIFESTYLE_SYSTEM_PROMPT)
 
     def generate_response(
         self,
@@ -146,9 +259,19 @@ class GeminiClient:
         system_prompt: str = "You are a helpful medical assistant.",
     ) -> str:
         """Generate response to user query."""
-        full_query = f"{context}\n\n{user_query}" if context else user_query
+        full_query = response_prompt(user_query, context, system_prompt)
         return self.generate_content(full_query, system_prompt)
 
+    def stream_response(
+        self,
+        user_query: str,
+        context: str = "",
+        system_prompt: str = "You are a helpful medical assistant.",
+    ) -> Iterator[str]:
+        """Stream response to user query."""
+        full_query = response_prompt(user_query, context, system_prompt)
+        return self.stream_content(full_query, system_prompt)
+
 
 # =============================================================================
 # OPENAI CLIENT (Alternative - Requires Paid Credits)
@@ -163,6 +286,7 @@ class OpenAIClient:
         self._client: Any = None
         self._model_name: str = getattr(settings, "OPENAI_MODEL", "gpt-3.5-turbo")
         self._api_key: Optional[str] = getattr(settings, "OPENAI_API_KEY", None)
+        self._timeout = float(getattr(settings, "AI_REQUEST_TIMEOUT_SECONDS", 45.0))
 
     @property
     def client(self) -> Any:
@@ -200,10 +324,16 @@ class OpenAIClient:
         """Check if client is properly configured."""
         return bool(self._api_key)
 
+    @cached_ai_call
+    @coalesced_ai_call
+    @throttled_ai_call
+    @metered_ai_call
+    @traced_ai_call
     def generate_content(
         self, prompt: str, system_instruction: str = "", temperature: float = 0.7
     ) -> str:
         """Generate content using OpenAI."""
+        timeout = bounded_timeout(self._timeout)
         try:
             messages = []
             if system_instruction:
@@ -215,6 +345,7 @@ class OpenAIClient:
                 messages=messages,
                 temperature=temperature,
                 max_tokens=1000,
+                timeout=timeout,
             )
             content = response.choices[0].message.content
             return content.strip() if content else ""
@@ -222,6 +353,35 @@ class OpenAIClient:
             logger.error(f"OpenAI API call failed: {e}")
             raise AIServiceUnavailableError(f"AI service error: {e}") from None
 
+    @cached_ai_stream
+    @throttled_ai_call
+    @metered_ai_stream
+    @traced_ai_stream
+    def stream_content(
+        self, prompt: str, system_instruction: str = "", temperature: float = 0.7
+    ) -> Iterator[str]:
+        """Stream generated text chunks from OpenAI as they arrive."""
+        try:
+            messages = []
+            if system_instruction:
+                messages.append({"role": "system", "content": system_instruction})
+            messages.append({"role": "user", "content": prompt})
+
+            response = self.client.chat.completions.create(
+                model=self._model_name,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=1000,
+                timeout=self._timeout,
+                stream=True,
+            )
+            for event in response:
+                if event.choices and event.choices[0].delta.content:
+                    yield event.choices[0].delta.content
+        except Exception as e:
+            logger.error(f"OpenAI streaming call failed: {e}")
+            raise AIServiceUnavailableError(f"AI service error: {e}") from None
+
     def analyze_text(
         self, text: str, system_prompt: str, temperature: float = 0.3
     ) -> str:
@@ -235,27 +395,36 @@ class OpenAIClient:
         system_prompt: str = "You are a helpful medical assistant.",
     ) -> str:
         """Generate response to user query."""
-        full_query = f"{context}\n\n{user_query}" if context else user_query
+        full_query = response_prompt(user_query, context, system_prompt)
         return self.generate_content(full_query, system_prompt)
 
+    def stream_response(
+        self,
+        user_query: str,
+        context: str = "",
+        system_prompt: str = "You are a helpful medical assistant.",
+    ) -> Iterator[str]:
+        """Stream response to user query."""
+        full_query = response_prompt(user_query, context, system_prompt)
+        return self.stream_content(full_query, system_prompt)
+
     def generate_lifestyle_advice(
         self,
         diagnostic_report_text: str,
         patient_context: str = "",
     ) -> str:
         """Generate lifestyle advice based on diagnostic report."""
-        system_prompt = (
-            "You are a helpful medical assistant focusing on LIFESTYLE changes only. "
-            "Do NOT recommend medications. Do NOT override doctor's orders. "
-            "Suggest diet, exercise, and sleep improvements based on the diagnosis. "
-            "Keep it encouraging and actionable."
-        )
-        prompt = (
-            f"Patient Context: {patient_context}\n"
-            f"Diagnostic Report: {diagnostic_report_text}\n\n"
-            "Please provide lifestyle and diet suggestions."
-        )
-        return self.generate_content(prompt, system_prompt)
+        prompt = lifestyle_advice_prompt(diagnostic_report_text, patient_context)
+        return self.generate_content(prompt, LIFESTYLE_SYSTEM_PROMPT)
+
+    def stream_lifestyle_advice(
+        self,
+        diagnostic_report_text: str,
+        patient_context: str = "",
+    ) -> Iterator[str]:
+        """Stream lifestyle advice based on diagnostic report."""
+        prompt = lifestyle_advice_prompt(diagnostic_report_text, patient_context)
+        return self.stream_content(prompt, LIFESTYLE_SYSTEM_PROMPT)
 
 
 # =============================================================================
@@ -273,6 +442,7 @@ class AzureClient:
         self._deployment_name: str = getattr(
             settings, "AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o-mini"
         )
+        self._timeout = float(getattr(settings, "AI_REQUEST_TIMEOUT_SECONDS", 45.0))
         # Optional API version if needed specially, but default usually works with latest SDK
         self._api_version: Optional[str] = getattr(
             settings, "AZURE_OPENAI_API_VERSION", None
@@ -340,10 +510,16 @@ class AzureClient:
         """Check if client is properly configured."""
         return bool(self._api_key and self._endpoint)
 
+    @cached_ai_call
+    @coalesced_ai_call
+    @throttled_ai_call
+    @metered_ai_call
+    @traced_ai_call
     def generate_content(
         self, prompt: str, system_instruction: str = "", temperature: float = 0.7
     ) -> str:
         """Generate content using Azure OpenAI."""
+        timeout = bounded_timeout(self._timeout)
         try:
             messages = []
             if system_instruction:
@@ -355,6 +531,7 @@ class AzureClient:
                 messages=messages,
                 temperature=temperature,
                 max_tokens=1000,
+                timeout=timeout,
             )
             content = response.choices[0].message.content
             return content.strip() if content else ""
@@ -362,6 +539,35 @@ class AzureClient:
             logger.error(f"Azure OpenAI API call failed: {e}")
             raise AIServiceUnavailableError(f"AI service error: {e}") from None
 
+    @cached_ai_stream
+    @throttled_ai_call
+    @metered_ai_stream
+    @traced_ai_stream
+    def stream_content(
+        self, prompt: str, system_instruction: str = "", temperature: float = 0.7
+    ) -> Iterator[str]:
+        """Stream generated text chunks from Azure OpenAI as they arrive."""
+        try:
+            messages = []
+            if system_instruction:
+                messages.append({"role": "system", "content": system_instruction})
+            messages.append({"role": "user", "content": prompt})
+
+            response = self.client.chat.completions.create(
+                model=self._deployment_name,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=1000,
+                timeout=self._timeout,
+                stream=True,
+            )
+            for event in response:
+                if event.choices and event.choices[0].delta.content:
+                    yield event.choices[0].delta.content
+        except Exception as e:
+            logger.error(f"Azure OpenAI streaming call failed: {e}")
+            raise AIServiceUnavailableError(f"AI service error: {e}") from None
+
     def analyze_text(
         self, text: str, system_prompt: str, temperature: float = 0.3
     ) -> str:
@@ -375,40 +581,238 @@ class AzureClient:
         system_prompt: str = "You are a helpful medical assistant.",
     ) -> str:
         """Generate response to user query."""
-        full_query = f"{context}\n\n{user_query}" if context else user_query
+        full_query = response_prompt(user_query, context, system_prompt)
         return self.generate_content(full_query, system_prompt)
 
+    def stream_response(
+        self,
+        user_query: str,
+        context: str = "",
+        system_prompt: str = "You are a helpful medical assistant.",
+    ) -> Iterator[str]:
+        """Stream response to user query."""
+        full_query = response_prompt(user_query, context, system_prompt)
+        return self.stream_content(full_query, system_prompt)
+
     def generate_lifestyle_advice(
         self,
         diagnostic_report_text: str,
         patient_context: str = "",
     ) -> str:
         """Generate lifestyle advice based on diagnostic report."""
-        system_prompt = (
-            "You are a helpful medical assistant focusing on LIFESTYLE changes only. "
-            "Do NOT recommend medications. Do NOT override doctor's orders. "
-            "Suggest diet, exercise, and sleep improvements based on the diagnosis. "
-            "Keep it encouraging and actionable."
+        prompt = lifestyle_advice_prompt(diagnostic_report_text, patient_context)
+        return self.generate_content(prompt, LIFESTYLE_SYSTEM_PROMPT)
+
+    def stream_lifestyle_advice(
+        self,
+        diagnostic_report_text: str,
+        patient_context: str = "",
+    ) -> Iterator[str]:
+        """Stream lifestyle advice based on diagnostic report."""
+        prompt = lifestyle_advice_prompt(diagnostic_report_text, patient_context)
+        return self.stream_content(prompt, LIFESTYLE_SYSTEM_PROMPT)
+
+
+# =============================================================================
+# LOCAL STAND-IN CLIENT (Benchmarks and load tests - no network)
+# =============================================================================
+
+LOCAL_RESPONSE_SENTENCES = (
+    "Review the findings with the treating clinician before acting on them.",
+    "Encourage a balanced diet rich in vegetables, whole grains and lean protein.",
+    "Aim for at least 150 minutes of moderate activity each week.",
+    "Keep a regular sleep schedule of seven to nine hours per night.",
+    "Monitor for side effects and report anything unusual promptly.",
+    "Check for interactions with current prescriptions and supplements.",
+    "Follow the prescribed dosage and do not stop treatment abruptly.",
+    "Limit alcohol and avoid smoking to support recovery.",
+    "Staff communication and waiting times are recurring themes.",
+    "Schedule a follow-up visit to reassess progress.",
+)
+
+
+class LocalAIClient:
+    """Deterministic in-process provider for offline benchmarks and load tests.
+
+    Output is templated from a hash of the prompt, so identical requests get
+    identical answers. Latency, errors and rate-limit responses are drawn
+    from ``AI_LOCAL_*`` settings with a seeded generator.
+    """
+
+    # Share of the latency spent before the first streamed chunk
+    FIRST_CHUNK_SHARE = 0.3
+
+    def __init__(self) -> None:
+        self._model_name: str = getattr(settings, "AI_LOCAL_MODEL", "local-stub")
+        self._timeout = float(getattr(settings, "AI_REQUEST_TIMEOUT_SECONDS", 45.0))
+        self._distribution: str = getattr(
+            settings, "AI_LOCAL_LATENCY_DISTRIBUTION", "lognormal"
         )
-        prompt = (
-            f"Patient Context: {patient_context}\n"
-            f"Diagnostic Report: {diagnostic_report_text}\n\n"
-            "Please provide lifestyle and diet suggestions."
+        self._median = float(getattr(settings, "AI_LOCAL_LATENCY_MEDIAN_SECONDS", 0.8))
+        self._sigma = float(getattr(settings, "AI_LOCAL_LATENCY_SIGMA", 0.5))
+        self._error_rate = float(getattr(settings, "AI_LOCAL_ERROR_RATE", 0.0))
+        self._rate_limit_rate = float(
+            getattr(settings, "AI_LOCAL_RATE_LIMIT_RATE", 0.0)
         )
-        return self.generate_content(prompt, system_prompt)
+        self._words = int(getattr(settings, "AI_LOCAL_RESPONSE_WORDS", 120))
+        self._random = random.Random(getattr(settings, "AI_LOCAL_SEED", 0))
+        self._lock = threading.Lock()
+
+    @property
+    def model_name(self) -> str:
+        """Get configured model name."""
+        return self._model_name
+
+    def is_configured(self) -> bool:
+        """Always configured; no credentials needed."""
+        return True
+
+    def sample_latency(self) -> float:
+        """Draw one call latency in seconds from the configured distribution."""
+        with self._lock:
+            if self._distribution == "fixed":
+                return self._median
+            if self._distribution == "uniform":
+                return self._random.uniform(0, 2 * self._median)
+            return self._median * math.exp(self._sigma * self._random.gauss(0, 1))
+
+    def _outcome(self) -> str | None:
+        """Pick an injected failure for this call, if any."""
+        with self._lock:
+            roll = self._random.random()
+        if roll < self._rate_limit_rate:
+            return "429 Resource has been exhausted (e.g. check quota)."
+        if roll < self._rate_limit_rate + self._error_rate:
+            return "503 The model is overloaded. Please try again later."
+        return None
+
+    def render(self, prompt: str, system_instruction: str = "") -> str:
+        """Return the deterministic answer for a prompt."""
+        digest = hashlib.sha256(f"{system_instruction}\n{prompt}".encode()).digest()
+        words: list[str] = []
+        index = 0
+        while len(words) < self._words:
+            sentence = LOCAL_RESPONSE_SENTENCES[
+                digest[index % len(digest)] % len(LOCAL_RESPONSE_SENTENCES)
+            ]
+            words.extend(sentence.split())
+            index += 1
+        topic = prompt.strip().splitlines()[0][:80] if prompt.strip() else "request"
+        return f"Summary for: {topic}\n\n" + " ".join(words[: self._words])
+
+    def _wait(self, seconds: float, timeout: float) -> None:
+        time.sleep(min(seconds, timeout))
+        if seconds > timeout:
+            raise AIServiceUnavailableError(
+                f"AI service error: Request timed out after {timeout:.1f}s"
+            )
+
+    @cached_ai_call
+    @coalesced_ai_call
+    @throttled_ai_call
+    @metered_ai_call
+    @traced_ai_call
+    def generate_content(
+        self, prompt: str, system_instruction: str = "", temperature: float = 0.7
+    ) -> str:
+        """Generate templated content after a sampled delay."""
+        timeout = bounded_timeout(self._timeout)
+        latency = self.sample_latency()
+        failure = self._outcome()
+        self._wait(latency, timeout)
+        if failure:
+            logger.error(f"Local AI call failed: {failure}")
+            raise AIServiceUnavailableError(f"AI service error: {failure}")
+        return self.render(prompt, system_instruction)
+
+    @cached_ai_stream
+    @throttled_ai_call
+    @metered_ai_stream
+    @traced_ai_stream
+    def stream_content(
+        self, prompt: str, system_instruction: str = "", temperature: float = 0.7
+    ) -> Iterator[str]:
+        """Stream templated content, spreading the sampled delay over chunks."""
+        latency = self.sample_latency()
+        failure = self._outcome()
+        self._wait(latency * self.FIRST_CHUNK_SHARE, self._timeout)
+        if failure:
+            logger.error(f"Local AI streaming call failed: {failure}")
+            raise AIServiceUnavailableError(f"AI service error: {failure}")
+        words = self.render(prompt, system_instruction).split(" ")
+        chunks = [" ".join(words[i : i + 8]) + " " for i in range(0, len(words), 8)]
+        pause = latency * (1 - self.FIRST_CHUNK_SHARE) / max(1, len(chunks) - 1)
+        for i, chunk in enumerate(chunks):
+            if i:
+                time.sleep(pause)
+            yield chunk if i < len(chunks) - 1 else chunk.rstrip()
+
+    def analyze_text(
+        self, text: str, system_prompt: str, temperature: float = 0.3
+    ) -> str:
+        """Analyze text with system instruction."""
+        return self.generate_content(text, system_prompt, temperature)
+
+    def generate_response(
+        self,
+        user_query: str,
+        context: str = "",
+        system_prompt: str = "You are a helpful medical assistant.",
+    ) -> str:
+        """Generate response to user query."""
+        full_query = response_prompt(user_query, context, system_prompt)
+        return self.generate_content(full_query, system_prompt)
+
+    def stream_response(
+        self,
+        user_query: str,
+        context: str = "",
+        system_prompt: str = "You are a helpful medical assistant.",
+    ) -> Iterator[str]:
+        """Stream response to user query."""
+        full_query = response_prompt(user_query, context, system_prompt)
+        return self.stream_content(full_query, system_prompt)
+
+    def generate_lifestyle_advice(
+        self,
+        diagnostic_report_text: str,
+        patient_context: str = "",
+    ) -> str:
+        """Generate lifestyle advice based on diagnostic report."""
+        prompt = lifestyle_advice_prompt(diagnostic_report_text, patient_context)
+        return self.generate_content(prompt, LIFESTYLE_SYSTEM_PROMPT)
+
+    def stream_lifestyle_advice(
+        self,
+        diagnostic_report_text: str,
+        patient_context: str = "",
+    ) -> Iterator[str]:
+        """Stream lifestyle advice based on diagnostic report."""
+        prompt = lifestyle_advice_prompt(diagnostic_report_text, patient_context)
+        return self.stream_content(prompt, LIFESTYLE_SYSTEM_PROMPT)
 
 
 # =============================================================================
 # PROVIDER SELECTION - Change this line to switch providers
 # =============================================================================
 
-# ACTIVE PROVIDER: Azure OpenAI (Enterprise)
+# ACTIVE PROVIDER: Azure OpenAI (Enterprise), used when AI_PROVIDERS is empty
 AIClient = AzureClient
 
 # ALTERNATIVES:
 # AIClient = GeminiClient  # Free Tier
 # AIClient = OpenAIClient  # Standard OpenAI
 
+AIProvider = GeminiClient | OpenAIClient | AzureClient | LocalAIClient
+
+# Names accepted in AI_PROVIDERS
+PROVIDERS: dict[str, type[AIProvider]] = {
+    "AzureClient": AzureClient,
+    "GeminiClient": GeminiClient,
+    "OpenAIClient": OpenAIClient,
+    "LocalAIClient": LocalAIClient,
+}
+
 
 # =============================================================================
 # SINGLETON GETTER
@@ -416,6 +820,21 @@ AIClient = AzureClient
 
 
 @lru_cache(maxsize=1)
-def get_ai_client() -> GeminiClient | OpenAIClient | AzureClient:
-    """Get singleton AI client instance."""
-    return AIClient()
+def get_ai_client() -> "AIProvider | FailoverAIClient":
+    """Get singleton AI client instance.
+
+    A single provider is returned as-is; several are wrapped in a
+    ``FailoverAIClient`` in ``AI_PROVIDERS`` order.
+    """
+    names = [name for name in settings.AI_PROVIDERS if name]
+    if not names:
+        return AIClient()
+    unknown = sorted(set(names) - set(PROVIDERS))
+    if unknown:
+        raise AIConfigurationError(f"Unknown AI_PROVIDERS entries: {unknown}")
+    if len(names) == 1:
+        return PROVIDERS[names[0]]()
+
+    from .ai_failover import FailoverAIClient
+
+    return FailoverAIClient([PROVIDERS[name]() for name in names])
@@ -0,0 +1,341 @@
+"""Provider failover, hedged requests and circuit breaking for AI calls.
+
+``FailoverAIClient`` wraps the configured providers (``AI_PROVIDERS``, in
+priority order) behind the same interface as a single client:
+
+- Each provider has its own ``pybreaker`` circuit breaker; while it is open
+  calls skip straight to the next provider.
+- ``generate_content`` hedges: if the primary has not answered within its
+  observed p95 latency, the same request is sent to the next provider and
+  the first successful answer wins. The slower call is left to finish in the
+  background (its result is discarded) so latency samples stay honest.
+  Only real provider round trips are sampled: cache hits and coalesced
+  waits would pull the p95 down and hedge every miss.
+- Rate-limit rejections and spent request deadlines never reached the
+  provider and do not count as breaker failures.
+- ``stream_content`` fails over only until the first chunk arrives; once
+  text has been sent to the client the stream cannot switch providers.
+
+Which provider served each call is exported as
+``healthcore_ai_served_total{provider,path}`` and exposed through
+``model_name`` in the calling context until the next call.
+"""
+
+import contextvars
+import functools
+import itertools
+import logging
+import math
+import threading
+from collections import deque
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TypeVar
+
+from django.conf import settings
+from prometheus_client import Counter, Gauge
+from pybreaker import CircuitBreaker, CircuitBreakerError
+
+from .ai_budget import round_trips
+from .ai_client import (
+    LIFESTYLE_SYSTEM_PROMPT,
+    AIConfigurationError,
+    AIProvider,
+    AIRateLimitExceededError,
+    AIServiceUnavailableError,
+    lifestyle_advice_prompt,
+    response_prompt,
+)
+from .deadline import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+AI_PROVIDER_CALLS = Counter(
+    "healthcore_ai_provider_calls_total",
+    "AI provider calls made by the failover client, by result.",
+    ["provider", "result"],
+)
+AI_SERVED = Counter(
+    "healthcore_ai_served_total",
+    "AI calls by the provider that answered (path: primary, failover, hedge).",
+    ["provider", "path"],
+)
+AI_HEDGES = Counter(
+    "healthcore_ai_hedged_requests_total",
+    "Hedged AI requests sent because the primary exceeded its p95 latency.",
+    ["provider"],
+)
+AI_CIRCUIT_OPEN = Gauge(
+    "healthcore_ai_circuit_open",
+    "1 while the provider's circuit breaker is open.",
+    ["provider"],
+)
+
+_served_by: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "ai_served_by", default=None
+)
+
+
+class LatencyWindow:
+    """Rolling window of successful round-trip latencies for one provider."""
+
+    def __init__(self, size: int = 200) -> None:
+        self._samples: deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def quantile(self, q: float) -> float | None:
+        """Return the ``q`` quantile (nearest rank), or None without samples."""
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return None
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+class _Provider:
+    """A provider client with its breaker and latency history."""
+
+    def __init__(self, client: AIProvider) -> None:
+        self.client = client
+        self.name = type(client).__name__
+        self.latency = LatencyWindow()
+        self.breaker = CircuitBreaker(
+            fail_max=settings.AI_BREAKER_FAIL_MAX,
+            reset_timeout=settings.AI_BREAKER_RESET_SECONDS,
+            exclude=[AIRateLimitExceededError, DeadlineExceeded],
+            name=self.name,
+        )
+        AI_CIRCUIT_OPEN.labels(self.name).set_function(
+            lambda: float(self.breaker.current_state == "open")
+        )
+
+    def call(self, func: Callable[[], T]) -> T:
+        """Run ``func`` through the breaker, recording result and latency."""
+        with round_trips() as samples:
+            try:
+                result = self.breaker.call(func)
+            except CircuitBreakerError:
+                AI_PROVIDER_CALLS.labels(self.name, "short_circuited").inc()
+                raise AIServiceUnavailableError(
+                    f"{self.name} circuit is open; provider skipped"
+                ) from None
+            except Exception:
+                AI_PROVIDER_CALLS.labels(self.name, "error").inc()
+                raise
+        for seconds in samples:
+            self.latency.observe(seconds)
+        AI_PROVIDER_CALLS.labels(self.name, "success").inc()
+        return result
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for this provider before hedging (its p95)."""
+        p95 = self.latency.quantile(0.95)
+        if p95 is None or len(self.latency) < settings.AI_HEDGE_MIN_SAMPLES:
+            return float(settings.AI_HEDGE_DEFAULT_DELAY_SECONDS)
+        return max(float(settings.AI_HEDGE_MIN_DELAY_SECONDS), p95)
+
+
+class FailoverAIClient:
+    """Composite AI client: circuit-broken failover with hedged requests."""
+
+    def __init__(self, clients: Sequence[AIProvider]) -> None:
+        if not clients:
+            raise ValueError("FailoverAIClient needs at least one provider")
+        self._providers = [_Provider(client) for client in clients]
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def providers(self) -> list[AIProvider]:
+        return [provider.client for provider in self._providers]
+
+    @property
+    def model_name(self) -> str:
+        """Model that served the last call in this context, else the primary's."""
+        served = _served_by.get()
+        if served is not None:
+            return served
+        candidates = self._candidates() or self._providers
+        return str(candidates[0].client.model_name)
+
+    def is_configured(self) -> bool:
+        """True if any provider is configured."""
+        return bool(self._candidates())
+
+    def _candidates(self) -> list[_Provider]:
+        return [p for p in self._providers if p.client.is_configured()]
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.AI_HEDGE_MAX_WORKERS,
+                    thread_name_prefix="ai-hedge",
+                )
+            return self._executor
+
+    def _served(self, provider: _Provider, path: str) -> None:
+        AI_SERVED.labels(provider.name, path).inc()
+        _served_by.set(str(provider.client.model_name))
+
+    def generate_content(
+        self, prompt: str, system_instruction: str = "", temperature: float = 0.7
+    ) -> str:
+        """Generate content, failing over and hedging across providers."""
+        _served_by.set(None)
+        candidates = self._candidates()
+        if not candidates:
+            raise AIConfigurationError("No AI provider is configured.")
+
+        def request(provider: _Provider) -> Callable[[], str]:
+            return lambda: provider.call(
+                lambda: provider.client.generate_content(
+                    prompt, system_instruction, temperature
+                )
+            )
+
+        if len(candidates) == 1 or not settings.AI_HEDGE_ENABLED:
+            return self._sequential(candidates, request)
+        return self._hedged(candidates, request)
+
+    def _sequential(
+        self,
+        candidates: list[_Provider],
+        request: Callable[[_Provider], Callable[[], str]],
+    ) -> str:
+        error: Exception | None = None
+        for index, provider in enumerate(candidates):
+            try:
+                value = request(provider)()
+            except Exception as e:
+                logger.warning(f"AI provider {provider.name} failed: {e}")
+                error = e
+                continue
+            self._served(provider, "primary" if index == 0 else "failover")
+            return value
+        raise self._exhausted(error)
+
+    def _hedged(
+        self,
+        candidates: list[_Provider],
+        request: Callable[[_Provider], Callable[[], str]],
+    ) -> str:
+        pool = self._pool()
+        remaining = iter(candidates)
+        running: dict[Future[str], tuple[_Provider, str]] = {}
+
+        def launch(path: str) -> bool:
+            provider = next(remaining, None)
+            if provider is None:
+                return False
+            # Each call runs in a copy of this context (deadline, use case)
+            context = contextvars.copy_context()
+            future = pool.submit(context.run, request(provider))
+            running[future] = (provider, path)
+            return True
+
+        primary = candidates[0]
+        launch("primary")
+        done, _ = wait(running, timeout=primary.hedge_delay())
+        if not done and launch("hedge"):
+            AI_HEDGES.labels(primary.name).inc()
+
+        error: Exception | None = None
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                provider, path = running.pop(future)
+                try:
+                    value = future.result()
+                except Exception as e:
+                    logger.warning(f"AI provider {provider.name} failed: {e}")
+                    error = e
+                    continue
+                self._served(provider, path)
+                return value
+            if not running:
+                launch("failover")
+        raise self._exhausted(error)
+
+    @staticmethod
+    def _exhausted(error: Exception | None) -> AIServiceUnavailableError:
+        if isinstance(error, AIServiceUnavailableError):
+            return error
+        return AIServiceUnavailableError(f"All AI providers failed: {error}")
+
+    def stream_content(
+        self, prompt: str, system_instruction: str = "", temperature: float = 0.7
+    ) -> Iterator[str]:
+        """Stream from the first provider that produces a chunk."""
+        _served_by.set(None)
+        error: Exception | None = None
+        for index, provider in enumerate(self._candidates()):
+            chunks = provider.client.stream_content(
+                prompt, system_instruction, temperature
+            )
+            try:
+                first = provider.call(functools.partial(next, chunks, None))
+            except Exception as e:
+                logger.warning(f"AI provider {provider.name} failed: {e}")
+                error = e
+                continue
+            self._served(provider, "primary" if index == 0 else "failover")
+            if first is None:
+                return iter(())
+            return itertools.chain([first], chunks)
+        if error is None:
+            raise AIConfigurationError("No AI provider is configured.")
+        raise self._exhausted(error)
+
+    def analyze_text(
+        self, text: str, system_prompt: str, temperature: float = 0.3
+    ) -> str:
+        """Analyze text with system instruction."""
+        return self.generate_content(text, system_prompt, temperature)
+
+    def generate_response(
+        self,
+        user_query: str,
+        context: str = "",
+        system_prompt: str = "You are a helpful medical assistant.",
+    ) -> str:
+        """Generate response to user query."""
+        full_query = response_prompt(user_query, context, system_prompt)
+        return self.generate_content(full_query, system_prompt)
+
+    def stream_response(
+        self,
+        user_query: str,
+        context: str = "",
+        system_prompt: str = "You are a helpful medical assistant.",
+    ) -> Iterator[str]:
+        """Stream response to user query."""
+        full_query = response_prompt(user_query, context, system_prompt)
+        return self.stream_content(full_query, system_prompt)
+
+    def generate_lifestyle_advice(
+        self,
+        diagnostic_report_text: str,
+        patient_context: str = "",
+    ) -> str:
+        """Generate lifestyle advice based on diagnostic report."""
+        prompt = lifestyle_advice_prompt(diagnostic_report_text, patient_context)
+        return self.generate_content(prompt, LIFESTYLE_SYSTEM_PROMPT)
+
+    def stream_lifestyle_advice(
+        self,
+        diagnostic_report_text: str,
+        patient_context: str = "",
+    ) -> Iterator[str]:
+        """Stream lifestyle advice based on diagnostic report."""
+        prompt = lifestyle_advice_prompt(diagnostic_report_text, patient_context)
+        return self.stream_content(prompt, LIFESTYLE_SYSTEM_PROMPT)
@@ -0,0 +1,138 @@
+"""Asynchronous AI jobs.
+
+AI endpoints answer ``Prefer: respond-async`` (or ``?async=true``) requests
+with 202 and a job id instead of holding a Gunicorn thread for the whole
+provider round trip. The job record (kind, owner, parameters, status and
+result) lives in the Django cache; only the job id goes through the broker.
+``run_ai_job`` executes the handler registered in ``AI_JOB_HANDLERS`` on the
+``AI_JOB_QUEUE`` queue, and clients poll (optionally long-poll) the status
+endpoint until the job is ``succeeded`` or ``failed``.
+"""
+
+import logging
+import time
+import uuid
+from collections.abc import Callable
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from . import deadline
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TERMINAL_STATES = (SUCCEEDED, FAILED)
+
+
+class AIJobError(Exception):
+    """Raised by job handlers; the message is shown to the client."""
+
+    pass
+
+
+def _key(job_id: str) -> str:
+    return f"ai:job:{job_id}"
+
+
+def wants_async(request: Request) -> bool:
+    """Return True if the client asked for a 202 + job response."""
+    prefer = request.headers.get("Prefer", "")
+    if "respond-async" in prefer.lower():
+        return True
+    return str(request.query_params.get("async", "")).lower() in ("1", "true")
+
+
+def get_handler(kind: str) -> Callable[[dict[str, Any]], dict[str, Any]]:
+    """Resolve the handler registered for a job kind."""
+    handler: Callable[[dict[str, Any]], dict[str, Any]] = import_string(
+        settings.AI_JOB_HANDLERS[kind]
+    )
+    return handler
+
+
+def get_job(job_id: str) -> dict[str, Any] | None:
+    """Return the stored job record, or None if unknown or expired."""
+    job: dict[str, Any] | None = cache.get(_key(job_id))
+    return job
+
+
+def save_job(job: dict[str, Any]) -> None:
+    """Persist a job record for ``AI_JOB_TTL_SECONDS``."""
+    job["updated_at"] = time.time()
+    cache.set(_key(job["id"]), job, settings.AI_JOB_TTL_SECONDS)
+
+
+def submit_job(kind: str, params: dict[str, Any], owner_id: int | None) -> str:
+    """Store a pending job and enqueue it on the AI queue."""
+    from .tasks import run_ai_job
+
+    if kind not in settings.AI_JOB_HANDLERS:
+        raise ValueError(f"Unknown AI job kind: {kind}")
+    job_id = uuid.uuid4().hex
+    save_job(
+        {
+            "id": job_id,
+            "kind": kind,
+            "owner_id": owner_id,
+            "params": params,
+            "status": PENDING,
+            "created_at": time.time(),
+        }
+    )
+    run_ai_job.apply_async(args=[job_id], queue=settings.AI_JOB_QUEUE)
+    logger.info(f"AI job {job_id} ({kind}) queued")
+    return job_id
+
+
+def accepted_response(request: Request, kind: str, params: dict[str, Any]) -> Response:
+    """Submit a job and build the 202 response pointing at its status URL."""
+    job_id = submit_job(kind, params, getattr(request.user, "id", None))
+    status_url = request.build_absolute_uri(
+        reverse("core:ai-job-status", args=[job_id])
+    )
+    return Response(
+        {"job_id": job_id, "status": PENDING, "status_url": status_url},
+        status=status.HTTP_202_ACCEPTED,
+        headers={"Location": status_url, "Retry-After": "1"},
+    )
+
+
+def wait_for_job(job_id: str, timeout: float) -> dict[str, Any] | None:
+    """Long-poll the job record until it is terminal or ``timeout`` passes.
+
+    The wait never outlives the current request deadline.
+    """
+    left = deadline.remaining()
+    if left is not None:
+        timeout = min(timeout, left - 1.0)
+    end = time.monotonic() + timeout
+    interval = settings.AI_JOB_POLL_INTERVAL_SECONDS
+    job = get_job(job_id)
+    while job is not None and job["status"] not in TERMINAL_STATES:
+        now = time.monotonic()
+        if now >= end:
+            break
+        time.sleep(min(interval, end - now))
+        interval = min(interval * 2, 1.0)
+        job = get_job(job_id)
+    return job
+
+
+def public_view(job: dict[str, Any]) -> dict[str, Any]:
+    """Client-facing fields of a job record (parameters are not echoed)."""
+    view = {"job_id": job["id"], "kind": job["kind"], "status": job["status"]}
+    if job["status"] == SUCCEEDED:
+        view["result"] = job.get("result")
+    elif job["status"] == FAILED:
+        view["error"] = job.get("error")
+    return view
@@ -0,0 +1,329 @@
+"""Provider rate limiting and single-flight coalescing for AI calls.
+
+``throttled_ai_call`` takes a token from a per provider/model token bucket
+before each provider request (``AI_RATE_LIMITS``: requests per minute and
+burst). With the Redis cache backend the bucket is shared by every worker
+through an atomic Lua script; otherwise a process-local bucket is used.
+Callers without a token wait until one is available, for at most
+``AI_RATE_LIMIT_MAX_WAIT_SECONDS`` or the remaining request deadline, and
+then fail with ``AIRateLimitExceededError`` instead of tripping the provider
+limit.
+
+``coalesced_ai_call`` makes concurrent identical requests (same cache key)
+share one provider call: threads in a process wait on an event, and other
+workers wait on a result published through the Django cache by the worker
+holding the ``cache.add`` lock.
+"""
+
+import functools
+import logging
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from typing import Any, NoReturn, TypeVar, cast
+
+from django.conf import settings
+from django.core.cache import cache
+from prometheus_client import Counter, Histogram
+
+from . import deadline
+from .ai_cache import cache_key
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class AIRateLimitedError(Exception):
+    """Raised when no provider token became available in time.
+
+    Re-raised by ``throttled_ai_call`` as ``AIRateLimitExceededError``.
+    """
+
+    pass
+
+
+def _unavailable(message: str) -> Exception:
+    # Imported lazily: ai_client applies the decorators defined here
+    from .ai_client import AIServiceUnavailableError
+
+    return AIServiceUnavailableError(message)
+
+
+def _rate_limited(message: str) -> Exception:
+    from .ai_client import AIRateLimitExceededError
+
+    return AIRateLimitExceededError(message)
+
+
+AI_RATE_LIMIT_WAIT = Histogram(
+    "healthcore_ai_rate_limit_wait_seconds",
+    "Time AI calls queued for a provider rate-limit token.",
+    ["provider"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+AI_RATE_LIMITED = Counter(
+    "healthcore_ai_rate_limited_total",
+    "AI calls rejected because no rate-limit token arrived in time.",
+    ["provider"],
+)
+AI_SINGLE_FLIGHT = Counter(
+    "healthcore_ai_single_flight_total",
+    "AI calls by single-flight role (leader, coalesced, timeout).",
+    ["provider", "result"],
+)
+
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return wait
+"""
+
+
+def limits_for(provider: str, model: str) -> tuple[float, int]:
+    """Return (tokens per second, burst) for a provider/model."""
+    limits: dict[str, dict[str, int]] = settings.AI_RATE_LIMITS
+    entry = (
+        limits.get(f"{provider}:{model}") or limits.get(provider) or limits["default"]
+    )
+    return entry["rpm"] / 60.0, int(entry["burst"])
+
+
+class LocalTokenBucket:
+    """In-process token bucket (used without a Redis cache backend)."""
+
+    def __init__(self) -> None:
+        self._state: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, capacity: int) -> float:
+        """Take a token; return 0, or the seconds until one is available."""
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._state.get(key, (float(capacity), now))
+            tokens = min(capacity, tokens + (now - last) * rate)
+            if tokens >= 1:
+                self._state[key] = (tokens - 1, now)
+                return 0.0
+            self._state[key] = (tokens, now)
+            return (1 - tokens) / rate
+
+
+class RedisTokenBucket:
+    """Token bucket shared by all workers via an atomic Lua script."""
+
+    def __init__(self) -> None:
+        from django_redis import get_redis_connection
+
+        self._script = get_redis_connection("default").register_script(
+            TOKEN_BUCKET_SCRIPT
+        )
+
+    def take(self, key: str, rate: float, capacity: int) -> float:
+        """Take a token; return 0, or the seconds until one is available."""
+        wait_ms = self._script(keys=[f"healthcoreapi:{key}"], args=[rate, capacity])
+        return int(wait_ms) / 1000
+
+
+_bucket: LocalTokenBucket | RedisTokenBucket | None = None
+
+
+def get_bucket() -> LocalTokenBucket | RedisTokenBucket:
+    """Redis bucket when the default cache is Redis, else a local one."""
+    global _bucket
+    if _bucket is None:
+        backend = settings.CACHES["default"]["BACKEND"]
+        _bucket = (
+            RedisTokenBucket()
+            if backend.startswith("django_redis")
+            else LocalTokenBucket()
+        )
+    return _bucket
+
+
+def acquire_token(provider: str, model: str) -> float:
+    """Block until a rate-limit token is available; return the time waited.
+
+    Raises:
+        AIRateLimitedError: If no token arrives within the wait budget.
+    """
+    rate, capacity = limits_for(provider, model)
+    key = f"ai:bucket:{provider}:{model}"
+    budget = float(settings.AI_RATE_LIMIT_MAX_WAIT_SECONDS)
+    left = deadline.remaining()
+    if left is not None:
+        budget = min(budget, left)
+
+    start = time.monotonic()
+    while True:
+        try:
+            wait = get_bucket().take(key, rate, capacity)
+        except Exception as e:
+            # Fail open: a cache outage must not block every AI call
+            logger.warning(f"AI rate limiter unavailable, allowing call: {e}")
+            return 0.0
+        if wait <= 0:
+            return time.monotonic() - start
+        if time.monotonic() - start + wait > budget:
+            raise AIRateLimitedError(
+                f"{provider} rate limit reached; no capacity within {budget:.1f}s"
+            )
+        time.sleep(wait)
+
+
+def throttled_ai_call(func: F) -> F:
+    """Take a provider rate-limit token before calling ``generate_content``."""
+
+    @functools.wraps(func)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        if settings.AI_RATE_LIMIT_ENABLED:
+            provider = type(self).__name__
+            try:
+                waited = acquire_token(provider, str(self.model_name))
+            except AIRateLimitedError as e:
+                AI_RATE_LIMITED.labels(provider).inc()
+                raise _rate_limited(str(e)) from None
+            AI_RATE_LIMIT_WAIT.labels(provider).observe(waited)
+        return func(self, *args, **kwargs)
+
+    return cast(F, wrapper)
+
+
+class _Call:
+    """An in-flight call other threads of this process can wait on."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: str | None = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls within and across processes."""
+
+    def __init__(self) -> None:
+        self._calls: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, func: Callable[[], str], provider: str) -> str:
+        """Run ``func`` once per ``key`` among concurrent callers."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.done.wait(self._wait_budget()):
+                self._timed_out(provider)
+            AI_SINGLE_FLIGHT.labels(provider, "coalesced").inc()
+            if call.error is not None:
+                raise call.error
+            return cast(str, call.value)
+
+        try:
+            call.value = self._shared(key, func, provider)
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _shared(self, key: str, func: Callable[[], str], provider: str) -> str:
+        lock_key = f"ai:flight:{key}"
+        lock_ttl = settings.AI_SINGLE_FLIGHT_LOCK_SECONDS
+        end = time.monotonic() + self._wait_budget()
+        interval = 0.05
+        while True:
+            # Results are published per flight: a waiter never reads the
+            # result (or error) of an earlier flight for the same key
+            flight = uuid.uuid4().hex
+            if cache.add(lock_key, flight, lock_ttl):
+                AI_SINGLE_FLIGHT.labels(provider, "leader").inc()
+                result_key = f"{lock_key}:{flight}"
+                try:
+                    value = func()
+                    cache.set(result_key, {"value": value}, 30)
+                    return value
+                except Exception as e:
+                    cache.set(result_key, {"error": str(e)}, 5)
+                    raise
+                finally:
+                    cache.delete(lock_key)
+
+            # Another worker is calling the provider; wait for its result
+            flight = cache.get(lock_key)
+            if flight is None:
+                continue  # Finished in between; lead a new flight
+            result_key = f"{lock_key}:{flight}"
+            while time.monotonic() < end:
+                time.sleep(interval)
+                interval = min(interval * 2, 0.5)
+                published = cache.get(result_key)
+                if published is not None:
+                    AI_SINGLE_FLIGHT.labels(provider, "coalesced").inc()
+                    if "error" in published:
+                        raise _unavailable(published["error"])
+                    return cast(str, published["value"])
+                if cache.get(lock_key) != flight:
+                    break  # Leader vanished without publishing; take over
+            else:
+                self._timed_out(provider)
+
+    @staticmethod
+    def _wait_budget() -> float:
+        budget = float(settings.AI_SINGLE_FLIGHT_LOCK_SECONDS)
+        left = deadline.remaining()
+        return budget if left is None else max(0.0, min(budget, left))
+
+    @staticmethod
+    def _timed_out(provider: str) -> NoReturn:
+        AI_SINGLE_FLIGHT.labels(provider, "timeout").inc()
+        raise _unavailable("Timed out waiting for an identical in-flight AI request")
+
+
+single_flight = SingleFlight()
+
+
+def coalesced_ai_call(func: F) -> F:
+    """Share one provider call among concurrent identical requests."""
+
+    @functools.wraps(func)
+    def wrapper(
+        self: Any,
+        prompt: str,
+        system_instruction: str = "",
+        temperature: float = 0.7,
+    ) -> str:
+        if not settings.AI_SINGLE_FLIGHT_ENABLED:
+            result: str = func(self, prompt, system_instruction, temperature)
+            return result
+        provider = type(self).__name__
+        key = cache_key(
+            provider, str(self.model_name), system_instruction, prompt, temperature
+        )
+        return single_flight.do(
+            key,
+            lambda: func(self, prompt, system_instruction, temperature),
+            provider,
+        )
+
+    return cast(F, wrapper)
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "src.apps.core"
+
+    def ready(self) -> None:
+        """Install deadline enforcement and tracing once apps are loaded."""
+        from django.db.backends.signals import connection_created
+
+        from .deadline import install_db_deadline
+        from .tracing import configure_tracing
+
+        connection_created.connect(install_db_deadline, weak=False)
+        configure_tracing()
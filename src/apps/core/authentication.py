@@ -0,0 +1,48 @@
+"""JWT authentication with a short-lived per-process user cache.
+
+``JWTAuthentication`` loads the token's user with one query per request.
+Hot read endpoints served from cache (e.g. the equipment QR lookup) would
+spend that query on every scan, so ``CachedJWTAuthentication`` keeps the
+user for ``USER_CACHE_TTL_SECONDS``. A deactivated user keeps access for
+at most that long; with ``CHECK_REVOKE_TOKEN`` every request loads the user.
+"""
+
+import copy
+import time
+from typing import Any
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+
+USER_CACHE_TTL_SECONDS = 30.0
+USER_CACHE_MAX_ENTRIES = 10000
+
+_users: dict[Any, tuple[Any, float]] = {}
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` reusing recently loaded users by token user id."""
+
+    def get_user(self, validated_token: Token) -> Any:
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        now = time.monotonic()
+        cached = _users.get(user_id)
+        if (
+            cached is not None
+            and cached[1] > now
+            and not api_settings.CHECK_REVOKE_TOKEN
+        ):
+            # A copy: views must not share one instance across requests
+            return copy.copy(cached[0])
+
+        user = super().get_user(validated_token)
+        if len(_users) >= USER_CACHE_MAX_ENTRIES:
+            _users.clear()
+        _users[user_id] = (user, now + USER_CACHE_TTL_SECONDS)
+        return user
+
+
+def clear_user_cache() -> None:
+    """Drop all cached users."""
+    _users.clear()
@@ -0,0 +1,250 @@
+"""Adaptive concurrency limiting and priority-aware load shedding.
+
+``AdaptiveConcurrencyLimiter`` caps the number of in-flight requests per
+worker process and adapts the cap with AIMD on observed latency:
+
+- while the limit is actually being used, every sample slower than
+  ``latency_tolerance`` x the recent minimum latency of its own route (or
+  ending in a 5xx) multiplies the limit by ``backoff_ratio``, at most once
+  per observed round trip;
+- otherwise, while the limit is actually being used, it grows by
+  ``1 / limit`` per sample (about +1 per limit's worth of requests).
+
+Requests are classified as critical (clinical writes), normal or low
+(AI/analytics). Each class may only fill its share of the limit, waits in a
+short bounded queue behind higher classes, and is shed with 503 +
+``Retry-After`` once its queue timeout passes.
+"""
+
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from enum import IntEnum
+
+from django.conf import settings
+from prometheus_client import Counter, Gauge, Histogram
+
+
+class Priority(IntEnum):
+    """Admission priority; higher values are admitted first."""
+
+    LOW = 0
+    NORMAL = 1
+    CRITICAL = 2
+
+    @property
+    def label(self) -> str:
+        """Lower-case name used in settings and metric labels."""
+        return self.name.lower()
+
+
+@dataclass(frozen=True)
+class PriorityPolicy:
+    """Admission policy for one priority class."""
+
+    share: float
+    queue_timeout: float
+    retry_after: int
+
+
+CONCURRENCY_LIMIT = Gauge(
+    "healthcore_concurrency_limit", "Current adaptive concurrency limit."
+)
+CONCURRENCY_IN_FLIGHT = Gauge(
+    "healthcore_concurrency_in_flight", "Requests currently holding a slot."
+)
+CONCURRENCY_QUEUED = Gauge(
+    "healthcore_concurrency_queued", "Requests waiting for a slot.", ["priority"]
+)
+CONCURRENCY_SHED = Counter(
+    "healthcore_concurrency_shed_total",
+    "Requests rejected with 503 by the concurrency limiter.",
+    ["priority"],
+)
+CONCURRENCY_QUEUE_WAIT = Histogram(
+    "healthcore_concurrency_queue_wait_seconds",
+    "Time admitted requests spent waiting for a slot.",
+    ["priority"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Thread-safe AIMD concurrency limiter with prioritized admission."""
+
+    def __init__(
+        self,
+        policies: dict[Priority, PriorityPolicy],
+        initial_limit: float = 8,
+        min_limit: int = 2,
+        max_limit: int = 200,
+        backoff_ratio: float = 0.9,
+        latency_tolerance: float = 2.0,
+        latency_floor: float = 0.05,
+        baseline_window: int = 500,
+        max_queue: int = 50,
+    ) -> None:
+        self.policies = policies
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.latency_floor = latency_floor
+        self.baseline_window = baseline_window
+        self.max_queue = max_queue
+
+        self.in_flight = 0
+        self.waiting = dict.fromkeys(Priority, 0)
+        self._cond = threading.Condition()
+        # Per route: routes that are always slow are not congestion
+        self._baselines: dict[str, _Baseline] = {}
+        self._last_decrease = float("-inf")
+
+    def capacity(self, priority: Priority) -> int:
+        """Slots available to ``priority`` under the current limit."""
+        return max(1, int(self.limit * self.policies[priority].share))
+
+    def _can_admit(self, priority: Priority) -> bool:
+        if self.in_flight >= self.capacity(priority):
+            return False
+        return not any(self.waiting[p] for p in Priority if p > priority)
+
+    def acquire(self, priority: Priority) -> bool:
+        """Take a slot, waiting up to the priority's queue timeout.
+
+        Returns False if the request should be shed.
+        """
+        timeout = self.policies[priority].queue_timeout
+        with self._cond:
+            if self._can_admit(priority):
+                self.in_flight += 1
+                return True
+            if timeout <= 0 or sum(self.waiting.values()) >= self.max_queue:
+                return False
+
+            start = time.monotonic()
+            deadline = start + timeout
+            self.waiting[priority] += 1
+            try:
+                while not self._can_admit(priority):
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        return False
+                    self._cond.wait(left)
+                self.in_flight += 1
+            finally:
+                self.waiting[priority] -= 1
+                # Lower classes may have been blocked behind this waiter
+                self._cond.notify_all()
+        CONCURRENCY_QUEUE_WAIT.labels(priority.label).observe(time.monotonic() - start)
+        return True
+
+    def release(
+        self, latency: float | None, dropped: bool = False, route: str = ""
+    ) -> None:
+        """Free a slot and feed the sample into the AIMD controller.
+
+        ``latency`` is compared with the recent minimum of the same ``route``.
+
+        ``latency`` is None for requests whose outcome says nothing about
+        local saturation (e.g. calls dominated by an external AI provider).
+        Those only free their slot: neither their duration nor their errors
+        move the limit.
+        """
+        with self._cond:
+            utilized = self.in_flight * 2 >= self.limit
+            self.in_flight -= 1
+            if latency is not None:
+                self._update(latency, dropped, utilized, route)
+            self._cond.notify_all()
+
+    def _update(
+        self, latency: float, dropped: bool, utilized: bool, route: str
+    ) -> None:
+        baseline = self._baselines.get(route)
+        if baseline is None:
+            baseline = self._baselines[route] = _Baseline(self.baseline_window)
+        threshold = max(
+            baseline.observe(latency) * self.latency_tolerance, self.latency_floor
+        )
+        if not utilized:
+            # An idle worker is not congested, however slow the request
+            return
+
+        if dropped or latency > threshold:
+            # One multiplicative decrease per round trip, not per slow sample
+            now = time.monotonic()
+            if now - self._last_decrease >= latency:
+                self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                self._last_decrease = now
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+
+class _Baseline:
+    """Minimum latency of one route over the current and previous window."""
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self.previous = float("inf")
+        self.current = float("inf")
+        self.count = 0
+
+    def observe(self, latency: float) -> float:
+        """Add a sample; return the minimum latency to compare it with."""
+        self.current = min(self.current, latency)
+        self.count += 1
+        if self.count >= self.window:
+            self.previous, self.current, self.count = self.current, float("inf"), 0
+        return min(self.previous, self.current)
+
+
+def classify(method: str, path: str) -> Priority:
+    """Map a request to its priority using ``CONCURRENCY_PRIORITY_ROUTES``."""
+    for rule in settings.CONCURRENCY_PRIORITY_ROUTES:
+        methods = rule.get("methods")
+        if methods and method not in methods:
+            continue
+        if path.startswith(rule["prefix"]):
+            return Priority[rule["priority"].upper()]
+    return Priority.NORMAL
+
+
+def build_limiter() -> AdaptiveConcurrencyLimiter:
+    """Create a limiter from the ``CONCURRENCY_*`` settings."""
+    policies = {
+        Priority[name.upper()]: PriorityPolicy(
+            share=float(policy["share"]),
+            queue_timeout=policy["queue_timeout_ms"] / 1000,
+            retry_after=int(policy["retry_after"]),
+        )
+        for name, policy in settings.CONCURRENCY_PRIORITIES.items()
+    }
+    return AdaptiveConcurrencyLimiter(
+        policies,
+        initial_limit=settings.CONCURRENCY_LIMIT_INITIAL,
+        min_limit=settings.CONCURRENCY_LIMIT_MIN,
+        max_limit=settings.CONCURRENCY_LIMIT_MAX,
+        backoff_ratio=settings.CONCURRENCY_LIMIT_BACKOFF,
+        latency_tolerance=settings.CONCURRENCY_LATENCY_TOLERANCE,
+        latency_floor=settings.CONCURRENCY_LATENCY_FLOOR_MS / 1000,
+        max_queue=settings.CONCURRENCY_MAX_QUEUE,
+    )
+
+
+def export_metrics(limiter: AdaptiveConcurrencyLimiter) -> None:
+    """Point the scrape-time gauges at ``limiter``."""
+    CONCURRENCY_LIMIT.set_function(lambda: limiter.limit)
+    CONCURRENCY_IN_FLIGHT.set_function(lambda: limiter.in_flight)
+    for priority in Priority:
+        CONCURRENCY_QUEUED.labels(priority.label).set_function(
+            _queued_reader(limiter, priority)
+        )
+
+
+def _queued_reader(
+    limiter: AdaptiveConcurrencyLimiter, priority: Priority
+) -> Callable[[], float]:
+    return lambda: limiter.waiting[priority]
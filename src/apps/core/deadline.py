@@ -0,0 +1,160 @@
+"""Cooperative per-request deadlines.
+
+``TimeoutMiddleware`` gives each request a time budget (from
+``REQUEST_DEADLINE_ROUTES`` or a shorter ``X-Request-Deadline`` header) and
+stores the absolute deadline in a context variable. Outbound calls bound
+their own timeouts by the remaining budget:
+
+- PostgreSQL queries get a session ``statement_timeout`` (``db_deadline_wrapper``)
+- ``AuditGRPCClient`` passes it as the gRPC call timeout
+- AI clients pass it as the HTTP request timeout
+
+Once the budget is spent, further calls raise ``DeadlineExceeded`` instead of
+starting work, and the middleware answers 504 rather than letting Gunicorn
+kill the worker (and every other request on it) at ``--timeout``.
+"""
+
+import contextvars
+import logging
+import time
+from collections.abc import Callable
+from typing import Any
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEADLINE_HEADER = "X-Request-Deadline"
+
+# Absolute ``time.monotonic()`` deadline of the current request, if any
+request_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the current request has no time budget left."""
+
+    pass
+
+
+def budget_for_path(path: str) -> float:
+    """Return the configured budget in seconds for a request path.
+
+    The longest matching prefix in ``REQUEST_DEADLINE_ROUTES`` wins; other
+    paths get ``REQUEST_DEADLINE_DEFAULT_SECONDS``.
+    """
+    best_prefix = ""
+    budget = float(settings.REQUEST_DEADLINE_DEFAULT_SECONDS)
+    for prefix, seconds in settings.REQUEST_DEADLINE_ROUTES.items():
+        if path.startswith(prefix) and len(prefix) > len(best_prefix):
+            best_prefix, budget = prefix, float(seconds)
+    return budget
+
+
+def parse_deadline_header(value: str | None) -> float | None:
+    """Parse an ``X-Request-Deadline`` value (remaining budget in seconds)."""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        return None
+    return seconds if seconds >= 0 else None
+
+
+def set_deadline(seconds: float) -> contextvars.Token[float | None]:
+    """Start a budget of ``seconds`` for the current context."""
+    return request_deadline.set(time.monotonic() + seconds)
+
+
+def remaining() -> float | None:
+    """Seconds left in the current budget, or None without a deadline."""
+    deadline = request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def expired() -> bool:
+    """Return True if the current deadline has passed."""
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def bounded_timeout(default: float) -> float:
+    """Return ``default`` capped by the remaining budget.
+
+    Raises:
+        DeadlineExceeded: If the budget is already spent.
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return min(default, left)
+
+
+def db_deadline_wrapper(
+    execute: Callable[..., Any],
+    sql: str,
+    params: Any,
+    many: bool,
+    context: dict[str, Any],
+) -> Any:
+    """Django execute wrapper enforcing the deadline on each query.
+
+    On PostgreSQL the session ``statement_timeout`` is lowered to the
+    remaining budget. It is only re-issued once the applied value exceeds
+    the remaining time by ``REQUEST_DEADLINE_DB_SLACK_MS``, so most queries
+    add no extra round trip. ``reset_statement_timeouts`` restores it.
+    """
+    left = remaining()
+    if left is None:
+        return execute(sql, params, many, context)
+    if left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded before query")
+
+    connection = context["connection"]
+    if connection.vendor == "postgresql":
+        budget_ms = max(1, int(left * 1000))
+        applied = getattr(connection, "_deadline_timeout_ms", None)
+        slack = settings.REQUEST_DEADLINE_DB_SLACK_MS
+        if applied is None or applied - budget_ms > slack:
+            with connection.connection.cursor() as cursor:
+                cursor.execute("SET statement_timeout = %s", [budget_ms])
+            connection._deadline_timeout_ms = budget_ms
+    return execute(sql, params, many, context)
+
+
+def install_db_deadline(sender: Any, connection: Any, **kwargs: Any) -> None:
+    """``connection_created`` receiver attaching ``db_deadline_wrapper``."""
+    if db_deadline_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_deadline_wrapper)
+
+
+def reset_statement_timeouts() -> None:
+    """Restore the default ``statement_timeout`` on connections we lowered."""
+    for connection in connections.all(initialized_only=True):
+        if getattr(connection, "_deadline_timeout_ms", None) is None:
+            continue
+        connection._deadline_timeout_ms = None  # type: ignore[attr-defined]
+        if connection.connection is None:
+            continue
+        try:
+            with connection.connection.cursor() as cursor:
+                cursor.execute("SET statement_timeout TO DEFAULT")
+        except Exception as e:
+            # Broken connections are discarded by Django at request end
+            logger.warning(f"Could not reset statement_timeout: {e}")
+
+
+def is_deadline_error(exc: BaseException) -> bool:
+    """Return True if ``exc`` was caused by the request deadline."""
+    if isinstance(exc, DeadlineExceeded):
+        return True
+    # PostgreSQL query_canceled (statement_timeout)
+    cause = exc.__cause__ or exc
+    return getattr(cause, "pgcode", None) == "57014" or expired()
@@ -10,6 +10,7 @@ from typing import Any
 
 from confluent_kafka import Consumer
 
+from src.apps.core import tracing
 from src.apps.core.kafka.config import KafkaConfig
 
 logging.basicConfig(level=logging.INFO)
@@ -64,8 +65,9 @@ class KafkaConsumer:
                     event_data = json.loads(msg.value().decode("utf-8"))
                     logger.info(f"Received event from {msg.topic()}: {event_data}")
 
-                    # Process event (implement your logic here)
-                    self.process_event(msg.topic(), event_data)
+                    # Process event under the producer's trace context
+                    with tracing.kafka_consume_span(msg.topic(), msg.headers()):
+                        self.process_event(msg.topic(), event_data)
 
                 except json.JSONDecodeError as e:
                     logger.error(f"Failed to decode message: {e}")
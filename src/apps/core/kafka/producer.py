@@ -9,7 +9,9 @@ import logging
 from typing import Any, Optional
 
 from confluent_kafka import KafkaException, Producer
+from opentelemetry.trace import SpanKind
 
+from .. import tracing
 from .config import KafkaConfig
 
 logger = logging.getLogger(__name__)
@@ -72,13 +74,23 @@ class KafkaProducer:
             value = json.dumps(data).encode("utf-8")
             key_bytes = key.encode("utf-8") if key else None
 
-            # Publish to Kafka
-            self._producer.produce(
-                topic=topic,
-                value=value,
-                key=key_bytes,
-                callback=self._delivery_callback,
-            )
+            # Publish to Kafka, carrying the trace context in message headers
+            with tracing.span(
+                f"{topic} publish",
+                kind=SpanKind.PRODUCER,
+                attributes={
+                    "messaging.system": "kafka",
+                    "messaging.destination.name": topic,
+                    "messaging.operation": "publish",
+                },
+            ):
+                self._producer.produce(
+                    topic=topic,
+                    value=value,
+                    key=key_bytes,
+                    headers=tracing.kafka_headers(),
+                    callback=self._delivery_callback,
+                )
 
             # Trigger delivery reports
             self._producer.poll(0)
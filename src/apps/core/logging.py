@@ -1,13 +1,31 @@
-"""Logging utilities for correlation ID propagation."""
+"""Logging utilities for correlation ID propagation and structured output."""
 
+import atexit
 import contextvars
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import weakref
+from datetime import datetime, timezone
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.in
+    orjson = None  # type: ignore[assignment]
 
 # Context variable to store correlation ID for the current request
 correlation_id_context: contextvars.ContextVar[str | None] = contextvars.ContextVar(
     "correlation_id", default=None
 )
 
+# Attributes every LogRecord carries; anything else was passed via ``extra=``
+_RESERVED_RECORD_ATTRS = frozenset(
+    vars(logging.LogRecord("", logging.INFO, "", 0, "", None, None))
+) | {"message", "asctime", "taskName"}
+
 
 class CorrelationIDFilter(logging.Filter):
     """Logging filter that injects correlation ID into all log records.
@@ -16,12 +34,161 @@ class CorrelationIDFilter(logging.Filter):
     and adds it to every log record, enabling request tracing across
     all application logs. The correlation_id will be automatically
     included in JSON formatters and can be referenced in verbose formatters.
+
+    Records that already carry a correlation ID (passed explicitly via
+    ``extra=``) are left untouched.
     """
 
     def filter(self, record: logging.LogRecord) -> bool:
         """Add correlation ID to log record if available."""
+        if getattr(record, "correlation_id", None):
+            return True
         correlation_id = correlation_id_context.get(None)
         # Add correlation_id as an attribute to the log record
         # This will be automatically included in JSON formatters
         record.correlation_id = correlation_id if correlation_id else ""
         return True
+
+
+class OrjsonFormatter(logging.Formatter):
+    """Fast JSON formatter emitting one object per line.
+
+    Fields passed through ``extra=`` are emitted as top-level structured
+    keys instead of being stringified into the message. Serialization uses
+    orjson when available and falls back to the stdlib ``json`` module.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Serialize the record and its structured fields to JSON."""
+        payload: dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(
+                record.created, tz=timezone.utc
+            ).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "funcName": record.funcName,
+            "lineno": record.lineno,
+            "process": record.process,
+            "thread": record.thread,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            payload["stack_info"] = self.formatStack(record.stack_info)
+
+        if orjson is not None:
+            return orjson.dumps(payload, default=str).decode("utf-8")
+        return json.dumps(payload, default=str)
+
+
+class QueueListenerHandler(logging.handlers.QueueHandler):
+    """Non-blocking handler that hands records to a background listener.
+
+    Request threads only enqueue the record; formatting and I/O happen on
+    the ``QueueListener`` thread against the wrapped ``handlers``. When the
+    bounded queue is full the record is dropped (and counted) rather than
+    blocking the caller.
+
+    Configured from ``LOGGING`` with ``cfg://`` references, e.g.::
+
+        "queue": {
+            "()": "src.apps.core.logging.QueueListenerHandler",
+            "handlers": ["cfg://handlers.console"],
+            "filters": ["correlation_id"],
+        }
+
+    Filters attached to this handler run in the calling thread, so
+    context variables such as the correlation ID are still captured.
+
+    A forked child (Celery prefork workers, Gunicorn with ``--preload``)
+    inherits the queue but not the listener thread, so each child starts
+    its own. Processes that exit without running ``atexit`` hooks call
+    ``stop_listeners`` to flush first.
+    """
+
+    def __init__(
+        self,
+        handlers: list[Any],
+        queue_size: int = 10000,
+        respect_handler_level: bool = True,
+    ) -> None:
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.queue_size = queue_size
+        # Index access forces dictConfig's lazy cfg:// conversion
+        resolved = [handlers[i] for i in range(len(handlers))]
+        for handler in resolved:
+            if not isinstance(handler, logging.Handler):
+                raise ValueError(
+                    f"QueueListenerHandler target is not a configured handler: {handler!r}"
+                )
+        self.dropped = 0
+        self.listener = logging.handlers.QueueListener(
+            self.queue, *resolved, respect_handler_level=respect_handler_level
+        )
+        self.listener.start()
+        self._listening = True
+        _handlers.add(self)
+        atexit.register(self.stop)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Resolve the message eagerly but defer formatting to the listener."""
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Enqueue without blocking; drop the record if the queue is full."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def restart_after_fork(self) -> None:
+        """Give a forked child a fresh queue and its own listener thread.
+
+        The inherited queue's lock may have been held by another parent
+        thread at fork time, so it is replaced rather than reused.
+        """
+        if not self._listening:
+            return
+        self.queue = queue.Queue(maxsize=self.queue_size)
+        self.listener = logging.handlers.QueueListener(
+            self.queue,
+            *self.listener.handlers,
+            respect_handler_level=self.listener.respect_handler_level,
+        )
+        self.listener.start()
+
+    def stop(self) -> None:
+        """Flush pending records and stop the listener thread."""
+        if self._listening:
+            self._listening = False
+            self.listener.stop()
+
+    def close(self) -> None:
+        """Stop the listener before closing the handler."""
+        self.stop()
+        super().close()
+
+
+_handlers: "weakref.WeakSet[QueueListenerHandler]" = weakref.WeakSet()
+
+
+def stop_listeners() -> None:
+    """Flush and stop every queue handler's listener in this process."""
+    for handler in list(_handlers):
+        handler.stop()
+
+
+def _restart_listeners() -> None:
+    for handler in list(_handlers):
+        handler.restart_after_fork()
+
+
+os.register_at_fork(after_in_child=_restart_listeners)
@@ -0,0 +1,202 @@
+"""Per-route latency histograms and SLO burn-rate metrics.
+
+``RouteMetricsMiddleware`` records every request into a Prometheus histogram
+labelled by route template (never the raw path, to keep cardinality bounded),
+HTTP method, caller role and status class. Requests matching an entry in
+``SLO_DEFINITIONS`` are additionally classified as good or bad events.
+Multi-window burn rates are Prometheus recording rules over those events
+(``prometheus/rules/slo.yml``).
+"""
+
+import re
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from django.conf import settings
+from django.http import HttpRequest
+from prometheus_client import Counter, Gauge, Histogram
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Highest-privilege group wins when a user belongs to several
+ROLE_GROUPS = (
+    ("Admins", "admin"),
+    ("Doctors", "doctor"),
+    ("Nurses", "nurse"),
+    ("Pharmacists", "pharmacist"),
+    ("Receptionists", "receptionist"),
+    ("Patients", "patient"),
+)
+ROLE_CACHE_TTL_SECONDS = 60.0
+ROLE_CACHE_MAX_ENTRIES = 10000
+
+_NAMED_GROUP_RE = re.compile(r"\(\?P<(\w+)>[^)]*\)")
+
+REQUEST_LATENCY = Histogram(
+    "healthcore_http_request_duration_seconds",
+    "HTTP request latency by route template, method, role and status class.",
+    ["route", "method", "role", "status_class"],
+    buckets=settings.REQUEST_LATENCY_BUCKETS,
+)
+
+SLO_EVENTS = Counter(
+    "healthcore_slo_events_total",
+    "Requests evaluated against an SLO, by outcome (good/bad).",
+    ["slo", "outcome"],
+)
+SLO_OBJECTIVE = Gauge(
+    "healthcore_slo_objective",
+    "Target fraction of good events per SLO.",
+    ["slo"],
+)
+SLO_LATENCY_THRESHOLD = Gauge(
+    "healthcore_slo_latency_threshold_seconds",
+    "Latency threshold above which a request is a bad event.",
+    ["slo"],
+)
+
+
+def normalize_route(route: str) -> str:
+    """Turn a resolver route pattern into a stable, low-cardinality template.
+
+    Both path converters and DRF router regexes are supported, e.g.
+    ``api/v1/scheduling/appointments/(?P<pk>[^/.]+)/$`` becomes
+    ``/api/v1/scheduling/appointments/<pk>/``.
+    """
+    template = _NAMED_GROUP_RE.sub(r"<\1>", route)
+    template = template.replace("^", "").replace("$", "")
+    return "/" + template.lstrip("/")
+
+
+def route_template(request: HttpRequest) -> str:
+    """Return the normalized route template for a resolved request."""
+    match = getattr(request, "resolver_match", None)
+    if match is None or not match.route:
+        return UNMATCHED_ROUTE
+    return normalize_route(match.route)
+
+
+def status_class(status_code: int) -> str:
+    """Collapse a status code into its class label (``2xx``, ``5xx``...)."""
+    return f"{status_code // 100}xx"
+
+
+class RoleResolver:
+    """Map users to a role label, caching group lookups per user id.
+
+    Group membership is resolved with one query and cached for
+    ``ttl`` seconds so the metrics path does not add a query per request.
+    Permission checks read the same cache (``groups``).
+    """
+
+    def __init__(
+        self,
+        ttl: float = ROLE_CACHE_TTL_SECONDS,
+        max_entries: int = ROLE_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._cache: dict[Any, tuple[frozenset[str], float]] = {}
+
+    def resolve(self, user: Any) -> str:
+        """Return the role label for ``user`` (``anonymous`` if not logged in)."""
+        if user is None or not getattr(user, "is_authenticated", False):
+            return "anonymous"
+        if getattr(user, "is_superuser", False):
+            return "admin"
+
+        names = self.groups(user)
+        return next(
+            (label for group, label in ROLE_GROUPS if group in names),
+            "authenticated",
+        )
+
+    def groups(self, user: Any) -> frozenset[str]:
+        """Group names of an authenticated ``user``, cached for ``ttl``."""
+        now = time.monotonic()
+        cached = self._cache.get(user.pk)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+
+        names = frozenset(user.groups.values_list("name", flat=True))
+        if len(self._cache) >= self.max_entries:
+            self._cache.clear()
+        self._cache[user.pk] = (names, now + self.ttl)
+        return names
+
+    def clear(self) -> None:
+        """Drop all cached role lookups."""
+        self._cache.clear()
+
+
+@dataclass(frozen=True)
+class SLODefinition:
+    """Latency/availability objective for one endpoint.
+
+    A request is a *good* event when it completes below ``threshold_ms``
+    without a 5xx status.
+    """
+
+    name: str
+    route: str
+    methods: tuple[str, ...]
+    threshold_ms: float
+    objective: float
+
+    @classmethod
+    def from_setting(cls, entry: dict[str, Any]) -> "SLODefinition":
+        """Build a definition from an ``SLO_DEFINITIONS`` settings entry."""
+        return cls(
+            name=entry["name"],
+            route=normalize_route(entry["route"]),
+            methods=tuple(m.upper() for m in entry.get("methods", ())),
+            threshold_ms=float(entry["threshold_ms"]),
+            objective=float(entry["objective"]),
+        )
+
+    def matches(self, route: str, method: str) -> bool:
+        """Return True if the request falls under this SLO."""
+        if self.methods and method not in self.methods:
+            return False
+        return route.startswith(self.route)
+
+    def is_good(self, duration_seconds: float, status_code: int) -> bool:
+        """Classify a request as a good or bad event."""
+        return status_code < 500 and duration_seconds * 1000 <= self.threshold_ms
+
+
+class SLOTracker:
+    """Classify requests against SLOs into ``healthcore_slo_events_total``.
+
+    Burn rates are not computed here: per-process windows would only see
+    one worker's traffic and reset on restart. Prometheus recording rules
+    (``prometheus/rules/slo.yml``) derive them from the event counter across
+    all workers, using the ``healthcore_slo_objective`` gauge as the target.
+    """
+
+    def __init__(self, definitions: Iterable[SLODefinition]) -> None:
+        self.definitions = list(definitions)
+        for slo in self.definitions:
+            SLO_OBJECTIVE.labels(slo.name).set(slo.objective)
+            SLO_LATENCY_THRESHOLD.labels(slo.name).set(slo.threshold_ms / 1000)
+            # Export zeros so error ratios exist before the first bad event
+            for outcome in ("good", "bad"):
+                SLO_EVENTS.labels(slo.name, outcome)
+
+    def observe(
+        self, route: str, method: str, status_code: int, duration_seconds: float
+    ) -> None:
+        """Record a request against every SLO it matches."""
+        for slo in self.definitions:
+            if slo.matches(route, method):
+                good = slo.is_good(duration_seconds, status_code)
+                SLO_EVENTS.labels(slo.name, "good" if good else "bad").inc()
+
+
+role_resolver = RoleResolver()
+
+slo_tracker = SLOTracker(
+    SLODefinition.from_setting(entry) for entry in settings.SLO_DEFINITIONS
+)
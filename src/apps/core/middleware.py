@@ -2,14 +2,17 @@
 
 import json
 import logging
+import random
+import threading
 import time
 import uuid
 from typing import Any
 
+from django.conf import settings
 from django.http import HttpRequest, HttpResponse, JsonResponse
-from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
 
+from . import concurrency, deadline, metrics, tracing
 from .logging import correlation_id_context
 from .models import IdempotencyKey
 
@@ -26,23 +29,36 @@ class RequestLoggingMiddleware(MiddlewareMixin):
     - Adds correlation ID to response headers
     - Maintains backward compatibility with request_id
 
-    Logs:
+    Logs (as structured ``extra`` fields, rendered by the JSON formatter):
     - Request method, path, user agent
     - Response status code and duration
     - Request ID and correlation ID for tracing
     - User information if authenticated
+
+    Successful (< 400) requests are sampled at ``REQUEST_LOG_SAMPLE_RATE``;
+    4xx and 5xx responses are always logged.
     """
 
+    SKIP_PATHS = ("/static/", "/media/", "/favicon.ico")
+    SENSITIVE_PARAMS = frozenset({"password", "token", "secret", "key"})
+
+    def __init__(self, get_response: Any) -> None:
+        super().__init__(get_response)
+        self.sample_rate: float = getattr(settings, "REQUEST_LOG_SAMPLE_RATE", 1.0)
+
     def process_request(self, request: HttpRequest) -> None:
         """Add request metadata, correlation ID, and start timer."""
-        request.start_time = time.time()  # type: ignore[attr-defined]
-        request.request_id = str(uuid.uuid4())[:8]  # type: ignore[attr-defined]
+        request.start_time = time.perf_counter()  # type: ignore[attr-defined]
+
+        # A single UUID serves as request ID and, if absent, correlation ID
+        generated_id = str(uuid.uuid4())
+        request.request_id = generated_id[:8]  # type: ignore[attr-defined]
 
         # Get correlation ID from headers or generate one
         correlation_id = (
             request.headers.get("X-Correlation-ID")
             or request.headers.get("Correlation-ID")
-            or str(uuid.uuid4())
+            or generated_id
         )
 
         # Store correlation ID in request object
@@ -70,57 +86,86 @@ class RequestLoggingMiddleware(MiddlewareMixin):
         if correlation_id:
             response["X-Correlation-ID"] = correlation_id
 
-        # Clear correlation ID from context after request
-        correlation_id_context.set(None)
+        try:
+            self._log_request(request, response)
+        finally:
+            # Clear correlation ID from context after request
+            correlation_id_context.set(None)
+
+        return response
 
+    def _log_request(self, request: HttpRequest, response: HttpResponse) -> None:
+        """Emit the structured request log record, honouring sampling."""
         # Skip logging for static files and health checks
         if not hasattr(request, "start_time"):
-            return response
+            return
 
-        duration = time.time() - request.start_time
+        if request.path.startswith(self.SKIP_PATHS):
+            return
 
-        skip_paths = ["/static/", "/media/", "/favicon.ico"]
-        if any(request.path.startswith(path) for path in skip_paths):
-            return response
+        status_code = response.status_code
+        if (
+            status_code < 400
+            and self.sample_rate < 1.0
+            and random.random() >= self.sample_rate
+        ):
+            return
+
+        # Log at appropriate level based on status code
+        if status_code >= 500:
+            level = logging.ERROR
+        elif status_code >= 400:
+            level = logging.WARNING
+        else:
+            level = logging.INFO
+
+        if not logger.isEnabledFor(level):
+            return
+
+        duration_ms = round((time.perf_counter() - request.start_time) * 1000, 2)
+        request_id = getattr(request, "request_id", "unknown")
+        correlation_id = getattr(request, "correlation_id", "unknown")
 
-        # Prepare log data
-        log_data = {
-            "request_id": getattr(request, "request_id", "unknown"),
-            "correlation_id": getattr(request, "correlation_id", "unknown"),
+        log_data: dict[str, Any] = {
+            "request_id": request_id,
+            "correlation_id": correlation_id,
             "method": request.method,
             "path": request.path,
-            "status_code": response.status_code,
-            "duration_ms": round(duration * 1000, 2),
+            "status_code": status_code,
+            "duration_ms": duration_ms,
             "user_agent": request.META.get("HTTP_USER_AGENT", "")[:100],
             "ip_address": self._get_client_ip(request),
-            "timestamp": timezone.now().isoformat(),
         }
 
         # Add user info if authenticated
-        if hasattr(request, "user") and request.user.is_authenticated:
-            log_data["user_id"] = request.user.id
-            log_data["username"] = request.user.username
+        user = getattr(request, "user", None)
+        user_id = None
+        if user is not None and user.is_authenticated:
+            user_id = user.id
+            log_data["user_id"] = user_id
+            log_data["username"] = user.username
 
         # Add query params for GET requests (be careful with sensitive data)
         if request.method == "GET" and request.GET:
             # Only log safe query parameters
             safe_params = {
-                k: v
-                for k, v in request.GET.items()
-                if k not in ["password", "token", "secret", "key"]
+                k: v for k, v in request.GET.items() if k not in self.SENSITIVE_PARAMS
             }
             if safe_params:
                 log_data["query_params"] = safe_params
 
-        # Log at appropriate level based on status code
-        if response.status_code >= 500:
-            logger.error(f"Request completed: {log_data}")
-        elif response.status_code >= 400:
-            logger.warning(f"Request completed: {log_data}")
-        else:
-            logger.info(f"Request completed: {log_data}")
-
-        return response
+        logger.log(
+            level,
+            "Request completed: %s %s %s %.2fms request_id=%s correlation_id=%s user_id=%s",
+            request.method,
+            request.path,
+            status_code,
+            duration_ms,
+            request_id,
+            correlation_id,
+            user_id,
+            extra=log_data,
+        )
 
     def _get_client_ip(self, request: HttpRequest) -> str:
         """Extract client IP address from request."""
@@ -131,6 +176,172 @@ class RequestLoggingMiddleware(MiddlewareMixin):
         return str(request.META.get("REMOTE_ADDR", "unknown"))
 
 
+class RouteMetricsMiddleware(MiddlewareMixin):
+    """Record per-route latency histograms and SLO events.
+
+    Placed directly after ``PrometheusBeforeMiddleware`` so the measured
+    duration covers the rest of the middleware stack. The caller role is
+    read in ``process_response``, once DRF authentication has run.
+    """
+
+    def process_request(self, request: HttpRequest) -> None:
+        """Start the latency timer."""
+        request._metrics_start = time.perf_counter()  # type: ignore[attr-defined]
+        return None
+
+    def process_response(
+        self, request: HttpRequest, response: HttpResponse
+    ) -> HttpResponse:
+        """Observe the request duration under its route template labels."""
+        start = getattr(request, "_metrics_start", None)
+        if start is None:
+            return response
+        duration = time.perf_counter() - start
+
+        route = metrics.route_template(request)
+        method = request.method or ""
+        role = metrics.role_resolver.resolve(getattr(request, "user", None))
+        metrics.REQUEST_LATENCY.labels(
+            route, method, role, metrics.status_class(response.status_code)
+        ).observe(duration)
+        metrics.slo_tracker.observe(route, method, response.status_code, duration)
+        return response
+
+
+class TracingMiddleware(MiddlewareMixin):
+    """Open a server span per request, continuing any incoming trace.
+
+    The span is renamed to the route template once the URL resolves, so
+    span names stay low-cardinality. It is a no-op span unless tracing is
+    configured (``OTEL_TRACING_ENABLED``).
+    """
+
+    def process_request(self, request: HttpRequest) -> None:
+        """Start the server span under the caller's trace context."""
+        server_span = tracing.start_server_span(
+            f"{request.method} {request.path}",
+            request.headers,
+            attributes={
+                "http.request.method": request.method or "",
+                "url.path": request.path,
+            },
+        )
+        request._trace_span = server_span  # type: ignore[attr-defined]
+        request._trace_token = tracing.activate(server_span)  # type: ignore[attr-defined]
+        return None
+
+    def process_view(
+        self,
+        request: HttpRequest,
+        view_func: Any,
+        view_args: Any,
+        view_kwargs: Any,
+    ) -> None:
+        """Name the span after the resolved route template."""
+        server_span = getattr(request, "_trace_span", None)
+        if server_span is not None:
+            route = metrics.route_template(request)
+            server_span.update_name(f"{request.method} {route}")
+            server_span.set_attribute("http.route", route)
+        return None
+
+    def process_exception(self, request: HttpRequest, exception: Exception) -> None:
+        """Record unhandled view exceptions on the span."""
+        server_span = getattr(request, "_trace_span", None)
+        if server_span is not None:
+            server_span.record_exception(exception)
+        return None
+
+    def process_response(
+        self, request: HttpRequest, response: HttpResponse
+    ) -> HttpResponse:
+        """Finish the span with the response status."""
+        server_span = getattr(request, "_trace_span", None)
+        if server_span is None:
+            return response
+
+        server_span.set_attribute("http.response.status_code", response.status_code)
+        correlation_id = getattr(request, "correlation_id", None)
+        if correlation_id:
+            server_span.set_attribute("healthcore.correlation_id", correlation_id)
+        token = request._trace_token  # type: ignore[attr-defined]
+        tracing.finish(server_span, token, error=response.status_code >= 500)
+        del request._trace_span  # type: ignore[attr-defined]
+        return response
+
+
+class ConcurrencyLimitMiddleware:
+    """Adaptive per-process concurrency limit with priority load shedding.
+
+    Wraps the rest of the stack so the slot is held for the whole request.
+    Clinical writes queue longest and may use the full limit; AI/analytics
+    requests get a smaller share and are shed first. Shed requests receive
+    503 with ``Retry-After``. See ``core.concurrency`` for the controller.
+    """
+
+    def __init__(self, get_response: Any) -> None:
+        self.get_response = get_response
+        self.enabled: bool = settings.CONCURRENCY_LIMIT_ENABLED
+        self.exempt_paths = tuple(settings.CONCURRENCY_EXEMPT_PATHS)
+        self.limiter = concurrency.build_limiter()
+        if self.enabled:
+            concurrency.export_metrics(self.limiter)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not self.enabled or request.path.startswith(self.exempt_paths):
+            return self.get_response(request)  # type: ignore[no-any-return]
+
+        priority = concurrency.classify(request.method or "", request.path)
+        if not self.limiter.acquire(priority):
+            return self._shed(request, priority)
+
+        start = time.perf_counter()
+        try:
+            response: HttpResponse = self.get_response(request)
+        except BaseException:
+            self.limiter.release(None)
+            raise
+
+        if response.streaming:
+            # The body (e.g. SSE) runs after this returns: hold the slot until
+            # the server closes the response. Stream length is not latency.
+            released = threading.Event()
+
+            def release_stream() -> None:
+                if not released.is_set():
+                    released.set()
+                    self.limiter.release(None)
+
+            response._resource_closers.append(release_stream)  # type: ignore[attr-defined]
+        elif priority is concurrency.Priority.LOW:
+            # External AI latency and errors say nothing about local
+            # saturation; they must not shrink the limit shared by all
+            self.limiter.release(None)
+        else:
+            self.limiter.release(
+                time.perf_counter() - start,
+                dropped=response.status_code >= 500 and response.status_code != 501,
+                route=metrics.route_template(request),
+            )
+        return response
+
+    def _shed(
+        self, request: HttpRequest, priority: concurrency.Priority
+    ) -> JsonResponse:
+        concurrency.CONCURRENCY_SHED.labels(priority.label).inc()
+        retry_after = self.limiter.policies[priority].retry_after
+        logger.warning(
+            f"Load shed ({priority.label}): {request.method} {request.path} "
+            f"in_flight={self.limiter.in_flight} limit={self.limiter.limit:.1f}"
+        )
+        response = JsonResponse(
+            {"error": "Service overloaded, retry later", "code": "overloaded"},
+            status=503,
+        )
+        response["Retry-After"] = str(retry_after)
+        return response
+
+
 class SecurityHeadersMiddleware(MiddlewareMixin):
     """Add security headers to all responses.
 
@@ -162,31 +373,73 @@ class SecurityHeadersMiddleware(MiddlewareMixin):
 
 class TimeoutMiddleware(MiddlewareMixin):
     """
-    Middleware to enforce a request timeout.
+    Middleware enforcing a cooperative per-request deadline.
+
+    The budget comes from ``REQUEST_DEADLINE_ROUTES`` (longest path prefix)
+    and may be shortened, never extended, by an ``X-Request-Deadline`` header
+    carrying the caller's remaining seconds. The deadline lives in a context
+    variable consulted by database, gRPC and AI calls (see ``core.deadline``).
 
-    NOTE: The signal-based timeout implementation has been disabled because
-    it doesn't work properly in multi-threaded environments (e.g., Django's runserver).
-    Timeout handling is now managed at the WSGI server level (Gunicorn with --timeout).
+    Requests that overrun fail with 504 instead of holding the worker until
+    Gunicorn's ``--timeout`` kills it along with its other in-flight requests.
     """
 
     def process_request(self, request: HttpRequest) -> None:
-        # COMMENTED OUT: signal-based timeout doesn't work in threads
-        # def handler(signum, frame):
-        #     logger.warning(f"Request timed out: {request.path}")
-        #     raise TimeoutError("Request processing timed out.")
-        #
-        # signal.signal(signal.SIGALRM, handler)
-        # signal.alarm(10)
+        """Start the deadline for this request."""
+        budget = deadline.budget_for_path(request.path)
+        requested = deadline.parse_deadline_header(
+            request.headers.get(deadline.DEADLINE_HEADER)
+        )
+        if requested is not None:
+            budget = min(budget, requested)
+        request._deadline_token = deadline.set_deadline(budget)  # type: ignore[attr-defined]
+        return None
 
+    def process_view(
+        self,
+        request: HttpRequest,
+        view_func: Any,
+        view_args: Any,
+        view_kwargs: Any,
+    ) -> JsonResponse | None:
+        """Reject requests whose budget is gone before the view runs."""
+        if deadline.expired():
+            return self._timeout_response(request)
+        return None
+
+    def process_exception(
+        self, request: HttpRequest, exception: Exception
+    ) -> JsonResponse | None:
+        """Turn deadline-caused failures into 504 responses."""
+        if deadline.is_deadline_error(exception):
+            return self._timeout_response(request)
         return None
 
     def process_response(
         self, request: HttpRequest, response: HttpResponse
     ) -> HttpResponse:
-        # COMMENTED OUT: corresponding cleanup
-        # signal.alarm(0)
+        """Map overrun 5xx responses to 504 and clear the deadline."""
+        token = getattr(request, "_deadline_token", None)
+        if token is None:
+            return response
+
+        if response.status_code >= 500 and response.status_code != 504:
+            if deadline.expired():
+                response = self._timeout_response(request)
+
+        deadline.reset_statement_timeouts()
+        deadline.request_deadline.reset(token)
+        del request._deadline_token  # type: ignore[attr-defined]
         return response
 
+    @staticmethod
+    def _timeout_response(request: HttpRequest) -> JsonResponse:
+        logger.warning(f"Request deadline exceeded: {request.method} {request.path}")
+        return JsonResponse(
+            {"error": "Request deadline exceeded", "code": "deadline_exceeded"},
+            status=504,
+        )
+
 
 class HealthCheckMiddleware(MiddlewareMixin):
     """Lightweight middleware for health check endpoints.
@@ -12,7 +12,9 @@ from typing import Any, Optional
 
 import grpc
 from google.protobuf import json_format
+from opentelemetry.trace import SpanKind
 
+from src.apps.core import deadline, tracing
 from src.apps.core.grpc_proto import audit_pb2, audit_pb2_grpc
 
 logger = logging.getLogger(__name__)
@@ -43,7 +45,7 @@ class AuditGRPCClient:
         Args:
             host: Audit service hostname (default: 'audit-service' for Docker)
             port: gRPC port (default: 50051)
-            timeout: Request timeout in seconds
+            timeout: Request timeout in seconds (capped by the request deadline)
         """
         self.host = host
         self.port = port
@@ -111,7 +113,12 @@ class AuditGRPCClient:
             )
 
             assert self.stub is not None, "Stub not initialized"
-            response = self.stub.LogEvent(request, timeout=self.timeout)
+            with self._rpc_span("LogEvent"):
+                response = self.stub.LogEvent(
+                    request,
+                    timeout=deadline.bounded_timeout(self.timeout),
+                    metadata=tracing.grpc_metadata(),
+                )
             logger.info(f"✅ Audit event logged: {response.event_id}")
             return str(response.event_id)
 
@@ -145,7 +152,12 @@ class AuditGRPCClient:
             )
 
             assert self.stub is not None, "Stub not initialized"
-            response = self.stub.GetAuditLogs(request, timeout=self.timeout)
+            with self._rpc_span("GetAuditLogs"):
+                response = self.stub.GetAuditLogs(
+                    request,
+                    timeout=deadline.bounded_timeout(self.timeout),
+                    metadata=tracing.grpc_metadata(),
+                )
 
             logs = []
             for entry in response.logs:
@@ -161,6 +173,20 @@ class AuditGRPCClient:
             logger.error(f"❌ Error retrieving audit logs: {e}")
             raise
 
+    def _rpc_span(self, method: str) -> Any:
+        """Client span for one AuditService call."""
+        return tracing.span(
+            f"audit.AuditService/{method}",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "rpc.system": "grpc",
+                "rpc.service": "audit.AuditService",
+                "rpc.method": method,
+                "server.address": self.host,
+                "server.port": self.port,
+            },
+        )
+
     def __enter__(self) -> "AuditGRPCClient":
         """Context manager entry."""
         self.connect()
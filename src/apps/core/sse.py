@@ -0,0 +1,90 @@
+"""Server-Sent Events helpers for streaming AI responses.
+
+AI endpoints switch to streaming when the client sends
+``Accept: text/event-stream`` (or ``?stream=true``). The response is a
+``StreamingHttpResponse`` emitting:
+
+- ``token`` events, ``{"text": "..."}``, as the provider produces output
+- one final ``done`` event with endpoint metadata (e.g. ``model_used``), or
+  an ``error`` event, ``{"detail": "..."}``, if the provider fails mid-stream
+
+Errors raised before streaming starts are ordinary DRF responses; with the
+event-stream renderer they are sent as a single ``error`` event.
+"""
+
+import json
+import logging
+from collections.abc import Iterator, Mapping
+from typing import Any, cast
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .ai_client import AIClientError
+
+logger = logging.getLogger(__name__)
+
+EVENT_STREAM = "text/event-stream"
+
+
+def format_event(event: str, data: Any) -> bytes:
+    """Encode one SSE event; JSON keeps multi-line text on one data line."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Renders non-streaming (error) responses for SSE clients."""
+
+    media_type = EVENT_STREAM
+    format = "sse"
+    charset = "utf-8"
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: str | None = None,
+        renderer_context: Mapping[str, Any] | None = None,
+    ) -> bytes:
+        return format_event("error", data)
+
+
+# Renderers for AI views: the defaults plus text/event-stream negotiation
+AI_RENDERER_CLASSES: list[type[BaseRenderer]] = [
+    *cast(list[type[BaseRenderer]], api_settings.DEFAULT_RENDERER_CLASSES),
+    EventStreamRenderer,
+]
+
+
+def wants_stream(request: Request) -> bool:
+    """Return True if the client asked for a Server-Sent Events response."""
+    if EVENT_STREAM in request.headers.get("Accept", ""):
+        return True
+    return str(request.query_params.get("stream", "")).lower() in ("1", "true")
+
+
+def ai_events(chunks: Iterator[str], done: Mapping[str, Any]) -> Iterator[bytes]:
+    """Turn AI text chunks into ``token`` events, then ``done`` or ``error``."""
+    try:
+        for chunk in chunks:
+            yield format_event("token", {"text": chunk})
+    except AIClientError as e:
+        yield format_event("error", {"detail": str(e)})
+        return
+    except Exception as e:
+        logger.exception(f"AI stream failed: {e}")
+        yield format_event("error", {"detail": "An unexpected error occurred."})
+        return
+    yield format_event("done", dict(done))
+
+
+def stream_response(
+    chunks: Iterator[str], done: Mapping[str, Any]
+) -> StreamingHttpResponse:
+    """Build the SSE response for an AI text stream."""
+    response = StreamingHttpResponse(ai_events(chunks, done), content_type=EVENT_STREAM)
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
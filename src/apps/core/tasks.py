@@ -0,0 +1,51 @@
+"""
+Celery tasks for the core app.
+
+``run_ai_job`` executes asynchronous AI jobs (see ``core.ai_jobs``) on the
+dedicated AI queue so provider round trips never block request workers.
+"""
+
+import logging
+
+from celery import shared_task
+
+from . import ai_jobs
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(  # type: ignore[misc]
+    acks_late=True,
+    soft_time_limit=120,
+    time_limit=150,
+)
+def run_ai_job(job_id: str) -> str:
+    """
+    Run a queued AI job and store its result in the job record.
+
+    Handler errors mark the job ``failed``; they are not retried because
+    the client is already polling and can resubmit.
+    """
+    job = ai_jobs.get_job(job_id)
+    if job is None:
+        logger.warning(f"AI job {job_id} expired before it could run")
+        return "expired"
+    if job["status"] in ai_jobs.TERMINAL_STATES:
+        # Redelivered after completion (acks_late)
+        return str(job["status"])
+
+    job["status"] = ai_jobs.RUNNING
+    ai_jobs.save_job(job)
+    try:
+        job["result"] = ai_jobs.get_handler(job["kind"])(job["params"])
+        job["status"] = ai_jobs.SUCCEEDED
+    except ai_jobs.AIJobError as e:
+        job["status"] = ai_jobs.FAILED
+        job["error"] = str(e)
+    except Exception as e:
+        logger.exception(f"AI job {job_id} ({job['kind']}) crashed: {e}")
+        job["status"] = ai_jobs.FAILED
+        job["error"] = "An unexpected error occurred."
+    ai_jobs.save_job(job)
+    logger.info(f"AI job {job_id} ({job['kind']}) {job['status']}")
+    return str(job["status"])
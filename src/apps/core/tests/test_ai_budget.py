@@ -0,0 +1,177 @@
+"""
+Tests for prompt budgeting and AI call metering.
+"""
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.apps.core import ai_budget, ai_cache
+from src.apps.core.ai_client import (
+    LIFESTYLE_SYSTEM_PROMPT,
+    AIServiceUnavailableError,
+    LocalAIClient,
+    lifestyle_advice_prompt,
+    response_prompt,
+)
+
+
+@pytest.fixture(autouse=True)
+def budget_settings(settings):
+    settings.AI_PROMPT_BUDGETS = {"default": 400, "report_advice": 300}
+    settings.AI_CHARS_PER_TOKEN = 4.0
+    settings.AI_LOCAL_LATENCY_DISTRIBUTION = "fixed"
+    settings.AI_LOCAL_LATENCY_MEDIAN_SECONDS = 0.0
+    settings.AI_LOCAL_ERROR_RATE = 0.0
+    settings.AI_LOCAL_RATE_LIMIT_RATE = 0.0
+
+
+def _report(words):
+    return " ".join(f"finding{i}" for i in range(words)) + " Conclusion: anemia."
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestFitting:
+    def test_estimate_tokens(self):
+        assert ai_budget.estimate_tokens("") == 0
+        assert ai_budget.estimate_tokens("abcde") == 2
+
+    def test_budget_follows_use_case(self):
+        assert ai_budget.budget_for() == 400
+        with ai_cache.use_case("report_advice"):
+            assert ai_budget.budget_for() == 300
+        assert ai_budget.budget_for("drug_info") == 400
+
+    def test_condense_collapses_whitespace(self):
+        assert (
+            ai_budget.condense("  Hb   low\n\n\n\n  MCV\tlow  ") == "Hb low\n\nMCV low"
+        )
+
+    def test_truncate_keeps_head_and_tail(self):
+        text = _report(200)
+        trimmed = ai_budget.truncate_middle(text, 50)
+
+        assert ai_budget.estimate_tokens(trimmed) <= 50
+        assert trimmed.startswith("finding0 finding1")
+        assert trimmed.endswith("Conclusion: anemia.")
+        assert ai_budget.TRUNCATION_MARKER in trimmed
+
+    def test_short_prompt_untouched(self):
+        sections = [ai_budget.PromptSection("report", "Hb 9.1 g/dL")]
+        assert ai_budget.fit_sections(sections) == {"report": "Hb 9.1 g/dL"}
+
+    def test_lowest_priority_trimmed_first(self):
+        sections = [
+            ai_budget.PromptSection("query", "What should I eat?", priority=0),
+            ai_budget.PromptSection("history", _report(100), priority=2),
+            ai_budget.PromptSection("report", _report(300), priority=1),
+        ]
+        fitted = ai_budget.fit_sections(sections, reserved="x" * 400)
+
+        assert fitted["query"] == "What should I eat?"
+        assert fitted["history"] == ""
+        assert ai_budget.TRUNCATION_MARKER in fitted["report"]
+        total = "x" * 400 + "".join(fitted.values())
+        assert ai_budget.estimate_tokens(total) <= 400
+
+    def test_min_tokens_respected(self):
+        sections = [
+            ai_budget.PromptSection("report", _report(300), priority=0),
+            ai_budget.PromptSection("history", _report(50), priority=1, min_tokens=80),
+        ]
+        fitted = ai_budget.fit_sections(sections)
+        assert ai_budget.estimate_tokens(fitted["history"]) > 70
+        assert ai_budget.TRUNCATION_MARKER in fitted["report"]
+
+    def test_disabled(self, settings):
+        settings.AI_PROMPT_BUDGET_ENABLED = False
+        text = _report(500)
+        sections = [ai_budget.PromptSection("report", text)]
+        assert ai_budget.fit_sections(sections)["report"] == text
+
+    def test_truncation_is_counted(self):
+        before = _sample(
+            "healthcore_ai_prompt_truncated_total",
+            use_case="report_advice",
+            section="diagnostic_report",
+        )
+        with ai_cache.use_case("report_advice"):
+            lifestyle_advice_prompt(_report(1000), "F, born 1980-01-01.")
+        after = _sample(
+            "healthcore_ai_prompt_truncated_total",
+            use_case="report_advice",
+            section="diagnostic_report",
+        )
+        assert after == before + 1
+
+
+class TestPromptBuilders:
+    def test_lifestyle_prompt_fits_budget(self):
+        with ai_cache.use_case("report_advice"):
+            prompt = lifestyle_advice_prompt(_report(1000), "F, born 1980-01-01.")
+
+        assert "Patient Context: F, born 1980-01-01." in prompt
+        assert "Conclusion: anemia." in prompt
+        assert ai_budget.estimate_tokens(LIFESTYLE_SYSTEM_PROMPT + prompt) <= 300
+
+    def test_response_prompt_trims_context_not_query(self):
+        prompt = response_prompt("Is this dose safe?", _report(1000), "Be brief.")
+
+        assert prompt.endswith("\n\nIs this dose safe?")
+        assert ai_budget.estimate_tokens("Be brief." + prompt) <= 400
+
+    def test_response_prompt_without_context(self):
+        assert response_prompt("Hi", "", "sys") == "Hi"
+
+
+class TestMetering:
+    def test_generate_records_tokens_and_latency(self):
+        labels = {"provider": "LocalAIClient", "use_case": "drug_info"}
+        prompt_before = _sample("healthcore_ai_prompt_tokens_sum", **labels)
+        calls_before = _sample(
+            "healthcore_ai_call_duration_seconds_count", outcome="success", **labels
+        )
+
+        with ai_cache.use_case("drug_info"):
+            answer = LocalAIClient().generate_content("x" * 400, "y" * 40)
+
+        assert _sample("healthcore_ai_prompt_tokens_sum", **labels) == (
+            prompt_before + 110
+        )
+        assert _sample(
+            "healthcore_ai_call_duration_seconds_count", outcome="success", **labels
+        ) == (calls_before + 1)
+        assert _sample("healthcore_ai_response_tokens_sum", **labels) >= (
+            ai_budget.estimate_tokens(answer)
+        )
+
+    def test_failed_call_recorded_as_error(self, settings):
+        settings.AI_LOCAL_ERROR_RATE = 1.0
+        labels = {"provider": "LocalAIClient", "use_case": "default"}
+        before = _sample(
+            "healthcore_ai_call_duration_seconds_count", outcome="error", **labels
+        )
+
+        with pytest.raises(AIServiceUnavailableError):
+            LocalAIClient().generate_content("q")
+
+        assert _sample(
+            "healthcore_ai_call_duration_seconds_count", outcome="error", **labels
+        ) == (before + 1)
+
+    def test_over_budget_prompt_is_counted(self):
+        before = _sample("healthcore_ai_prompt_over_budget_total", use_case="default")
+        LocalAIClient().generate_content("x" * 2000)
+        after = _sample("healthcore_ai_prompt_over_budget_total", use_case="default")
+        assert after == before + 1
+
+    def test_stream_records_response_tokens(self):
+        labels = {"provider": "LocalAIClient", "use_case": "default"}
+        before = _sample("healthcore_ai_response_tokens_sum", **labels)
+
+        text = "".join(LocalAIClient().stream_content("Metformin"))
+
+        after = _sample("healthcore_ai_response_tokens_sum", **labels)
+        assert after == before + ai_budget.estimate_tokens(text)
@@ -0,0 +1,161 @@
+"""
+Tests for the two-tier AI response cache.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+
+from src.apps.core import ai_cache
+
+
+class FakeClient:
+    """Minimal client exposing the cached ``generate_content`` signature."""
+
+    model_name = "test-model"
+
+    def __init__(self):
+        self.provider = Mock(return_value="answer")
+
+    @ai_cache.cached_ai_call
+    def generate_content(self, prompt, system_instruction="", temperature=0.7):
+        return self.provider(prompt, system_instruction, temperature)
+
+
+@pytest.fixture(autouse=True)
+def enabled_cache():
+    """Enable caching with a fresh L1 and L2 for each test."""
+    ai_cache.get_response_cache.cache_clear()
+    cache.clear()
+    with override_settings(AI_CACHE_ENABLED=True):
+        yield
+    ai_cache.get_response_cache.cache_clear()
+    cache.clear()
+
+
+def _requests(use_case, result):
+    return ai_cache.AI_CACHE_REQUESTS.labels(use_case, result)._value.get()
+
+
+class TestCacheKey:
+    """The key covers every input that changes the answer."""
+
+    def test_stable_for_same_inputs(self):
+        args = ("GeminiClient", "m", "sys", "prompt", 0.2)
+        assert ai_cache.cache_key(*args) == ai_cache.cache_key(*args)
+
+    @pytest.mark.parametrize(
+        "changed",
+        [
+            ("OpenAIClient", "m", "sys", "prompt", 0.2),
+            ("GeminiClient", "other", "sys", "prompt", 0.2),
+            ("GeminiClient", "m", "other", "prompt", 0.2),
+            ("GeminiClient", "m", "sys", "other", 0.2),
+            ("GeminiClient", "m", "sys", "prompt", 0.3),
+        ],
+    )
+    def test_differs_per_input(self, changed):
+        base = ai_cache.cache_key("GeminiClient", "m", "sys", "prompt", 0.2)
+        assert ai_cache.cache_key(*changed) != base
+
+    def test_field_boundaries_matter(self):
+        assert ai_cache.cache_key("p", "m", "ab", "c", 0) != ai_cache.cache_key(
+            "p", "m", "a", "bc", 0
+        )
+
+
+class TestCachedCalls:
+    """Hits are served from L1, then L2, before calling the provider."""
+
+    def test_low_temperature_call_hits_local_cache(self):
+        client = FakeClient()
+        before = _requests("default", "local_hit")
+
+        assert client.generate_content("q", "sys", 0.2) == "answer"
+        assert client.generate_content("q", "sys", 0.2) == "answer"
+
+        client.provider.assert_called_once()
+        assert _requests("default", "local_hit") == before + 1
+
+    def test_shared_tier_used_by_other_processes(self):
+        FakeClient().generate_content("q", "sys", 0.2)
+        ai_cache.get_response_cache.cache_clear()  # simulate another worker
+
+        other = FakeClient()
+        assert other.generate_content("q", "sys", 0.2) == "answer"
+        other.provider.assert_not_called()
+
+    def test_untagged_high_temperature_bypasses(self):
+        client = FakeClient()
+        client.generate_content("q", "sys", 0.9)
+        client.generate_content("q", "sys", 0.9)
+        assert client.provider.call_count == 2
+
+    def test_tagged_use_case_cached_at_any_temperature(self):
+        client = FakeClient()
+        with ai_cache.use_case("drug_info"):
+            client.generate_content("q", "sys", 0.7)
+            client.generate_content("q", "sys", 0.7)
+        client.provider.assert_called_once()
+
+    def test_empty_answers_not_cached(self):
+        client = FakeClient()
+        client.provider.return_value = ""
+        client.generate_content("q", "sys", 0.2)
+        client.generate_content("q", "sys", 0.2)
+        assert client.provider.call_count == 2
+
+    @override_settings(AI_CACHE_TTLS={"default": 0})
+    def test_zero_ttl_disables_use_case(self):
+        client = FakeClient()
+        client.generate_content("q", "sys", 0.2)
+        client.generate_content("q", "sys", 0.2)
+        assert client.provider.call_count == 2
+
+
+class TestInvalidation:
+    """Entries can be dropped one at a time or per use case."""
+
+    def test_invalidate_single_entry(self):
+        client = FakeClient()
+        client.generate_content("q", "sys", 0.2)
+        digest = ai_cache.cache_key("FakeClient", "test-model", "sys", "q", 0.2)
+
+        ai_cache.get_response_cache().invalidate("default", digest)
+        client.generate_content("q", "sys", 0.2)
+
+        assert client.provider.call_count == 2
+
+    def test_invalidate_use_case_reaches_shared_tier(self):
+        client = FakeClient()
+        with ai_cache.use_case("drug_info"):
+            client.generate_content("aspirin", "sys")
+            client.generate_content("ibuprofen", "sys")
+
+        ai_cache.get_response_cache().invalidate_use_case("drug_info")
+        ai_cache.get_response_cache.cache_clear()
+
+        with ai_cache.use_case("drug_info"):
+            client.generate_content("aspirin", "sys")
+        assert client.provider.call_count == 3
+
+
+class TestLocalLRU:
+    """The L1 tier evicts least recently used and expired entries."""
+
+    def test_evicts_least_recently_used(self):
+        lru = ai_cache.LocalLRUCache(max_entries=2)
+        lru.set("a", "1", 60)
+        lru.set("b", "2", 60)
+        lru.get("a")
+        lru.set("c", "3", 60)
+        assert lru.get("b") is None
+        assert lru.get("a") == "1"
+
+    def test_expired_entry_dropped(self):
+        lru = ai_cache.LocalLRUCache(max_entries=2)
+        lru.set("a", "1", -1)
+        assert lru.get("a") is None
+        assert len(lru) == 0
@@ -0,0 +1,270 @@
+"""
+Tests for AI provider failover, hedged requests and circuit breaking.
+"""
+
+import threading
+import time
+
+import pytest
+from django.core.cache import cache
+
+from src.apps.core import ai_cache, ai_failover, deadline
+from src.apps.core.ai_budget import metered_ai_call
+from src.apps.core.ai_client import (
+    AIConfigurationError,
+    AIRateLimitExceededError,
+    AIServiceUnavailableError,
+    get_ai_client,
+)
+from src.apps.core.ai_failover import FailoverAIClient, LatencyWindow
+
+
+class FakeProvider:
+    """Provider stub with configurable latency and failure."""
+
+    def __init__(self, name, delay=0.0, error=None, configured=True):
+        self.model_name = f"{name}-model"
+        self.delay = delay
+        self.error = error
+        self.configured = configured
+        self.calls = 0
+        self.deadlines = []
+        self._lock = threading.Lock()
+
+    def is_configured(self):
+        return self.configured
+
+    @metered_ai_call
+    def generate_content(self, prompt, system_instruction="", temperature=0.7):
+        with self._lock:
+            self.calls += 1
+        self.deadlines.append(deadline.remaining())
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return f"{self.model_name}: {prompt}"
+
+    def stream_content(self, prompt, system_instruction="", temperature=0.7):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        yield from ["a", "b"]
+
+
+class Primary(FakeProvider):
+    pass
+
+
+class Secondary(FakeProvider):
+    pass
+
+
+class CachedPrimary(FakeProvider):
+    generate_content = ai_cache.cached_ai_call(FakeProvider.generate_content)
+
+
+@pytest.fixture(autouse=True)
+def failover_settings(settings):
+    settings.AI_HEDGE_ENABLED = True
+    settings.AI_HEDGE_DEFAULT_DELAY_SECONDS = 0.05
+    settings.AI_HEDGE_MIN_DELAY_SECONDS = 0.01
+    settings.AI_HEDGE_MIN_SAMPLES = 5
+    settings.AI_BREAKER_FAIL_MAX = 2
+    settings.AI_BREAKER_RESET_SECONDS = 30
+
+
+def _served(provider, path):
+    return ai_failover.AI_SERVED.labels(provider, path)._value.get()
+
+
+class TestLatencyWindow:
+    def test_p95_nearest_rank(self):
+        window = LatencyWindow()
+        for ms in range(1, 101):
+            window.observe(ms / 1000)
+        assert window.quantile(0.95) == pytest.approx(0.095)
+
+    def test_empty(self):
+        assert LatencyWindow().quantile(0.95) is None
+
+
+class TestFailover:
+    """Errors and open circuits move the call to the next provider."""
+
+    def test_primary_serves_when_healthy(self):
+        primary, secondary = Primary("p"), Secondary("s")
+        client = FailoverAIClient([primary, secondary])
+
+        assert client.generate_content("q") == "p-model: q"
+        assert client.model_name == "p-model"
+        assert secondary.calls == 0
+
+    def test_fails_over_on_error(self):
+        before = _served("Secondary", "failover")
+        primary = Primary("p", error=AIServiceUnavailableError("down"))
+        client = FailoverAIClient([primary, Secondary("s")])
+
+        assert client.generate_content("q") == "s-model: q"
+        assert client.model_name == "s-model"
+        assert _served("Secondary", "failover") == before + 1
+
+    def test_open_circuit_skips_provider(self):
+        primary = Primary("p", error=AIServiceUnavailableError("down"))
+        client = FailoverAIClient([primary, Secondary("s")])
+        for _ in range(3):
+            client.generate_content("q")
+
+        assert primary.calls == 2  # breaker opened after fail_max
+
+    def test_all_failed(self):
+        client = FailoverAIClient(
+            [
+                Primary("p", error=AIServiceUnavailableError("p down")),
+                Secondary("s", error=RuntimeError("s down")),
+            ]
+        )
+        with pytest.raises(AIServiceUnavailableError, match="s down"):
+            client.generate_content("q")
+
+    def test_unconfigured_providers_skipped(self):
+        client = FailoverAIClient([Primary("p", configured=False), Secondary("s")])
+        assert client.is_configured()
+        assert client.generate_content("q") == "s-model: q"
+
+    @pytest.mark.parametrize(
+        "error",
+        [AIRateLimitExceededError("limited"), deadline.DeadlineExceeded("late")],
+    )
+    def test_calls_that_never_reached_provider_keep_circuit_closed(self, error):
+        primary = Primary("p", error=error)
+        client = FailoverAIClient([primary, Secondary("s")])
+        for _ in range(3):
+            client.generate_content("q")
+
+        assert primary.calls == 3
+
+    def test_model_name_not_kept_from_previous_call(self):
+        primary = Primary("p", error=AIServiceUnavailableError("down"))
+        secondary = Secondary("s")
+        client = FailoverAIClient([primary, secondary])
+        client.generate_content("q")
+        assert client.model_name == "s-model"
+
+        secondary.error = AIServiceUnavailableError("down")
+        with pytest.raises(AIServiceUnavailableError):
+            client.generate_content("q")
+
+        assert client.model_name == "p-model"
+
+    def test_nothing_configured(self):
+        client = FailoverAIClient([Primary("p", configured=False)])
+        assert not client.is_configured()
+        with pytest.raises(AIConfigurationError):
+            client.generate_content("q")
+
+
+class TestHedging:
+    """A slow primary is raced against the secondary after its p95."""
+
+    def test_hedge_wins_when_primary_slow(self):
+        before = ai_failover.AI_HEDGES.labels("Primary")._value.get()
+        primary, secondary = Primary("p", delay=0.5), Secondary("s")
+        client = FailoverAIClient([primary, secondary])
+
+        start = time.monotonic()
+        assert client.generate_content("q") == "s-model: q"
+        assert time.monotonic() - start < 0.4
+        assert ai_failover.AI_HEDGES.labels("Primary")._value.get() == before + 1
+        assert client.model_name == "s-model"
+
+    def test_no_hedge_within_p95(self):
+        primary, secondary = Primary("p", delay=0.01), Secondary("s")
+        client = FailoverAIClient([primary, secondary])
+
+        for _ in range(3):
+            client.generate_content("q")
+        assert secondary.calls == 0
+
+    def test_hedge_delay_tracks_p95(self, settings):
+        client = FailoverAIClient([Primary("p", delay=0.02), Secondary("s")])
+        provider = client._providers[0]
+        assert provider.hedge_delay() == settings.AI_HEDGE_DEFAULT_DELAY_SECONDS
+        for _ in range(5):
+            client.generate_content("q")
+        assert provider.hedge_delay() == pytest.approx(0.02, abs=0.02)
+
+    def test_cache_hits_not_sampled(self, settings):
+        settings.AI_CACHE_ENABLED = True
+        ai_cache.get_response_cache.cache_clear()
+        cache.clear()
+        client = FailoverAIClient([CachedPrimary("p", delay=0.02), Secondary("s")])
+        for _ in range(6):
+            client.generate_content("q", temperature=0.2)
+
+        assert len(client._providers[0].latency) == 1
+        ai_cache.get_response_cache.cache_clear()
+        cache.clear()
+
+    def test_hedged_calls_keep_request_deadline(self):
+        primary, secondary = Primary("p", delay=0.2), Secondary("s")
+        client = FailoverAIClient([primary, secondary])
+
+        token = deadline.set_deadline(5)
+        try:
+            client.generate_content("q")
+        finally:
+            deadline.request_deadline.reset(token)
+
+        assert secondary.deadlines[0] is not None
+        assert secondary.deadlines[0] <= 5
+
+    def test_hedging_disabled(self, settings):
+        settings.AI_HEDGE_ENABLED = False
+        primary, secondary = Primary("p", delay=0.1), Secondary("s")
+        client = FailoverAIClient([primary, secondary])
+
+        assert client.generate_content("q") == "p-model: q"
+        assert secondary.calls == 0
+
+
+class TestStreamFailover:
+    """Streams switch provider only before the first chunk."""
+
+    def test_fails_over_before_first_chunk(self):
+        primary = Primary("p", error=AIServiceUnavailableError("down"))
+        client = FailoverAIClient([primary, Secondary("s")])
+
+        assert list(client.stream_content("q")) == ["a", "b"]
+        assert client.model_name == "s-model"
+
+
+class TestProviderSelection:
+    def test_single_provider_returned_directly(self, settings):
+        settings.AI_PROVIDERS = ["GeminiClient"]
+        get_ai_client.cache_clear()
+        try:
+            assert type(get_ai_client()).__name__ == "GeminiClient"
+        finally:
+            get_ai_client.cache_clear()
+
+    def test_several_providers_wrapped(self, settings):
+        settings.AI_PROVIDERS = ["GeminiClient", "OpenAIClient"]
+        get_ai_client.cache_clear()
+        try:
+            client = get_ai_client()
+            assert isinstance(client, FailoverAIClient)
+            assert [type(p).__name__ for p in client.providers] == [
+                "GeminiClient",
+                "OpenAIClient",
+            ]
+        finally:
+            get_ai_client.cache_clear()
+
+    def test_unknown_provider_rejected(self, settings):
+        settings.AI_PROVIDERS = ["Nope", "GeminiClient"]
+        get_ai_client.cache_clear()
+        try:
+            with pytest.raises(AIConfigurationError, match="Nope"):
+                get_ai_client()
+        finally:
+            get_ai_client.cache_clear()
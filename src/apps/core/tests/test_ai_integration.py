@@ -57,6 +57,7 @@ class TestAIClient:
             OpenAIClient,
             get_ai_client,
         )
+        from src.apps.core.ai_failover import FailoverAIClient
 
         get_ai_client.cache_clear()
         # Determine the active client type first
@@ -94,6 +95,19 @@ class TestAIClient:
             client = get_ai_client()
             assert client.is_configured() is False
 
+        elif isinstance(initial_client, FailoverAIClient):
+            settings.GEMINI_API_KEY = None
+            settings.OPENAI_API_KEY = None
+            settings.AZURE_OPENAI_API_KEY = "test-azure-key"
+            settings.AZURE_OPENAI_ENDPOINT = "https://test.openai.azure.com"
+            client = get_ai_client()
+            assert client.is_configured() is True
+
+            get_ai_client.cache_clear()
+            settings.AZURE_OPENAI_API_KEY = None
+            client = get_ai_client()
+            assert client.is_configured() is False
+
 
 # --- Pharmacy AI Tests ---
 
@@ -0,0 +1,167 @@
+"""
+Tests for asynchronous AI jobs (202 + job id, status polling).
+"""
+
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from src.apps.core import ai_jobs
+from src.apps.core.tasks import run_ai_job
+from src.apps.pharmacy.ai_service import DrugInfoResponse
+
+User = get_user_model()
+
+DRUG_INFO_URL = "/api/v1/pharmacy/ai/drug-info/"
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def doctor():
+    user = User.objects.create_user(username="async_doc", password="password")
+    group, _ = Group.objects.get_or_create(name="Doctors")
+    user.groups.add(group)
+    return user
+
+
+@pytest.fixture
+def doctor_client(doctor):
+    client = APIClient()
+    client.force_authenticate(user=doctor)
+    return client
+
+
+def _drug_info(success=True):
+    return DrugInfoResponse(
+        medication_name="Metformin",
+        information="Biguanide" if success else "",
+        model_used="test-model" if success else "",
+        success=success,
+        error_message=None if success else "AI service error: quota",
+    )
+
+
+@pytest.mark.django_db
+class TestAsyncSubmission:
+    """Prefer: respond-async returns 202 and the job runs on the worker."""
+
+    @patch("src.apps.pharmacy.ai_service.get_drug_information")
+    def test_submit_and_fetch_result(self, mock_info, doctor_client):
+        mock_info.return_value = _drug_info()
+
+        response = doctor_client.post(
+            DRUG_INFO_URL,
+            {"medication_name": "Metformin"},
+            format="json",
+            HTTP_PREFER="respond-async",
+        )
+
+        assert response.status_code == 202
+        job_id = response.data["job_id"]
+        assert response["Location"].endswith(f"/api/v1/ai/jobs/{job_id}/")
+
+        status_response = doctor_client.get(f"/api/v1/ai/jobs/{job_id}/")
+        assert status_response.status_code == 200
+        assert status_response.data["status"] == ai_jobs.SUCCEEDED
+        assert status_response.data["result"]["information"] == "Biguanide"
+        assert "params" not in status_response.data
+
+    @patch("src.apps.core.tasks.run_ai_job.apply_async")
+    def test_job_queued_on_ai_queue(self, mock_apply, doctor_client, settings):
+        response = doctor_client.post(
+            f"{DRUG_INFO_URL}?async=true", {"medication_name": "Metformin"}
+        )
+
+        assert response.status_code == 202
+        assert mock_apply.call_args.kwargs["queue"] == settings.AI_JOB_QUEUE
+        assert mock_apply.call_args.kwargs["args"] == [response.data["job_id"]]
+
+    @patch("src.apps.pharmacy.ai_service.get_drug_information")
+    def test_sync_mode_unchanged(self, mock_info, doctor_client):
+        mock_info.return_value = _drug_info()
+
+        response = doctor_client.post(
+            DRUG_INFO_URL, {"medication_name": "Metformin"}, format="json"
+        )
+
+        assert response.status_code == 200
+        assert response.data["information"] == "Biguanide"
+
+
+@pytest.mark.django_db
+class TestJobExecution:
+    """run_ai_job records success and failure in the job record."""
+
+    @patch("src.apps.pharmacy.ai_service.get_drug_information")
+    def test_handler_error_marks_job_failed(self, mock_info):
+        mock_info.return_value = _drug_info(success=False)
+        with patch("src.apps.core.tasks.run_ai_job.apply_async"):
+            job_id = ai_jobs.submit_job("drug_info", {"medication_name": "X"}, None)
+
+        assert run_ai_job(job_id) == ai_jobs.FAILED
+        job = ai_jobs.get_job(job_id)
+        assert job["error"] == "AI service error: quota"
+
+    def test_expired_job_skipped(self):
+        assert run_ai_job("missing") == "expired"
+
+    def test_unknown_kind_rejected(self):
+        with pytest.raises(ValueError):
+            ai_jobs.submit_job("unknown", {}, None)
+
+
+@pytest.mark.django_db
+class TestStatusEndpoint:
+    """Only the owner sees the job; pending jobs can be long-polled."""
+
+    def _pending_job(self, owner_id):
+        with patch("src.apps.core.tasks.run_ai_job.apply_async"):
+            return ai_jobs.submit_job("drug_info", {"medication_name": "X"}, owner_id)
+
+    def test_other_users_get_404(self, doctor):
+        job_id = self._pending_job(doctor.id)
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user(username="other"))
+
+        assert other.get(f"/api/v1/ai/jobs/{job_id}/").status_code == 404
+
+    def test_pending_job_has_retry_after(self, doctor, doctor_client):
+        job_id = self._pending_job(doctor.id)
+
+        response = doctor_client.get(f"/api/v1/ai/jobs/{job_id}/")
+
+        assert response.data["status"] == ai_jobs.PENDING
+        assert response["Retry-After"] == "1"
+
+    def test_long_poll_returns_when_job_finishes(self, doctor):
+        job_id = self._pending_job(doctor.id)
+        job = ai_jobs.get_job(job_id)
+        calls = {"n": 0}
+        real_get_job = ai_jobs.get_job
+
+        def finishing_get_job(requested_id):
+            calls["n"] += 1
+            if calls["n"] == 3:
+                job.update(status=ai_jobs.SUCCEEDED, result={"ok": True})
+                ai_jobs.save_job(job)
+            return real_get_job(requested_id)
+
+        with patch.object(ai_jobs, "get_job", side_effect=finishing_get_job):
+            finished = ai_jobs.wait_for_job(job_id, timeout=5)
+
+        assert finished["status"] == ai_jobs.SUCCEEDED
+        assert calls["n"] == 3
+
+    def test_long_poll_times_out(self, doctor):
+        job_id = self._pending_job(doctor.id)
+        assert ai_jobs.wait_for_job(job_id, timeout=0.05)["status"] == ai_jobs.PENDING
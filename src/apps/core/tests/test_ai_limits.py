@@ -0,0 +1,206 @@
+"""
+Tests for AI provider rate limiting and single-flight coalescing.
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+
+from src.apps.core import ai_limits
+from src.apps.core.ai_client import AIServiceUnavailableError
+
+
+class FakeClient:
+    """Provider stub recording calls behind the throttle and coalescer."""
+
+    model_name = "test-model"
+
+    def __init__(self, delay=0.0, error=None):
+        self.calls = 0
+        self.delay = delay
+        self.error = error
+        self._lock = threading.Lock()
+
+    @ai_limits.coalesced_ai_call
+    @ai_limits.throttled_ai_call
+    def generate_content(self, prompt, system_instruction="", temperature=0.7):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return f"answer to {prompt}"
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    """Use a new local bucket and an empty cache for each test."""
+    monkeypatch.setattr(ai_limits, "_bucket", ai_limits.LocalTokenBucket())
+    cache.clear()
+    yield
+    cache.clear()
+
+
+class TestTokenBucket:
+    """Bucket refill and burst behaviour."""
+
+    def test_burst_then_wait(self):
+        bucket = ai_limits.LocalTokenBucket()
+        assert bucket.take("k", rate=1.0, capacity=2) == 0
+        assert bucket.take("k", rate=1.0, capacity=2) == 0
+        assert bucket.take("k", rate=1.0, capacity=2) == pytest.approx(1.0, abs=0.05)
+
+    def test_refills_over_time(self):
+        bucket = ai_limits.LocalTokenBucket()
+        bucket.take("k", rate=100.0, capacity=1)
+        time.sleep(0.02)
+        assert bucket.take("k", rate=100.0, capacity=1) == 0
+
+    @override_settings(
+        AI_RATE_LIMITS={
+            "default": {"rpm": 60, "burst": 10},
+            "GeminiClient": {"rpm": 15, "burst": 3},
+            "GeminiClient:models/pro": {"rpm": 2, "burst": 1},
+        }
+    )
+    def test_limits_lookup_order(self):
+        assert ai_limits.limits_for("GeminiClient", "models/pro") == (2 / 60, 1)
+        assert ai_limits.limits_for("GeminiClient", "flash") == (15 / 60, 3)
+        assert ai_limits.limits_for("OpenAIClient", "gpt") == (1.0, 10)
+
+
+class TestThrottle:
+    """Calls queue for a token and fail once the wait budget is spent."""
+
+    @pytest.fixture(autouse=True)
+    def enabled(self, settings):
+        settings.AI_RATE_LIMIT_ENABLED = True
+        settings.AI_RATE_LIMITS = {"default": {"rpm": 600, "burst": 1}}
+
+    def test_second_call_queues_for_token(self):
+        client = FakeClient()
+        client.generate_content("a")
+        start = time.monotonic()
+        client.generate_content("b")
+        assert time.monotonic() - start >= 0.09
+        assert client.calls == 2
+
+    def test_rejected_when_wait_exceeds_budget(self, settings):
+        settings.AI_RATE_LIMIT_MAX_WAIT_SECONDS = 0.01
+        client = FakeClient()
+        client.generate_content("a")
+        with pytest.raises(AIServiceUnavailableError, match="rate limit"):
+            client.generate_content("b")
+        assert client.calls == 1
+
+    def test_limiter_outage_fails_open(self):
+        client = FakeClient()
+        with patch.object(ai_limits, "get_bucket", side_effect=ConnectionError):
+            client.generate_content("a")
+            client.generate_content("b")
+        assert client.calls == 2
+
+
+class TestSingleFlight:
+    """Concurrent identical prompts share one provider call."""
+
+    @pytest.fixture(autouse=True)
+    def enabled(self, settings):
+        settings.AI_SINGLE_FLIGHT_ENABLED = True
+
+    def _concurrently(self, client, prompts):
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda p=p: results.append(client.generate_content(p))
+            )
+            for p in prompts
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+        return results
+
+    def test_identical_prompts_coalesced_in_process(self):
+        client = FakeClient(delay=0.1)
+        results = self._concurrently(client, ["same"] * 5)
+        assert results == ["answer to same"] * 5
+        assert client.calls == 1
+
+    def test_different_prompts_not_coalesced(self):
+        client = FakeClient(delay=0.05)
+        self._concurrently(client, ["a", "b"])
+        assert client.calls == 2
+
+    def test_leader_error_shared_with_followers(self):
+        client = FakeClient(delay=0.1, error=AIServiceUnavailableError("quota"))
+        errors = []
+
+        def call():
+            try:
+                client.generate_content("same")
+            except AIServiceUnavailableError as e:
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+        assert errors == ["quota"] * 3
+        assert client.calls == 1
+
+    def test_waits_for_result_from_other_worker(self):
+        key = ai_limits.cache_key("FakeClient", "test-model", "", "same", 0.7)
+        cache.add(f"ai:flight:{key}", "f2", 60)  # another worker holds the lock
+
+        def publish():
+            time.sleep(0.1)
+            cache.set(f"ai:flight:{key}:f2", {"value": "from worker 2"}, 30)
+
+        threading.Thread(target=publish).start()
+        client = FakeClient()
+
+        assert client.generate_content("same") == "from worker 2"
+        assert client.calls == 0
+
+    def test_takes_over_when_other_worker_vanishes(self):
+        key = ai_limits.cache_key("FakeClient", "test-model", "", "same", 0.7)
+        cache.add(f"ai:flight:{key}", "f2", 60)
+        threading.Timer(0.1, cache.delete, args=[f"ai:flight:{key}"]).start()
+        client = FakeClient()
+
+        assert client.generate_content("same") == "answer to same"
+        assert client.calls == 1
+
+    def test_ignores_result_of_earlier_flight(self):
+        key = ai_limits.cache_key("FakeClient", "test-model", "", "same", 0.7)
+        cache.set(f"ai:flight:{key}:f1", {"error": "stale quota error"}, 5)
+        cache.add(f"ai:flight:{key}", "f2", 60)
+
+        def publish():
+            time.sleep(0.1)
+            cache.set(f"ai:flight:{key}:f2", {"value": "from worker 2"}, 30)
+
+        threading.Thread(target=publish).start()
+
+        assert FakeClient().generate_content("same") == "from worker 2"
+
+    def test_failed_flight_not_served_to_next_flight(self, monkeypatch):
+        client = FakeClient(error=AIServiceUnavailableError("quota"))
+        with pytest.raises(AIServiceUnavailableError):
+            client.generate_content("same")
+        client.error, client.delay = None, 0.2
+        leader = threading.Thread(target=client.generate_content, args=["same"])
+        leader.start()
+        time.sleep(0.05)
+        # Wait through the cache like another worker would
+        monkeypatch.setattr(ai_limits.single_flight, "_calls", {})
+
+        assert FakeClient().generate_content("same") == "answer to same"
+        leader.join(timeout=5)
@@ -0,0 +1,106 @@
+"""
+Tests for the deterministic local AI provider stand-in.
+"""
+
+import time
+
+import pytest
+from rest_framework.test import APIClient
+
+from src.apps.core.ai_client import (
+    AIServiceUnavailableError,
+    LocalAIClient,
+    get_ai_client,
+)
+
+
+@pytest.fixture(autouse=True)
+def local_settings(settings):
+    settings.AI_LOCAL_LATENCY_DISTRIBUTION = "fixed"
+    settings.AI_LOCAL_LATENCY_MEDIAN_SECONDS = 0.0
+    settings.AI_LOCAL_ERROR_RATE = 0.0
+    settings.AI_LOCAL_RATE_LIMIT_RATE = 0.0
+    settings.AI_LOCAL_RESPONSE_WORDS = 30
+    settings.AI_LOCAL_SEED = 7
+
+
+class TestOutput:
+    """Identical prompts give identical answers, without a network."""
+
+    def test_deterministic(self):
+        assert LocalAIClient().generate_content("Metformin") == (
+            LocalAIClient().generate_content("Metformin")
+        )
+
+    def test_varies_with_prompt(self):
+        client = LocalAIClient()
+        assert client.generate_content("Metformin") != client.generate_content(
+            "Warfarin"
+        )
+
+    def test_response_length(self):
+        answer = LocalAIClient().generate_content("Metformin")
+        assert answer.startswith("Summary for: Metformin")
+        assert len(answer.split("\n\n", 1)[1].split()) == 30
+
+    def test_stream_matches_blocking_answer(self):
+        client = LocalAIClient()
+        chunks = list(client.stream_content("Metformin", "sys"))
+        assert len(chunks) > 1
+        assert "".join(chunks) == client.generate_content("Metformin", "sys")
+
+
+class TestInjection:
+    """Latency, errors and rate limits follow the AI_LOCAL_* settings."""
+
+    def test_fixed_latency(self, settings):
+        settings.AI_LOCAL_LATENCY_MEDIAN_SECONDS = 0.05
+        start = time.monotonic()
+        LocalAIClient().generate_content("q")
+        assert time.monotonic() - start >= 0.05
+
+    def test_lognormal_latency_is_seeded(self, settings):
+        settings.AI_LOCAL_LATENCY_DISTRIBUTION = "lognormal"
+        settings.AI_LOCAL_LATENCY_MEDIAN_SECONDS = 1.0
+        first = [LocalAIClient().sample_latency() for _ in range(3)]
+        client = LocalAIClient()
+        samples = [client.sample_latency() for _ in range(1000)]
+
+        assert first == [first[0]] * 3
+        assert sorted(samples)[500] == pytest.approx(1.0, rel=0.15)
+
+    def test_error_rate(self, settings):
+        settings.AI_LOCAL_ERROR_RATE = 1.0
+        with pytest.raises(AIServiceUnavailableError, match="overloaded"):
+            LocalAIClient().generate_content("q")
+
+    def test_rate_limit_responses(self, settings):
+        settings.AI_LOCAL_RATE_LIMIT_RATE = 1.0
+        with pytest.raises(AIServiceUnavailableError, match="429"):
+            list(LocalAIClient().stream_content("q"))
+
+    def test_timeout_when_latency_exceeds_budget(self, settings):
+        settings.AI_LOCAL_LATENCY_MEDIAN_SECONDS = 0.2
+        settings.AI_REQUEST_TIMEOUT_SECONDS = 0.01
+        with pytest.raises(AIServiceUnavailableError, match="timed out"):
+            LocalAIClient().generate_content("q")
+
+
+@pytest.mark.django_db
+def test_selected_via_settings(settings, django_user_model):
+    settings.AI_PROVIDERS = ["LocalAIClient"]
+    get_ai_client.cache_clear()
+    user = django_user_model.objects.create_user(username="local_ai_user")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    try:
+        response = client.post(
+            "/api/v1/experience/ai/analyze/",
+            {"feedback_text": "Long wait, kind staff", "rating": 3},
+            format="json",
+        )
+    finally:
+        get_ai_client.cache_clear()
+
+    assert response.status_code == 200
+    assert response.data["model_used"] == "local-stub"
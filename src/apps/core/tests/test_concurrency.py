@@ -0,0 +1,240 @@
+"""
+Tests for the adaptive concurrency limiter and load-shedding middleware.
+"""
+
+import threading
+import time
+
+import pytest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, override_settings
+
+from src.apps.core.concurrency import (
+    AdaptiveConcurrencyLimiter,
+    Priority,
+    PriorityPolicy,
+    classify,
+)
+from src.apps.core.middleware import ConcurrencyLimitMiddleware
+
+POLICIES = {
+    Priority.CRITICAL: PriorityPolicy(share=1.0, queue_timeout=1.0, retry_after=1),
+    Priority.NORMAL: PriorityPolicy(share=0.5, queue_timeout=0.05, retry_after=2),
+    Priority.LOW: PriorityPolicy(share=0.25, queue_timeout=0, retry_after=10),
+}
+
+
+def _limiter(**kwargs):
+    options = {"initial_limit": 4, "min_limit": 1, "max_limit": 10}
+    options.update(kwargs)
+    return AdaptiveConcurrencyLimiter(POLICIES, **options)
+
+
+def _occupy(limiter, slots):
+    """Hold slots so the limit counts as used."""
+    for _ in range(slots):
+        limiter.acquire(Priority.CRITICAL)
+
+
+class TestAIMD:
+    """The limit grows while healthy and backs off on congestion."""
+
+    def test_additive_increase_when_utilized(self):
+        limiter = _limiter()
+        for _ in range(4):
+            limiter.acquire(Priority.CRITICAL)
+        limiter.release(0.01)
+        assert limiter.limit == pytest.approx(4.25)
+
+    def test_no_increase_when_idle(self):
+        limiter = _limiter()
+        limiter.acquire(Priority.CRITICAL)
+        limiter.release(0.01)
+        assert limiter.limit == 4
+
+    def test_multiplicative_decrease_on_slow_sample(self):
+        limiter = _limiter(latency_floor=0.0, backoff_ratio=0.5)
+        _occupy(limiter, 2)
+        limiter.acquire(Priority.CRITICAL)
+        limiter.release(0.01)
+        limiter.acquire(Priority.CRITICAL)
+        limiter.release(0.5)
+        assert limiter.limit == pytest.approx(2.125)
+
+    def test_one_decrease_per_round_trip(self):
+        limiter = _limiter(backoff_ratio=0.5)
+        _occupy(limiter, 2)
+        for _ in range(3):
+            limiter.acquire(Priority.CRITICAL)
+            limiter.release(10.0, dropped=True)
+        assert limiter.limit == 2
+
+    def test_limit_never_below_minimum(self):
+        limiter = _limiter(min_limit=3, backoff_ratio=0.1)
+        _occupy(limiter, 2)
+        limiter.acquire(Priority.CRITICAL)
+        limiter.release(10.0, dropped=True)
+        assert limiter.limit == 3
+
+    def test_no_decrease_when_idle(self):
+        limiter = _limiter(latency_floor=0.0, backoff_ratio=0.5)
+        for latency in (0.01, 0.5, 0.5):
+            limiter.acquire(Priority.CRITICAL)
+            limiter.release(latency, dropped=latency > 0.1)
+        assert limiter.limit == 4
+
+    def test_slow_route_compared_with_its_own_baseline(self):
+        limiter = _limiter(initial_limit=8, max_limit=8)
+        _occupy(limiter, 3)
+        for _ in range(100):
+            for route, latency in (("/fast/", 0.008), ("/list/", 0.12)):
+                limiter.acquire(Priority.NORMAL)
+                limiter.release(latency, route=route)
+        assert limiter.limit == 8
+
+        limiter.acquire(Priority.NORMAL)
+        limiter.release(0.3, route="/list/")
+        assert limiter.limit < 8
+
+    def test_samples_without_latency_leave_limit_unchanged(self):
+        limiter = _limiter(backoff_ratio=0.5)
+        for _ in range(5):
+            limiter.acquire(Priority.LOW)
+            limiter.release(None, dropped=True)
+        assert limiter.limit == 4
+        assert limiter.in_flight == 0
+
+
+class TestAdmission:
+    """Priority shares, queueing and shedding."""
+
+    def test_low_priority_limited_to_its_share(self):
+        limiter = _limiter()
+        assert limiter.acquire(Priority.LOW)
+        assert not limiter.acquire(Priority.LOW)
+        assert limiter.acquire(Priority.CRITICAL)
+
+    def test_normal_waits_then_sheds(self):
+        limiter = _limiter()
+        assert limiter.acquire(Priority.NORMAL)
+        assert limiter.acquire(Priority.NORMAL)
+
+        start = time.monotonic()
+        assert not limiter.acquire(Priority.NORMAL)
+        assert time.monotonic() - start >= 0.05
+        assert limiter.waiting[Priority.NORMAL] == 0
+
+    def test_queued_request_admitted_on_release(self):
+        limiter = _limiter(initial_limit=1)
+        assert limiter.acquire(Priority.CRITICAL)
+        admitted = []
+        waiter = threading.Thread(
+            target=lambda: admitted.append(limiter.acquire(Priority.CRITICAL))
+        )
+        waiter.start()
+        time.sleep(0.02)
+        limiter.release(None)
+        waiter.join(timeout=1)
+        assert admitted == [True]
+
+    def test_lower_priority_yields_to_waiting_critical(self):
+        limiter = _limiter()
+        limiter.waiting[Priority.CRITICAL] = 1
+        assert not limiter.acquire(Priority.LOW)
+
+    def test_queue_full_sheds_immediately(self):
+        limiter = _limiter(initial_limit=1, max_queue=0)
+        assert limiter.acquire(Priority.CRITICAL)
+        assert not limiter.acquire(Priority.CRITICAL)
+
+
+class TestClassify:
+    """Requests are mapped to priorities by route and method."""
+
+    def test_clinical_write_is_critical(self):
+        assert classify("POST", "/api/v1/pharmacy/dispensations/") is Priority.CRITICAL
+
+    def test_clinical_read_is_normal(self):
+        assert classify("GET", "/api/v1/pharmacy/dispensations/") is Priority.NORMAL
+
+    def test_ai_route_is_low(self):
+        assert classify("POST", "/api/v1/pharmacy/ai/drug-info/") is Priority.LOW
+
+
+class TestMiddleware:
+    """Shed requests get 503 with Retry-After; exempt paths bypass the limit."""
+
+    def _middleware(self):
+        middleware = ConcurrencyLimitMiddleware(lambda request: HttpResponse())
+        middleware.limiter = _limiter(initial_limit=1)
+        return middleware
+
+    def test_shed_returns_503_with_retry_after(self):
+        middleware = self._middleware()
+        middleware.limiter.acquire(Priority.CRITICAL)
+
+        response = middleware(RequestFactory().post("/api/v1/pharmacy/ai/drug-info/"))
+
+        assert response.status_code == 503
+        assert response["Retry-After"] == "10"
+
+    def test_slot_released_after_response(self):
+        middleware = self._middleware()
+
+        response = middleware(RequestFactory().get("/api/v1/patients/"))
+
+        assert response.status_code == 200
+        assert middleware.limiter.in_flight == 0
+
+    def test_health_check_exempt(self):
+        middleware = self._middleware()
+        middleware.limiter.acquire(Priority.CRITICAL)
+
+        assert middleware(RequestFactory().get("/health/")).status_code == 200
+
+    def test_low_priority_errors_do_not_shrink_limit(self):
+        middleware = ConcurrencyLimitMiddleware(
+            lambda request: HttpResponse(status=503)
+        )
+        middleware.limiter = _limiter()
+
+        for _ in range(10):
+            response = middleware(
+                RequestFactory().post("/api/v1/pharmacy/ai/drug-info/")
+            )
+            assert response.status_code == 503
+
+        assert middleware.limiter.limit == 4
+        assert middleware.limiter.in_flight == 0
+
+    def test_normal_priority_errors_shrink_limit(self):
+        middleware = ConcurrencyLimitMiddleware(
+            lambda request: HttpResponse(status=503)
+        )
+        middleware.limiter = _limiter(backoff_ratio=0.5)
+        _occupy(middleware.limiter, 1)
+
+        middleware(RequestFactory().get("/api/v1/patients/"))
+
+        assert middleware.limiter.limit == 2
+
+    def test_streaming_response_holds_slot_until_closed(self):
+        middleware = ConcurrencyLimitMiddleware(
+            lambda request: StreamingHttpResponse(iter(["data: 1\n\n"]))
+        )
+        middleware.limiter = _limiter()
+
+        response = middleware(RequestFactory().get("/api/v1/patients/"))
+
+        assert middleware.limiter.in_flight == 1
+        response.close()
+        response.close()
+        assert middleware.limiter.in_flight == 0
+        assert middleware.limiter.limit == 4
+
+    @override_settings(CONCURRENCY_LIMIT_ENABLED=False)
+    def test_disabled(self):
+        middleware = ConcurrencyLimitMiddleware(lambda request: HttpResponse())
+        middleware.limiter.in_flight = 10**6
+
+        assert middleware(RequestFactory().get("/api/v1/patients/")).status_code == 200
@@ -0,0 +1,216 @@
+"""
+Tests for cooperative request deadlines and TimeoutMiddleware.
+"""
+
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, Mock
+
+import pytest
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from src.apps.core import deadline
+from src.apps.core.ai_client import AzureClient
+from src.apps.core.middleware import TimeoutMiddleware
+from src.apps.core.services.grpc_client import AuditGRPCClient
+
+
+@pytest.fixture
+def budget():
+    """Run the test body under a deadline of the given seconds."""
+    tokens = []
+
+    def _set(seconds):
+        tokens.append(deadline.set_deadline(seconds))
+
+    yield _set
+    for token in reversed(tokens):
+        deadline.request_deadline.reset(token)
+
+
+class TestBudgets:
+    """Route budgets and header parsing."""
+
+    @override_settings(
+        REQUEST_DEADLINE_DEFAULT_SECONDS=30,
+        REQUEST_DEADLINE_ROUTES={"/api/v1/": 10, "/api/v1/pharmacy/ai/": 50},
+    )
+    def test_longest_prefix_wins(self):
+        assert deadline.budget_for_path("/api/v1/pharmacy/ai/drug-info/") == 50
+        assert deadline.budget_for_path("/api/v1/patients/") == 10
+        assert deadline.budget_for_path("/admin/") == 30
+
+    @pytest.mark.parametrize(
+        "value,expected", [("2.5", 2.5), ("0", 0.0), ("-1", None), ("soon", None)]
+    )
+    def test_parse_header(self, value, expected):
+        assert deadline.parse_deadline_header(value) == expected
+
+    def test_bounded_timeout(self, budget):
+        assert deadline.bounded_timeout(5) == 5
+        budget(1)
+        assert deadline.bounded_timeout(5) <= 1
+        budget(-1)
+        with pytest.raises(deadline.DeadlineExceeded):
+            deadline.bounded_timeout(5)
+
+
+class TestOutboundTimeouts:
+    """gRPC and AI calls use the remaining budget as their timeout."""
+
+    def test_grpc_timeout_is_capped(self, budget):
+        client = AuditGRPCClient(timeout=5)
+        client.stub = Mock()
+        client.stub.LogEvent.return_value = SimpleNamespace(event_id="evt")
+        budget(0.5)
+
+        client.log_event(actor_id="USER-1", action="LOGIN")
+
+        assert client.stub.LogEvent.call_args.kwargs["timeout"] <= 0.5
+
+    def test_grpc_call_not_started_when_expired(self, budget):
+        client = AuditGRPCClient()
+        client.stub = Mock()
+        budget(-1)
+
+        with pytest.raises(deadline.DeadlineExceeded):
+            client.log_event(actor_id="USER-1", action="LOGIN")
+        client.stub.LogEvent.assert_not_called()
+
+    def test_ai_http_timeout_is_capped(self, budget):
+        client = AzureClient()
+        client._client = MagicMock()
+        client._client.chat.completions.create.return_value.choices = [
+            SimpleNamespace(message=SimpleNamespace(content="ok"))
+        ]
+        budget(2)
+
+        assert client.generate_content("hello") == "ok"
+
+        kwargs = client._client.chat.completions.create.call_args.kwargs
+        assert 0 < kwargs["timeout"] <= 2
+
+
+@pytest.mark.django_db
+class TestDatabaseDeadline:
+    """Queries are refused once the budget is spent."""
+
+    def test_query_refused_after_deadline(self, budget):
+        budget(-1)
+        with connection.execute_wrapper(deadline.db_deadline_wrapper):
+            with pytest.raises(deadline.DeadlineExceeded):
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+
+    def test_postgres_statement_timeout_set_once_within_slack(self, budget):
+        raw_cursor = MagicMock()
+        fake_connection = SimpleNamespace(
+            vendor="postgresql",
+            connection=Mock(cursor=Mock(return_value=raw_cursor)),
+        )
+        execute = Mock(return_value="rows")
+        budget(10)
+
+        context = {"connection": fake_connection}
+        for _ in range(3):
+            assert (
+                deadline.db_deadline_wrapper(execute, "SELECT 1", None, False, context)
+                == "rows"
+            )
+
+        set_calls = raw_cursor.__enter__.return_value.execute.call_args_list
+        assert len(set_calls) == 1
+        assert set_calls[0].args[0] == "SET statement_timeout = %s"
+        assert 9000 < set_calls[0].args[1][0] <= 10000
+
+
+@pytest.mark.django_db
+class TestTimeoutMiddleware:
+    """The middleware sets, enforces and clears the deadline."""
+
+    def _run(self, request, view):
+        middleware = TimeoutMiddleware(get_response=lambda r: HttpResponse())
+        middleware.process_request(request)
+        response = middleware.process_view(request, view, (), {})
+        if response is None:
+            try:
+                response = view(request)
+            except Exception as exc:
+                response = middleware.process_exception(request, exc)
+                if response is None:
+                    raise
+        return middleware.process_response(request, response)
+
+    def test_deadline_active_during_view_and_cleared_after(self):
+        seen = {}
+
+        def view(request):
+            seen["remaining"] = deadline.remaining()
+            return HttpResponse()
+
+        response = self._run(RequestFactory().get("/api/v1/patients/"), view)
+
+        assert response.status_code == 200
+        assert 0 < seen["remaining"] <= 30
+        assert deadline.remaining() is None
+
+    def test_header_can_only_shorten_budget(self):
+        seen = {}
+
+        def view(request):
+            seen["remaining"] = deadline.remaining()
+            return HttpResponse()
+
+        request = RequestFactory().get(
+            "/api/v1/patients/", HTTP_X_REQUEST_DEADLINE="0.8"
+        )
+        self._run(request, view)
+        assert seen["remaining"] <= 0.8
+
+        request = RequestFactory().get(
+            "/api/v1/patients/", HTTP_X_REQUEST_DEADLINE="3600"
+        )
+        self._run(request, view)
+        assert seen["remaining"] <= 30
+
+    def test_expired_header_rejected_before_view(self):
+        view = Mock()
+        request = RequestFactory().get("/api/v1/patients/", HTTP_X_REQUEST_DEADLINE="0")
+
+        response = self._run(request, view)
+
+        assert response.status_code == 504
+        view.assert_not_called()
+
+    def test_deadline_exception_becomes_504(self):
+        def view(request):
+            time.sleep(0.02)
+            deadline.bounded_timeout(1)
+            return HttpResponse()
+
+        request = RequestFactory().get(
+            "/api/v1/patients/", HTTP_X_REQUEST_DEADLINE="0.01"
+        )
+        response = self._run(request, view)
+
+        assert response.status_code == 504
+
+    def test_overrun_5xx_mapped_to_504(self):
+        def view(request):
+            time.sleep(0.02)
+            return HttpResponse(status=503)
+
+        request = RequestFactory().get(
+            "/api/v1/patients/", HTTP_X_REQUEST_DEADLINE="0.01"
+        )
+        response = self._run(request, view)
+        assert response.status_code == 504
+
+    def test_in_budget_errors_unchanged(self):
+        response = self._run(
+            RequestFactory().get("/api/v1/patients/"),
+            lambda request: HttpResponse(status=503),
+        )
+        assert response.status_code == 503
@@ -0,0 +1,123 @@
+"""
+Tests for structured logging utilities.
+
+Covers the orjson formatter and the queue-backed asynchronous handler.
+"""
+
+import io
+import json
+import logging
+import os
+
+from src.apps.core.logging import (
+    CorrelationIDFilter,
+    OrjsonFormatter,
+    QueueListenerHandler,
+    correlation_id_context,
+)
+
+
+def _make_record(msg="hello %s", args=("world",), **extra):
+    record = logging.LogRecord("src.test", logging.INFO, __file__, 10, msg, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+class TestOrjsonFormatter:
+    """Test JSON output of OrjsonFormatter."""
+
+    def test_formats_message_and_standard_fields(self):
+        """Test that the rendered message and metadata are serialized."""
+        payload = json.loads(OrjsonFormatter().format(_make_record()))
+
+        assert payload["message"] == "hello world"
+        assert payload["level"] == "INFO"
+        assert payload["logger"] == "src.test"
+        assert payload["timestamp"].endswith("+00:00")
+
+    def test_extra_fields_are_top_level_keys(self):
+        """Test that extra= fields are emitted as structured keys."""
+        record = _make_record(status_code=200, query_params={"page": "1"})
+
+        payload = json.loads(OrjsonFormatter().format(record))
+
+        assert payload["status_code"] == 200
+        assert payload["query_params"] == {"page": "1"}
+        assert "args" not in payload
+        assert "msg" not in payload
+
+    def test_non_serializable_values_fall_back_to_str(self):
+        """Test that unknown types do not break formatting."""
+        record = _make_record(obj=object())
+
+        payload = json.loads(OrjsonFormatter().format(record))
+
+        assert payload["obj"].startswith("<object object")
+
+
+class TestCorrelationIDFilter:
+    """Test correlation ID injection."""
+
+    def test_keeps_explicit_correlation_id(self):
+        """Test that an explicit correlation_id is not overwritten."""
+        token = correlation_id_context.set("from-context")
+        try:
+            record = _make_record(correlation_id="explicit")
+            CorrelationIDFilter().filter(record)
+        finally:
+            correlation_id_context.reset(token)
+
+        assert record.correlation_id == "explicit"
+
+
+class TestQueueListenerHandler:
+    """Test the asynchronous queue handler."""
+
+    def test_records_are_written_by_listener(self):
+        """Test that records reach the target handler after flushing."""
+        stream = io.StringIO()
+        target = logging.StreamHandler(stream)
+        target.setFormatter(OrjsonFormatter())
+        handler = QueueListenerHandler([target])
+
+        try:
+            handler.handle(_make_record(status_code=503))
+        finally:
+            handler.stop()
+
+        payload = json.loads(stream.getvalue())
+        assert payload["message"] == "hello world"
+        assert payload["status_code"] == 503
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        """Test that a full queue drops records and counts them."""
+        target = logging.StreamHandler(io.StringIO())
+        handler = QueueListenerHandler([target], queue_size=1)
+        handler.stop()  # Nothing drains the queue
+
+        handler.handle(_make_record())
+        handler.handle(_make_record())
+
+        assert handler.dropped == 1
+
+    def test_forked_child_starts_its_own_listener(self, tmp_path):
+        """Test that records logged in a forked child are written."""
+        path = tmp_path / "child.log"
+        target = logging.FileHandler(path)
+        target.setFormatter(OrjsonFormatter())
+        handler = QueueListenerHandler([target])
+
+        try:
+            pid = os.fork()
+            if pid == 0:  # Child: log, flush, exit without pytest's teardown
+                handler.handle(_make_record(worker="child"))
+                handler.stop()
+                os._exit(0)
+            _, status = os.waitpid(pid, 0)
+        finally:
+            handler.stop()
+            target.close()
+
+        assert os.waitstatus_to_exitcode(status) == 0
+        assert json.loads(path.read_text())["worker"] == "child"
@@ -0,0 +1,184 @@
+"""
+Tests for per-route latency metrics and SLO event tracking.
+"""
+
+from pathlib import Path
+
+import pytest
+import yaml
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve
+from prometheus_client import REGISTRY
+
+from src.apps.core import metrics
+from src.apps.core.middleware import RouteMetricsMiddleware
+
+User = get_user_model()
+
+
+class TestRouteTemplates:
+    """Route patterns collapse to low-cardinality templates."""
+
+    @pytest.mark.parametrize(
+        "route,expected",
+        [
+            (
+                "api/v1/scheduling/appointments/(?P<pk>[^/.]+)/$",
+                "/api/v1/scheduling/appointments/<pk>/",
+            ),
+            ("^api/v1/scheduling/appointments/$", "/api/v1/scheduling/appointments/"),
+            ("api/v1/pharmacy/ai/drug-info/", "/api/v1/pharmacy/ai/drug-info/"),
+            ("patients/<uuid:pk>/", "/patients/<uuid:pk>/"),
+        ],
+    )
+    def test_normalize_route(self, route, expected):
+        assert metrics.normalize_route(route) == expected
+
+    def test_resolved_request_uses_template_not_path(self):
+        request = RequestFactory().get("/api/v1/scheduling/appointments/42/")
+        request.resolver_match = resolve(request.path)
+        assert (
+            metrics.route_template(request) == "/api/v1/scheduling/appointments/<pk>/"
+        )
+
+    def test_unresolved_request(self):
+        request = RequestFactory().get("/does-not-exist/")
+        assert metrics.route_template(request) == metrics.UNMATCHED_ROUTE
+
+
+@pytest.mark.django_db
+class TestRoleResolver:
+    """Roles are derived from groups and cached per user."""
+
+    def test_anonymous(self):
+        assert metrics.RoleResolver().resolve(None) == "anonymous"
+
+    def test_highest_privilege_group_wins(self):
+        user = User.objects.create_user(username="doc", password="x")
+        user.groups.add(
+            Group.objects.create(name="Patients"), Group.objects.create(name="Doctors")
+        )
+        assert metrics.RoleResolver().resolve(user) == "doctor"
+
+    def test_lookup_is_cached(self, django_assert_num_queries):
+        user = User.objects.create_user(username="plain", password="x")
+        resolver = metrics.RoleResolver()
+        with django_assert_num_queries(1):
+            assert resolver.resolve(user) == "authenticated"
+            assert resolver.resolve(user) == "authenticated"
+
+
+class TestSLOTracking:
+    """Good/bad classification and the burn-rate recording rules."""
+
+    @pytest.fixture
+    def slo(self):
+        return metrics.SLODefinition.from_setting(
+            {
+                "name": "booking-test",
+                "route": "api/v1/scheduling/appointments/",
+                "methods": ["post"],
+                "threshold_ms": 300,
+                "objective": 0.99,
+            }
+        )
+
+    def test_matches_route_prefix_and_method(self, slo):
+        assert slo.matches("/api/v1/scheduling/appointments/", "POST")
+        assert slo.matches("/api/v1/scheduling/appointments/<pk>/cancel/", "POST")
+        assert not slo.matches("/api/v1/scheduling/appointments/", "GET")
+        assert not slo.matches("/api/v1/scheduling/slots/", "POST")
+
+    def test_good_event_requires_latency_and_no_5xx(self, slo):
+        assert slo.is_good(0.1, 201)
+        assert slo.is_good(0.1, 409)
+        assert not slo.is_good(0.5, 201)
+        assert not slo.is_good(0.1, 503)
+
+    def test_observe_counts_good_and_bad_events(self, slo):
+        tracker = metrics.SLOTracker([slo])
+
+        def count(outcome):
+            return REGISTRY.get_sample_value(
+                "healthcore_slo_events_total",
+                {"slo": "booking-test", "outcome": outcome},
+            )
+
+        assert count("bad") == 0  # Exported before the first event
+        good, bad = count("good"), count("bad")
+        tracker.observe("/api/v1/scheduling/appointments/", "POST", 201, 0.05)
+        tracker.observe("/api/v1/scheduling/appointments/", "POST", 500, 0.05)
+        tracker.observe("/api/v1/scheduling/slots/", "POST", 500, 0.05)
+
+        assert count("good") == good + 1
+        assert count("bad") == bad + 1
+        objective = REGISTRY.get_sample_value(
+            "healthcore_slo_objective", {"slo": "booking-test"}
+        )
+        assert objective == 0.99
+
+    def test_recording_rules_cover_burn_rate_windows(self):
+        path = Path(__file__).resolve().parents[4] / "prometheus/rules/slo.yml"
+        groups = yaml.safe_load(path.read_text())["groups"]
+        rules = [rule for group in groups for rule in group["rules"]]
+
+        windows = {
+            rule["labels"]["window"]
+            for rule in rules
+            if rule.get("record") == "healthcore_slo_burn_rate"
+        }
+        assert windows == {"5m", "30m", "1h", "6h"}
+        alerts = [rule["expr"] for rule in rules if "alert" in rule]
+        assert alerts and all("and on (slo)" in expr for expr in alerts)
+
+
+@pytest.mark.django_db
+class TestRouteMetricsMiddleware:
+    """The middleware observes the histogram with template labels."""
+
+    def test_observes_histogram(self):
+        labels = {
+            "route": "/api/v1/scheduling/appointments/<pk>/",
+            "method": "GET",
+            "role": "anonymous",
+            "status_class": "4xx",
+        }
+        before = (
+            REGISTRY.get_sample_value(
+                "healthcore_http_request_duration_seconds_count", labels
+            )
+            or 0
+        )
+
+        request = RequestFactory().get("/api/v1/scheduling/appointments/7/")
+        middleware = RouteMetricsMiddleware(get_response=lambda r: HttpResponse())
+        middleware.process_request(request)
+        request.resolver_match = resolve(request.path)
+        middleware.process_response(request, HttpResponse(status=404))
+
+        after = REGISTRY.get_sample_value(
+            "healthcore_http_request_duration_seconds_count", labels
+        )
+        assert after == before + 1
+
+    def test_booking_requests_feed_slo_counter(self, client):
+        labels = {"slo": "booking"}
+        before = sum(
+            REGISTRY.get_sample_value(
+                "healthcore_slo_events_total", {**labels, "outcome": outcome}
+            )
+            or 0
+            for outcome in ("good", "bad")
+        )
+        client.post("/api/v1/scheduling/appointments/", {}, format="json")
+        after = sum(
+            REGISTRY.get_sample_value(
+                "healthcore_slo_events_total", {**labels, "outcome": outcome}
+            )
+            or 0
+            for outcome in ("good", "bad")
+        )
+        assert after == before + 1
@@ -301,3 +301,74 @@ class TestCorrelationIDWithSkippedPaths:
             # But log might be skipped for these paths
         finally:
             logger.removeHandler(handler)
+
+
+class TestRequestLogSampling:
+    """Test sampling of successful request logs."""
+
+    def _capture(self):
+        records = []
+
+        class ListHandler(logging.Handler):
+            def emit(self, record):
+                records.append(record)
+
+        handler = ListHandler()
+        logger = logging.getLogger("src.apps.core.middleware")
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        return logger, handler, records
+
+    @pytest.mark.parametrize(
+        "status_code,expected", [(200, 0), (302, 0), (404, 1), (500, 1)]
+    )
+    def test_zero_sample_rate_keeps_only_errors(
+        self, request_factory, settings, status_code, expected
+    ):
+        """Test that 2xx/3xx logs are sampled out while 4xx/5xx are kept."""
+        settings.REQUEST_LOG_SAMPLE_RATE = 0.0
+        middleware = RequestLoggingMiddleware(get_response=lambda r: HttpResponse())
+        logger, handler, records = self._capture()
+
+        try:
+            request = request_factory.get("/test/")
+            middleware.process_request(request)
+            response = middleware.process_response(
+                request, HttpResponse(status=status_code)
+            )
+        finally:
+            logger.removeHandler(handler)
+
+        assert len(records) == expected
+        # Headers are still set for sampled-out requests
+        assert response["X-Request-ID"] == request.request_id
+
+    def test_structured_fields_in_log_record(self, middleware, request_factory):
+        """Test that request data is attached as structured record fields."""
+        logger, handler, records = self._capture()
+
+        try:
+            request = request_factory.get("/test/?page=2&token=abc")
+            middleware.process_request(request)
+            middleware.process_response(request, HttpResponse(status=201))
+        finally:
+            logger.removeHandler(handler)
+
+        record = records[0]
+        assert record.status_code == 201
+        assert record.method == "GET"
+        assert record.path == "/test/"
+        assert record.request_id == request.request_id
+        assert record.correlation_id == request.correlation_id
+        assert isinstance(record.duration_ms, float)
+        assert record.query_params == {"page": "2"}
+
+    def test_generated_correlation_id_shares_request_id_prefix(
+        self, middleware, request_factory
+    ):
+        """Test that one UUID is generated per request for both IDs."""
+        request = request_factory.get("/test/")
+
+        middleware.process_request(request)
+
+        assert request.correlation_id.startswith(request.request_id)
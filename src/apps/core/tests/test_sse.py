@@ -0,0 +1,165 @@
+"""
+Tests for streaming AI responses over Server-Sent Events.
+"""
+
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from src.apps.core import ai_cache, sse
+from src.apps.core.ai_client import AIServiceUnavailableError
+
+User = get_user_model()
+
+DRUG_INFO_URL = "/api/v1/pharmacy/ai/drug-info/"
+
+
+def _events(body):
+    """Parse an SSE body into (event, data) pairs."""
+    events = []
+    for block in body.decode().strip().split("\n\n"):
+        name, data = block.split("\n")
+        events.append((name.removeprefix("event: "), json.loads(data[6:])))
+    return events
+
+
+class FakeClient:
+    """Client with cached blocking and streaming calls."""
+
+    model_name = "test-model"
+
+    def __init__(self, chunks=("Take ", "with ", "food.")):
+        self.chunks = chunks
+        self.generate = Mock(return_value="generated")
+        self.streams = 0
+
+    @ai_cache.cached_ai_call
+    def generate_content(self, prompt, system_instruction="", temperature=0.7):
+        return self.generate(prompt, system_instruction, temperature)
+
+    @ai_cache.cached_ai_stream
+    def stream_content(self, prompt, system_instruction="", temperature=0.7):
+        self.streams += 1
+        yield from self.chunks
+
+
+class TestEvents:
+    """Chunks become token events followed by done or error."""
+
+    def test_format_event(self):
+        assert sse.format_event("token", {"text": "a\nb"}) == (
+            b'event: token\ndata: {"text": "a\\nb"}\n\n'
+        )
+
+    def test_tokens_then_done(self):
+        body = b"".join(sse.ai_events(iter(["a", "b"]), {"model_used": "m"}))
+        assert _events(body) == [
+            ("token", {"text": "a"}),
+            ("token", {"text": "b"}),
+            ("done", {"model_used": "m"}),
+        ]
+
+    def test_provider_error_mid_stream(self):
+        def chunks():
+            yield "a"
+            raise AIServiceUnavailableError("quota")
+
+        body = b"".join(sse.ai_events(chunks(), {}))
+        assert _events(body) == [
+            ("token", {"text": "a"}),
+            ("error", {"detail": "quota"}),
+        ]
+
+
+class TestStreamCaching:
+    """Completed streams populate the cache shared with generate_content."""
+
+    @pytest.fixture(autouse=True)
+    def enabled_cache(self):
+        ai_cache.get_response_cache.cache_clear()
+        cache.clear()
+        with override_settings(AI_CACHE_ENABLED=True):
+            yield
+        ai_cache.get_response_cache.cache_clear()
+        cache.clear()
+
+    def test_completed_stream_serves_later_calls(self):
+        client = FakeClient()
+        with ai_cache.use_case("drug_info"):
+            chunks = client.stream_content("q", "sys", 0.2)
+        assert "".join(chunks) == "Take with food."
+
+        with ai_cache.use_case("drug_info"):
+            assert client.generate_content("q", "sys", 0.2) == "Take with food."
+            assert list(client.stream_content("q", "sys", 0.2)) == ["Take with food."]
+        client.generate.assert_not_called()
+        assert client.streams == 1
+
+    def test_abandoned_stream_not_cached(self):
+        client = FakeClient()
+        with ai_cache.use_case("drug_info"):
+            chunks = client.stream_content("q", "sys", 0.2)
+        next(chunks)
+        chunks.close()
+
+        with ai_cache.use_case("drug_info"):
+            assert client.generate_content("q", "sys", 0.2) == "generated"
+
+
+@pytest.mark.django_db
+class TestStreamingEndpoint:
+    """Accept: text/event-stream switches AI views to SSE."""
+
+    @pytest.fixture
+    def doctor_client(self):
+        user = User.objects.create_user(username="sse_doc", password="password")
+        group, _ = Group.objects.get_or_create(name="Doctors")
+        user.groups.add(group)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    def _post(self, doctor_client):
+        return doctor_client.post(
+            DRUG_INFO_URL,
+            {"medication_name": "Metformin"},
+            format="json",
+            HTTP_ACCEPT="text/event-stream",
+        )
+
+    @patch("src.apps.pharmacy.ai_service.get_ai_client")
+    def test_streams_drug_info(self, mock_get_client, doctor_client):
+        client = mock_get_client.return_value
+        client.is_configured.return_value = True
+        client.model_name = "test-model"
+        client.stream_response.return_value = iter(["Biguanide", " class"])
+
+        response = self._post(doctor_client)
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "text/event-stream"
+        assert _events(b"".join(response.streaming_content)) == [
+            ("token", {"text": "Biguanide"}),
+            ("token", {"text": " class"}),
+            (
+                "done",
+                {"medication_name": "Metformin", "model_used": "test-model"},
+            ),
+        ]
+
+    @patch("src.apps.pharmacy.ai_service.get_ai_client")
+    def test_unconfigured_is_error_event(self, mock_get_client, doctor_client):
+        mock_get_client.return_value.is_configured.return_value = False
+
+        response = self._post(doctor_client)
+
+        assert response.status_code == 503
+        assert _events(response.content) == [
+            ("error", {"error": "AI service is not configured."})
+        ]
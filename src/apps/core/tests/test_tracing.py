@@ -0,0 +1,220 @@
+"""
+Tests for OpenTelemetry span creation and context propagation.
+"""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytest
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import resolve
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.trace import SpanKind
+
+from src.apps.core import tracing
+from src.apps.core.kafka.config import KafkaConfig
+from src.apps.core.kafka.producer import KafkaProducer
+from src.apps.core.logging import correlation_id_context
+from src.apps.core.middleware import TracingMiddleware
+from src.apps.core.services.grpc_client import AuditGRPCClient
+
+REMOTE_TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+REMOTE_PARENT = f"00-{REMOTE_TRACE_ID}-00f067aa0ba902b7-01"
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    """Route tracing spans to an in-memory exporter."""
+    memory = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(memory))
+    monkeypatch.setattr(tracing, "_tracer", provider.get_tracer("test"))
+    yield memory
+    memory.clear()
+
+
+def _by_name(exporter):
+    return {span.name: span for span in exporter.get_finished_spans()}
+
+
+class TestPropagation:
+    """Context survives the header round trip."""
+
+    def test_inject_and_extract_round_trip(self, exporter):
+        token = correlation_id_context.set("corr-123")
+        try:
+            with tracing.span("parent") as parent:
+                headers = tracing.inject_headers()
+        finally:
+            correlation_id_context.reset(token)
+
+        trace_id = format(parent.get_span_context().trace_id, "032x")
+        assert trace_id in headers["traceparent"]
+        assert headers[tracing.CORRELATION_HEADER] == "corr-123"
+
+        with tracing.span("child", context=tracing.extract_context(headers)):
+            pass
+        child = _by_name(exporter)["child"]
+        assert child.parent.span_id == parent.get_span_context().span_id
+
+    def test_no_active_span_injects_nothing(self):
+        assert "traceparent" not in tracing.inject_headers()
+
+
+class TestKafkaTracing:
+    """Produce spans inject headers; consume spans continue the trace."""
+
+    def test_publish_sends_trace_headers(self, exporter):
+        with patch("src.apps.core.kafka.producer.Producer") as mock_producer:
+            KafkaProducer._instance = None
+            producer = KafkaProducer.get_instance()
+            producer._producer = mock_producer.return_value
+            with patch.object(KafkaConfig, "ENABLED", True):
+                assert producer.publish("patient.created", {"patient_id": 1})
+        KafkaProducer._instance = None
+
+        headers = dict(mock_producer.return_value.produce.call_args.kwargs["headers"])
+        publish = next(
+            s for s in exporter.get_finished_spans() if s.kind == SpanKind.PRODUCER
+        )
+        assert publish.attributes["messaging.system"] == "kafka"
+        assert (
+            format(publish.context.span_id, "016x") in headers["traceparent"].decode()
+        )
+
+    def test_consume_span_continues_producer_trace(self, exporter):
+        headers = [
+            ("traceparent", REMOTE_PARENT.encode()),
+            (tracing.CORRELATION_HEADER, b"corr-kafka"),
+        ]
+        before = correlation_id_context.get()
+        with tracing.kafka_consume_span("healthcore.patient.created", headers):
+            assert correlation_id_context.get() == "corr-kafka"
+        assert correlation_id_context.get() == before
+
+        (consumed,) = exporter.get_finished_spans()
+        assert consumed.kind == SpanKind.CONSUMER
+        assert format(consumed.context.trace_id, "032x") == REMOTE_TRACE_ID
+
+
+class TestGRPCTracing:
+    """Audit calls carry trace context in gRPC metadata."""
+
+    def test_log_event_sends_metadata(self, exporter):
+        client = AuditGRPCClient()
+        client.stub = Mock()
+        client.stub.LogEvent.return_value = SimpleNamespace(event_id="evt-1")
+
+        assert client.log_event(actor_id="USER-1", action="PATIENT_VIEW") == "evt-1"
+
+        metadata = dict(client.stub.LogEvent.call_args.kwargs["metadata"])
+        rpc = _by_name(exporter)["audit.AuditService/LogEvent"]
+        assert rpc.kind == SpanKind.CLIENT
+        assert format(rpc.context.span_id, "016x") in metadata["traceparent"]
+
+
+@pytest.mark.django_db
+class TestServerAndORMSpans:
+    """Request spans continue incoming traces and parent ORM spans."""
+
+    def test_middleware_continues_incoming_trace(self, exporter):
+        request = RequestFactory().get(
+            "/api/v1/scheduling/appointments/5/", HTTP_TRACEPARENT=REMOTE_PARENT
+        )
+        middleware = TracingMiddleware(get_response=lambda r: HttpResponse())
+        middleware.process_request(request)
+        request.resolver_match = resolve(request.path)
+        middleware.process_view(request, None, (), {})
+        middleware.process_response(request, HttpResponse(status=200))
+
+        (server,) = exporter.get_finished_spans()
+        assert server.name == "GET /api/v1/scheduling/appointments/<pk>/"
+        assert server.kind == SpanKind.SERVER
+        assert format(server.context.trace_id, "032x") == REMOTE_TRACE_ID
+        assert server.attributes["http.response.status_code"] == 200
+
+    def test_queries_inside_a_span_are_traced(self, exporter):
+        with connection.execute_wrapper(tracing.db_execute_wrapper):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")  # no active span: not traced
+            with tracing.span("unit-of-work"):
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 2")
+
+        spans = _by_name(exporter)
+        assert spans["db.query"].attributes["db.statement"] == "SELECT 2"
+        assert spans["db.query"].parent.span_id == spans["unit-of-work"].context.span_id
+        assert len(exporter.get_finished_spans()) == 2
+
+
+class TestCeleryTracing:
+    """Celery signal handlers carry context from publisher to worker."""
+
+    def test_publish_headers_and_task_span(self, exporter):
+        headers = {}
+        with tracing.span("enqueue") as enqueue:
+            tracing._on_before_task_publish(headers=headers)
+
+        task = SimpleNamespace(
+            name="src.apps.demo.tasks.run",
+            request=SimpleNamespace(traceparent=headers["traceparent"]),
+        )
+        tracing._on_task_prerun(task_id="task-1", task=task)
+        tracing._on_task_failure(task_id="task-1", exception=ValueError("boom"))
+        tracing._on_task_postrun(task_id="task-1")
+
+        run = _by_name(exporter)["celery.task src.apps.demo.tasks.run"]
+        assert run.parent.span_id == enqueue.get_span_context().span_id
+        assert not run.status.is_ok
+        assert tracing._task_spans == {}
+
+
+class TestAICallTracing:
+    """AI generate_content calls get a client span."""
+
+    def test_generate_content_span(self, exporter):
+        class FakeClient:
+            model_name = "test-model"
+
+            @tracing.traced_ai_call
+            def generate_content(self, prompt):
+                return prompt.upper()
+
+        assert FakeClient().generate_content("hi") == "HI"
+        (ai_span,) = exporter.get_finished_spans()
+        assert ai_span.attributes["gen_ai.request.model"] == "test-model"
+        assert ai_span.attributes["gen_ai.system"] == "FakeClient"
+
+
+class TestConfiguration:
+    """Exporter selection and the disabled default."""
+
+    @override_settings(OTEL_TRACING_ENABLED=False)
+    def test_disabled_by_default(self):
+        assert tracing.configure_tracing() is False
+
+    def test_file_exporter_writes_json_lines(self, tmp_path):
+        memory = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(memory))
+        with provider.get_tracer("test").start_as_current_span("written"):
+            pass
+
+        path = tmp_path / "traces.jsonl"
+        exporter = tracing.JsonLinesSpanExporter(str(path))
+        exporter.export(memory.get_finished_spans())
+        exporter.export(memory.get_finished_spans())
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 2
+        assert json.loads(lines[0])["name"] == "written"
+
+    def test_none_exporter(self):
+        assert tracing._build_exporter("none") is None
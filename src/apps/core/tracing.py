@@ -0,0 +1,398 @@
+"""OpenTelemetry tracing setup and context propagation helpers.
+
+Tracing is disabled unless ``OTEL_TRACING_ENABLED`` is set; until
+``configure_tracing`` installs an SDK provider the OpenTelemetry API hands out
+no-op spans, so the instrumentation below costs next to nothing.
+
+Context crosses process boundaries as W3C ``traceparent``/``tracestate``
+entries plus the request correlation ID, carried in:
+
+- HTTP request headers (``TracingMiddleware``)
+- Kafka message headers (``kafka_headers`` / ``kafka_consume_span``)
+- gRPC metadata (``grpc_metadata``)
+- Celery message headers (signal handlers connected by ``configure_tracing``)
+"""
+
+import functools
+import logging
+import threading
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from typing import Any, TypeVar, cast
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from opentelemetry import context as otel_context
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import Span, SpanKind, Status, StatusCode
+
+from .logging import correlation_id_context
+
+logger = logging.getLogger(__name__)
+
+CORRELATION_HEADER = "x-correlation-id"
+MAX_DB_STATEMENT_LENGTH = 1000
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_tracer = trace.get_tracer("healthcoreapi")
+_configured = False
+_configure_lock = threading.Lock()
+# Celery task spans, keyed by task id, between task_prerun and task_postrun
+_task_spans: dict[str, tuple[Span, object, Any]] = {}
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """Append finished spans to a file, one JSON object per line."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        """Write a batch of spans to the trace file."""
+        lines = [span.to_json(indent=None) for span in spans]
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as handle:
+                handle.write("\n".join(lines) + "\n")
+        except OSError as e:
+            logger.error(f"Failed to write spans to {self.path}: {e}")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+
+def _build_exporter(name: str) -> SpanExporter | None:
+    """Return the span exporter selected by ``OTEL_TRACES_EXPORTER``."""
+    if name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        return OTLPSpanExporter(endpoint=settings.OTEL_EXPORTER_OTLP_ENDPOINT)
+    if name == "file":
+        return JsonLinesSpanExporter(str(settings.OTEL_TRACES_FILE))
+    if name == "console":
+        return ConsoleSpanExporter()
+    return None
+
+
+def configure_tracing() -> bool:
+    """Install the SDK tracer provider and ORM/Celery hooks once per process.
+
+    Returns True if tracing is active after the call.
+    """
+    global _configured
+    if not getattr(settings, "OTEL_TRACING_ENABLED", False):
+        return False
+
+    with _configure_lock:
+        if _configured:
+            return True
+
+        provider = TracerProvider(
+            resource=Resource.create({"service.name": settings.OTEL_SERVICE_NAME}),
+            sampler=ParentBased(TraceIdRatioBased(settings.OTEL_TRACES_SAMPLER_RATIO)),
+        )
+        exporter = _build_exporter(settings.OTEL_TRACES_EXPORTER)
+        if exporter is not None:
+            provider.add_span_processor(BatchSpanProcessor(exporter))
+        trace.set_tracer_provider(provider)
+
+        if settings.OTEL_TRACE_DB_QUERIES:
+            connection_created.connect(_install_db_wrapper, weak=False)
+            for connection in connections.all(initialized_only=True):
+                _install_db_wrapper(sender=None, connection=connection)
+        _connect_celery_signals()
+
+        _configured = True
+        logger.info(
+            f"Tracing enabled: exporter={settings.OTEL_TRACES_EXPORTER} "
+            f"ratio={settings.OTEL_TRACES_SAMPLER_RATIO}"
+        )
+        return True
+
+
+@contextmanager
+def span(
+    name: str,
+    kind: SpanKind = SpanKind.INTERNAL,
+    attributes: Mapping[str, Any] | None = None,
+    context: otel_context.Context | None = None,
+) -> Iterator[Span]:
+    """Start a span as the current span; exceptions are recorded and re-raised."""
+    with _tracer.start_as_current_span(
+        name, context=context, kind=kind, attributes=attributes
+    ) as current:
+        yield current
+
+
+def start_server_span(
+    name: str, headers: Mapping[str, str], attributes: Mapping[str, Any]
+) -> Span:
+    """Start (but do not activate) a server span continuing ``headers``."""
+    return _tracer.start_span(
+        name,
+        context=extract_context(headers),
+        kind=SpanKind.SERVER,
+        attributes=attributes,
+    )
+
+
+def activate(current: Span) -> object:
+    """Make ``current`` the active span; returns a token for ``finish``."""
+    return otel_context.attach(trace.set_span_in_context(current))
+
+
+def finish(current: Span, token: object, error: bool = False) -> None:
+    """End a span started with ``start_server_span`` and restore the context."""
+    if error:
+        current.set_status(Status(StatusCode.ERROR))
+    current.end()
+    otel_context.detach(cast(Any, token))
+
+
+# =============================================================================
+# PROPAGATION
+# =============================================================================
+
+
+def inject_headers() -> dict[str, str]:
+    """Return trace context and correlation ID as a header dictionary."""
+    carrier: dict[str, str] = {}
+    propagate.inject(carrier)
+    correlation_id = correlation_id_context.get(None)
+    if correlation_id:
+        carrier[CORRELATION_HEADER] = correlation_id
+    return carrier
+
+
+def extract_context(carrier: Mapping[str, str]) -> otel_context.Context:
+    """Return the remote trace context found in ``carrier``."""
+    return propagate.extract(carrier)
+
+
+def kafka_headers() -> list[tuple[str, bytes]]:
+    """Return trace context as Kafka message headers."""
+    return [(key, value.encode("utf-8")) for key, value in inject_headers().items()]
+
+
+def decode_kafka_headers(
+    headers: Sequence[tuple[str, bytes | None]] | None,
+) -> dict[str, str]:
+    """Decode Kafka message headers into a string dictionary."""
+    return {
+        key: value.decode("utf-8", errors="replace")
+        for key, value in headers or ()
+        if value is not None
+    }
+
+
+def grpc_metadata() -> list[tuple[str, str]]:
+    """Return trace context as gRPC call metadata (lower-case keys)."""
+    return [(key.lower(), value) for key, value in inject_headers().items()]
+
+
+@contextmanager
+def kafka_consume_span(
+    topic: str, headers: Sequence[tuple[str, bytes | None]] | None
+) -> Iterator[Span]:
+    """Process a consumed message under the producer's trace context.
+
+    The correlation ID from the headers is restored for log records emitted
+    while the message is processed.
+    """
+    carrier = decode_kafka_headers(headers)
+    token = correlation_id_context.set(carrier.get(CORRELATION_HEADER))
+    try:
+        with span(
+            f"{topic} process",
+            kind=SpanKind.CONSUMER,
+            attributes={
+                "messaging.system": "kafka",
+                "messaging.destination.name": topic,
+                "messaging.operation": "process",
+            },
+            context=extract_context(carrier),
+        ) as current:
+            yield current
+    finally:
+        correlation_id_context.reset(token)
+
+
+# =============================================================================
+# ORM
+# =============================================================================
+
+
+def db_execute_wrapper(
+    execute: Callable[..., Any],
+    sql: str,
+    params: Any,
+    many: bool,
+    context: dict[str, Any],
+) -> Any:
+    """Django execute wrapper emitting one span per query.
+
+    Queries only get a span inside an already-sampled trace, so background
+    queries do not start root spans. Bound parameters are never recorded.
+    """
+    if not trace.get_current_span().is_recording():
+        return execute(sql, params, many, context)
+
+    connection = context["connection"]
+    with span(
+        "db.query",
+        kind=SpanKind.CLIENT,
+        attributes={
+            "db.system": connection.vendor,
+            "db.name": str(connection.settings_dict.get("NAME", "")),
+            "db.statement": sql[:MAX_DB_STATEMENT_LENGTH],
+            "db.executemany": many,
+        },
+    ):
+        return execute(sql, params, many, context)
+
+
+def _install_db_wrapper(sender: Any, connection: Any, **kwargs: Any) -> None:
+    """Attach the tracing execute wrapper to a new database connection."""
+    if db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
+
+
+# =============================================================================
+# CELERY
+# =============================================================================
+
+
+def _on_before_task_publish(
+    headers: dict[str, Any] | None = None, **kwargs: Any
+) -> None:
+    """Inject the publishing context into the Celery message headers."""
+    if headers is not None:
+        headers.update(inject_headers())
+
+
+def _on_task_prerun(task_id: str, task: Any, **kwargs: Any) -> None:
+    """Start the task span under the context carried by the message."""
+    request = task.request
+    carrier = {
+        key: value
+        for key in ("traceparent", "tracestate", CORRELATION_HEADER)
+        if isinstance(value := getattr(request, key, None), str)
+    }
+    parent = extract_context(carrier) if carrier else None
+    task_span = _tracer.start_span(
+        f"celery.task {task.name}",
+        context=parent,
+        kind=SpanKind.CONSUMER,
+        attributes={
+            "messaging.system": "celery",
+            "celery.task_name": task.name,
+            "celery.task_id": task_id,
+        },
+    )
+    token = otel_context.attach(trace.set_span_in_context(task_span, parent))
+    correlation_token = correlation_id_context.set(
+        carrier.get(CORRELATION_HEADER) or correlation_id_context.get(None)
+    )
+    _task_spans[task_id] = (task_span, token, correlation_token)
+
+
+def _on_task_failure(
+    task_id: str, exception: BaseException | None = None, **kwargs: Any
+) -> None:
+    """Record the task exception on its span."""
+    entry = _task_spans.get(task_id)
+    if entry is not None and exception is not None:
+        entry[0].record_exception(exception)
+        entry[0].set_status(Status(StatusCode.ERROR, str(exception)))
+
+
+def _on_task_postrun(task_id: str, **kwargs: Any) -> None:
+    """End the task span and restore the previous context."""
+    entry = _task_spans.pop(task_id, None)
+    if entry is not None:
+        task_span, token, correlation_token = entry
+        task_span.end()
+        otel_context.detach(cast(Any, token))
+        correlation_id_context.reset(correlation_token)
+
+
+def _connect_celery_signals() -> None:
+    """Connect the Celery propagation handlers."""
+    from celery import signals
+
+    signals.before_task_publish.connect(_on_before_task_publish, weak=False)
+    signals.task_prerun.connect(_on_task_prerun, weak=False)
+    signals.task_failure.connect(_on_task_failure, weak=False)
+    signals.task_postrun.connect(_on_task_postrun, weak=False)
+
+
+# =============================================================================
+# AI CALLS
+# =============================================================================
+
+
+def traced_ai_call(func: F) -> F:
+    """Wrap an AI client ``generate_content`` method in a client span."""
+
+    @functools.wraps(func)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        with span(
+            "ai.generate_content",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "gen_ai.system": type(self).__name__,
+                "gen_ai.request.model": str(self.model_name),
+            },
+        ):
+            return func(self, *args, **kwargs)
+
+    return cast(F, wrapper)
+
+
+def traced_ai_stream(func: F) -> F:
+    """Wrap an AI client ``stream_content`` generator in a client span.
+
+    The span is not made current: the generator is consumed chunk by chunk
+    after the view has returned, outside the request's context.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Iterator[str]:
+        ai_span = _tracer.start_span(
+            "ai.stream_content",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "gen_ai.system": type(self).__name__,
+                "gen_ai.request.model": str(self.model_name),
+            },
+        )
+        return _end_span_after(func(self, *args, **kwargs), ai_span)
+
+    return cast(F, wrapper)
+
+
+def _end_span_after(chunks: Iterator[str], ai_span: Span) -> Iterator[str]:
+    count = 0
+    try:
+        for chunk in chunks:
+            count += 1
+            yield chunk
+    except Exception as e:
+        ai_span.record_exception(e)
+        ai_span.set_status(Status(StatusCode.ERROR, str(e)))
+        raise
+    finally:
+        ai_span.set_attribute("gen_ai.response.chunks", count)
+        ai_span.end()
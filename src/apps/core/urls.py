@@ -17,6 +17,7 @@ from .oauth_views import oauth_callback
 from .views import (
     HealthCheckAPIView,
     PostViewSet,
+    ai_job_status,
     approve_role_request,
     get_current_user,
     list_role_requests,
@@ -72,6 +73,8 @@ urlpatterns = [
         reject_role_request,
         name="reject-credential-request",
     ),
+    # Asynchronous AI job status (long-poll with ?wait=seconds)
+    path("api/v1/ai/jobs/<str:job_id>/", ai_job_status, name="ai-job-status"),
     # API endpoints from the router
     path("api/", include(router.urls)),
 ]
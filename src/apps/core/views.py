@@ -7,7 +7,7 @@ from typing import Any, cast
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404
-from drf_spectacular.utils import OpenApiExample, extend_schema
+from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 from rest_framework import status, viewsets
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -17,7 +17,7 @@ from rest_framework.serializers import BaseSerializer
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from . import repositories, services
+from . import ai_jobs, repositories, services
 from .models import Post, ProfessionalRoleRequest
 from .permissions import IsAdmin, IsOwnerOrReadOnly
 from .serializers import (
@@ -558,3 +558,48 @@ def reject_role_request(request: Request, request_id: int) -> Response:
             "role": role_request.role_requested,
         }
     )
+
+
+# ============================================================================
+# Asynchronous AI Jobs
+# ============================================================================
+
+
+@extend_schema(
+    tags=["AI Jobs"],
+    summary="Get AI job status",
+    description=(
+        "Status and result of an AI job submitted with `Prefer: respond-async`. "
+        "Pass `wait` (seconds) to long-poll until the job finishes."
+    ),
+    parameters=[
+        OpenApiParameter(
+            "wait", int, description="Long-poll for up to this many seconds"
+        )
+    ],
+    responses={200: None, 404: None},
+)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def ai_job_status(request: Request, job_id: str) -> Response:
+    """
+    Return the status of an asynchronous AI job owned by the caller.
+    """
+    job = ai_jobs.get_job(job_id)
+    if job is None or (
+        job["owner_id"] != request.user.id and not request.user.is_superuser
+    ):
+        return Response({"detail": "Job not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        wait = float(request.query_params.get("wait", 0))
+    except ValueError:
+        wait = 0.0
+    wait = min(max(wait, 0.0), settings.AI_JOB_MAX_WAIT_SECONDS)
+    if wait and job["status"] not in ai_jobs.TERMINAL_STATES:
+        job = ai_jobs.wait_for_job(job_id, wait) or job
+
+    headers = {}
+    if job["status"] not in ai_jobs.TERMINAL_STATES:
+        headers["Retry-After"] = "1"
+    return Response(ai_jobs.public_view(job), headers=headers)
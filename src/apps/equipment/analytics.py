@@ -0,0 +1,307 @@
+"""
+Equipment utilization analytics from status and movement history.
+
+Status changes are not logged, so each asset's history is rebuilt from the
+records that imply them:
+
+- reservations that were not cancelled: the asset is in use;
+- HIGH severity incidents, from report until resolved: the asset is down
+  (``report_incident`` puts it in maintenance);
+- movements (by scan time when synced later): where the asset was.
+
+Down beats in use, and in use beats idle. Time before an asset was created
+is not counted. Deactivated assets are left out, since the day they were
+retired is not recorded.
+
+The three histories are read in one streaming pass. Each is ordered by
+equipment and time and streamed in chunks, then merged per asset and swept
+into (location, state, start, end) segments. NumPy splits the segments at
+local midnights and sums seconds per day, type, location and state.
+
+The nightly task stores the result as ``EquipmentUtilization`` daily
+rollups for the last ``EQUIPMENT_UTILIZATION_RECOMPUTE_DAYS`` days, so
+late scans and incident updates are picked up. The API sums rollups and
+never reads raw history.
+"""
+
+from collections.abc import Iterator
+from datetime import date, datetime, time, timedelta
+from heapq import merge
+from itertools import groupby
+from operator import itemgetter
+from typing import Any
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, QuerySet, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import (
+    Equipment,
+    EquipmentIncident,
+    EquipmentMovement,
+    EquipmentReservation,
+    EquipmentUtilization,
+)
+
+IDLE, IN_USE, DOWN = 0, 1, 2
+STATE_FIELDS = ("idle_seconds", "in_use_seconds", "down_seconds")
+
+# Event kinds; at the same instant, moves apply first, then ends, then starts
+MOVE, END, START = 0, 1, 2
+
+GROUP_FIELDS = {"day": "day", "type": "equipment_type", "location": "location"}
+
+_CHUNK_SIZE = 5000
+
+
+def _day_bounds(start_day: date, end_day: date) -> list[datetime]:
+    """Local midnights from ``start_day`` through the day after ``end_day``."""
+    days = (end_day - start_day).days + 1
+    return [
+        timezone.make_aware(datetime.combine(start_day + timedelta(days=d), time.min))
+        for d in range(days + 1)
+    ]
+
+
+def _events(
+    start: datetime, end: datetime
+) -> Iterator[tuple[int, datetime, int, Any, Any]]:
+    """
+    (equipment id, time, kind, state or location, value) for every asset,
+    ordered by asset and time, streamed from the three histories.
+
+    Intervals yield a START with their end time; the sweep adds the END.
+    Movements from ``start`` on, including later ones, give each asset's
+    location at ``start`` (the first move's origin).
+    """
+    reservations = (
+        EquipmentReservation.objects.exclude(status="CANCELLED")
+        .filter(start_time__lt=end, end_time__gt=start)
+        .order_by("equipment_id", "start_time")
+        .values_list("equipment_id", "start_time", "end_time")
+        .iterator(chunk_size=_CHUNK_SIZE)
+    )
+    incidents = (
+        EquipmentIncident.objects.filter(severity="HIGH", created_at__lt=end)
+        .filter(Q(resolved_at__isnull=True) | Q(resolved_at__gt=start))
+        .order_by("equipment_id", "created_at")
+        .values_list("equipment_id", "created_at", "resolved_at")
+        .iterator(chunk_size=_CHUNK_SIZE)
+    )
+    movements = (
+        EquipmentMovement.objects.annotate(moved_at=Coalesce("scanned_at", "timestamp"))
+        .filter(moved_at__gte=start)
+        .order_by("equipment_id", "moved_at", "id")
+        .values_list("equipment_id", "moved_at", "from_location", "to_location")
+        .iterator(chunk_size=_CHUNK_SIZE)
+    )
+    return merge(
+        ((pk, begin, START, IN_USE, until) for pk, begin, until in reservations),
+        ((pk, begin, START, DOWN, until or end) for pk, begin, until in incidents),
+        ((pk, at, MOVE, origin, to) for pk, at, origin, to in movements),
+        key=itemgetter(0, 1),
+    )
+
+
+def _sweep(
+    events: list[tuple[int, datetime, int, Any, Any]],
+    location: str,
+    start: datetime,
+    end: datetime,
+) -> Iterator[tuple[str, int, float, float]]:
+    """
+    (location, state, start, end) segments of one asset over ``[start, end)``,
+    with times as POSIX timestamps.
+    """
+    points: list[tuple[datetime, int, Any]] = []
+    moves = [event for event in events if event[2] == MOVE]
+    if moves:
+        location = moves[0][3]  # Where the asset was before its first move
+    for _, at, kind, what, value in events:
+        if kind == MOVE:
+            points.append((max(at, start), MOVE, value))
+        elif at < end and value > start:
+            points.append((max(at, start), START, what))
+            points.append((min(value, end), END, what))
+    points.sort(key=itemgetter(0, 1))
+
+    active = [0, 0, 0]
+    cursor = start
+    for at, kind, what in points:
+        if at >= end:
+            break
+        if at > cursor:
+            state = DOWN if active[DOWN] else IN_USE if active[IN_USE] else IDLE
+            yield location, state, cursor.timestamp(), at.timestamp()
+            cursor = at
+        if kind == MOVE:
+            location = what
+        else:
+            active[what] += 1 if kind == START else -1
+    if end > cursor:
+        state = DOWN if active[DOWN] else IN_USE if active[IN_USE] else IDLE
+        yield location, state, cursor.timestamp(), end.timestamp()
+
+
+def daily_seconds(
+    group: np.ndarray,
+    state: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    bounds: np.ndarray,
+    groups: int,
+) -> np.ndarray:
+    """
+    Seconds per (day, group, state) of segments, split at day ``bounds``.
+
+    Segments must lie within ``bounds[0]`` and ``bounds[-1]``.
+    """
+    days = len(bounds) - 1
+    first = np.searchsorted(bounds, starts, side="right") - 1
+    last = np.searchsorted(bounds, ends, side="left") - 1
+    counts = last - first + 1
+    segment = np.repeat(np.arange(len(starts)), counts)
+    offsets = np.cumsum(counts) - counts
+    day = first[segment] + np.arange(len(segment)) - offsets[segment]
+    seconds = np.minimum(ends[segment], bounds[day + 1]) - np.maximum(
+        starts[segment], bounds[day]
+    )
+    cells = (day * groups + group[segment]) * 3 + state[segment]
+    totals: np.ndarray = np.bincount(
+        cells, weights=seconds, minlength=days * groups * 3
+    ).reshape(days, groups, 3)
+    return totals
+
+
+def compute_utilization(start_day: date, end_day: date) -> list[EquipmentUtilization]:
+    """Unsaved daily rollups of all active assets, ``start_day`` to ``end_day``."""
+    bounds = _day_bounds(start_day, end_day)
+    start, end = bounds[0], bounds[-1]
+    assets = (
+        Equipment.objects.filter(is_active=True, created_at__lt=end)
+        .order_by("id")
+        .values_list("id", "type", "current_location", "created_at")
+    )
+    histories = groupby(_events(start, end), key=itemgetter(0))
+    pending = next(histories, None)
+
+    group_index: dict[tuple[str, str], int] = {}
+    group: list[int] = []
+    state: list[int] = []
+    starts: list[float] = []
+    ends: list[float] = []
+    for equipment_id, equipment_type, location, created_at in assets.iterator(
+        chunk_size=_CHUNK_SIZE
+    ):
+        # Skip histories of assets not counted (inactive or created later)
+        while pending is not None and pending[0] < equipment_id:
+            pending = next(histories, None)
+        events: list[tuple[int, datetime, int, Any, Any]] = []
+        if pending is not None and pending[0] == equipment_id:
+            events = list(pending[1])
+            pending = next(histories, None)
+
+        for segment_location, segment_state, begin, until in _sweep(
+            events, location, max(start, created_at), end
+        ):
+            key = (equipment_type, segment_location)
+            group.append(group_index.setdefault(key, len(group_index)))
+            state.append(segment_state)
+            starts.append(begin)
+            ends.append(until)
+
+    if not starts:
+        return []
+    totals = daily_seconds(
+        np.array(group),
+        np.array(state),
+        np.array(starts),
+        np.array(ends),
+        np.array([bound.timestamp() for bound in bounds]),
+        len(group_index),
+    )
+    rollups = []
+    for (equipment_type, location), index in group_index.items():
+        daily = np.rint(totals[:, index]).astype(np.int64).tolist()
+        for offset, seconds in enumerate(daily):
+            if any(seconds):
+                rollups.append(
+                    EquipmentUtilization(
+                        day=start_day + timedelta(days=offset),
+                        equipment_type=equipment_type,
+                        location=location,
+                        idle_seconds=seconds[IDLE],
+                        in_use_seconds=seconds[IN_USE],
+                        down_seconds=seconds[DOWN],
+                    )
+                )
+    return rollups
+
+
+def rollup_utilization(start_day: date, end_day: date) -> int:
+    """Recompute and store daily rollups for a range of days."""
+    rollups = compute_utilization(start_day, end_day)
+    with transaction.atomic():
+        EquipmentUtilization.objects.filter(day__range=(start_day, end_day)).delete()
+        EquipmentUtilization.objects.bulk_create(rollups, batch_size=_CHUNK_SIZE)
+    return len(rollups)
+
+
+def refresh_rollups(today: date | None = None) -> tuple[date, date, int]:
+    """Recompute the recent days through yesterday, as the nightly task does."""
+    yesterday = (today or timezone.localdate()) - timedelta(days=1)
+    start_day = yesterday - timedelta(
+        days=settings.EQUIPMENT_UTILIZATION_RECOMPUTE_DAYS - 1
+    )
+    return start_day, yesterday, rollup_utilization(start_day, yesterday)
+
+
+def utilization_summary(
+    start_day: date,
+    end_day: date,
+    group_by: list[str],
+    equipment_type: str = "",
+    location: str = "",
+) -> list[dict[str, Any]]:
+    """
+    Hours in use, down and idle from stored rollups, per ``group_by`` keys
+    (``day``, ``type``, ``location``).
+
+    A ``location`` filter also matches the locations under it
+    ("Main/3" matches "Main/3/ICU").
+    """
+    rollups: QuerySet[EquipmentUtilization] = EquipmentUtilization.objects.filter(
+        day__range=(start_day, end_day)
+    )
+    if equipment_type:
+        rollups = rollups.filter(equipment_type=equipment_type)
+    if location:
+        rollups = rollups.filter(
+            Q(location__iexact=location) | Q(location__istartswith=f"{location}/")
+        )
+    fields = [GROUP_FIELDS[key] for key in group_by]
+    rows = (
+        rollups.values(*fields)
+        .annotate(**{name: Sum(name) for name in STATE_FIELDS})
+        .order_by(*fields)
+    )
+
+    summary = []
+    for row in rows:
+        hours = {name: row[name] / 3600 for name in STATE_FIELDS}
+        total = sum(hours.values())
+        summary.append(
+            {
+                **{key: row[GROUP_FIELDS[key]] for key in group_by},
+                "in_use_hours": round(hours["in_use_seconds"], 2),
+                "down_hours": round(hours["down_seconds"], 2),
+                "idle_hours": round(hours["idle_seconds"], 2),
+                "utilization": (
+                    round(hours["in_use_seconds"] / total, 4) if total else 0.0
+                ),
+            }
+        )
+    return summary
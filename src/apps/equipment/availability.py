@@ -0,0 +1,153 @@
+"""
+Equipment reservation timelines and availability search.
+
+On PostgreSQL, overlapping reservations are rejected by the exclusion
+constraint from migration 0003. Elsewhere, ``services.reserve_equipment``
+locks the equipment row and checks the request against a
+``ReservationTimeline`` of the equipment's active reservations. The timeline
+also suggests the next free slot when a request conflicts.
+
+Availability search finds the units of a type that are free for a whole
+window with one query: an anti-join against the partial index on active
+reservations. Units are then ranked by distance from the requested location.
+Locations are free text. They compare as paths
+("Building/Floor/Unit/Room"), so more shared leading parts means closer.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from heapq import nsmallest
+from itertools import accumulate
+
+from django.db.models import Exists, OuterRef
+
+from .models import Equipment, EquipmentReservation, EquipmentStatus
+
+# Statuses that cannot be reserved (see services.reserve_equipment)
+UNRESERVABLE_STATUSES = (EquipmentStatus.MAINTENANCE, EquipmentStatus.LOST)
+
+
+class ReservationTimeline:
+    """
+    Reservation intervals of one equipment, ``[start, end)``, sorted by start.
+
+    Each entry stores the running maximum of end times up to its position, as
+    an interval tree does. Intervals that end before a query starts are
+    skipped with one bisect. Conflicts are then the entries up to the first
+    one starting after the query ends. Intervals may overlap, for example
+    reservations made before the constraint existed.
+    """
+
+    def __init__(self, intervals: Iterable[tuple[datetime, datetime]] = ()):
+        self._intervals = sorted(intervals)
+        self._starts = [start for start, _ in self._intervals]
+        self._max_ends = list(accumulate((end for _, end in self._intervals), max))
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def conflicts(
+        self, start: datetime, end: datetime
+    ) -> list[tuple[datetime, datetime]]:
+        """Intervals overlapping ``[start, end)``, by start time."""
+        first = bisect_right(self._max_ends, start)
+        last = bisect_left(self._starts, end)
+        return [
+            interval for interval in self._intervals[first:last] if interval[1] > start
+        ]
+
+    def next_free(self, start: datetime, duration: timedelta) -> datetime:
+        """Earliest start at or after ``start`` with ``duration`` free."""
+        candidate = start
+        for interval_start, interval_end in self._intervals[
+            bisect_right(self._max_ends, start) :
+        ]:
+            if interval_start >= candidate + duration:
+                break
+            candidate = max(candidate, interval_end)
+        return candidate
+
+
+def load_timeline(equipment_id: int, since: datetime) -> ReservationTimeline:
+    """Active reservations of an equipment ending after ``since``."""
+    return ReservationTimeline(
+        EquipmentReservation.objects.filter(
+            equipment_id=equipment_id, status="ACTIVE", end_time__gt=since
+        ).values_list("start_time", "end_time")
+    )
+
+
+def location_parts(location: str) -> list[str]:
+    return [part.strip().lower() for part in location.split("/") if part.strip()]
+
+
+def location_distance(a: str, b: str) -> int:
+    """
+    Steps between two locations through their deepest shared part.
+
+    "Main/3/ICU/Bay 2" is 2 steps from "Main/3/ICU/Bay 4", and 4 steps from
+    "Main/3/Cardiology/Bay 1". The distance is 0 for the same place.
+    """
+    parts_a, parts_b = location_parts(a), location_parts(b)
+    shared = 0
+    for part_a, part_b in zip(parts_a, parts_b, strict=False):
+        if part_a != part_b:
+            break
+        shared += 1
+    return len(parts_a) + len(parts_b) - 2 * shared
+
+
+@dataclass
+class AvailableEquipment:
+    id: int
+    name: str
+    serial_number: str
+    current_location: str
+    status: str
+    distance: int
+
+
+def find_available_equipment(
+    *,
+    equipment_type: str,
+    start_time: datetime,
+    end_time: datetime,
+    near: str = "",
+    limit: int = 20,
+) -> list[AvailableEquipment]:
+    """
+    Units of a type free for the whole window, nearest to ``near`` first.
+
+    Units without an overlapping active reservation qualify, whatever their
+    status, except those in ``UNRESERVABLE_STATUSES``. A unit in use now can
+    still be free later.
+    """
+    overlapping = EquipmentReservation.objects.filter(
+        equipment=OuterRef("pk"),
+        status="ACTIVE",
+        start_time__lt=end_time,
+        end_time__gt=start_time,
+    )
+    candidates = (
+        Equipment.objects.filter(is_active=True, type=equipment_type)
+        .exclude(status__in=UNRESERVABLE_STATUSES)
+        .exclude(Exists(overlapping))
+        .values_list("id", "name", "serial_number", "current_location", "status")
+    )
+    return nsmallest(
+        limit,
+        (
+            AvailableEquipment(
+                id=equipment_id,
+                name=name,
+                serial_number=serial_number,
+                current_location=location,
+                status=status,
+                distance=location_distance(near, location) if near else 0,
+            )
+            for equipment_id, name, serial_number, location, status in candidates
+        ),
+        key=lambda unit: (unit.distance, unit.name, unit.id),
+    )
@@ -0,0 +1,19 @@
+"""
+Equipment Domain Events
+
+Events published when equipment changes location.
+"""
+
+from typing import Any
+
+from src.apps.core.events import BaseEvent
+
+
+class EquipmentMovedEvent(BaseEvent):
+    """Event published once per asset moved by a batch of scans"""
+
+    def __init__(self, equipment_id: int, move_data: dict[str, Any]):
+        super().__init__(
+            event_type="equipment.moved",
+            data={"equipment_id": equipment_id, **move_data},
+        )
@@ -0,0 +1,87 @@
+"""
+Cached QR code -> equipment resolution for ward scanners.
+
+Resolving a scan is the most frequent equipment request. A compact record
+(id, status, location, type) is cached per QR code, read through from the
+database on a miss. It is dropped after commit when the equipment is saved
+or deleted, under both its old and new QR codes. ``record_scans``
+invalidates explicitly, since its bulk update sends no signals.
+
+The cache entry expires after ``EQUIPMENT_QR_CACHE_SECONDS``. That bounds
+the rare race where a miss reads a row just before an update commits and
+caches it after the invalidation.
+"""
+
+import hashlib
+from collections.abc import Iterable
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from prometheus_client import Counter
+
+from .models import Equipment
+
+QR_CACHE_PREFIX = "equipment:qr:"
+
+QR_LOOKUPS = Counter(
+    "healthcore_equipment_qr_lookups_total",
+    "QR code lookups by result: hit, miss (read from the database) or unknown.",
+    ["result"],
+)
+
+
+def _key(qr_code: str) -> str:
+    # QR content is arbitrary text (often a URL); hash it into a safe key
+    return QR_CACHE_PREFIX + hashlib.sha256(qr_code.encode()).hexdigest()
+
+
+def resolve_qr(qr_code: str) -> dict[str, Any] | None:
+    """Compact record of the active equipment with this QR code, if any."""
+    key = _key(qr_code)
+    record = cache.get(key)
+    if record is None:
+        record = (
+            Equipment.objects.filter(qr_code=qr_code, is_active=True)
+            .values_list("id", "status", "current_location", "type")
+            .first()
+        )
+        if record is None:
+            QR_LOOKUPS.labels("unknown").inc()
+            return None
+        QR_LOOKUPS.labels("miss").inc()
+        cache.set(key, record, settings.EQUIPMENT_QR_CACHE_SECONDS)
+    else:
+        QR_LOOKUPS.labels("hit").inc()
+
+    equipment_id, status, location, equipment_type = record
+    return {
+        "id": equipment_id,
+        "qr_code": qr_code,
+        "status": status,
+        "current_location": location,
+        "type": equipment_type,
+    }
+
+
+def invalidate(qr_codes: Iterable[str]) -> None:
+    """Drop cached records after the current transaction commits."""
+    keys = [_key(qr_code) for qr_code in set(qr_codes) if qr_code]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+@receiver(post_init, sender=Equipment)
+def _remember_qr_code(instance: Equipment, **kwargs: Any) -> None:
+    # From __dict__, so a deferred qr_code is not loaded for every instance
+    loaded = instance.__dict__.get("qr_code", "")
+    instance._loaded_qr_code = loaded  # type: ignore[attr-defined]
+
+
+@receiver(post_save, sender=Equipment)
+@receiver(post_delete, sender=Equipment)
+def _equipment_changed(instance: Equipment, **kwargs: Any) -> None:
+    invalidate([instance.qr_code, getattr(instance, "_loaded_qr_code", "")])
@@ -0,0 +1,39 @@
+from datetime import date, timedelta
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils import timezone
+
+from src.apps.equipment.analytics import rollup_utilization
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds daily equipment utilization rollups from reservation, "
+        "incident and movement history, e.g. to backfill past days. "
+        "The nightly task only recomputes recent days."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Number of days through yesterday (default 30)",
+        )
+        parser.add_argument(
+            "--end", type=date.fromisoformat, help="Last day (default yesterday)"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["days"] < 1:
+            raise CommandError("--days must be at least 1")
+        end_day = options["end"] or timezone.localdate() - timedelta(days=1)
+        start_day = end_day - timedelta(days=options["days"] - 1)
+
+        rows = rollup_utilization(start_day, end_day)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Stored {rows} utilization rollups for {start_day}..{end_day}"
+            )
+        )
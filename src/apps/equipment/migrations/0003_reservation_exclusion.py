@@ -0,0 +1,71 @@
+# Generated by Django 5.2 on 2026-10-19 04:17
+#
+# On PostgreSQL, overlapping ACTIVE reservations of the same equipment are
+# rejected by a range exclusion constraint (btree_gist for the equality on
+# equipment_id). Other databases rely on the locked check in
+# services.reserve_equipment.
+
+from django.apps.registry import Apps
+from django.conf import settings
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+
+CONSTRAINT = "equipment_reservation_no_overlap"
+
+
+def add_exclusion_constraint(
+    apps: Apps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    table = apps.get_model("equipment", "EquipmentReservation")._meta.db_table
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    # Reservations made before the constraint may overlap; keep the earliest
+    schema_editor.execute(
+        f"UPDATE {table} AS later SET status = 'CANCELLED' "
+        "WHERE later.status = 'ACTIVE' AND EXISTS ("
+        f"SELECT 1 FROM {table} AS earlier "
+        "WHERE earlier.equipment_id = later.equipment_id "
+        "AND earlier.status = 'ACTIVE' AND earlier.id < later.id "
+        "AND earlier.start_time < later.end_time "
+        "AND earlier.end_time > later.start_time)"
+    )
+    schema_editor.execute(
+        f"ALTER TABLE {table} ADD CONSTRAINT {CONSTRAINT} EXCLUDE USING gist "
+        "(equipment_id WITH =, tstzrange(start_time, end_time, '[)') WITH &&) "
+        "WHERE (status = 'ACTIVE')"
+    )
+
+
+def drop_exclusion_constraint(
+    apps: Apps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    table = apps.get_model("equipment", "EquipmentReservation")._meta.db_table
+    schema_editor.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {CONSTRAINT}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("equipment", "0002_alter_equipment_is_active"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="equipment",
+            index=models.Index(
+                fields=["type", "status"], name="equipment_e_type_d82ecb_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="equipmentreservation",
+            index=models.Index(
+                condition=models.Q(("status", "ACTIVE")),
+                fields=["equipment", "start_time", "end_time"],
+                name="equipment_active_resv_idx",
+            ),
+        ),
+        migrations.RunPython(add_exclusion_constraint, drop_exclusion_constraint),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-19 04:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("equipment", "0003_reservation_exclusion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="equipmentmovement",
+            name="scanned_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When the code was scanned, if synced later",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-19 04:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("equipment", "0004_movement_scanned_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EquipmentUtilization",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                (
+                    "equipment_type",
+                    models.CharField(
+                        choices=[
+                            ("STRETCHER", "Stretcher"),
+                            ("WHEELCHAIR", "Wheelchair"),
+                            ("INFUSION_PUMP", "Infusion Pump"),
+                            ("DEFIBRILLATOR", "Defibrillator"),
+                            ("ECG", "ECG Machine"),
+                            ("PORTABLE_XRAY", "Portable X-Ray"),
+                            ("OTHER", "Other"),
+                        ],
+                        max_length=50,
+                    ),
+                ),
+                ("location", models.CharField(max_length=255)),
+                ("in_use_seconds", models.PositiveBigIntegerField(default=0)),
+                ("down_seconds", models.PositiveBigIntegerField(default=0)),
+                ("idle_seconds", models.PositiveBigIntegerField(default=0)),
+                ("computed_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "equipment_type", "location"),
+                        name="equipment_unique_utilization_day",
+                    )
+                ],
+            },
+        ),
+    ]
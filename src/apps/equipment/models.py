@@ -64,6 +64,9 @@ class Equipment(AuthorableModel):
     class Meta:
         verbose_name = "Equipment"
         verbose_name_plural = "Equipment"
+        indexes = [
+            models.Index(fields=["type", "status"]),
+        ]
 
     def __str__(self) -> str:
         return f"{self.name} ({self.serial_number})"
@@ -79,6 +82,9 @@ class Equipment(AuthorableModel):
         self.save(update_fields=["is_active", "updated_at"])
 
 
+RESERVATION_EXCLUSION_CONSTRAINT = "equipment_reservation_no_overlap"
+
+
 class EquipmentReservation(AuthorableModel):
     """
     Reservation of equipment for a specific timeframe.
@@ -100,6 +106,18 @@ class EquipmentReservation(AuthorableModel):
         max_length=20, default="ACTIVE"
     )  # ACTIVE, COMPLETED, CANCELLED
 
+    class Meta:
+        # On PostgreSQL, migration 0003 also adds an exclusion constraint
+        # (RESERVATION_EXCLUSION_CONSTRAINT): no two ACTIVE reservations of
+        # the same equipment may overlap.
+        indexes = [
+            models.Index(
+                fields=["equipment", "start_time", "end_time"],
+                condition=models.Q(status="ACTIVE"),
+                name="equipment_active_resv_idx",
+            ),
+        ]
+
 
 class EquipmentMovement(models.Model):
     """
@@ -115,6 +133,9 @@ class EquipmentMovement(models.Model):
         settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True
     )
     timestamp = models.DateTimeField(auto_now_add=True)
+    scanned_at = models.DateTimeField(
+        null=True, blank=True, help_text="When the code was scanned, if synced later"
+    )
     method = models.CharField(max_length=50, default="SCAN")  # SCAN or MANUAL
     notes = models.TextField(blank=True)
 
@@ -142,3 +163,29 @@ class EquipmentIncident(AuthorableModel):
     description = models.TextField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="OPEN")
     resolved_at = models.DateTimeField(null=True, blank=True)
+
+
+class EquipmentUtilization(models.Model):
+    """
+    Daily rollup of equipment time by type and location, rebuilt from
+    reservation, incident and movement history (see ``analytics``).
+    """
+
+    day = models.DateField()
+    equipment_type = models.CharField(max_length=50, choices=EquipmentType.choices)
+    location = models.CharField(max_length=255)
+    in_use_seconds = models.PositiveBigIntegerField(default=0)
+    down_seconds = models.PositiveBigIntegerField(default=0)
+    idle_seconds = models.PositiveBigIntegerField(default=0)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "equipment_type", "location"],
+                name="equipment_unique_utilization_day",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.day} {self.equipment_type} @ {self.location}"
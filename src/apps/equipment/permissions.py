@@ -2,6 +2,8 @@ from typing import TYPE_CHECKING
 
 from rest_framework import permissions
 
+from src.apps.core.metrics import role_resolver
+
 if TYPE_CHECKING:
     from rest_framework.request import Request
     from rest_framework.views import APIView
@@ -11,6 +13,9 @@ class IsMedicalStaffOrReadOnly(permissions.BasePermission):
     """
     Allows access only to authenticated users who are staff or members of
     'Doctors' or 'Nurses' groups.
+
+    Group membership comes from the role cache (``core.metrics``), so a
+    change takes up to ``ROLE_CACHE_TTL_SECONDS`` to apply.
     """
 
     def has_permission(self, request: "Request", view: "APIView") -> bool:
@@ -22,4 +27,4 @@ class IsMedicalStaffOrReadOnly(permissions.BasePermission):
             return True
 
         # Check for group membership
-        return request.user.groups.filter(name__in=["Doctors", "Nurses"]).exists()
+        return bool(role_resolver.groups(request.user) & {"Doctors", "Nurses"})
@@ -4,6 +4,7 @@ Serializers for Equipment API.
 
 from typing import Any
 
+from django.conf import settings
 from rest_framework import serializers
 
 from .models import (
@@ -11,6 +12,7 @@ from .models import (
     EquipmentIncident,
     EquipmentMovement,
     EquipmentReservation,
+    EquipmentType,
 )
 
 
@@ -82,3 +84,102 @@ class ReserveSerializer(serializers.Serializer[Any]):
     end_time = serializers.DateTimeField()
     purpose = serializers.CharField()
     department_id = serializers.CharField()
+
+
+class AvailabilityQuerySerializer(serializers.Serializer[Any]):
+    type = serializers.ChoiceField(choices=EquipmentType.choices)
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    near = serializers.CharField(required=False, default="", allow_blank=True)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        if attrs["start_time"] >= attrs["end_time"]:
+            raise serializers.ValidationError("End time must be after start time")
+        return attrs
+
+
+class AvailableEquipmentSerializer(serializers.Serializer[Any]):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    serial_number = serializers.CharField()
+    current_location = serializers.CharField()
+    status = serializers.CharField()
+    distance = serializers.IntegerField(
+        help_text="Steps from the requested location (0: same place)"
+    )
+
+
+class ScanSerializer(serializers.Serializer[Any]):
+    qr_code = serializers.CharField(max_length=255)
+    location = serializers.CharField(max_length=255)
+    scanned_at = serializers.DateTimeField()
+
+
+class ScanBatchSerializer(serializers.Serializer[Any]):
+    scans = ScanSerializer(many=True, allow_empty=False)
+
+    def validate_scans(self, value: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        if len(value) > settings.EQUIPMENT_SCAN_BATCH_MAX:
+            raise serializers.ValidationError(
+                f"At most {settings.EQUIPMENT_SCAN_BATCH_MAX} scans per batch"
+            )
+        return value
+
+
+class ScanBatchResultSerializer(serializers.Serializer[Any]):
+    received = serializers.IntegerField()
+    movements = serializers.IntegerField()
+    moved_equipment = serializers.ListField(child=serializers.IntegerField())
+    unknown_qr_codes = serializers.ListField(child=serializers.CharField())
+
+
+class QRLookupSerializer(serializers.Serializer[Any]):
+    """Schema of the QR lookup response, which is returned as a plain dict."""
+
+    id = serializers.IntegerField()
+    qr_code = serializers.CharField()
+    status = serializers.CharField()
+    current_location = serializers.CharField()
+    type = serializers.CharField()
+
+
+class UtilizationQuerySerializer(serializers.Serializer[Any]):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    type = serializers.ChoiceField(
+        choices=EquipmentType.choices, required=False, default=""
+    )
+    location = serializers.CharField(required=False, default="", allow_blank=True)
+    group_by = serializers.CharField(
+        required=False,
+        default="type",
+        help_text="Comma-separated: day, type, location",
+    )
+
+    def validate_group_by(self, value: str) -> list[str]:
+        keys = [key.strip() for key in value.split(",") if key.strip()]
+        unknown = set(keys) - {"day", "type", "location"}
+        if not keys or unknown:
+            raise serializers.ValidationError(
+                "Group by one or more of: day, type, location"
+            )
+        return list(dict.fromkeys(keys))
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        days = (attrs["end_date"] - attrs["start_date"]).days
+        if days < 0:
+            raise serializers.ValidationError("end_date must not be before start_date")
+        if days >= 366:
+            raise serializers.ValidationError("At most 366 days per query")
+        return attrs
+
+
+class UtilizationSerializer(serializers.Serializer[Any]):
+    day = serializers.DateField(required=False)
+    type = serializers.CharField(required=False)
+    location = serializers.CharField(required=False)
+    in_use_hours = serializers.FloatField()
+    down_hours = serializers.FloatField()
+    idle_hours = serializers.FloatField()
+    utilization = serializers.FloatField(help_text="Share of the time in use")
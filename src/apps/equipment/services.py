@@ -2,13 +2,27 @@
 Service layer for Equipment. Handles atomic handoffs and maintenance triggers.
 """
 
+import logging
+from collections.abc import Sequence
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import TYPE_CHECKING
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any
 
 from django.core.exceptions import ValidationError
-from django.db import transaction
+from django.db import IntegrityError, connection, transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from prometheus_client import Counter
 
+from src.apps.core.kafka import KafkaProducer
+
+from . import lookup
+from .availability import load_timeline
+from .events import EquipmentMovedEvent
 from .models import (
+    RESERVATION_EXCLUSION_CONSTRAINT,
     Equipment,
     EquipmentIncident,
     EquipmentMovement,
@@ -19,6 +33,17 @@ from .models import (
 if TYPE_CHECKING:
     from django.contrib.auth.models import User
 
+logger = logging.getLogger(__name__)
+
+SCANS = Counter(
+    "healthcore_equipment_scans_total",
+    "Batched QR scans by outcome: moved, unchanged (same location), stale "
+    "(older than the last move) or unknown.",
+    ["outcome"],
+)
+
+STALE_SCAN_NOTE = "Scanned before the last recorded move; location not changed"
+
 
 def record_handoff(
     *,
@@ -86,7 +111,12 @@ def reserve_equipment(
 ) -> EquipmentReservation:
     """
     Reserves equipment.
-    Logic: Check for overlap. Check if equipment is usable.
+    Logic: Check if equipment is usable. Reject overlapping reservations.
+
+    On PostgreSQL the exclusion constraint rejects overlaps, including
+    concurrent ones. Elsewhere, the equipment row is locked (an UPDATE, which
+    also serializes SQLite writers) until the transaction commits, and the
+    request is checked against the equipment's reservation timeline.
     """
     if equipment.status in [EquipmentStatus.MAINTENANCE, EquipmentStatus.LOST]:
         raise ValidationError(f"Cannot reserve equipment in status {equipment.status}")
@@ -94,23 +124,186 @@ def reserve_equipment(
     if start_time >= end_time:
         raise ValidationError("End time must be after start time")
 
-    # Overlap check: (StartA < EndB) and (EndA > StartB)
-    overlap = EquipmentReservation.objects.filter(
-        equipment=equipment,
-        status="ACTIVE",
-        start_time__lt=end_time,
-        end_time__gt=start_time,
-    ).exists()
-
-    if overlap:
-        raise ValidationError("Equipment is already reserved for this time slot.")
-
-    return EquipmentReservation.objects.create(
-        equipment=equipment,
-        requester=requester,
-        start_time=start_time,
-        end_time=end_time,
-        purpose=purpose,
-        department_id=department_id,
-        status="ACTIVE",
+    def create() -> EquipmentReservation:
+        return EquipmentReservation.objects.create(
+            equipment=equipment,
+            requester=requester,
+            start_time=start_time,
+            end_time=end_time,
+            purpose=purpose,
+            department_id=department_id,
+            status="ACTIVE",
+        )
+
+    if connection.vendor == "postgresql":
+        try:
+            with transaction.atomic():
+                return create()
+        except IntegrityError as e:
+            if RESERVATION_EXCLUSION_CONSTRAINT not in str(e):
+                raise
+            raise ValidationError(
+                _overlap_message(equipment, start_time, end_time)
+            ) from e
+
+    with transaction.atomic():
+        Equipment.objects.filter(pk=equipment.pk).update(updated_at=timezone.now())
+        if load_timeline(equipment.pk, start_time).conflicts(start_time, end_time):
+            raise ValidationError(_overlap_message(equipment, start_time, end_time))
+        return create()
+
+
+def _overlap_message(
+    equipment: Equipment, start_time: datetime, end_time: datetime
+) -> str:
+    next_free = load_timeline(equipment.pk, start_time).next_free(
+        start_time, end_time - start_time
     )
+    return (
+        "Equipment is already reserved for this time slot. "
+        f"Next free slot of this length starts at {next_free.isoformat()}."
+    )
+
+
+@dataclass
+class ScanBatchResult:
+    """Outcome of a batch of QR scans."""
+
+    received: int
+    movements: int = 0
+    moved_equipment: list[int] = field(default_factory=list)
+    unknown_qr_codes: list[str] = field(default_factory=list)
+
+
+def record_scans(*, scans: Sequence[dict[str, Any]], actor: "User") -> ScanBatchResult:
+    """
+    Applies a batch of QR scans (qr_code, location, scanned_at) synced by a
+    handheld scanner.
+    Logic: Scans are replayed in scan order. Each change of location is a
+    movement. Repeated scans at the same place are dropped. Lost equipment
+    that is scanned becomes available, as with a handoff. Equipment is
+    resolved, moved and updated in a constant number of queries, whatever
+    the batch size. One event is published per moved asset, with its route.
+    Unknown or inactive QR codes are skipped and reported.
+
+    Scanners sync late, so a scan may be older than the asset's last
+    recorded move (a live handoff or a scan synced earlier). Such a scan is
+    kept only as history, a sighting at its location and time. It does not
+    move the asset or change its status.
+    """
+    ordered = sorted(scans, key=itemgetter("scanned_at"))
+    result = ScanBatchResult(received=len(scans))
+
+    last_moved = (
+        EquipmentMovement.objects.filter(equipment=OuterRef("pk"))
+        .annotate(moved_at=Coalesce("scanned_at", "timestamp"))
+        .order_by("-moved_at")
+        .values("moved_at")[:1]
+    )
+    with transaction.atomic():
+        equipment_by_qr: dict[str, Equipment] = {
+            equipment.qr_code: equipment
+            for equipment in Equipment.objects.select_for_update()
+            .filter(qr_code__in={scan["qr_code"] for scan in ordered}, is_active=True)
+            .annotate(last_moved_at=Subquery(last_moved))
+        }
+        movements: list[EquipmentMovement] = []
+        routes: dict[int, list[dict[str, Any]]] = {}
+        changed: dict[int, Equipment] = {}
+        sighted: dict[int, str] = {}
+
+        for scan in ordered:
+            equipment = equipment_by_qr.get(scan["qr_code"])
+            if equipment is None:
+                SCANS.labels("unknown").inc()
+                if scan["qr_code"] not in result.unknown_qr_codes:
+                    result.unknown_qr_codes.append(scan["qr_code"])
+                continue
+            last_moved_at = equipment.last_moved_at  # type: ignore[attr-defined]
+            if last_moved_at is not None and scan["scanned_at"] < last_moved_at:
+                SCANS.labels("stale").inc()
+                if sighted.get(equipment.pk) != scan["location"]:
+                    sighted[equipment.pk] = scan["location"]
+                    movements.append(
+                        EquipmentMovement(
+                            equipment=equipment,
+                            from_location=scan["location"],
+                            to_location=scan["location"],
+                            actor=actor,
+                            method="SCAN",
+                            scanned_at=scan["scanned_at"],
+                            notes=STALE_SCAN_NOTE,
+                        )
+                    )
+                continue
+            if equipment.status == EquipmentStatus.LOST:
+                equipment.status = EquipmentStatus.AVAILABLE
+                changed[equipment.pk] = equipment
+            if scan["location"] == equipment.current_location:
+                SCANS.labels("unchanged").inc()
+                continue
+
+            SCANS.labels("moved").inc()
+            movements.append(
+                EquipmentMovement(
+                    equipment=equipment,
+                    from_location=equipment.current_location,
+                    to_location=scan["location"],
+                    actor=actor,
+                    method="SCAN",
+                    scanned_at=scan["scanned_at"],
+                )
+            )
+            routes.setdefault(equipment.pk, []).append(
+                {
+                    "from_location": equipment.current_location,
+                    "to_location": scan["location"],
+                    "scanned_at": scan["scanned_at"].isoformat(),
+                }
+            )
+            equipment.current_location = scan["location"]
+            changed[equipment.pk] = equipment
+
+        now = timezone.now()
+        for equipment in changed.values():
+            equipment.updated_at = now
+            equipment.updated_by = actor
+        EquipmentMovement.objects.bulk_create(movements)
+        Equipment.objects.bulk_update(
+            changed.values(),
+            ["current_location", "status", "updated_at", "updated_by"],
+        )
+        # bulk_update sends no post_save
+        lookup.invalidate(equipment.qr_code for equipment in changed.values())
+
+        events = [
+            EquipmentMovedEvent(
+                equipment_id,
+                {
+                    "from_location": route[0]["from_location"],
+                    "to_location": route[-1]["to_location"],
+                    "moves": route,
+                    "actor_id": actor.pk,
+                },
+            )
+            for equipment_id, route in routes.items()
+        ]
+        if events:
+            transaction.on_commit(lambda: _publish_moves(events))
+
+    result.movements = len(movements)
+    result.moved_equipment = list(routes)
+    return result
+
+
+def _publish_moves(events: list[EquipmentMovedEvent]) -> None:
+    producer = KafkaProducer.get_instance()
+    for event in events:
+        try:
+            producer.publish(
+                event_type=event.event_type,
+                data=event.to_dict(),
+                key=str(event.data["equipment_id"]),
+            )
+        except Exception as e:
+            logger.error(f"Failed to publish equipment moved event: {e}")
@@ -0,0 +1,22 @@
+"""
+Celery tasks for the equipment app.
+
+``rollup_utilization`` rebuilds the recent daily utilization rollups (see
+``analytics``).
+"""
+
+import logging
+
+from celery import shared_task
+
+from . import analytics
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(acks_late=True)  # type: ignore[misc]
+def rollup_utilization() -> dict[str, str | int]:
+    """Recompute equipment utilization rollups through yesterday."""
+    start_day, end_day, rows = analytics.refresh_rollups()
+    logger.info(f"Equipment utilization: {rows} rollups for {start_day}..{end_day}")
+    return {"start": start_day.isoformat(), "end": end_day.isoformat(), "rows": rows}
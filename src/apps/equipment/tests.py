@@ -1,11 +1,31 @@
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+import numpy as np
 import pytest
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from model_bakery import baker
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
 
-from . import services
-from .models import Equipment, EquipmentStatus
+from . import analytics, services
+from .availability import ReservationTimeline, location_distance
+from .models import (
+    Equipment,
+    EquipmentIncident,
+    EquipmentMovement,
+    EquipmentReservation,
+    EquipmentStatus,
+    EquipmentType,
+    EquipmentUtilization,
+)
 
 User = get_user_model()
 
@@ -77,3 +97,680 @@ class TestEquipmentAPI:
         url = f"/api/v1/equipment/equipment/{equipment.id}/handoff/"
         response = client.post(url, {"to_location": "ER"})
         assert response.status_code == 403  # Forbidden
+
+
+NOW = timezone.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+
+def _hours(start, end):
+    return NOW + timedelta(hours=start), NOW + timedelta(hours=end)
+
+
+def _reserve(equipment, user, start, end):
+    start_time, end_time = _hours(start, end)
+    return services.reserve_equipment(
+        equipment=equipment,
+        requester=user,
+        start_time=start_time,
+        end_time=end_time,
+        purpose="Surgery",
+        department_id="SURG",
+    )
+
+
+def _pump(serial, location, **kwargs):
+    return baker.make(
+        Equipment,
+        name=kwargs.pop("name", f"Pump {serial}"),
+        type=EquipmentType.INFUSION_PUMP,
+        serial_number=serial,
+        qr_code=f"QR-{serial}",
+        current_location=location,
+        status=kwargs.pop("status", EquipmentStatus.AVAILABLE),
+        **kwargs,
+    )
+
+
+class TestReservationTimeline:
+    def test_conflicts(self):
+        timeline = ReservationTimeline([_hours(0, 2), _hours(4, 6), _hours(8, 9)])
+
+        assert timeline.conflicts(*_hours(1, 5)) == [_hours(0, 2), _hours(4, 6)]
+        assert timeline.conflicts(*_hours(2, 4)) == []  # Back to back
+        assert timeline.conflicts(*_hours(9, 10)) == []
+
+    def test_long_interval_is_not_skipped(self):
+        # A long reservation starting early must still be found later on
+        timeline = ReservationTimeline([_hours(0, 10), _hours(1, 2)])
+        assert timeline.conflicts(*_hours(5, 6)) == [_hours(0, 10)]
+
+    def test_next_free(self):
+        timeline = ReservationTimeline([_hours(0, 2), _hours(3, 6), _hours(8, 9)])
+
+        assert timeline.next_free(NOW, timedelta(hours=1)) == _hours(2, 2)[0]
+        assert timeline.next_free(NOW, timedelta(hours=2)) == _hours(6, 6)[0]
+        assert timeline.next_free(NOW, timedelta(hours=3)) == _hours(9, 9)[0]
+
+
+class TestLocationDistance:
+    def test_distance(self):
+        assert location_distance("Main/3/ICU/Bay 2", "main/3/icu/bay 2") == 0
+        assert location_distance("Main/3/ICU/Bay 2", "Main/3/ICU/Bay 4") == 2
+        assert location_distance("Main/3/ICU", "Main/3/ICU/Bay 4") == 1
+        assert location_distance("Main/3/ICU", "Main/2/Storage") == 4
+        assert location_distance("ICU", "Storage") == 2
+
+
+@pytest.mark.django_db
+class TestReservations:
+    def test_overlap_rejected_with_next_free_slot(self, equipment, medical_user):
+        _reserve(equipment, medical_user, 0, 2)
+
+        with pytest.raises(ValidationError) as excinfo:
+            _reserve(equipment, medical_user, 1, 3)
+
+        assert _hours(2, 2)[0].isoformat() in str(excinfo.value)
+        assert EquipmentReservation.objects.filter(equipment=equipment).count() == 1
+
+    def test_back_to_back_and_cancelled_allowed(self, equipment, medical_user):
+        first = _reserve(equipment, medical_user, 0, 2)
+        _reserve(equipment, medical_user, 2, 4)
+        first.status = "CANCELLED"
+        first.save()
+
+        _reserve(equipment, medical_user, 0, 2)
+
+        assert equipment.reservations.filter(status="ACTIVE").count() == 2
+
+    def test_other_equipment_not_affected(self, equipment, medical_user):
+        _reserve(equipment, medical_user, 0, 2)
+        _reserve(_pump("IP-2", "Storage"), medical_user, 0, 2)
+
+    def test_unusable_equipment_rejected(self, equipment, medical_user):
+        equipment.status = EquipmentStatus.MAINTENANCE
+        equipment.save()
+
+        with pytest.raises(ValidationError):
+            _reserve(equipment, medical_user, 0, 2)
+
+
+@pytest.mark.postgres
+@pytest.mark.skipif(
+    connection.vendor != "postgresql",
+    reason="The exclusion constraint exists on PostgreSQL only",
+)
+@pytest.mark.django_db
+def test_exclusion_constraint_rejects_direct_overlap(equipment, medical_user):
+    _reserve(equipment, medical_user, 0, 2)
+    start_time, end_time = _hours(1, 3)
+
+    with pytest.raises(IntegrityError), transaction.atomic():
+        EquipmentReservation.objects.create(
+            equipment=equipment,
+            requester=medical_user,
+            start_time=start_time,
+            end_time=end_time,
+            purpose="Bypassing the service",
+            department_id="SURG",
+        )
+
+
+@pytest.mark.django_db
+class TestExclusionViolation:
+    """
+    How reserve_equipment reports a PostgreSQL constraint violation, run on
+    any database by raising the error the exclusion constraint would.
+    """
+
+    def _reserve_on_postgresql(self, equipment, user, error):
+        with (
+            patch("src.apps.equipment.services.connection") as db,
+            patch.object(EquipmentReservation.objects, "create", side_effect=error),
+        ):
+            db.vendor = "postgresql"
+            return _reserve(equipment, user, 1, 3)
+
+    def test_overlap_becomes_validation_error(self, equipment, medical_user):
+        _reserve(equipment, medical_user, 0, 2)
+        error = IntegrityError(
+            'conflicting key value violates exclusion constraint "'
+            f'{services.RESERVATION_EXCLUSION_CONSTRAINT}"'
+        )
+
+        with pytest.raises(ValidationError) as excinfo:
+            self._reserve_on_postgresql(equipment, medical_user, error)
+
+        message = excinfo.value.messages[0]
+        assert "already reserved" in message
+        assert _hours(2, 2)[0].isoformat() in message
+
+    def test_other_integrity_errors_propagate(self, equipment, medical_user):
+        error = IntegrityError("null value in column violates not-null constraint")
+
+        with pytest.raises(IntegrityError):
+            self._reserve_on_postgresql(equipment, medical_user, error)
+
+
+@pytest.mark.django_db
+class TestAvailabilityAPI:
+    url = "/api/v1/equipment/equipment/available/"
+
+    def _query(self, client, start, end, **params):
+        start_time, end_time = _hours(start, end)
+        return client.get(
+            self.url,
+            {
+                "type": EquipmentType.INFUSION_PUMP,
+                "start_time": start_time.isoformat(),
+                "end_time": end_time.isoformat(),
+                **params,
+            },
+        )
+
+    def test_free_units_nearest_first(self, auth_client, medical_user):
+        same_unit = _pump("IP-1", "Main/3/ICU/Bay 4", status=EquipmentStatus.IN_USE)
+        same_floor = _pump("IP-2", "Main/3/Cardiology")
+        elsewhere = _pump("IP-3", "Annex/1/Storage")
+        reserved = _pump("IP-4", "Main/3/ICU/Bay 2")
+        _pump("IP-5", "Main/3/ICU/Bay 2", status=EquipmentStatus.MAINTENANCE)
+        _pump("IP-6", "Main/3/ICU/Bay 2", is_active=False)
+        baker.make(
+            Equipment,
+            type=EquipmentType.WHEELCHAIR,
+            current_location="Main/3/ICU/Bay 2",
+        )
+        _reserve(reserved, medical_user, 1, 3)
+
+        response = self._query(auth_client, 2, 4, near="Main/3/ICU/Bay 2")
+
+        assert response.status_code == 200
+        assert [unit["id"] for unit in response.data] == [
+            same_unit.id,
+            same_floor.id,
+            elsewhere.id,
+        ]
+        assert [unit["distance"] for unit in response.data] == [2, 3, 7]
+
+    def test_unit_free_after_reservation_ends(self, auth_client, medical_user):
+        pump = _pump("IP-1", "ICU")
+        _reserve(pump, medical_user, 0, 2)
+
+        assert self._query(auth_client, 1, 3).data == []
+        assert [unit["id"] for unit in self._query(auth_client, 2, 3).data] == [pump.id]
+
+    def test_limit(self, auth_client):
+        for serial in range(5):
+            _pump(f"IP-{serial}", "ICU")
+
+        assert len(self._query(auth_client, 0, 1, limit=3).data) == 3
+
+    def test_invalid_window(self, auth_client):
+        assert self._query(auth_client, 2, 1).status_code == 400
+
+
+def _scan(qr_code, location, minutes):
+    return {
+        "qr_code": qr_code,
+        "location": location,
+        "scanned_at": NOW + timedelta(minutes=minutes),
+    }
+
+
+@pytest.mark.django_db
+class TestScanBatch:
+    def test_replays_scans_in_order(self, equipment, medical_user):
+        other = _pump("IP-2", "Storage")
+        scans = [
+            _scan("QR-123", "ER", 3),
+            _scan("QR-123", "ICU", 1),
+            _scan("QR-123", "ICU", 2),  # Same place again
+            _scan("QR-IP-2", "Storage", 1),  # Not moved
+            _scan("QR-MISSING", "ICU", 1),
+        ]
+
+        result = services.record_scans(scans=scans, actor=medical_user)
+
+        assert result.received == 5
+        assert result.movements == 2
+        assert result.moved_equipment == [equipment.id]
+        assert result.unknown_qr_codes == ["QR-MISSING"]
+        equipment.refresh_from_db()
+        other.refresh_from_db()
+        assert equipment.current_location == "ER"
+        assert equipment.updated_by == medical_user
+        assert other.current_location == "Storage"
+        assert list(
+            EquipmentMovement.objects.order_by("scanned_at").values_list(
+                "from_location", "to_location", "scanned_at"
+            )
+        ) == [
+            ("Storage", "ICU", NOW + timedelta(minutes=1)),
+            ("ICU", "ER", NOW + timedelta(minutes=3)),
+        ]
+
+    def test_lost_equipment_found(self, equipment, medical_user):
+        equipment.status = EquipmentStatus.LOST
+        equipment.save()
+
+        services.record_scans(scans=[_scan("QR-123", "Storage", 0)], actor=medical_user)
+
+        equipment.refresh_from_db()
+        assert equipment.status == EquipmentStatus.AVAILABLE
+
+    def test_stale_scans_do_not_undo_live_handoff(self, equipment, medical_user):
+        synced_late = timezone.now() - timedelta(minutes=30)
+        services.record_handoff(
+            equipment=equipment, to_location="OR-2", actor=medical_user
+        )
+        equipment.status = EquipmentStatus.LOST
+        equipment.save()
+        scans = [
+            {"qr_code": "QR-123", "location": "ICU", "scanned_at": synced_late},
+            {
+                "qr_code": "QR-123",
+                "location": "ICU",
+                "scanned_at": synced_late + timedelta(minutes=1),
+            },
+        ]
+
+        with patch("src.apps.equipment.services.KafkaProducer") as producer:
+            result = services.record_scans(scans=scans, actor=medical_user)
+
+        assert result.movements == 1
+        assert result.moved_equipment == []
+        producer.get_instance.assert_not_called()
+        equipment.refresh_from_db()
+        assert equipment.current_location == "OR-2"
+        assert equipment.status == EquipmentStatus.LOST
+        sighting = EquipmentMovement.objects.get(scanned_at=synced_late)
+        assert (sighting.from_location, sighting.to_location) == ("ICU", "ICU")
+
+    def test_scans_after_last_move_still_apply(self, equipment, medical_user):
+        services.record_scans(scans=[_scan("QR-123", "ICU", 0)], actor=medical_user)
+
+        services.record_scans(
+            scans=[_scan("QR-123", "Storage", -5), _scan("QR-123", "ER", 5)],
+            actor=medical_user,
+        )
+
+        equipment.refresh_from_db()
+        assert equipment.current_location == "ER"
+        assert list(
+            EquipmentMovement.objects.order_by("scanned_at").values_list(
+                "from_location", "to_location"
+            )
+        ) == [("Storage", "Storage"), ("Storage", "ICU"), ("ICU", "ER")]
+
+    def test_inactive_equipment_is_unknown(self, equipment, medical_user):
+        equipment.soft_delete()
+
+        result = services.record_scans(
+            scans=[_scan("QR-123", "ICU", 0)], actor=medical_user
+        )
+
+        assert result.unknown_qr_codes == ["QR-123"]
+        equipment.refresh_from_db()
+        assert equipment.current_location == "Storage"
+
+    def test_queries_do_not_grow_with_batch(self, medical_user):
+        pumps = [_pump(f"IP-{i}", "Storage") for i in range(20)]
+
+        def queries(scans):
+            with CaptureQueriesContext(connection) as context:
+                services.record_scans(scans=scans, actor=medical_user)
+            return len(context.captured_queries)
+
+        small = queries([_scan(pumps[0].qr_code, "ICU", 0)])
+        large = queries(
+            [
+                _scan(pump.qr_code, f"Ward {step}", step)
+                for step in range(5)
+                for pump in pumps
+            ]
+        )
+        assert large == small
+
+    def test_one_event_per_asset(
+        self, equipment, medical_user, django_capture_on_commit_callbacks
+    ):
+        _pump("IP-2", "Storage")
+        scans = [
+            _scan("QR-123", "ICU", 1),
+            _scan("QR-IP-2", "OR", 1),
+            _scan("QR-123", "ER", 2),
+        ]
+
+        with (
+            patch("src.apps.equipment.services.KafkaProducer") as producer,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            services.record_scans(scans=scans, actor=medical_user)
+
+        published = producer.get_instance.return_value.publish.call_args_list
+        assert len(published) == 2
+        event = next(
+            call.kwargs["data"]["data"]
+            for call in published
+            if call.kwargs["key"] == str(equipment.id)
+        )
+        assert event["from_location"] == "Storage"
+        assert event["to_location"] == "ER"
+        assert [move["to_location"] for move in event["moves"]] == ["ICU", "ER"]
+
+
+@pytest.mark.django_db
+class TestScanBatchAPI:
+    url = "/api/v1/equipment/equipment/scans/"
+
+    def test_batch(self, auth_client, equipment):
+        scans = [
+            {**scan, "scanned_at": scan["scanned_at"].isoformat()}
+            for scan in [_scan("QR-123", "ICU", 0), _scan("QR-X", "ER", 1)]
+        ]
+
+        response = auth_client.post(self.url, {"scans": scans}, format="json")
+
+        assert response.status_code == 200
+        assert response.data["movements"] == 1
+        assert response.data["unknown_qr_codes"] == ["QR-X"]
+
+    def test_batch_size_limited(self, auth_client, settings):
+        settings.EQUIPMENT_SCAN_BATCH_MAX = 2
+        scans = [
+            {"qr_code": "QR-1", "location": "ICU", "scanned_at": NOW.isoformat()}
+        ] * 3
+
+        response = auth_client.post(self.url, {"scans": scans}, format="json")
+
+        assert response.status_code == 400
+
+    def test_requires_medical_staff(self, equipment):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="nobody"))
+
+        response = client.post(self.url, {"scans": []}, format="json")
+
+        assert response.status_code == 403
+
+
+@pytest.mark.django_db
+class TestQRLookup:
+    url = "/api/v1/equipment/qr/"
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+
+    @pytest.fixture
+    def staff_client(self):
+        client = APIClient()
+        client.force_authenticate(
+            User.objects.create_user(username="porter", is_staff=True)
+        )
+        return client
+
+    @pytest.fixture
+    def nurse_client(self):
+        nurse = User.objects.create_user(username="nurse", password="password")
+        nurse.groups.add(Group.objects.get_or_create(name="Nurses")[0])
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(nurse).access_token}"
+        )
+        return client
+
+    def test_cache_hit_skips_database(
+        self, nurse_client, equipment, django_assert_num_queries
+    ):
+        # User, groups and the equipment row
+        with django_assert_num_queries(3):
+            first = nurse_client.get(self.url, {"qr": "QR-123"})
+        with django_assert_num_queries(0):
+            second = nurse_client.get(self.url, {"qr": "QR-123"})
+
+        assert first.status_code == second.status_code == 200
+        assert second.data == {
+            "id": equipment.id,
+            "qr_code": "QR-123",
+            "status": EquipmentStatus.AVAILABLE,
+            "current_location": "Storage",
+            "type": equipment.type,
+        }
+
+    def test_save_invalidates(
+        self, staff_client, equipment, medical_user, django_capture_on_commit_callbacks
+    ):
+        staff_client.get(self.url, {"qr": "QR-123"})
+
+        with django_capture_on_commit_callbacks(execute=True):
+            services.record_handoff(
+                equipment=equipment, to_location="ICU", actor=medical_user
+            )
+
+        response = staff_client.get(self.url, {"qr": "QR-123"})
+        assert response.data["current_location"] == "ICU"
+
+    def test_new_qr_code_invalidates_old(
+        self, staff_client, equipment, django_capture_on_commit_callbacks
+    ):
+        staff_client.get(self.url, {"qr": "QR-123"})
+        equipment = Equipment.objects.get(pk=equipment.pk)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            equipment.qr_code = "QR-456"
+            equipment.save()
+
+        assert staff_client.get(self.url, {"qr": "QR-123"}).status_code == 404
+        assert staff_client.get(self.url, {"qr": "QR-456"}).status_code == 200
+
+    def test_batch_scans_invalidate(
+        self, staff_client, equipment, medical_user, django_capture_on_commit_callbacks
+    ):
+        staff_client.get(self.url, {"qr": "QR-123"})
+
+        with django_capture_on_commit_callbacks(execute=True):
+            services.record_scans(scans=[_scan("QR-123", "OR", 0)], actor=medical_user)
+
+        response = staff_client.get(self.url, {"qr": "QR-123"})
+        assert response.data["current_location"] == "OR"
+
+    def test_inactive_and_unknown(
+        self, staff_client, equipment, django_capture_on_commit_callbacks
+    ):
+        staff_client.get(self.url, {"qr": "QR-123"})
+        with django_capture_on_commit_callbacks(execute=True):
+            equipment.soft_delete()
+
+        assert staff_client.get(self.url, {"qr": "QR-123"}).status_code == 404
+        assert staff_client.get(self.url, {"qr": "https://x/y z"}).status_code == 404
+        assert staff_client.get(self.url).status_code == 400
+
+    def test_requires_medical_staff(self, equipment):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="visitor"))
+
+        assert client.get(self.url, {"qr": "QR-123"}).status_code == 403
+
+
+DAY = date(2026, 3, 2)
+
+
+def _at(day_offset, hour):
+    return timezone.make_aware(
+        datetime.combine(DAY + timedelta(days=day_offset), datetime.min.time())
+    ) + timedelta(hours=hour)
+
+
+@pytest.fixture
+def usage_history(medical_user):
+    """
+    An ECG in Storage moved to the ICU at 06:00 on DAY, reserved 08-12 and
+    down from a HIGH incident at 10:00 until 02:00 the next day.
+    """
+    ecg = baker.make(Equipment, type=EquipmentType.ECG, current_location="Main/2/ICU")
+    wheelchair = baker.make(
+        Equipment, type=EquipmentType.WHEELCHAIR, current_location="Main/1/ER"
+    )
+    retired = baker.make(Equipment, type=EquipmentType.ECG, is_active=False)
+    Equipment.objects.filter(pk__in=[ecg.pk, retired.pk]).update(created_at=_at(-30, 0))
+    # Added at noon on the second day
+    Equipment.objects.filter(pk=wheelchair.pk).update(created_at=_at(1, 12))
+
+    baker.make(
+        EquipmentMovement,
+        equipment=ecg,
+        from_location="Main/0/Storage",
+        to_location="Main/2/ICU",
+        scanned_at=_at(0, 6),
+    )
+    for start, end, status in [(8, 12, "COMPLETED"), (14, 16, "CANCELLED")]:
+        baker.make(
+            EquipmentReservation,
+            equipment=ecg,
+            requester=medical_user,
+            start_time=_at(0, start),
+            end_time=_at(0, end),
+            status=status,
+        )
+    baker.make(
+        EquipmentReservation,
+        equipment=retired,
+        requester=medical_user,
+        start_time=_at(0, 0),
+        end_time=_at(0, 5),
+    )
+    incident = baker.make(
+        EquipmentIncident, equipment=ecg, severity="HIGH", resolved_at=_at(1, 2)
+    )
+    EquipmentIncident.objects.filter(pk=incident.pk).update(created_at=_at(0, 10))
+    baker.make(EquipmentIncident, equipment=ecg, severity="LOW")
+    return ecg
+
+
+def _hours_by_group(rollups):
+    return {
+        (r.day, r.equipment_type, r.location): (
+            r.in_use_seconds / 3600,
+            r.down_seconds / 3600,
+            r.idle_seconds / 3600,
+        )
+        for r in rollups
+    }
+
+
+@pytest.mark.django_db
+class TestUtilizationAnalytics:
+    def test_reconstructs_daily_states(self, usage_history):
+        rollups = analytics.compute_utilization(DAY, DAY + timedelta(days=1))
+
+        assert _hours_by_group(rollups) == {
+            # (in use, down, idle)
+            (DAY, "ECG", "Main/0/Storage"): (0, 0, 6),
+            (DAY, "ECG", "Main/2/ICU"): (2, 14, 2),
+            (DAY + timedelta(days=1), "ECG", "Main/2/ICU"): (0, 2, 22),
+            (DAY + timedelta(days=1), "WHEELCHAIR", "Main/1/ER"): (0, 0, 12),
+        }
+
+    def test_location_before_later_moves(self, usage_history):
+        # Moves after the window still tell where the asset was during it
+        rollups = analytics.compute_utilization(
+            DAY - timedelta(days=1), DAY - timedelta(days=1)
+        )
+        assert _hours_by_group(rollups) == {
+            (DAY - timedelta(days=1), "ECG", "Main/0/Storage"): (0, 0, 24)
+        }
+
+    def test_daily_seconds_splits_at_midnight(self):
+        bounds = np.array([0.0, 86400.0, 172800.0])
+        totals = analytics.daily_seconds(
+            group=np.array([0, 1]),
+            state=np.array([analytics.IN_USE, analytics.DOWN]),
+            starts=np.array([80000.0, 0.0]),
+            ends=np.array([90000.0, 172800.0]),
+            bounds=bounds,
+            groups=2,
+        )
+        assert totals[0, 0, analytics.IN_USE] == 6400
+        assert totals[1, 0, analytics.IN_USE] == 3600
+        assert totals[:, 1, analytics.DOWN].tolist() == [86400, 86400]
+
+    def test_rollup_replaces_days(self, usage_history):
+        analytics.rollup_utilization(DAY, DAY + timedelta(days=1))
+        stored = analytics.rollup_utilization(DAY, DAY + timedelta(days=1))
+
+        assert stored == 4
+        assert EquipmentUtilization.objects.count() == 4
+
+    def test_refresh_covers_recent_days(self, usage_history, settings):
+        settings.EQUIPMENT_UTILIZATION_RECOMPUTE_DAYS = 2
+
+        start_day, end_day, rows = analytics.refresh_rollups(
+            today=DAY + timedelta(days=2)
+        )
+
+        assert (start_day, end_day, rows) == (DAY, DAY + timedelta(days=1), 4)
+
+    def test_command(self, usage_history):
+        call_command(
+            "rollup_equipment_utilization",
+            "--days=2",
+            f"--end={DAY + timedelta(days=1)}",
+            stdout=None,
+        )
+        assert EquipmentUtilization.objects.count() == 4
+
+
+@pytest.mark.django_db
+class TestUtilizationAPI:
+    url = "/api/v1/equipment/utilization/"
+
+    @pytest.fixture(autouse=True)
+    def rollups(self, usage_history):
+        analytics.rollup_utilization(DAY, DAY + timedelta(days=1))
+
+    def _get(self, client, **params):
+        return client.get(
+            self.url,
+            {
+                "start_date": DAY.isoformat(),
+                "end_date": (DAY + timedelta(days=1)).isoformat(),
+                **params,
+            },
+        )
+
+    def test_by_type_from_rollups_only(self, auth_client, django_assert_num_queries):
+        # The Doctors group check, then one query on the rollups
+        with django_assert_num_queries(2):
+            response = self._get(auth_client)
+
+        assert response.status_code == 200
+        assert response.data == [
+            {
+                "type": "ECG",
+                "in_use_hours": 2.0,
+                "down_hours": 16.0,
+                "idle_hours": 30.0,
+                "utilization": round(2 / 48, 4),
+            },
+            {
+                "type": "WHEELCHAIR",
+                "in_use_hours": 0.0,
+                "down_hours": 0.0,
+                "idle_hours": 12.0,
+                "utilization": 0.0,
+            },
+        ]
+
+    def test_location_prefix_and_grouping(self, auth_client):
+        response = self._get(auth_client, location="main/2", group_by="day,location")
+
+        assert [(row["day"], row["location"]) for row in response.data] == [
+            (DAY.isoformat(), "Main/2/ICU"),
+            ((DAY + timedelta(days=1)).isoformat(), "Main/2/ICU"),
+        ]
+
+    def test_invalid_query(self, auth_client):
+        assert self._get(auth_client, group_by="ward").status_code == 400
+        assert (
+            self._get(auth_client, end_date=(DAY - timedelta(days=1)).isoformat())
+        ).status_code == 400
@@ -1,10 +1,14 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import EquipmentViewSet
+from .views import EquipmentViewSet, qr_lookup_view, utilization_view
 
 app_name = "equipment"
 router = DefaultRouter()
 router.register(r"equipment", EquipmentViewSet, basename="equipment")
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path("", include(router.urls)),
+    path("qr/", qr_lookup_view, name="qr-lookup"),
+    path("utilization/", utilization_view, name="utilization"),
+]
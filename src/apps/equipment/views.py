@@ -5,24 +5,42 @@ API Views for Equipment.
 from typing import Any
 
 from django.core.exceptions import ValidationError
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import status, viewsets
-from rest_framework.decorators import action
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import (
+    action,
+    api_view,
+    authentication_classes,
+    permission_classes,
+)
+from rest_framework.request import Request
 from rest_framework.response import Response
 
-from . import services
+from src.apps.core.authentication import CachedJWTAuthentication
+
+from . import analytics, services
+from .availability import find_available_equipment
+from .lookup import resolve_qr
 from .models import (
     Equipment,
 )
 from .permissions import IsMedicalStaffOrReadOnly
 from .serializers import (
+    AvailabilityQuerySerializer,
+    AvailableEquipmentSerializer,
     EquipmentIncidentSerializer,
     EquipmentMovementSerializer,
     EquipmentReservationSerializer,
     EquipmentSerializer,
     HandoffSerializer,
+    QRLookupSerializer,
     ReportIncidentSerializer,
     ReserveSerializer,
+    ScanBatchResultSerializer,
+    ScanBatchSerializer,
+    UtilizationQuerySerializer,
+    UtilizationSerializer,
 )
 
 
@@ -79,3 +97,87 @@ class EquipmentViewSet(viewsets.ModelViewSet[Equipment]):
             )
         except ValidationError as e:
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    @extend_schema(
+        parameters=[AvailabilityQuerySerializer],
+        responses=AvailableEquipmentSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"])
+    def available(self, request: Any) -> Response:
+        """Units of a type free for a time window, nearest to ``near`` first."""
+        query = AvailabilityQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        units = find_available_equipment(
+            equipment_type=params["type"],
+            start_time=params["start_time"],
+            end_time=params["end_time"],
+            near=params["near"],
+            limit=params["limit"],
+        )
+        return Response(AvailableEquipmentSerializer(units, many=True).data)
+
+    @extend_schema(request=ScanBatchSerializer, responses=ScanBatchResultSerializer)
+    @action(detail=False, methods=["post"])
+    def scans(self, request: Any) -> Response:
+        """Apply a batch of QR scans synced by a handheld scanner, in scan order."""
+        serializer = ScanBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        result = services.record_scans(
+            scans=serializer.validated_data["scans"], actor=request.user
+        )
+        return Response(ScanBatchResultSerializer(result).data)
+
+
+@extend_schema(
+    parameters=[OpenApiParameter("qr", str, required=True, description="QR content")],
+    responses=QRLookupSerializer,
+)
+@api_view(["GET"])
+@authentication_classes([CachedJWTAuthentication, SessionAuthentication])
+@permission_classes([IsMedicalStaffOrReadOnly])
+def qr_lookup_view(request: Request) -> Response:
+    """
+    Resolve a scanned QR code to a compact equipment record.
+
+    Served from the QR cache without a serializer. The caller's user and
+    groups come from short-lived caches too, so a hit runs no query.
+    """
+    qr_code = request.query_params.get("qr", "")
+    if not qr_code:
+        return Response(
+            {"detail": "qr is required."}, status=status.HTTP_400_BAD_REQUEST
+        )
+    record = resolve_qr(qr_code)
+    if record is None:
+        return Response(
+            {"detail": "Unknown QR code."}, status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(record)
+
+
+@extend_schema(
+    parameters=[UtilizationQuerySerializer],
+    responses=UtilizationSerializer(many=True),
+)
+@api_view(["GET"])
+@permission_classes([IsMedicalStaffOrReadOnly])
+def utilization_view(request: Request) -> Response:
+    """
+    Equipment hours in use, down and idle per day, type and/or location.
+
+    Read from the nightly daily rollups; days not rolled up yet (today) are
+    not included.
+    """
+    query = UtilizationQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    params = query.validated_data
+    summary = analytics.utilization_summary(
+        params["start_date"],
+        params["end_date"],
+        params["group_by"],
+        equipment_type=params["type"],
+        location=params["location"],
+    )
+    return Response(UtilizationSerializer(summary, many=True).data)
@@ -4,7 +4,7 @@ Django Admin configuration for the Patient Experience bounded context.
 
 from django.contrib import admin
 
-from .models import PatientComplaint, PatientFeedback
+from .models import FeedbackAnalysis, PatientComplaint, PatientFeedback
 
 
 @admin.register(PatientFeedback)
@@ -24,3 +24,12 @@ class PatientComplaintAdmin(admin.ModelAdmin[PatientComplaint]):
     autocomplete_fields = ("patient", "admission")
     readonly_fields = ("created_at", "updated_at")
     list_editable = ("status",)
+
+
+@admin.register(FeedbackAnalysis)
+class FeedbackAnalysisAdmin(admin.ModelAdmin[FeedbackAnalysis]):
+    list_display = ("feedback", "sentiment", "priority", "model_used", "created_at")
+    list_filter = ("sentiment", "priority")
+    search_fields = ("summary", "feedback__comments")
+    raw_id_fields = ("feedback",)
+    readonly_fields = ("created_at", "updated_at")
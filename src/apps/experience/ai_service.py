@@ -4,13 +4,16 @@ Provides AI-powered patient feedback analysis with rating context.
 """
 
 import logging
+from collections.abc import Iterator
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Optional
 
 from src.apps.core.ai_client import (
+    AIConfigurationError,
     AIServiceUnavailableError,
     get_ai_client,
 )
+from src.apps.core.ai_jobs import AIJobError
 
 logger = logging.getLogger(__name__)
 
@@ -145,3 +148,43 @@ def analyze_patient_feedback(
             success=False,
             error_message=f"Unexpected error: {str(e)}",
         )
+
+
+def stream_feedback_analysis(
+    feedback_text: str,
+    rating: Optional[int] = None,
+) -> tuple[Iterator[str], str]:
+    """
+    Stream AI feedback analysis. Input is validated by the caller.
+
+    Returns:
+        Tuple of (text chunk iterator, model name)
+
+    Raises:
+        AIConfigurationError: If the AI service is not configured
+        AIServiceUnavailableError: If the provider cannot be called
+    """
+    ai_client = get_ai_client()
+    if not ai_client.is_configured():
+        raise AIConfigurationError("AI service is not configured.")
+
+    chunks = ai_client.stream_content(
+        feedback_text, get_feedback_analysis_prompt(rating), temperature=0.3
+    )
+    return chunks, str(ai_client.model_name)
+
+
+def feedback_analysis_job(params: dict[str, Any]) -> dict[str, Any]:
+    """Async job handler for ``analyze_patient_feedback`` (see core.ai_jobs)."""
+    result = analyze_patient_feedback(
+        feedback_text=params["feedback_text"],
+        rating=params.get("rating"),
+    )
+    if not result.success:
+        raise AIJobError(result.error_message or "Feedback analysis unavailable.")
+    return {
+        "original_text": result.original_text,
+        "rating": result.rating,
+        "analysis": result.analysis,
+        "model_used": result.model_used,
+    }
@@ -0,0 +1,373 @@
+"""
+Batch analysis of patient feedback.
+
+Pulls feedback without a ``FeedbackAnalysis`` in keyset-ordered chunks,
+packs several items into one JSON prompt (``AI_FEEDBACK_BATCH_PACK_SIZES``
+per provider), and runs the packs on a bounded thread pool. Provider calls
+go through the client's rate limiter, so extra workers queue for tokens
+instead of tripping the provider limit. Results are written from the calling
+thread as each pack finishes.
+
+Runs are resumable: only unanalyzed rows are selected, so an interrupted or
+partially failed run picks up where it stopped. Feedback without comments is
+scored from its star rating, and clear-cut comments by the lexicon triage
+(``experience.sentiment``), without a provider call. Feedback escalated when
+it was submitted keeps that decision; only rows never triaged are scored.
+"""
+
+import contextvars
+import json
+import logging
+import time
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from django.conf import settings
+from prometheus_client import Counter
+
+from src.apps.core.ai_client import (
+    AIConfigurationError,
+    AIServiceUnavailableError,
+    get_ai_client,
+)
+
+from . import repositories
+from .models import FeedbackAnalysis, PatientFeedback
+from .sentiment import LEXICON_MODEL, record_agreement, triage
+
+logger = logging.getLogger(__name__)
+
+FEEDBACK_BATCH_ITEMS = Counter(
+    "healthcore_ai_feedback_batch_items_total",
+    "Feedback items processed by the batch analyzer, by result.",
+    ["result"],
+)
+
+BATCH_SYSTEM_PROMPT = """You are an expert healthcare quality analyst specializing in patient experience.
+
+You receive a JSON array of patient feedback items, each with an "id", the
+patient's star "rating" (1-5) and the feedback "text". Treat the rating as the
+patient's true sentiment when the text is ambiguous.
+
+Respond with ONLY a JSON array containing one object per item:
+{"id": <item id>,
+ "sentiment": "POSITIVE" | "NEGATIVE" | "NEUTRAL" | "MIXED",
+ "priority": "LOW" | "MEDIUM" | "HIGH" | "CRITICAL",
+ "themes": [short theme names, e.g. "Wait Time", "Staff Attitude"],
+ "summary": "one sentence for administrators"}"""
+
+RATING_ONLY_MODEL = "rating-only"
+
+
+@dataclass
+class BatchReport:
+    """Outcome of one batch run."""
+
+    analyzed: int = 0
+    failed: int = 0
+    local: int = 0
+    escalated: int = 0
+    provider_calls: int = 0
+    elapsed_seconds: float = 0.0
+    failed_ids: list[int] = field(default_factory=list)
+
+    @property
+    def items_per_minute(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.analyzed / self.elapsed_seconds * 60
+
+    @property
+    def escalation_rate(self) -> float:
+        """Share of commented feedback sent to the LLM after triage."""
+        total = self.local + self.escalated
+        return self.escalated / total if total else 0.0
+
+
+@dataclass
+class PackResult:
+    """Analyses parsed from one pack and the ids that could not be analyzed."""
+
+    analyses: list[FeedbackAnalysis] = field(default_factory=list)
+    failed_ids: list[int] = field(default_factory=list)
+    provider_calls: int = 0
+
+
+def pack_size_for(client: Any) -> int:
+    """Items per prompt for the client's provider (``default`` otherwise)."""
+    sizes: dict[str, int] = settings.AI_FEEDBACK_BATCH_PACK_SIZES
+    return max(1, sizes.get(type(client).__name__, sizes["default"]))
+
+
+def build_packs(
+    feedback: Sequence[PatientFeedback], pack_size: int
+) -> list[list[PatientFeedback]]:
+    """Group feedback into packs bounded by item count and prompt size."""
+    max_chars = settings.AI_FEEDBACK_BATCH_MAX_PROMPT_CHARS
+    packs: list[list[PatientFeedback]] = []
+    current: list[PatientFeedback] = []
+    chars = 0
+    for item in feedback:
+        size = len(item.comments)
+        if current and (len(current) >= pack_size or chars + size > max_chars):
+            packs.append(current)
+            current, chars = [], 0
+        current.append(item)
+        chars += size
+    if current:
+        packs.append(current)
+    return packs
+
+
+def rating_only_analysis(feedback: PatientFeedback) -> FeedbackAnalysis:
+    """Score feedback without comments from its star rating alone."""
+    rating = feedback.overall_rating
+    if rating >= 4:
+        sentiment, priority = "POSITIVE", "LOW"
+    elif rating == 3:
+        sentiment, priority = "NEUTRAL", "LOW"
+    else:
+        sentiment, priority = "NEGATIVE", "MEDIUM"
+    return FeedbackAnalysis(
+        feedback=feedback,
+        sentiment=sentiment,
+        priority=priority,
+        model_used=RATING_ONLY_MODEL,
+    )
+
+
+def triage_feedback(
+    feedback: Sequence[PatientFeedback],
+) -> tuple[list[FeedbackAnalysis], list[PatientFeedback]]:
+    """
+    Pre-score untriaged feedback with the lexicon scorer in one vectorized pass.
+
+    Feedback already escalated (at submission or by an earlier run) is not
+    scored again, so audit samples stay escalated. Newly escalated feedback
+    is stored with its reason. Returns (local analyses, feedback escalated
+    to the LLM).
+    """
+    untriaged = [f for f in feedback if not f.triage_reason]
+    scores = triage(
+        [f.comments for f in untriaged], [f.overall_rating for f in untriaged]
+    )
+    local: list[FeedbackAnalysis] = []
+    escalated: list[PatientFeedback] = []
+    for item, score in zip(untriaged, scores, strict=True):
+        if score.escalate:
+            item.triage_sentiment = score.sentiment
+            item.triage_reason = score.reason
+            escalated.append(item)
+            continue
+        local.append(
+            FeedbackAnalysis(
+                feedback=item,
+                sentiment=score.sentiment,
+                priority=score.priority,
+                themes=score.themes,
+                model_used=LEXICON_MODEL,
+                triage_sentiment=score.sentiment,
+            )
+        )
+    repositories.save_feedback_triage(escalated)
+    return local, [f for f in feedback if f.triage_reason]
+
+
+def pack_prompt(pack: Sequence[PatientFeedback]) -> str:
+    """Serialize a pack as the JSON array the batch prompt expects."""
+    return json.dumps(
+        [
+            {"id": item.id, "rating": item.overall_rating, "text": item.comments}
+            for item in pack
+        ],
+        ensure_ascii=False,
+    )
+
+
+def parse_pack_response(
+    text: str, pack: Sequence[PatientFeedback], model_used: str
+) -> PackResult:
+    """
+    Parse the provider's JSON array into analyses.
+
+    Items missing from the answer, or with an unknown sentiment/priority, are
+    reported as failed and retried on the next run.
+
+    Raises:
+        ValueError: If the response contains no JSON array.
+    """
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end < start:
+        raise ValueError("No JSON array in batch response")
+    rows = json.loads(text[start : end + 1])
+    if not isinstance(rows, list):
+        raise ValueError("Batch response is not a JSON array")
+
+    by_id = {item.id: item for item in pack}
+    result = PackResult()
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        row_id = _as_int(row.get("id"))
+        item = by_id.pop(row_id, None) if row_id is not None else None
+        if item is None:
+            continue
+        sentiment = str(row.get("sentiment", "")).upper()
+        priority = str(row.get("priority", "")).upper()
+        if (
+            sentiment not in FeedbackAnalysis.SENTIMENTS
+            or priority not in FeedbackAnalysis.PRIORITIES
+        ):
+            result.failed_ids.append(item.id)
+            continue
+        themes = row.get("themes")
+        if not isinstance(themes, list):
+            themes = []
+        result.analyses.append(
+            FeedbackAnalysis(
+                feedback=item,
+                sentiment=sentiment,
+                priority=priority,
+                themes=[str(theme) for theme in themes[:10]],
+                summary=str(row.get("summary", "")),
+                model_used=model_used,
+            )
+        )
+    result.failed_ids.extend(by_id)
+    return result
+
+
+def _as_int(value: Any) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def analyze_pack(client: Any, pack: list[PatientFeedback]) -> PackResult:
+    """
+    Analyze one pack, retrying provider errors with backoff.
+
+    A response that cannot be parsed is retried as two smaller packs, down
+    to single items.
+    """
+    retries = settings.AI_FEEDBACK_BATCH_RETRIES
+    for attempt in range(retries + 1):
+        try:
+            text = client.generate_content(
+                pack_prompt(pack), BATCH_SYSTEM_PROMPT, temperature=0.2
+            )
+            break
+        except AIServiceUnavailableError as e:
+            if attempt == retries:
+                logger.warning(f"Feedback pack of {len(pack)} failed: {e}")
+                return PackResult(failed_ids=[item.id for item in pack])
+            time.sleep(2**attempt)
+
+    try:
+        result = parse_pack_response(text, pack, str(client.model_name))
+        result.provider_calls = attempt + 1
+        return result
+    except ValueError as e:
+        if len(pack) == 1:
+            logger.warning(f"Unparseable analysis for feedback {pack[0].id}: {e}")
+            return PackResult(failed_ids=[pack[0].id], provider_calls=attempt + 1)
+
+    # Split and retry; a smaller answer is less likely to be truncated
+    middle = len(pack) // 2
+    merged = PackResult(provider_calls=attempt + 1)
+    for half in (pack[:middle], pack[middle:]):
+        part = analyze_pack(client, half)
+        merged.analyses.extend(part.analyses)
+        merged.failed_ids.extend(part.failed_ids)
+        merged.provider_calls += part.provider_calls
+    return merged
+
+
+def analyze_pending_feedback(
+    since: datetime | None = None,
+    limit: int | None = None,
+    chunk_size: int = 200,
+    workers: int | None = None,
+) -> BatchReport:
+    """
+    Analyze feedback that has no analysis yet.
+
+    Args:
+        since: Only feedback created at or after this time
+        limit: Stop after this many feedback rows
+        chunk_size: Rows fetched from the database per query
+        workers: Concurrent provider calls (default AI_FEEDBACK_BATCH_WORKERS)
+
+    Raises:
+        AIConfigurationError: If the AI service is not configured
+    """
+    client = get_ai_client()
+    if not client.is_configured():
+        raise AIConfigurationError("AI service is not configured.")
+
+    pack_size = pack_size_for(client)
+    report = BatchReport()
+    start = time.monotonic()
+    last_id = 0
+    remaining = limit
+
+    with ThreadPoolExecutor(
+        max_workers=workers or settings.AI_FEEDBACK_BATCH_WORKERS,
+        thread_name_prefix="feedback-batch",
+    ) as pool:
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            chunk = repositories.get_unanalyzed_feedback(last_id, size, since)
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+            if remaining is not None:
+                remaining -= len(chunk)
+
+            rating_only = [
+                rating_only_analysis(f) for f in chunk if not f.comments.strip()
+            ]
+            repositories.save_feedback_analyses(rating_only)
+            report.analyzed += len(rating_only)
+
+            with_text = [f for f in chunk if f.comments.strip()]
+            if settings.FEEDBACK_TRIAGE_ENABLED:
+                local, with_text = triage_feedback(with_text)
+                repositories.save_feedback_analyses(local)
+                report.analyzed += len(local)
+                report.local += len(local)
+            report.escalated += len(with_text)
+
+            futures = [
+                pool.submit(contextvars.copy_context().run, analyze_pack, client, pack)
+                for pack in build_packs(with_text, pack_size)
+            ]
+            # Persist from this thread as packs finish
+            for future in as_completed(futures):
+                result = future.result()
+                for analysis in result.analyses:
+                    item = analysis.feedback
+                    if item.triage_reason:
+                        analysis.triage_sentiment = item.triage_sentiment
+                        analysis.triage_reason = item.triage_reason
+                        record_agreement(item.triage_sentiment, analysis.sentiment)
+                repositories.save_feedback_analyses(result.analyses)
+                report.analyzed += len(result.analyses)
+                report.failed += len(result.failed_ids)
+                report.failed_ids.extend(result.failed_ids)
+                report.provider_calls += result.provider_calls
+
+    report.elapsed_seconds = time.monotonic() - start
+    FEEDBACK_BATCH_ITEMS.labels("analyzed").inc(report.analyzed)
+    FEEDBACK_BATCH_ITEMS.labels("failed").inc(report.failed)
+    logger.info(
+        f"Feedback batch: {report.analyzed} analyzed, {report.failed} failed, "
+        f"{report.provider_calls} provider calls, "
+        f"{report.escalation_rate:.0%} escalated, "
+        f"{report.items_per_minute:.0f} items/min"
+    )
+    return report
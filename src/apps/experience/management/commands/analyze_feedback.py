@@ -0,0 +1,82 @@
+from datetime import datetime
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils import timezone
+
+from src.apps.core.ai_client import AIConfigurationError
+from src.apps.experience import repositories
+from src.apps.experience.feedback_batch import analyze_pending_feedback
+
+
+class Command(BaseCommand):
+    help = (
+        "Analyzes patient feedback that has no AI analysis yet. "
+        "Safe to interrupt and re-run: finished items are kept."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--since",
+            help="Only feedback created on or after this date (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--limit", type=int, help="Maximum number of feedback rows to analyze"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=200,
+            help="Rows fetched from the database per query",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Concurrent provider calls (default AI_FEEDBACK_BATCH_WORKERS)",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        since = None
+        if options["since"]:
+            try:
+                since = timezone.make_aware(
+                    datetime.strptime(options["since"], "%Y-%m-%d")
+                )
+            except ValueError:
+                raise CommandError("--since must be a date (YYYY-MM-DD)") from None
+
+        try:
+            report = analyze_pending_feedback(
+                since=since,
+                limit=options["limit"],
+                chunk_size=options["chunk_size"],
+                workers=options["workers"],
+            )
+        except AIConfigurationError as e:
+            raise CommandError(str(e)) from None
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Analyzed {report.analyzed} feedback items "
+                f"({report.provider_calls} provider calls) in "
+                f"{report.elapsed_seconds:.1f}s: "
+                f"{report.items_per_minute:.0f} items/min"
+            )
+        )
+        if report.local or report.escalated:
+            self.stdout.write(
+                f"Triage: {report.local} analyzed locally, {report.escalated} "
+                f"escalated to the LLM ({report.escalation_rate:.0%})"
+            )
+        compared, agreed = repositories.get_triage_agreement()
+        if compared:
+            self.stdout.write(
+                f"Lexicon/LLM sentiment agreement: {agreed}/{compared} "
+                f"({agreed / compared:.0%})"
+            )
+        if report.failed:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{report.failed} items failed and will be retried on the next run"
+                )
+            )
@@ -0,0 +1,81 @@
+# Generated by Django 5.2 on 2026-10-19 03:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("experience", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedbackAnalysis",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="Timestamp when the record was created",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="Timestamp when the record was last updated",
+                    ),
+                ),
+                (
+                    "sentiment",
+                    models.CharField(
+                        choices=[
+                            ("POSITIVE", "Positive"),
+                            ("NEGATIVE", "Negative"),
+                            ("NEUTRAL", "Neutral"),
+                            ("MIXED", "Mixed"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "priority",
+                    models.CharField(
+                        choices=[
+                            ("LOW", "Low"),
+                            ("MEDIUM", "Medium"),
+                            ("HIGH", "High"),
+                            ("CRITICAL", "Critical"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("themes", models.JSONField(blank=True, default=list)),
+                ("summary", models.TextField(blank=True)),
+                ("model_used", models.CharField(blank=True, max_length=100)),
+                (
+                    "feedback",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="analysis",
+                        to="experience.patientfeedback",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Feedback Analysis",
+                "verbose_name_plural": "Feedback Analyses",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
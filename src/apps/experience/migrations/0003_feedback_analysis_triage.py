@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-19 03:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("experience", "0002_feedback_analysis"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="feedbackanalysis",
+            name="triage_reason",
+            field=models.CharField(
+                blank=True,
+                help_text="Why the feedback was escalated to the LLM (empty if local)",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="feedbackanalysis",
+            name="triage_sentiment",
+            field=models.CharField(
+                blank=True,
+                help_text="Lexicon pre-score sentiment, kept to measure LLM agreement",
+                max_length=10,
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-19 05:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("experience", "0003_feedback_analysis_triage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="patientfeedback",
+            name="triage_reason",
+            field=models.CharField(
+                blank=True,
+                help_text="Why triage escalated the feedback (empty if not escalated)",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="patientfeedback",
+            name="triage_sentiment",
+            field=models.CharField(
+                blank=True,
+                help_text="Lexicon pre-score sentiment of feedback escalated to the LLM",
+                max_length=10,
+            ),
+        ),
+    ]
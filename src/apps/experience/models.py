@@ -5,7 +5,7 @@ Domain models for the Patient Experience & Humanization bounded context.
 from django.db import models
 
 from src.apps.admissions.models import Admission
-from src.apps.core.models import ActivatableModel
+from src.apps.core.models import ActivatableModel, TimestampedModel
 from src.apps.patients.models import Patient
 
 
@@ -33,6 +33,16 @@ class PatientFeedback(ActivatableModel):
         help_text="Overall satisfaction rating from 1 to 5",
     )
     comments = models.TextField(blank=True)
+    triage_sentiment = models.CharField(
+        max_length=10,
+        blank=True,
+        help_text="Lexicon pre-score sentiment of feedback escalated to the LLM",
+    )
+    triage_reason = models.CharField(
+        max_length=20,
+        blank=True,
+        help_text="Why triage escalated the feedback (empty if not escalated)",
+    )
 
     class Meta:
         verbose_name = "Patient Feedback"
@@ -89,3 +99,46 @@ class PatientComplaint(ActivatableModel):
 
     def __str__(self) -> str:
         return f"Complaint ({self.category}) from {self.patient or 'Anonymous'}"
+
+
+class FeedbackAnalysis(TimestampedModel):
+    """
+    Structured AI analysis of one PatientFeedback, written by the batch
+    analyzer (see ``feedback_batch``).
+    """
+
+    SENTIMENTS = ["POSITIVE", "NEGATIVE", "NEUTRAL", "MIXED"]
+    PRIORITIES = ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+
+    feedback = models.OneToOneField(
+        PatientFeedback,
+        on_delete=models.CASCADE,
+        related_name="analysis",
+    )
+    sentiment = models.CharField(
+        max_length=10, choices=[(s, s.title()) for s in SENTIMENTS]
+    )
+    priority = models.CharField(
+        max_length=10, choices=[(p, p.title()) for p in PRIORITIES]
+    )
+    themes = models.JSONField(default=list, blank=True)
+    summary = models.TextField(blank=True)
+    model_used = models.CharField(max_length=100, blank=True)
+    triage_sentiment = models.CharField(
+        max_length=10,
+        blank=True,
+        help_text="Lexicon pre-score sentiment, kept to measure LLM agreement",
+    )
+    triage_reason = models.CharField(
+        max_length=20,
+        blank=True,
+        help_text="Why the feedback was escalated to the LLM (empty if local)",
+    )
+
+    class Meta:
+        verbose_name = "Feedback Analysis"
+        verbose_name_plural = "Feedback Analyses"
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return f"{self.sentiment}/{self.priority} for feedback {self.feedback_id}"
@@ -2,9 +2,13 @@
 Data access layer for the Patient Experience bounded context.
 """
 
+from collections.abc import Sequence
+from datetime import datetime
 from typing import Any
 
-from .models import PatientComplaint, PatientFeedback
+from django.db.models import F
+
+from .models import FeedbackAnalysis, PatientComplaint, PatientFeedback
 
 
 def create_feedback(**data: Any) -> PatientFeedback:
@@ -15,3 +19,39 @@ def create_feedback(**data: Any) -> PatientFeedback:
 def create_complaint(**data: Any) -> PatientComplaint:
     """Creates a new PatientComplaint record."""
     return PatientComplaint.objects.create(**data)
+
+
+def get_unanalyzed_feedback(
+    after_id: int = 0, limit: int = 200, since: datetime | None = None
+) -> list[PatientFeedback]:
+    """Feedback without an analysis, in id order after ``after_id`` (keyset)."""
+    queryset = PatientFeedback.objects.filter(
+        analysis__isnull=True, is_active=True, id__gt=after_id
+    )
+    if since is not None:
+        queryset = queryset.filter(created_at__gte=since)
+    return list(
+        queryset.order_by("id").only(
+            "id", "overall_rating", "comments", "triage_sentiment", "triage_reason"
+        )[:limit]
+    )
+
+
+def save_feedback_triage(feedback: Sequence[PatientFeedback]) -> None:
+    """Store the escalation decision of triaged feedback."""
+    PatientFeedback.objects.bulk_update(feedback, ["triage_sentiment", "triage_reason"])
+
+
+def save_feedback_analyses(analyses: Sequence[FeedbackAnalysis]) -> None:
+    """Insert analyses; rows analyzed concurrently by another run are skipped."""
+    FeedbackAnalysis.objects.bulk_create(analyses, ignore_conflicts=True)
+
+
+def get_triage_agreement() -> tuple[int, int]:
+    """Return (compared, agreed) for LLM analyses that carry a lexicon pre-score."""
+    # Escalated feedback carries a triage reason; local analyses do not
+    compared = FeedbackAnalysis.objects.exclude(triage_reason="").exclude(
+        triage_sentiment=""
+    )
+    agreed = compared.filter(sentiment=F("triage_sentiment"))
+    return compared.count(), agreed.count()
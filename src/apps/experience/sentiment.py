@@ -0,0 +1,339 @@
+"""
+Lexicon-based sentiment and theme pre-scoring for patient feedback.
+
+Scores batches of comments with a fixed vocabulary: each text becomes a row
+of signed term counts (a term after a negator such as "not" counts
+negatively), and sentiment, theme and risk scores are matrix products over
+that count matrix. Scoring a comment takes microseconds, so it runs on every
+submission.
+
+``triage`` decides which feedback still needs the LLM: low ratings, risk
+terms (falls, medication errors...), mixed or weak signals, and text that
+disagrees with the star rating are escalated; clear-cut comments are
+analyzed locally.
+"""
+
+import random
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+import numpy as np
+from django.conf import settings
+from prometheus_client import Counter
+
+LEXICON_MODEL = "lexicon-v1"
+
+POSITIVE_TERMS = {
+    "excellent": 3.0,
+    "amazing": 3.0,
+    "outstanding": 3.0,
+    "wonderful": 3.0,
+    "fantastic": 3.0,
+    "great": 2.5,
+    "kind": 2.0,
+    "caring": 2.0,
+    "friendly": 2.0,
+    "helpful": 2.0,
+    "professional": 2.0,
+    "attentive": 2.0,
+    "compassionate": 2.5,
+    "grateful": 2.0,
+    "thank": 1.5,
+    "thanks": 1.5,
+    "good": 1.5,
+    "nice": 1.5,
+    "clean": 1.5,
+    "quick": 1.5,
+    "fast": 1.5,
+    "efficient": 1.5,
+    "comfortable": 1.5,
+    "recommend": 2.0,
+    "happy": 2.0,
+    "satisfied": 2.0,
+    "polite": 1.5,
+    "respectful": 1.5,
+    "clear": 1.0,
+}
+
+NEGATIVE_TERMS = {
+    "terrible": -3.0,
+    "horrible": -3.0,
+    "awful": -3.0,
+    "worst": -3.0,
+    "rude": -2.5,
+    "disrespectful": -2.5,
+    "unprofessional": -2.5,
+    "dirty": -2.5,
+    "filthy": -3.0,
+    "bad": -2.0,
+    "poor": -2.0,
+    "slow": -1.5,
+    "late": -1.5,
+    "delay": -1.5,
+    "delayed": -1.5,
+    "long": -1.0,
+    "waited": -1.0,
+    "ignored": -2.5,
+    "careless": -2.5,
+    "disappointed": -2.0,
+    "frustrated": -2.0,
+    "angry": -2.5,
+    "unhappy": -2.0,
+    "confusing": -1.5,
+    "cold": -1.0,
+    "noisy": -1.0,
+    "expensive": -1.0,
+    "pain": -1.0,
+}
+
+# Terms that always escalate: possible safety incidents or legal exposure
+RISK_TERMS = {
+    "fell",
+    "fall",
+    "injured",
+    "injury",
+    "unsafe",
+    "negligence",
+    "negligent",
+    "abuse",
+    "abused",
+    "infection",
+    "overdose",
+    "lawsuit",
+    "lawyer",
+    "died",
+    "death",
+    "wrong",
+    "mistake",
+    "error",
+    "allergic",
+    "harassed",
+}
+
+THEME_TERMS = {
+    "Wait Time": {"wait", "waited", "waiting", "delay", "delayed", "queue", "hours"},
+    "Staff Attitude": {
+        "rude",
+        "kind",
+        "friendly",
+        "caring",
+        "polite",
+        "respectful",
+        "disrespectful",
+        "attentive",
+        "ignored",
+        "compassionate",
+    },
+    "Cleanliness": {"clean", "dirty", "filthy", "hygiene", "smell", "bathroom"},
+    "Communication": {
+        "explain",
+        "explained",
+        "informed",
+        "communication",
+        "listen",
+        "listened",
+        "confusing",
+        "clear",
+    },
+    "Billing": {"bill", "billing", "charge", "charged", "cost", "expensive", "invoice"},
+    "Food": {"food", "meal", "meals", "breakfast", "lunch", "dinner"},
+    "Pain Management": {"pain", "painful", "medication", "painkiller"},
+    "Safety": RISK_TERMS,
+}
+
+NEGATORS = {"not", "no", "never", "without", "hardly", "nothing"}
+NEGATION_WINDOW = 3
+
+# VADER-style normalization of the summed weights into [-1, 1]
+NORMALIZATION_ALPHA = 15.0
+
+_TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+VOCABULARY = sorted(
+    set(POSITIVE_TERMS)
+    | set(NEGATIVE_TERMS)
+    | RISK_TERMS
+    | set().union(*THEME_TERMS.values())
+)
+_INDEX = {term: i for i, term in enumerate(VOCABULARY)}
+THEMES = list(THEME_TERMS)
+
+# Column vectors/matrices over the vocabulary
+_WEIGHTS = np.array(
+    [POSITIVE_TERMS.get(t, NEGATIVE_TERMS.get(t, 0.0)) for t in VOCABULARY]
+)
+_RISK = np.array([1.0 if t in RISK_TERMS else 0.0 for t in VOCABULARY])
+_THEME_MATRIX = np.array(
+    [[1.0 if t in THEME_TERMS[theme] else 0.0 for theme in THEMES] for t in VOCABULARY]
+)
+
+FEEDBACK_TRIAGE = Counter(
+    "healthcore_feedback_triage_total",
+    "Feedback triage decisions (local or escalated to the LLM), by reason.",
+    ["decision", "reason"],
+)
+FEEDBACK_TRIAGE_AGREEMENT = Counter(
+    "healthcore_feedback_triage_agreement_total",
+    "Lexicon sentiment compared with the LLM's for escalated feedback.",
+    ["result"],
+)
+
+
+@dataclass
+class SentimentScore:
+    """Local scoring of one feedback comment."""
+
+    score: float
+    sentiment: str
+    priority: str
+    themes: list[str] = field(default_factory=list)
+    matched_terms: int = 0
+    risk: bool = False
+    escalate: bool = False
+    reason: str = ""
+
+
+def _signed_indices(text: str) -> tuple[list[int], list[float]]:
+    """Vocabulary indices of a text's terms, -1 signed after a negator."""
+    columns: list[int] = []
+    signs: list[float] = []
+    negated_until = -1
+    for position, token in enumerate(_TOKEN.findall(text.lower())):
+        if token in NEGATORS or token.endswith("n't"):
+            negated_until = position + NEGATION_WINDOW
+            continue
+        column = _INDEX.get(token)
+        if column is not None:
+            columns.append(column)
+            signs.append(-1.0 if position <= negated_until else 1.0)
+    return columns, signs
+
+
+def term_matrix(texts: Sequence[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Build (signed, absolute) term-count matrices, one row per text.
+
+    Signed counts feed sentiment (negation flips a term's polarity);
+    absolute counts feed themes and risk, which negation does not cancel.
+    """
+    rows: list[int] = []
+    columns: list[int] = []
+    signs: list[float] = []
+    for row, text in enumerate(texts):
+        text_columns, text_signs = _signed_indices(text)
+        rows.extend([row] * len(text_columns))
+        columns.extend(text_columns)
+        signs.extend(text_signs)
+
+    signed = np.zeros((len(texts), len(VOCABULARY)))
+    absolute = np.zeros((len(texts), len(VOCABULARY)))
+    np.add.at(signed, (rows, columns), signs)
+    np.add.at(absolute, (rows, columns), 1.0)
+    return signed, absolute
+
+
+def score_batch(
+    texts: Sequence[str], ratings: Sequence[int | None]
+) -> list[SentimentScore]:
+    """Score comments (with optional star ratings) and decide escalation."""
+    if not texts:
+        return []
+    signed, absolute = term_matrix(texts)
+
+    raw = signed @ _WEIGHTS
+    scores = raw / np.sqrt(raw * raw + NORMALIZATION_ALPHA)
+    contributions = signed * _WEIGHTS
+    positive_hits = (contributions > 0).sum(axis=1)
+    negative_hits = (contributions < 0).sum(axis=1)
+    risk = (absolute @ _RISK) > 0
+    theme_hits = (absolute @ _THEME_MATRIX) > 0
+    matched = absolute.sum(axis=1)
+
+    threshold = float(settings.FEEDBACK_TRIAGE_SCORE_THRESHOLD)
+    results = []
+    for i, rating in enumerate(ratings):
+        score = float(scores[i])
+        if not (positive_hits[i] or negative_hits[i]) and rating is not None:
+            # No sentiment terms in the text: the star rating decides
+            score = (rating - 3) / 2
+        if positive_hits[i] and negative_hits[i] and abs(score) < 0.5:
+            sentiment = "MIXED"
+        elif score >= threshold:
+            sentiment = "POSITIVE"
+        elif score <= -threshold:
+            sentiment = "NEGATIVE"
+        else:
+            sentiment = "NEUTRAL"
+
+        if risk[i]:
+            priority = "CRITICAL"
+        elif sentiment == "NEGATIVE" and (score <= -0.7 or rating == 1):
+            priority = "HIGH"
+        elif sentiment in ("NEGATIVE", "MIXED"):
+            priority = "MEDIUM"
+        else:
+            priority = "LOW"
+
+        result = SentimentScore(
+            score=round(score, 3),
+            sentiment=sentiment,
+            priority=priority,
+            themes=[THEMES[j] for j in np.flatnonzero(theme_hits[i])],
+            matched_terms=int(matched[i]),
+            risk=bool(risk[i]),
+        )
+        result.reason = _escalation_reason(result, rating, len(texts[i]))
+        result.escalate = bool(result.reason)
+        results.append(result)
+    return results
+
+
+def _escalation_reason(result: SentimentScore, rating: int | None, length: int) -> str:
+    """Why this feedback needs the LLM, or "" if the local result stands."""
+    if result.risk:
+        return "risk_terms"
+    if rating is not None and rating <= settings.FEEDBACK_TRIAGE_ESCALATE_RATING:
+        return "low_rating"
+    if result.priority in ("HIGH", "CRITICAL"):
+        return "high_priority"
+    if result.sentiment == "MIXED":
+        return "mixed"
+    if rating is not None and rating >= 4 and result.sentiment == "NEGATIVE":
+        return "rating_disagrees"
+    if length > settings.FEEDBACK_TRIAGE_MAX_UNMATCHED_CHARS:
+        # Long comments the lexicon barely reads
+        if result.matched_terms == 0:
+            return "no_signal"
+        if abs(result.score) < settings.FEEDBACK_TRIAGE_SCORE_THRESHOLD:
+            return "weak_signal"
+    return ""
+
+
+def score_text(text: str, rating: int | None = None) -> SentimentScore:
+    """Score a single comment."""
+    return score_batch([text], [rating])[0]
+
+
+def triage(texts: Sequence[str], ratings: Sequence[int | None]) -> list[SentimentScore]:
+    """
+    Score a batch and record the escalation decisions.
+
+    A sample of clear-cut items (``FEEDBACK_TRIAGE_AUDIT_RATE``) is escalated
+    anyway so lexicon/LLM agreement is measured on local decisions too.
+    """
+    results = score_batch(texts, ratings)
+    audit_rate = float(settings.FEEDBACK_TRIAGE_AUDIT_RATE)
+    for result in results:
+        if not result.escalate and audit_rate and random.random() < audit_rate:
+            result.escalate, result.reason = True, "audit"
+        FEEDBACK_TRIAGE.labels(
+            "escalated" if result.escalate else "local", result.reason or "clear"
+        ).inc()
+    return results
+
+
+def record_agreement(local_sentiment: str, llm_sentiment: str) -> None:
+    FEEDBACK_TRIAGE_AGREEMENT.labels(
+        "agree" if local_sentiment == llm_sentiment else "disagree"
+    ).inc()
@@ -4,8 +4,10 @@ Service layer for the Patient Experience bounded context.
 
 from typing import Any
 
-from . import repositories
-from .models import PatientComplaint, PatientFeedback
+from django.conf import settings
+
+from . import repositories, sentiment
+from .models import FeedbackAnalysis, PatientComplaint, PatientFeedback
 
 
 def submit_patient_feedback(**data: Any) -> PatientFeedback:
@@ -13,7 +15,38 @@ def submit_patient_feedback(**data: Any) -> PatientFeedback:
     Business logic to submit patient feedback.
     """
     # (Future) Here you could trigger notifications to a patient experience officer
-    return repositories.create_feedback(**data)
+    feedback = repositories.create_feedback(**data)
+    triage_feedback(feedback)
+    return feedback
+
+
+def triage_feedback(feedback: PatientFeedback) -> FeedbackAnalysis | None:
+    """
+    Pre-score new feedback locally.
+
+    Clear-cut feedback gets its analysis immediately from the lexicon scorer;
+    escalated feedback keeps the decision and is left for the LLM batch
+    analyzer (``analyze_feedback``). Returns the local analysis, or None if
+    escalated.
+    """
+    if not settings.FEEDBACK_TRIAGE_ENABLED:
+        return None
+    result = sentiment.triage([feedback.comments], [feedback.overall_rating])[0]
+    if result.escalate:
+        feedback.triage_sentiment = result.sentiment
+        feedback.triage_reason = result.reason
+        repositories.save_feedback_triage([feedback])
+        return None
+    analysis = FeedbackAnalysis(
+        feedback=feedback,
+        sentiment=result.sentiment,
+        priority=result.priority,
+        themes=result.themes,
+        model_used=sentiment.LEXICON_MODEL,
+        triage_sentiment=result.sentiment,
+    )
+    repositories.save_feedback_analyses([analysis])
+    return analysis
 
 
 def submit_patient_complaint(**data: Any) -> PatientComplaint:
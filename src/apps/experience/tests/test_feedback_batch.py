@@ -0,0 +1,216 @@
+"""
+Tests for batch patient-feedback analysis.
+"""
+
+import json
+import threading
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from model_bakery import baker
+
+from src.apps.core.ai_client import AIServiceUnavailableError
+from src.apps.experience import feedback_batch, repositories, services
+from src.apps.experience.models import FeedbackAnalysis, PatientFeedback
+from src.apps.experience.sentiment import FEEDBACK_TRIAGE, LEXICON_MODEL
+
+
+class FakeBatchClient:
+    """Answers packed prompts with one JSON object per item."""
+
+    model_name = "test-model"
+
+    def __init__(self, fail_ids=(), garbled_packs_over=None, error=None):
+        self.fail_ids = set(fail_ids)
+        self.garbled_packs_over = garbled_packs_over
+        self.error = error
+        self.packs = []
+        self._lock = threading.Lock()
+
+    def is_configured(self):
+        return True
+
+    def generate_content(self, prompt, system_instruction="", temperature=0.7):
+        items = json.loads(prompt)
+        with self._lock:
+            self.packs.append([item["id"] for item in items])
+        if self.error:
+            raise self.error
+        if self.garbled_packs_over and len(items) > self.garbled_packs_over:
+            return "Sorry, the answer was cut off"
+        rows = [
+            {
+                "id": item["id"],
+                "sentiment": "NEGATIVE" if item["rating"] <= 2 else "POSITIVE",
+                "priority": "HIGH" if item["rating"] == 1 else "LOW",
+                "themes": ["Wait Time"],
+                "summary": f"Summary of {item['id']}",
+            }
+            for item in items
+            if item["id"] not in self.fail_ids
+        ]
+        return f"```json\n{json.dumps(rows)}\n```"
+
+
+@pytest.fixture(autouse=True)
+def batch_settings(settings):
+    settings.AI_FEEDBACK_BATCH_PACK_SIZES = {"default": 3}
+    settings.AI_FEEDBACK_BATCH_RETRIES = 0
+
+
+def _feedback(count, comments="Long wait but kind nurses", rating=2):
+    return baker.make(
+        PatientFeedback, overall_rating=rating, comments=comments, _quantity=count
+    )
+
+
+def _run(client, **kwargs):
+    with patch.object(feedback_batch, "get_ai_client", return_value=client):
+        return feedback_batch.analyze_pending_feedback(**kwargs)
+
+
+@pytest.mark.django_db
+class TestBatchAnalysis:
+    def test_packs_items_and_persists_results(self):
+        feedback = _feedback(7, rating=1)
+        client = FakeBatchClient()
+
+        report = _run(client, workers=2)
+
+        assert report.analyzed == 7
+        assert report.provider_calls == 3  # packs of 3, 3 and 1
+        assert sorted(len(pack) for pack in client.packs) == [1, 3, 3]
+        analysis = FeedbackAnalysis.objects.get(feedback=feedback[0])
+        assert analysis.sentiment == "NEGATIVE"
+        assert analysis.priority == "HIGH"
+        assert analysis.themes == ["Wait Time"]
+        assert analysis.model_used == "test-model"
+
+    def test_blank_comments_scored_from_rating(self):
+        _feedback(2, comments="", rating=5)
+        client = FakeBatchClient()
+
+        report = _run(client)
+
+        assert report.analyzed == 2
+        assert client.packs == []
+        assert set(FeedbackAnalysis.objects.values_list("sentiment", "model_used")) == {
+            ("POSITIVE", feedback_batch.RATING_ONLY_MODEL)
+        }
+
+    def test_resumes_with_failed_items_only(self):
+        feedback = _feedback(4)
+        first = _run(FakeBatchClient(fail_ids={feedback[1].id}))
+        assert (first.analyzed, first.failed) == (3, 1)
+        assert first.failed_ids == [feedback[1].id]
+
+        client = FakeBatchClient()
+        second = _run(client)
+
+        assert second.analyzed == 1
+        assert client.packs == [[feedback[1].id]]
+        assert FeedbackAnalysis.objects.count() == 4
+
+    def test_unparseable_pack_is_split(self):
+        _feedback(3)
+        client = FakeBatchClient(garbled_packs_over=1)
+
+        report = _run(client)
+
+        assert report.analyzed == 3
+        assert [len(pack) for pack in client.packs] == [3, 1, 2, 1, 1]
+
+    def test_provider_errors_leave_items_pending(self):
+        _feedback(2)
+        report = _run(FakeBatchClient(error=AIServiceUnavailableError("quota")))
+
+        assert (report.analyzed, report.failed) == (0, 2)
+        assert FeedbackAnalysis.objects.count() == 0
+
+    def test_limit_and_chunking(self):
+        _feedback(5)
+        report = _run(FakeBatchClient(), limit=4, chunk_size=2)
+
+        assert report.analyzed == 4
+        assert PatientFeedback.objects.filter(analysis__isnull=True).count() == 1
+
+
+@pytest.mark.django_db
+def test_command_reports_items_per_minute():
+    _feedback(2)
+    out = StringIO()
+    with patch.object(feedback_batch, "get_ai_client", return_value=FakeBatchClient()):
+        call_command("analyze_feedback", "--since", "2000-01-01", stdout=out)
+
+    assert "Analyzed 2 feedback items" in out.getvalue()
+    assert "items/min" in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestBatchTriage:
+    def test_only_escalated_feedback_reaches_the_provider(self):
+        clear = baker.make(PatientFeedback, overall_rating=5, comments="Excellent")
+        risky = baker.make(
+            PatientFeedback, overall_rating=4, comments="Nice nurses, wrong dose given"
+        )
+        client = FakeBatchClient()
+
+        with patch.object(feedback_batch, "get_ai_client", return_value=client):
+            report = feedback_batch.analyze_pending_feedback()
+
+        assert client.packs == [[risky.id]]
+        assert (report.analyzed, report.local, report.escalated) == (2, 1, 1)
+        assert report.escalation_rate == 0.5
+        assert clear.analysis.model_used == LEXICON_MODEL
+        risky.analysis.refresh_from_db()
+        assert risky.analysis.model_used == "test-model"
+        assert risky.analysis.triage_reason == "risk_terms"
+        assert repositories.get_triage_agreement() == (1, 1)
+
+    def test_submission_decision_is_reused(self, settings):
+        settings.FEEDBACK_TRIAGE_AUDIT_RATE = 1.0
+        audited = services.submit_patient_feedback(
+            overall_rating=5, comments="Excellent"
+        )
+        settings.FEEDBACK_TRIAGE_AUDIT_RATE = 0.0
+        escalations = FEEDBACK_TRIAGE.labels("escalated", "audit")._value.get()
+        client = FakeBatchClient()
+
+        report = _run(client)
+
+        assert client.packs == [[audited.id]]
+        assert (report.local, report.escalated) == (0, 1)
+        assert audited.analysis.triage_reason == "audit"
+        assert FEEDBACK_TRIAGE.labels("escalated", "audit")._value.get() == escalations
+
+    def test_escalated_feedback_not_triaged_again_after_failure(self):
+        risky = baker.make(
+            PatientFeedback, overall_rating=4, comments="Nice nurses, wrong dose given"
+        )
+        _run(FakeBatchClient(fail_ids=[risky.id]))
+        risky.refresh_from_db()
+        assert risky.triage_reason == "risk_terms"
+
+        with patch.object(feedback_batch, "triage") as triage:
+            triage.return_value = []
+            report = _run(FakeBatchClient())
+
+        triage.assert_called_once_with([], [])
+        assert report.escalated == 1
+        assert FeedbackAnalysis.objects.get(feedback=risky).triage_reason == (
+            "risk_terms"
+        )
+
+    def test_command_reports_escalation_and_agreement(self):
+        baker.make(PatientFeedback, overall_rating=5, comments="Excellent")
+        baker.make(PatientFeedback, overall_rating=1, comments="Rude and slow")
+        out = StringIO()
+        with patch.object(
+            feedback_batch, "get_ai_client", return_value=FakeBatchClient()
+        ):
+            call_command("analyze_feedback", stdout=out)
+
+        assert "1 analyzed locally, 1 escalated to the LLM (50%)" in out.getvalue()
+        assert "agreement: 1/1 (100%)" in out.getvalue()
@@ -0,0 +1,115 @@
+"""
+Tests for the lexicon sentiment pre-scorer and feedback triage.
+"""
+
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from src.apps.experience import sentiment
+from src.apps.experience.models import FeedbackAnalysis, PatientFeedback
+
+User = get_user_model()
+
+
+class TestScoring:
+    def test_clear_positive_comment_stays_local(self):
+        result = sentiment.score_text("Great staff, very kind and helpful", 5)
+
+        assert result.sentiment == "POSITIVE"
+        assert result.priority == "LOW"
+        assert "Staff Attitude" in result.themes
+        assert not result.escalate
+
+    def test_negation_flips_polarity(self):
+        assert sentiment.score_text("The nurse was friendly").sentiment == "POSITIVE"
+        assert sentiment.score_text("The nurse was not friendly").sentiment == (
+            "NEGATIVE"
+        )
+        assert sentiment.score_text("The porter wasn't rude").score > 0
+
+    def test_risk_terms_are_critical_and_escalate(self):
+        result = sentiment.score_text("Lovely room but my father fell twice", 4)
+
+        assert result.risk
+        assert result.priority == "CRITICAL"
+        assert "Safety" in result.themes
+        assert (result.escalate, result.reason) == (True, "risk_terms")
+
+    def test_low_rating_escalates(self):
+        result = sentiment.score_text("Thanks", 1)
+        assert (result.escalate, result.reason) == (True, "low_rating")
+
+    def test_text_disagreeing_with_rating_escalates(self):
+        result = sentiment.score_text("Slow and confusing checkout", 5)
+        assert result.sentiment == "NEGATIVE"
+        assert result.reason == "rating_disagrees"
+
+    def test_mixed_comment_escalates(self):
+        result = sentiment.score_text("Great doctor but a rude receptionist", 3)
+        assert result.sentiment == "MIXED"
+        assert result.escalate
+
+    def test_rating_decides_without_sentiment_terms(self):
+        assert sentiment.score_text("Room 12, second floor", 5).sentiment == "POSITIVE"
+        assert sentiment.score_text("Room 12, second floor", 3).sentiment == "NEUTRAL"
+
+    def test_long_unmatched_comment_escalates(self, settings):
+        settings.FEEDBACK_TRIAGE_MAX_UNMATCHED_CHARS = 20
+        result = sentiment.score_text("The parking situation around the building", 4)
+        assert result.reason == "no_signal"
+
+    def test_batch_matches_single_scores(self):
+        texts = [
+            "Excellent care, thank you",
+            "Waited four hours, terrible",
+            "",
+            "The food was not good",
+        ]
+        ratings = [5, 2, 3, None]
+
+        batch = sentiment.score_batch(texts, ratings)
+
+        assert batch == [
+            sentiment.score_text(t, r) for t, r in zip(texts, ratings, strict=True)
+        ]
+
+    def test_audit_sample_escalates_clear_items(self, settings):
+        settings.FEEDBACK_TRIAGE_AUDIT_RATE = 1.0
+        [result] = sentiment.triage(["Great staff"], [5])
+        assert (result.escalate, result.reason) == (True, "audit")
+
+
+@pytest.mark.django_db
+class TestSubmissionTriage:
+    @pytest.fixture
+    def client(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="triage"))
+        return client
+
+    def _post(self, client, rating, comments):
+        response = client.post(
+            "/api/v1/experience/feedback/",
+            {"overall_rating": rating, "comments": comments},
+            format="json",
+        )
+        assert response.status_code == 201
+        return PatientFeedback.objects.get(pk=response.data["id"])
+
+    def test_clear_feedback_is_analyzed_on_submit(self, client):
+        feedback = self._post(client, 5, "Great staff, thanks")
+
+        analysis = FeedbackAnalysis.objects.get(feedback=feedback)
+        assert analysis.model_used == sentiment.LEXICON_MODEL
+        assert analysis.sentiment == analysis.triage_sentiment == "POSITIVE"
+
+    def test_escalated_feedback_waits_for_batch(self, client):
+        feedback = self._post(client, 1, "Great staff, thanks")
+        assert not FeedbackAnalysis.objects.filter(feedback=feedback).exists()
+        assert feedback.triage_reason == "low_rating"
+
+    def test_disabled_triage_leaves_feedback_pending(self, client, settings):
+        settings.FEEDBACK_TRIAGE_ENABLED = False
+        feedback = self._post(client, 5, "Great staff, thanks")
+        assert not FeedbackAnalysis.objects.filter(feedback=feedback).exists()
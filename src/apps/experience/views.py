@@ -2,14 +2,19 @@
 API Views for the Patient Experience bounded context.
 """
 
+from django.http import HttpResponseBase
 from drf_spectacular.utils import extend_schema
 from rest_framework import status, viewsets
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
 
-from . import ai_service
+from src.apps.core import ai_jobs, sse
+from src.apps.core.ai_client import AIClientError
+
+from . import ai_service, services
 from .models import PatientComplaint, PatientFeedback
 from .serializers import PatientComplaintSerializer, PatientFeedbackSerializer
 
@@ -28,6 +33,10 @@ class PatientFeedbackViewSet(viewsets.ModelViewSet[PatientFeedback]):
     permission_classes = [IsAuthenticated]
     http_method_names = ["get", "post", "head", "options"]
 
+    def perform_create(self, serializer: BaseSerializer[PatientFeedback]) -> None:
+        # Clear-cut feedback is analyzed locally; the rest waits for the LLM
+        services.triage_feedback(serializer.save())
+
 
 @extend_schema(tags=["Patient Experience"])
 class PatientComplaintViewSet(viewsets.ModelViewSet[PatientComplaint]):
@@ -65,11 +74,15 @@ class PatientComplaintViewSet(viewsets.ModelViewSet[PatientComplaint]):
             "required": ["feedback_text"],
         }
     },
-    responses={200: {"description": "Feedback analysis response"}},
+    responses={
+        200: {"description": "Feedback analysis response"},
+        202: {"description": "Job accepted (Prefer: respond-async)"},
+    },
 )
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
-def analyze_feedback_view(request: Request) -> Response:
+@renderer_classes(sse.AI_RENDERER_CLASSES)
+def analyze_feedback_view(request: Request) -> HttpResponseBase:
     """
     AI-powered patient feedback analyzer.
 
@@ -79,6 +92,9 @@ def analyze_feedback_view(request: Request) -> Response:
 
     The AI does NOT suggest ratings - it uses the patient's rating
     as context to better understand their feedback.
+
+    Send ``Prefer: respond-async`` to get 202 with a job id instead, or
+    ``Accept: text/event-stream`` to stream the analysis.
     """
     feedback_text = request.data.get("feedback_text")
     rating = request.data.get("rating")
@@ -104,6 +120,25 @@ def analyze_feedback_view(request: Request) -> Response:
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+    if ai_jobs.wants_async(request):
+        return ai_jobs.accepted_response(
+            request,
+            "feedback_analysis",
+            {"feedback_text": feedback_text, "rating": rating},
+        )
+
+    if sse.wants_stream(request):
+        try:
+            chunks, model_used = ai_service.stream_feedback_analysis(
+                feedback_text=feedback_text,
+                rating=rating,
+            )
+        except AIClientError as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        return sse.stream_response(chunks, {"rating": rating, "model_used": model_used})
+
     result = ai_service.analyze_patient_feedback(
         feedback_text=feedback_text,
         rating=rating,
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Dispensation, Medication
+from .models import Dispensation, DrugInteraction, Medication
 
 
 @admin.register(Medication)
@@ -11,11 +11,12 @@ class MedicationAdmin(admin.ModelAdmin[Medication]):
         "sku",
         "expiry_date",
         "stock_quantity",
+        "stock_status",
         "is_expired",
         "is_active",
     )
-    search_fields = ("name", "sku", "brand")
-    list_filter = ("expiry_date", "is_active")
+    search_fields = ("name", "sku", "brand", "drug_class")
+    list_filter = ("expiry_date", "stock_status", "is_active")
     readonly_fields = ("created_at", "updated_at")
 
 
@@ -26,3 +27,11 @@ class DispensationAdmin(admin.ModelAdmin[Dispensation]):
     search_fields = ("medication__name", "patient__mrn", "practitioner__family_name")
     autocomplete_fields = ("medication", "patient", "practitioner")
     readonly_fields = ("dispensed_at",)
+
+
+@admin.register(DrugInteraction)
+class DrugInteractionAdmin(admin.ModelAdmin[DrugInteraction]):
+    list_display = ("drug_a", "drug_b", "severity", "updated_at")
+    list_filter = ("severity",)
+    search_fields = ("drug_a", "drug_b")
+    readonly_fields = ("created_at", "updated_at")
@@ -1,19 +1,54 @@
 """
 Pharmacy AI Service - Drug Information Assistant.
 Provides AI-powered drug information lookups.
+
+Drug information for formulary medications (active ``Medication`` names) is
+pre-generated nightly by ``prewarm_drug_information`` and kept in the Django
+cache with its generation time, so pharmacists get stocked drugs without a
+provider round trip. Lookups with patient context, and drugs we do not
+stock, are answered live.
 """
 
+import hashlib
 import logging
+import random
+from collections.abc import Iterator
 from dataclasses import dataclass
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from prometheus_client import Counter
 
+from src.apps.core import ai_cache
 from src.apps.core.ai_client import (
+    AIConfigurationError,
     AIServiceUnavailableError,
     get_ai_client,
 )
+from src.apps.core.ai_jobs import AIJobError
+
+from . import repositories
 
 logger = logging.getLogger(__name__)
 
+# Cache use case of pre-warm calls; its TTL is 0 so a refresh always reaches
+# the provider instead of replaying the AI response cache
+PREWARM_USE_CASE = "drug_info_prewarm"
+
+DRUG_INFO_LOOKUPS = Counter(
+    "healthcore_drug_info_lookups_total",
+    "Drug information lookups by source (formulary_cache, live).",
+    ["source"],
+)
+DRUG_INFO_PREWARM = Counter(
+    "healthcore_drug_info_prewarm_total",
+    "Formulary drug information entries per pre-warm result.",
+    ["result"],
+)
+
 
 DRUG_INFO_SYSTEM_PROMPT = """You are a professional pharmacist assistant providing accurate drug information.
 
@@ -47,6 +82,57 @@ class DrugInfoResponse:
     model_used: str
     success: bool
     error_message: Optional[str] = None
+    generated_at: Optional[datetime] = None
+
+
+@dataclass
+class PrewarmReport:
+    """Outcome of one formulary pre-warm run."""
+
+    refreshed: int = 0
+    fresh: int = 0
+    failed: int = 0
+    deferred: int = 0
+
+
+def _drug_info_query(medication_name: str, patient_context: str) -> str:
+    """Build the drug information query."""
+    query = f"Provide comprehensive drug information for: {medication_name}"
+    if patient_context:
+        query += f"\n\nPatient context: {patient_context}"
+    return query
+
+
+def _formulary_key(medication_name: str) -> str:
+    normalized = " ".join(medication_name.lower().split())
+    digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+    return f"pharmacy:drug_info:{digest}"
+
+
+def get_formulary_entry(medication_name: str) -> dict[str, Any] | None:
+    """Return the stored drug information of a formulary medication."""
+    entry: dict[str, Any] | None = cache.get(_formulary_key(medication_name))
+    return entry
+
+
+def store_formulary_entry(
+    medication_name: str, information: str, model_used: str
+) -> datetime:
+    """Store drug information for a formulary medication; returns its time."""
+    generated_at = timezone.now()
+    jitter = random.uniform(0, settings.DRUG_INFO_CACHE_TTL_JITTER)
+    lifetime = int(settings.DRUG_INFO_CACHE_TTL_SECONDS * (1 - jitter))
+    cache.set(
+        _formulary_key(medication_name),
+        {
+            "information": information,
+            "model_used": model_used,
+            "generated_at": generated_at,
+            "expires_at": generated_at + timedelta(seconds=lifetime),
+        },
+        lifetime,
+    )
+    return generated_at
 
 
 def get_drug_information(
@@ -56,6 +142,9 @@ def get_drug_information(
     """
     Get AI-powered drug information.
 
+    Formulary medications are served from the pre-warmed cache when no
+    patient context is given; live answers for them are stored there.
+
     Args:
         medication_name: Name of the medication to look up
         patient_context: Optional patient context for tailored response
@@ -64,6 +153,18 @@ def get_drug_information(
         DrugInfoResponse with drug information or error
     """
     try:
+        if not patient_context:
+            entry = get_formulary_entry(medication_name)
+            if entry is not None:
+                DRUG_INFO_LOOKUPS.labels("formulary_cache").inc()
+                return DrugInfoResponse(
+                    medication_name=medication_name,
+                    information=entry["information"],
+                    model_used=entry["model_used"],
+                    success=True,
+                    generated_at=entry["generated_at"],
+                )
+
         ai_client = get_ai_client()
 
         if not ai_client.is_configured():
@@ -75,24 +176,34 @@ def get_drug_information(
                 error_message="AI service is not configured. Please set OPENAI_API_KEY.",
             )
 
-        # Build the query
-        query = f"Provide comprehensive drug information for: {medication_name}"
-        if patient_context:
-            query += f"\n\nPatient context: {patient_context}"
+        query = _drug_info_query(medication_name, patient_context)
 
-        # Get response from AI
-        response = ai_client.generate_response(
-            user_query=query,
-            system_prompt=DRUG_INFO_SYSTEM_PROMPT,
-        )
+        # Get response from AI (cached: drug monographs rarely change)
+        with ai_cache.use_case("drug_info"):
+            response = ai_client.generate_response(
+                user_query=query,
+                system_prompt=DRUG_INFO_SYSTEM_PROMPT,
+            )
 
         logger.info(f"Drug info generated for: {medication_name}")
+        DRUG_INFO_LOOKUPS.labels("live").inc()
+
+        generated_at = None
+        if (
+            response
+            and not patient_context
+            and repositories.is_formulary_medication(medication_name)
+        ):
+            generated_at = store_formulary_entry(
+                medication_name, response, str(ai_client.model_name)
+            )
 
         return DrugInfoResponse(
             medication_name=medication_name,
             information=response,
             model_used=str(ai_client.model_name),
             success=True,
+            generated_at=generated_at,
         )
 
     except AIServiceUnavailableError as e:
@@ -113,3 +224,112 @@ def get_drug_information(
             success=False,
             error_message=f"Unexpected error: {str(e)}",
         )
+
+
+def stream_drug_information(
+    medication_name: str,
+    patient_context: str = "",
+) -> tuple[Iterator[str], str]:
+    """
+    Stream AI-powered drug information.
+
+    Returns:
+        Tuple of (text chunk iterator, model name)
+
+    Raises:
+        AIConfigurationError: If the AI service is not configured
+        AIServiceUnavailableError: If the provider cannot be called
+    """
+    if not patient_context:
+        entry = get_formulary_entry(medication_name)
+        if entry is not None:
+            DRUG_INFO_LOOKUPS.labels("formulary_cache").inc()
+            return iter([entry["information"]]), entry["model_used"]
+
+    ai_client = get_ai_client()
+    if not ai_client.is_configured():
+        raise AIConfigurationError("AI service is not configured.")
+
+    DRUG_INFO_LOOKUPS.labels("live").inc()
+    query = _drug_info_query(medication_name, patient_context)
+    with ai_cache.use_case("drug_info"):
+        chunks = ai_client.stream_response(
+            user_query=query,
+            system_prompt=DRUG_INFO_SYSTEM_PROMPT,
+        )
+    return chunks, str(ai_client.model_name)
+
+
+def prewarm_drug_information(force: bool = False) -> PrewarmReport:
+    """
+    Generate drug information for every formulary medication.
+
+    Missing entries and entries expiring within
+    ``DRUG_INFO_REFRESH_BEFORE_SECONDS`` are regenerated one at a time, so
+    calls queue on the provider rate limit; missing and soonest-expiring
+    entries go first, at most ``DRUG_INFO_PREWARM_MAX_PER_RUN`` per run.
+
+    Args:
+        force: Regenerate every entry regardless of its expiry
+
+    Raises:
+        AIConfigurationError: If the AI service is not configured
+    """
+    ai_client = get_ai_client()
+    if not ai_client.is_configured():
+        raise AIConfigurationError("AI service is not configured.")
+
+    report = PrewarmReport()
+    now = timezone.now()
+    refresh_after = now + timedelta(seconds=settings.DRUG_INFO_REFRESH_BEFORE_SECONDS)
+    stale: list[tuple[datetime, str]] = []
+    for name in repositories.get_formulary_medication_names():
+        entry = get_formulary_entry(name)
+        if entry is None:
+            stale.append((now, name))
+        elif force or entry["expires_at"] <= refresh_after:
+            stale.append((entry["expires_at"], name))
+        else:
+            report.fresh += 1
+
+    stale.sort()
+    limit = settings.DRUG_INFO_PREWARM_MAX_PER_RUN
+    report.deferred = max(0, len(stale) - limit)
+    for _, name in stale[:limit]:
+        try:
+            with ai_cache.use_case(PREWARM_USE_CASE):
+                information = ai_client.generate_response(
+                    user_query=_drug_info_query(name, ""),
+                    system_prompt=DRUG_INFO_SYSTEM_PROMPT,
+                )
+        except AIServiceUnavailableError as e:
+            logger.warning(f"Drug info pre-warm failed for {name}: {e}")
+            report.failed += 1
+            continue
+        if not information:
+            report.failed += 1
+            continue
+        store_formulary_entry(name, information, str(ai_client.model_name))
+        report.refreshed += 1
+
+    for result in ("refreshed", "fresh", "failed", "deferred"):
+        DRUG_INFO_PREWARM.labels(result).inc(getattr(report, result))
+    return report
+
+
+def drug_info_job(params: dict[str, Any]) -> dict[str, Any]:
+    """Async job handler for ``get_drug_information`` (see core.ai_jobs)."""
+    result = get_drug_information(
+        medication_name=params["medication_name"],
+        patient_context=params.get("patient_context", ""),
+    )
+    if not result.success:
+        raise AIJobError(result.error_message or "Drug information unavailable.")
+    return {
+        "medication_name": result.medication_name,
+        "information": result.information,
+        "model_used": result.model_used,
+        "generated_at": (
+            result.generated_at.isoformat() if result.generated_at else None
+        ),
+    }
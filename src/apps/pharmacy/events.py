@@ -0,0 +1,19 @@
+"""
+Pharmacy Domain Events
+
+Events published when inventory crosses alert thresholds.
+"""
+
+from typing import Any
+
+from src.apps.core.events import BaseEvent
+
+
+class StockAlertEvent(BaseEvent):
+    """Event published when a medication falls below a stock level"""
+
+    def __init__(self, medication_id: int, stock_data: dict[str, Any]):
+        super().__init__(
+            event_type="medication.stock_alert",
+            data={"medication_id": medication_id, **stock_data},
+        )
@@ -0,0 +1,245 @@
+"""
+Medication consumption forecasting from dispensation history.
+
+Daily dispensed quantities for every medication are loaded with one
+aggregated query into a (medications x days) matrix. From it, in one
+vectorized pass over the whole formulary:
+
+- the consumption rate is the mean of the last ``PHARMACY_FORECAST_WINDOW_DAYS``
+  (whole weeks, so the weekday mix does not bias it);
+- weekday seasonality is each medication's mean consumption per weekday over
+  the full history, relative to its overall mean;
+- projected demand (rate x weekday factor) is accumulated day by day over
+  ``PHARMACY_FORECAST_HORIZON_DAYS`` and compared with current stock to get
+  days of cover, the stock-out date, and the date to reorder so a delivery
+  taking ``PHARMACY_REORDER_LEAD_DAYS`` arrives before stock falls below the
+  reorder level.
+
+The nightly task stores the result in the cache; the API reads it from there.
+"""
+
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from operator import itemgetter
+from typing import Any
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Dispensation, Medication
+
+FORECAST_CACHE_KEY = "pharmacy:consumption_forecast"
+
+
+@dataclass
+class MedicationForecast:
+    """Projected consumption of one medication."""
+
+    medication_id: int
+    name: str
+    sku: str
+    stock_quantity: int
+    daily_rate: float
+    days_of_cover: int | None
+    stockout_date: date | None
+    reorder_date: date | None
+
+
+def load_daily_consumption(start: date, days: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Dispensed quantities per medication and day, with one aggregated query.
+
+    Returns:
+        (medication ids, sorted; matrix of shape (len(ids), days)), column 0
+        being ``start``.
+    """
+    rows = list(
+        Dispensation.objects.filter(
+            is_active=True,
+            dispensed_at__date__gte=start,
+            dispensed_at__date__lt=start + timedelta(days=days),
+        )
+        .annotate(day=TruncDate("dispensed_at"))
+        .values("medication_id", "day")
+        .annotate(total=Sum("quantity"))
+        .values_list("medication_id", "day", "total")
+    )
+    return consumption_matrix(rows, start, days)
+
+
+def consumption_matrix(
+    rows: Sequence[tuple[int, date, int]], start: date, days: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Scatter (medication id, day, quantity) rows into a daily matrix."""
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, days))
+
+    count = len(rows)
+    start_ordinal = start.toordinal()
+    ids, row_index = np.unique(
+        np.fromiter(map(itemgetter(0), rows), dtype=np.int64, count=count),
+        return_inverse=True,
+    )
+    columns = np.fromiter(
+        (row[1].toordinal() - start_ordinal for row in rows),
+        dtype=np.int64,
+        count=count,
+    )
+    totals = np.fromiter(map(itemgetter(2), rows), dtype=float, count=count)
+    # Sum into flat (medication, day) cells; much faster than np.add.at
+    consumption = np.bincount(
+        row_index * days + columns,
+        weights=totals,
+        minlength=len(ids) * days,
+    ).reshape(len(ids), days)
+    return ids, consumption
+
+
+def weekday_factors(consumption: np.ndarray, start: date) -> np.ndarray:
+    """
+    Per-medication consumption by weekday relative to the daily mean.
+
+    Returns a (medications x 7) matrix indexed by ``date.weekday()``; rows
+    without consumption are all ones.
+    """
+    weekdays = (start.weekday() + np.arange(consumption.shape[1])) % 7
+    one_hot = np.eye(7)[weekdays]
+    per_weekday = (consumption @ one_hot) / np.maximum(one_hot.sum(axis=0), 1)
+    mean = consumption.mean(axis=1, keepdims=True)
+    factors: np.ndarray = np.ones_like(per_weekday)
+    np.divide(per_weekday, mean, out=factors, where=mean > 0)
+    return factors
+
+
+def project(
+    consumption: np.ndarray,
+    history_start: date,
+    stock: np.ndarray,
+    reorder_level: np.ndarray,
+    today: date,
+) -> dict[str, np.ndarray]:
+    """
+    Project stock for every medication at once.
+
+    Args:
+        consumption: Daily quantities, shape (medications, history days)
+        history_start: Date of the first history column
+        stock: Current stock per medication
+        reorder_level: Reorder level per medication
+        today: First projected day
+
+    Returns:
+        Arrays per medication: ``daily_rate``, and ``days_of_cover`` and
+        ``days_to_reorder`` as day offsets from today (-1: beyond the horizon).
+    """
+    window = settings.PHARMACY_FORECAST_WINDOW_DAYS
+    horizon = settings.PHARMACY_FORECAST_HORIZON_DAYS
+    rate = consumption[:, -window:].mean(axis=1)
+
+    factors = weekday_factors(consumption, history_start)
+    future_weekdays = (today.weekday() + np.arange(horizon)) % 7
+    demand = rate[:, None] * factors[:, future_weekdays]
+    cumulative = np.cumsum(demand, axis=1)
+
+    def first_day_beyond(limit: np.ndarray, already: np.ndarray) -> np.ndarray:
+        crossed = cumulative > limit[:, None]
+        day = np.where(crossed.any(axis=1), crossed.argmax(axis=1), -1)
+        # Already out (or below the reorder level): today, even without demand
+        return np.where(already, 0, day)
+
+    days_of_cover = first_day_beyond(stock, stock <= 0)
+    # Last day on which stock is still at or above the reorder level
+    below_reorder = first_day_beyond(stock - reorder_level, stock < reorder_level)
+    lead = settings.PHARMACY_REORDER_LEAD_DAYS
+    days_to_reorder = np.where(
+        below_reorder >= 0, np.maximum(below_reorder - lead, 0), -1
+    )
+    return {
+        "daily_rate": rate,
+        "days_of_cover": days_of_cover,
+        "days_to_reorder": days_to_reorder,
+    }
+
+
+def forecast_consumption(today: date | None = None) -> list[MedicationForecast]:
+    """
+    Forecast every active medication, soonest stock-out first.
+
+    Medications not projected to run out within the horizon come last.
+    """
+    today = today or timezone.now().date()
+    history = settings.PHARMACY_FORECAST_HISTORY_DAYS
+    history_start = today - timedelta(days=history)  # through yesterday
+    medications = list(
+        Medication.objects.filter(is_active=True)
+        .order_by("id")
+        .values_list("id", "name", "sku", "stock_quantity", "reorder_level")
+    )
+    if not medications:
+        return []
+
+    ids, consumption = load_daily_consumption(history_start, history)
+    medication_ids = np.array([m[0] for m in medications])
+    # Align history rows with the medications (zeros without dispensations)
+    aligned = np.zeros((len(medications), history))
+    if len(ids):
+        position = np.searchsorted(medication_ids, ids)
+        known = (position < len(medication_ids)) & (
+            medication_ids[np.minimum(position, len(medication_ids) - 1)] == ids
+        )
+        aligned[position[known]] = consumption[known]
+
+    projection = project(
+        aligned,
+        history_start,
+        np.array([m[3] for m in medications], dtype=float),
+        np.array([m[4] for m in medications], dtype=float),
+        today,
+    )
+
+    def day(offset: int) -> date | None:
+        return today + timedelta(days=offset) if offset >= 0 else None
+
+    forecasts = [
+        MedicationForecast(
+            medication_id=medication_id,
+            name=name,
+            sku=sku,
+            stock_quantity=stock,
+            daily_rate=round(float(rate), 2),
+            days_of_cover=int(cover) if cover >= 0 else None,
+            stockout_date=day(int(cover)),
+            reorder_date=day(int(reorder)),
+        )
+        for (medication_id, name, sku, stock, _), rate, cover, reorder in zip(
+            medications,
+            projection["daily_rate"],
+            projection["days_of_cover"],
+            projection["days_to_reorder"],
+            strict=True,
+        )
+    ]
+    forecasts.sort(key=lambda f: (f.days_of_cover is None, f.days_of_cover or 0))
+    return forecasts
+
+
+def refresh_forecast() -> dict[str, Any]:
+    """Compute the forecast and store it for the API."""
+    forecasts = forecast_consumption()
+    result = {
+        "generated_at": timezone.now(),
+        "medications": [asdict(forecast) for forecast in forecasts],
+    }
+    cache.set(FORECAST_CACHE_KEY, result, settings.PHARMACY_FORECAST_CACHE_SECONDS)
+    return result
+
+
+def get_forecast() -> dict[str, Any]:
+    """The stored forecast, computed now if the nightly run has not stored one."""
+    result: dict[str, Any] | None = cache.get(FORECAST_CACHE_KEY)
+    return result if result is not None else refresh_forecast()
@@ -0,0 +1,208 @@
+"""
+Drug interaction checking against a patient's recent medications.
+
+Interactions (``DrugInteraction``, importable from CSV with the
+``import_drug_interactions`` command) are loaded into an in-memory adjacency
+index: normalized drug name or class -> interacting names/classes. Checking a
+dispensation is a handful of dictionary lookups per recent medication, so it
+runs on every dispense without calling the AI service.
+
+Each process keeps its own index and reloads it after
+``DRUG_INTERACTION_INDEX_TTL_SECONDS``, or at once when interactions change
+in the same process.
+"""
+
+import csv
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+from typing import IO, Any
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from prometheus_client import Counter
+
+from .models import DrugInteraction, normalize_drug
+
+SEVERITY_ORDER = {"MINOR": 0, "MODERATE": 1, "MAJOR": 2, "CONTRAINDICATED": 3}
+
+INTERACTION_WARNINGS = Counter(
+    "healthcore_drug_interaction_warnings_total",
+    "Drug interaction warnings raised when dispensing, by severity.",
+    ["severity"],
+)
+
+
+@dataclass(frozen=True)
+class Interaction:
+    severity: str
+    description: str
+
+
+@dataclass
+class InteractionWarning:
+    """An interaction between the dispensed drug and a recent medication."""
+
+    medication: str
+    matched: str
+    interacts_with: str
+    severity: str
+    description: str
+
+
+class InteractionIndex:
+    """Adjacency index of drug interactions keyed by normalized name/class."""
+
+    def __init__(self, interactions: Iterable[tuple[str, str, str, str]] = ()):
+        self._adjacent: dict[str, dict[str, Interaction]] = {}
+        for drug_a, drug_b, severity, description in interactions:
+            self.add(drug_a, drug_b, severity, description)
+
+    def __len__(self) -> int:
+        # Each pair is stored both ways, except same-class pairs (NSAID + NSAID)
+        both_ways = sum(len(edges) for edges in self._adjacent.values())
+        same = sum(key in edges for key, edges in self._adjacent.items())
+        return (both_ways + same) // 2
+
+    def add(self, drug_a: str, drug_b: str, severity: str, description: str) -> None:
+        a, b = normalize_drug(drug_a), normalize_drug(drug_b)
+        interaction = Interaction(severity, description)
+        self._adjacent.setdefault(a, {})[b] = interaction
+        self._adjacent.setdefault(b, {})[a] = interaction
+
+    def check(
+        self, drug: tuple[str, str], recent: Iterable[tuple[str, str]]
+    ) -> list[InteractionWarning]:
+        """
+        Interactions of a drug with recent medications, most severe first.
+
+        A pair within one class (NSAID + NSAID) matches two different drugs
+        of that class. A recent dispensation of the same drug is a refill,
+        not an interaction, and is skipped.
+
+        Args:
+            drug: (name, class) of the drug being dispensed
+            recent: (name, class) of the patient's recent medications
+        """
+        keys = {normalize_drug(key) for key in drug if key}
+        edges = [(key, self._adjacent[key]) for key in keys if key in self._adjacent]
+        if not edges:
+            return []
+
+        warnings = []
+        for name, drug_class in recent:
+            if normalize_drug(name) == normalize_drug(drug[0]):
+                continue  # The same drug again, not an interaction
+            for other in {normalize_drug(name), normalize_drug(drug_class)} - {""}:
+                for key, adjacent in edges:
+                    interaction = adjacent.get(other)
+                    if interaction:
+                        warnings.append(
+                            InteractionWarning(
+                                medication=name,
+                                matched=key,
+                                interacts_with=other,
+                                severity=interaction.severity,
+                                description=interaction.description,
+                            )
+                        )
+        warnings.sort(key=lambda w: SEVERITY_ORDER.get(w.severity, 0), reverse=True)
+        return warnings
+
+
+_index: InteractionIndex | None = None
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+def get_index() -> InteractionIndex:
+    """The process-wide index, (re)loaded from the database when stale."""
+    global _index, _loaded_at
+    ttl = settings.DRUG_INTERACTION_INDEX_TTL_SECONDS
+    # invalidate_index() may reset the global at any time: return a local
+    index = _index
+    if index is None or time.monotonic() - _loaded_at > ttl:
+        with _lock:
+            index = _index
+            if index is None or time.monotonic() - _loaded_at > ttl:
+                index = InteractionIndex(
+                    DrugInteraction.objects.values_list(
+                        "drug_a", "drug_b", "severity", "description"
+                    )
+                )
+                _index, _loaded_at = index, time.monotonic()
+    return index
+
+
+def invalidate_index() -> None:
+    """Reload the index on next use in this process."""
+    global _index
+    _index = None
+
+
+@receiver(post_save, sender=DrugInteraction)
+@receiver(post_delete, sender=DrugInteraction)
+def _interaction_changed(**kwargs: Any) -> None:
+    transaction.on_commit(invalidate_index)
+
+
+def check_interactions(
+    drug: tuple[str, str], recent: Iterable[tuple[str, str]]
+) -> list[dict[str, str]]:
+    """Check a drug against recent medications; warnings as dicts."""
+    warnings = get_index().check(drug, recent)
+    for warning in warnings:
+        INTERACTION_WARNINGS.labels(warning.severity).inc()
+    return [asdict(warning) for warning in warnings]
+
+
+def import_csv(file: IO[str], replace: bool = False) -> int:
+    """
+    Import interactions from CSV with columns drug_a, drug_b, severity and
+    (optionally) description. Existing pairs are updated.
+
+    Args:
+        replace: Delete interactions not in the file
+
+    Returns:
+        Number of interactions imported.
+
+    Raises:
+        ValueError: On a missing column or unknown severity
+    """
+    reader = csv.DictReader(file)
+    missing = {"drug_a", "drug_b", "severity"} - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"Missing CSV columns: {', '.join(sorted(missing))}")
+
+    pairs: dict[tuple[str, str], DrugInteraction] = {}
+    for line, row in enumerate(reader, start=2):
+        severity = row["severity"].strip().upper()
+        if severity not in SEVERITY_ORDER:
+            raise ValueError(f"Line {line}: unknown severity '{row['severity']}'")
+        drug_a, drug_b = sorted(
+            (normalize_drug(row["drug_a"]), normalize_drug(row["drug_b"]))
+        )
+        if not drug_a:
+            raise ValueError(f"Line {line}: drug_a and drug_b are required")
+        pairs[(drug_a, drug_b)] = DrugInteraction(
+            drug_a=drug_a,
+            drug_b=drug_b,
+            severity=severity,
+            description=(row.get("description") or "").strip(),
+        )
+
+    with transaction.atomic():
+        if replace:
+            DrugInteraction.objects.all().delete()
+        DrugInteraction.objects.bulk_create(
+            pairs.values(),
+            update_conflicts=True,
+            unique_fields=["drug_a", "drug_b"],
+            update_fields=["severity", "description", "updated_at"],
+        )
+        transaction.on_commit(invalidate_index)
+    return len(pairs)
@@ -0,0 +1,30 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from src.apps.pharmacy.interactions import import_csv
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports drug interactions from a CSV file with columns drug_a, drug_b, "
+        "severity (MINOR, MODERATE, MAJOR, CONTRAINDICATED) and description. "
+        "Either drug may be a name or a drug class; existing pairs are updated."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("csv_file", help="Path to the interaction table")
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help="Delete interactions that are not in the file",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            with open(options["csv_file"], newline="", encoding="utf-8") as file:
+                count = import_csv(file, replace=options["replace"])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e)) from None
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {count} drug interactions"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 03:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pharmacy", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="medication",
+            index=models.Index(
+                fields=["name", "expiry_date"], name="pharmacy_me_name_da2c2e_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2 on 2026-10-19 04:01
+
+from django.apps.registry import Apps
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.models import Case, F, Value, When
+
+
+def set_stock_status(apps: Apps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    Medication = apps.get_model("pharmacy", "Medication")
+    Medication.objects.update(
+        stock_status=Case(
+            When(stock_quantity__lt=F("critical_level"), then=Value("CRITICAL")),
+            When(stock_quantity__lt=F("reorder_level"), then=Value("LOW")),
+            default=Value("OK"),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pharmacy", "0002_medication_fefo_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="medication",
+            name="critical_level",
+            field=models.PositiveIntegerField(
+                default=25, help_text="Stock below this is critical"
+            ),
+        ),
+        migrations.AddField(
+            model_name="medication",
+            name="reorder_level",
+            field=models.PositiveIntegerField(
+                default=50, help_text="Stock below this is low and should be reordered"
+            ),
+        ),
+        migrations.AddField(
+            model_name="medication",
+            name="stock_status",
+            field=models.CharField(
+                choices=[("OK", "OK"), ("LOW", "Low"), ("CRITICAL", "Critical")],
+                default="OK",
+                editable=False,
+                max_length=10,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="medication",
+            index=models.Index(
+                condition=models.Q(("stock_status", "OK"), _negated=True),
+                fields=["stock_quantity"],
+                name="pharmacy_low_stock_idx",
+            ),
+        ),
+        migrations.RunPython(set_stock_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2 on 2026-10-19 04:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("patients", "0003_patient_user"),
+        ("pharmacy", "0003_medication_stock_levels"),
+        ("practitioners", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DrugInteraction",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="Timestamp when the record was created",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="Timestamp when the record was last updated",
+                    ),
+                ),
+                ("drug_a", models.CharField(max_length=255)),
+                ("drug_b", models.CharField(max_length=255)),
+                (
+                    "severity",
+                    models.CharField(
+                        choices=[
+                            ("MINOR", "Minor"),
+                            ("MODERATE", "Moderate"),
+                            ("MAJOR", "Major"),
+                            ("CONTRAINDICATED", "Contraindicated"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("description", models.TextField(blank=True)),
+            ],
+            options={
+                "verbose_name": "Drug Interaction",
+                "verbose_name_plural": "Drug Interactions",
+                "ordering": ["drug_a", "drug_b"],
+            },
+        ),
+        migrations.AddField(
+            model_name="dispensation",
+            name="interaction_warnings",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name="medication",
+            name="drug_class",
+            field=models.CharField(
+                blank=True,
+                help_text="Therapeutic class used for interaction checks, e.g. NSAID",
+                max_length=100,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="dispensation",
+            index=models.Index(
+                fields=["patient", "dispensed_at"],
+                name="pharmacy_di_patient_f540b4_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="druginteraction",
+            constraint=models.UniqueConstraint(
+                fields=("drug_a", "drug_b"), name="pharmacy_unique_interaction_pair"
+            ),
+        ),
+    ]
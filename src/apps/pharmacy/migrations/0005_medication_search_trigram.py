@@ -0,0 +1,40 @@
+# pg_trgm indexes for MEDICATION_SEARCH_BACKEND = "postgres"; nothing to do on
+# other databases, where the in-memory search index is used.
+
+from django.apps.registry import Apps
+from django.db import migrations
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+
+TRIGRAM_INDEXES = {
+    "pharmacy_medication_name_trgm": "name",
+    "pharmacy_medication_brand_trgm": "brand",
+    "pharmacy_medication_sku_trgm": "sku",
+}
+
+
+def create_trigram_indexes(apps: Apps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, column in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON pharmacy_medication "
+            f"USING gin ({column} gin_trgm_ops) WHERE is_active"
+        )
+
+
+def drop_trigram_indexes(apps: Apps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pharmacy", "0004_drug_interactions"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -2,9 +2,11 @@
 Domain models for the Pharmacy & Inventory bounded context.
 """
 
+from typing import Any
+
 from django.db import models
 
-from src.apps.core.models import ActivatableModel
+from src.apps.core.models import ActivatableModel, TimestampedModel
 from src.apps.patients.models import Patient
 from src.apps.practitioners.models import Practitioner
 
@@ -16,13 +18,30 @@ class Medication(ActivatableModel):
 
     name = models.CharField(max_length=255)
     brand = models.CharField(max_length=255)
+    drug_class = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="Therapeutic class used for interaction checks, e.g. NSAID",
+    )
     sku = models.CharField(max_length=100, unique=True, help_text="Stock Keeping Unit")
     description = models.TextField(blank=True)
     batch_number = models.CharField(max_length=100)
     expiry_date = models.DateField()
     stock_quantity = models.PositiveIntegerField(default=0)
-
-    # Threshold configuration could be dynamic, but fixed for MVP as per requirements
+    reorder_level = models.PositiveIntegerField(
+        default=50, help_text="Stock below this is low and should be reordered"
+    )
+    critical_level = models.PositiveIntegerField(
+        default=25, help_text="Stock below this is critical"
+    )
+    # Maintained on every stock change; the low-stock set is the partial
+    # index over rows that are not OK.
+    stock_status = models.CharField(
+        max_length=10,
+        choices=[("OK", "OK"), ("LOW", "Low"), ("CRITICAL", "Critical")],
+        default="OK",
+        editable=False,
+    )
 
     class Meta:
         verbose_name = "Medication"
@@ -31,11 +50,34 @@ class Medication(ActivatableModel):
         indexes = [
             models.Index(fields=["sku"]),
             models.Index(fields=["expiry_date"]),
+            # Lots of one drug in expiry order (FEFO allocation)
+            models.Index(fields=["name", "expiry_date"]),
+            models.Index(
+                fields=["stock_quantity"],
+                condition=~models.Q(stock_status="OK"),
+                name="pharmacy_low_stock_idx",
+            ),
         ]
 
     def __str__(self) -> str:
         return f"{self.name} ({self.brand}) - Stock: {self.stock_quantity}"
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Keep stock_status in step with the stock and levels being saved."""
+        self.stock_status = self.status_for(self.stock_quantity)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "stock_quantity" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "stock_status"}
+        super().save(*args, **kwargs)
+
+    def status_for(self, quantity: int) -> str:
+        """Stock status this medication would have at ``quantity``."""
+        if quantity < self.critical_level:
+            return "CRITICAL"
+        if quantity < self.reorder_level:
+            return "LOW"
+        return "OK"
+
     @property
     def is_expired(self) -> bool:
         from django.utils import timezone
@@ -59,12 +101,64 @@ class Dispensation(ActivatableModel):
     )
     quantity = models.PositiveIntegerField()
     notes = models.TextField(blank=True)
+    # Interactions with the patient's recent medications found when dispensing
+    interaction_warnings = models.JSONField(default=list, blank=True)
     dispensed_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name = "Dispensation"
         verbose_name_plural = "Dispensations"
         ordering = ["-dispensed_at"]
+        indexes = [
+            # A patient's recent medications (interaction checks)
+            models.Index(fields=["patient", "dispensed_at"]),
+        ]
 
     def __str__(self) -> str:
         return f"{self.quantity}x {self.medication.name} to {self.patient.given_name} by {self.practitioner.given_name}"
+
+
+class DrugInteraction(TimestampedModel):
+    """
+    A known interaction between two drugs or drug classes.
+
+    Either side is a normalized drug name or drug class; pairs are stored
+    with ``drug_a`` <= ``drug_b`` so each appears once.
+    """
+
+    SEVERITY_CHOICES = [
+        ("MINOR", "Minor"),
+        ("MODERATE", "Moderate"),
+        ("MAJOR", "Major"),
+        ("CONTRAINDICATED", "Contraindicated"),
+    ]
+
+    drug_a = models.CharField(max_length=255)
+    drug_b = models.CharField(max_length=255)
+    severity = models.CharField(max_length=20, choices=SEVERITY_CHOICES)
+    description = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = "Drug Interaction"
+        verbose_name_plural = "Drug Interactions"
+        ordering = ["drug_a", "drug_b"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["drug_a", "drug_b"], name="pharmacy_unique_interaction_pair"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.drug_a} + {self.drug_b} ({self.severity})"
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Normalize both sides and store the pair in canonical order."""
+        self.drug_a, self.drug_b = sorted(
+            (normalize_drug(self.drug_a), normalize_drug(self.drug_b))
+        )
+        super().save(*args, **kwargs)
+
+
+def normalize_drug(name: str) -> str:
+    """Case- and whitespace-insensitive key for a drug name or class."""
+    return " ".join(name.lower().split())
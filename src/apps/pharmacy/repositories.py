@@ -2,8 +2,12 @@
 Data access layer for Pharmacy.
 """
 
+from datetime import date, datetime
 from typing import Any, Optional, Union
 
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
 from .models import Dispensation, Medication
 
 
@@ -12,13 +16,94 @@ def get_medication_by_id(med_id: Union[int, str]) -> Optional[Medication]:
     return Medication.objects.filter(id=med_id, is_active=True).first()
 
 
+def get_fefo_lots(name: str, on_date: date, brand: str = "") -> list[Medication]:
+    """
+    Dispensable lots of a drug, first expiry first.
+
+    Active, in-stock lots not expired on ``on_date``; one query on the
+    (name, expiry_date) index. Rows are not locked.
+    """
+    lots = Medication.objects.filter(
+        name=name, is_active=True, expiry_date__gte=on_date, stock_quantity__gt=0
+    )
+    if brand:
+        lots = lots.filter(brand=brand)
+    return list(lots.order_by("expiry_date", "id"))
+
+
+def get_formulary_medication_names() -> list[str]:
+    """Distinct names of active medications (one per case-insensitive name)."""
+    names: dict[str, str] = {}
+    for name in (
+        Medication.objects.filter(is_active=True)
+        .order_by("name")
+        .values_list("name", flat=True)
+        .distinct()
+    ):
+        names.setdefault(" ".join(name.lower().split()), name)
+    return list(names.values())
+
+
+def is_formulary_medication(name: str) -> bool:
+    """Whether an active medication with this name is stocked."""
+    return Medication.objects.filter(is_active=True, name__iexact=name.strip()).exists()
+
+
+def get_recent_medications(patient_id: int, since: datetime) -> list[tuple[str, str]]:
+    """
+    Distinct (name, drug class) of medications dispensed to a patient since a
+    time; one query on the (patient, dispensed_at) index.
+    """
+    return list(
+        Dispensation.objects.filter(
+            patient_id=patient_id, is_active=True, dispensed_at__gte=since
+        )
+        .order_by()
+        .values_list("medication__name", "medication__drug_class")
+        .distinct()
+    )
+
+
 def create_dispensation(**data: Any) -> Dispensation:
     """Creates a new dispensation record."""
     return Dispensation.objects.create(**data)
 
 
-def update_stock(medication: Medication, quantity_deducted: int) -> Medication:
-    """Updates stock count efficiently."""
-    medication.stock_quantity -= quantity_deducted
-    medication.save(update_fields=["stock_quantity", "updated_at"])
-    return medication
+def decrement_stock(medication: Medication, quantity: int) -> bool:
+    """
+    Atomically deduct stock if enough is available.
+
+    A single conditional UPDATE (``stock_quantity >= quantity``) so concurrent
+    dispensations can neither lose an update nor drive stock negative.
+    Returns False, leaving stock untouched, if there was not enough.
+    """
+    updated = Medication.objects.filter(
+        id=medication.id, is_active=True, stock_quantity__gte=quantity
+    ).update(
+        stock_quantity=F("stock_quantity") - quantity,
+        # Status of the decremented stock, in the same statement
+        stock_status=Case(
+            When(
+                stock_quantity__lt=F("critical_level") + quantity,
+                then=Value("CRITICAL"),
+            ),
+            When(stock_quantity__lt=F("reorder_level") + quantity, then=Value("LOW")),
+            default=Value("OK"),
+        ),
+        updated_at=timezone.now(),
+    )
+    medication.refresh_from_db(fields=["stock_quantity", "stock_status", "updated_at"])
+    return updated == 1
+
+
+def get_low_stock_medications(stock_status: str = "") -> list[Medication]:
+    """
+    Active medications below their reorder level, lowest stock first.
+
+    Reads the low-stock partial index, so cost follows the number of low
+    items rather than the size of the inventory.
+    """
+    low = Medication.objects.exclude(stock_status="OK").filter(is_active=True)
+    if stock_status:
+        low = low.filter(stock_status=stock_status)
+    return list(low.order_by("stock_quantity", "id"))
@@ -0,0 +1,479 @@
+"""
+Medication catalog search for typeahead.
+
+The default backend keeps an in-memory index of active medications:
+
+- a prefix trie over the words of name and brand and over the SKU, for
+  as-you-type matches;
+- a trigram index (pg_trgm style: each word padded with spaces) over the same
+  words, for misspellings, used when prefixes find too few matches.
+
+Matches are ranked name prefix > word prefix > trigram similarity. The index
+is updated from ``Medication`` save/delete signals after commit and rebuilt
+from the database every ``MEDICATION_SEARCH_REBUILD_SECONDS``, which also
+picks up changes made by other processes and by queryset updates. Rebuilds
+run in a background thread and swap the new index in; requests keep using
+the old one meanwhile.
+
+With ``MEDICATION_SEARCH_BACKEND = "postgres"`` the same tiers run in
+PostgreSQL with pg_trgm (GIN indexes from migration 0005), which every
+process sees at once. Differences from the in-memory index: the trigram
+score is pg_trgm's word similarity (matches need 0.6, its default
+threshold), the name prefix compares the raw name rather than its words,
+and word boundaries follow PostgreSQL regular expressions (``\\m``).
+Queries shorter than three characters cannot use the trigram indexes and
+scan the active rows.
+"""
+
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from collections.abc import Container, Iterable, Iterator
+from dataclasses import dataclass
+from heapq import merge
+from operator import itemgetter
+from typing import Any
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connections, transaction
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Medication
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Trigram similarity below this is not a match (pg_trgm's default)
+SIMILARITY_THRESHOLD = 0.3
+# Entries each trie node lists in name order (above the API's 50-result limit)
+NODE_CANDIDATES = 100
+
+NAME_PREFIX_SCORE = 3.0
+WORD_PREFIX_SCORE = 2.0
+
+
+@dataclass
+class SearchResult:
+    id: int
+    name: str
+    brand: str
+    sku: str
+    score: float
+
+
+def words(text: str) -> list[str]:
+    return _WORD.findall(text.lower())
+
+
+def trigrams(text: str) -> set[str]:
+    """pg_trgm trigrams: each word padded with two spaces before, one after."""
+    grams: set[str] = set()
+    for word in words(text):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _similarity(a: set[str], b: set[str]) -> float:
+    """pg_trgm similarity: shared trigrams over all distinct trigrams."""
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared) if shared else 0.0
+
+
+class _TrieNode:
+    __slots__ = ("children", "first", "ids")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        # Entries with a token ending here
+        self.ids: set[int] = set()
+        # The first NODE_CANDIDATES entries in name order with a token in this
+        # subtree; complete when shorter
+        self.first: list[int] = []
+
+
+@dataclass
+class _Entry:
+    name: str
+    brand: str
+    sku: str
+    tokens: set[str]
+    # Per field (name, brand, SKU); similarity is the best field's
+    trigrams: tuple[set[str], ...]
+    # Lower-case name words and id: name-prefix matching and result order
+    key: tuple[str, int]
+
+
+class MedicationSearchIndex:
+    """
+    Prefix trie and trigram index over medication names, brands and SKUs.
+
+    Name-prefix matches are a range of the sorted names. For word-prefix
+    matches, the most selective query word's trie node lists its first
+    entries in name order; they are checked against the other words until
+    the limit is reached, so a common prefix costs no more than a rare one.
+    """
+
+    def __init__(self, medications: Iterable[tuple[int, str, str, str]] = ()):
+        self._root = _TrieNode()
+        self._trigrams: dict[str, set[int]] = {}
+        self._entries: dict[int, _Entry] = {}
+        self._names: list[tuple[str, int]] = []
+        self._lock = threading.Lock()
+        for medication_id, name, brand, sku in medications:
+            self._insert(medication_id, name, brand, sku)
+        self._names = sorted(entry.key for entry in self._entries.values())
+        self._fill(self._root)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def upsert(self, medication_id: int, name: str, brand: str, sku: str) -> None:
+        with self._lock:
+            self._remove(medication_id)
+            self._add(medication_id, name, brand, sku)
+
+    def remove(self, medication_id: int) -> None:
+        with self._lock:
+            self._remove(medication_id)
+
+    def _key(self, medication_id: int) -> tuple[str, int]:
+        return self._entries[medication_id].key
+
+    def _insert(
+        self, medication_id: int, name: str, brand: str, sku: str
+    ) -> list[_TrieNode]:
+        """Index an entry's tokens and trigrams; the trie nodes on its paths."""
+        tokens = {*words(name), *words(brand), *words(sku), sku.lower()}
+        fields = (trigrams(name), trigrams(brand), trigrams(sku))
+        self._entries[medication_id] = _Entry(
+            name, brand, sku, tokens, fields, (" ".join(words(name)), medication_id)
+        )
+        path: dict[int, _TrieNode] = {}
+        for token in tokens:
+            node = self._root
+            for char in token:
+                node = node.children.setdefault(char, _TrieNode())
+                path[id(node)] = node
+            node.ids.add(medication_id)
+        for gram in set().union(*fields):
+            self._trigrams.setdefault(gram, set()).add(medication_id)
+        return list(path.values())
+
+    def _first(self, node: _TrieNode) -> list[int]:
+        """A node's first entries, from its own and its children's lists."""
+        first: list[int] = []
+        for medication_id in merge(
+            sorted(node.ids, key=self._key),
+            *(child.first for child in node.children.values()),
+            key=self._key,
+        ):
+            # An entry with tokens under several children comes up once per child
+            if not first or first[-1] != medication_id:
+                first.append(medication_id)
+                if len(first) == NODE_CANDIDATES:
+                    break
+        return first
+
+    def _fill(self, node: _TrieNode) -> None:
+        for child in node.children.values():
+            self._fill(child)
+        node.first = self._first(node)
+
+    def _add(self, medication_id: int, name: str, brand: str, sku: str) -> None:
+        key = (" ".join(words(name)), medication_id)
+        for node in self._insert(medication_id, name, brand, sku):
+            first = node.first
+            if len(first) < NODE_CANDIDATES or key < self._key(first[-1]):
+                insort(first, medication_id, key=self._key)
+                del first[NODE_CANDIDATES:]
+        insort(self._names, key)
+
+    def _remove(self, medication_id: int) -> None:
+        entry = self._entries.get(medication_id)
+        if entry is None:
+            return
+        path: dict[int, tuple[int, _TrieNode]] = {}
+        for token in entry.tokens:
+            node = self._root
+            for depth, char in enumerate(token):
+                node = node.children[char]
+                path[id(node)] = (depth, node)
+            node.ids.discard(medication_id)
+        # Deepest first, so a full list refills from updated children
+        for _, node in sorted(path.values(), key=itemgetter(0), reverse=True):
+            if medication_id in node.first:
+                if len(node.first) < NODE_CANDIDATES:
+                    node.first.remove(medication_id)
+                else:
+                    node.first = self._first(node)
+        del self._names[bisect_left(self._names, entry.key)]
+        for gram in set().union(*entry.trigrams):
+            self._trigrams.get(gram, set()).discard(medication_id)
+        del self._entries[medication_id]
+
+    def _node(self, prefix: str) -> _TrieNode | None:
+        node: _TrieNode | None = self._root
+        for char in prefix:
+            node = node.children.get(char) if node else None
+        return node
+
+    def _subtree_ids(self, node: _TrieNode) -> Iterator[int]:
+        """Entries under a node in name order, past its bounded list if needed."""
+        yield from node.first
+        if len(node.first) < NODE_CANDIDATES:
+            return
+        last = self._key(node.first[-1])
+        rest: set[int] = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            rest |= node.ids
+            stack.extend(node.children.values())
+        yield from sorted(
+            (
+                medication_id
+                for medication_id in rest
+                if self._key(medication_id) > last
+            ),
+            key=self._key,
+        )
+
+    def _name_prefix_ids(self, normalized: str, limit: int) -> list[int]:
+        start = bisect_left(self._names, (normalized,))
+        return [
+            medication_id
+            for name, medication_id in self._names[start : start + limit]
+            if name.startswith(normalized)
+        ]
+
+    def _word_prefix_ids(
+        self, terms: list[str], limit: int, exclude: Container[int]
+    ) -> list[int]:
+        """First ``limit`` entries in name order with a word prefixed by each term."""
+        nodes = [self._node(term) for term in terms]
+        if limit <= 0 or None in nodes:
+            return []
+        # Walk the most selective term; check the others against the entry
+        best = min(range(len(terms)), key=lambda i: len(nodes[i].first))  # type: ignore[union-attr]
+        others = terms[:best] + terms[best + 1 :]
+        found: list[int] = []
+        for medication_id in self._subtree_ids(nodes[best]):  # type: ignore[arg-type]
+            tokens = self._entries[medication_id].tokens
+            if medication_id not in exclude and all(
+                any(token.startswith(term) for token in tokens) for term in others
+            ):
+                found.append(medication_id)
+                if len(found) == limit:
+                    break
+        return found
+
+    def search(self, query: str, limit: int = 10) -> list[SearchResult]:
+        """Ranked matches; every query word must prefix a word, or trigrams match."""
+        terms = words(query)
+        if not terms:
+            return []
+        normalized = " ".join(terms)
+        with self._lock:
+            # Prefix matches outrank trigram ones, so at most ``limit`` are needed
+            scores = dict.fromkeys(
+                self._name_prefix_ids(normalized, limit), NAME_PREFIX_SCORE
+            )
+            scores.update(
+                dict.fromkeys(
+                    self._word_prefix_ids(terms, limit - len(scores), scores),
+                    WORD_PREFIX_SCORE,
+                )
+            )
+
+            # Fewer than ``limit``: all prefix matches are in
+            if len(scores) < limit:
+                query_grams = trigrams(query)
+                shared: Counter[int] = Counter()
+                for gram in query_grams:
+                    shared.update(self._trigrams.get(gram, ()))
+                # Fewer shared trigrams cannot reach the threshold in any field
+                least = SIMILARITY_THRESHOLD * len(query_grams)
+                for medication_id, count in shared.items():
+                    if count < least:
+                        continue
+                    similarity = max(
+                        _similarity(query_grams, grams)
+                        for grams in self._entries[medication_id].trigrams
+                    )
+                    if similarity >= SIMILARITY_THRESHOLD:
+                        scores[medication_id] = scores.get(medication_id, 0.0) + (
+                            similarity
+                        )
+
+            ranked = sorted(
+                scores.items(), key=lambda item: (-item[1], self._key(item[0]))
+            )[:limit]
+            return [
+                SearchResult(
+                    id=medication_id,
+                    name=self._entries[medication_id].name,
+                    brand=self._entries[medication_id].brand,
+                    sku=self._entries[medication_id].sku,
+                    score=round(score, 3),
+                )
+                for medication_id, score in ranked
+            ]
+
+
+_index: MedicationSearchIndex | None = None
+_built_at = 0.0
+# Held by the thread building an index, which can take seconds
+_rebuild_lock = threading.Lock()
+# Guards the swap and the changes applied while a rebuild reads the database
+_swap_lock = threading.Lock()
+_pending: list[tuple[int, Medication | None]] | None = None
+
+
+def get_index() -> MedicationSearchIndex:
+    """
+    The process-wide index. Only the first use builds it in the request;
+    later rebuilds run in a background thread while the old index serves.
+    """
+    index = _index
+    if index is None:
+        with _rebuild_lock:
+            index = _index if _index is not None else _rebuild()
+    elif (
+        time.monotonic() - _built_at > settings.MEDICATION_SEARCH_REBUILD_SECONDS
+        and _rebuild_lock.acquire(blocking=False)
+    ):
+        threading.Thread(
+            target=_rebuild_in_background, name="medication-search", daemon=True
+        ).start()
+    return index
+
+
+def _rebuild() -> MedicationSearchIndex:
+    """
+    Build an index from the database, then swap it in. The caller holds
+    ``_rebuild_lock``. Changes committed during the build are replayed on
+    the new index first, so none is lost with the old one.
+    """
+    global _index, _built_at, _pending
+    with _swap_lock:
+        _pending = []
+    try:
+        index = MedicationSearchIndex(
+            Medication.objects.filter(is_active=True).values_list(
+                "id", "name", "brand", "sku"
+            )
+        )
+        with _swap_lock:
+            for medication_id, medication in _pending:
+                _update(index, medication_id, medication)
+            _index, _built_at = index, time.monotonic()
+    finally:
+        with _swap_lock:
+            _pending = None
+    return index
+
+
+def _rebuild_in_background() -> None:
+    try:
+        _rebuild()
+    except Exception:
+        logger.exception("Medication search index rebuild failed")
+    finally:
+        _rebuild_lock.release()
+        connections.close_all()  # This thread's connections only
+
+
+def reset_index() -> None:
+    """Rebuild the index on next use in this process."""
+    global _index
+    _index = None
+
+
+def _update(
+    index: MedicationSearchIndex, medication_id: int, medication: Medication | None
+) -> None:
+    if medication is not None and medication.is_active:
+        index.upsert(medication_id, medication.name, medication.brand, medication.sku)
+    else:
+        index.remove(medication_id)
+
+
+def _apply(medication_id: int, medication: Medication | None) -> None:
+    with _swap_lock:
+        if _pending is not None:
+            _pending.append((medication_id, medication))
+        index = _index
+    if index is not None:  # Otherwise built from the database on first use
+        _update(index, medication_id, medication)
+
+
+@receiver(post_save, sender=Medication)
+def _medication_saved(instance: Medication, **kwargs: Any) -> None:
+    transaction.on_commit(lambda: _apply(instance.id, instance))
+
+
+@receiver(post_delete, sender=Medication)
+def _medication_deleted(instance: Medication, **kwargs: Any) -> None:
+    medication_id = instance.id
+    transaction.on_commit(lambda: _apply(medication_id, None))
+
+
+def search_postgres(query: str, limit: int = 10) -> list[SearchResult]:
+    """The same search with pg_trgm, for multi-process consistency."""
+    terms = words(query)
+    if not terms:
+        return []
+    normalized = " ".join(terms)
+    # Every term starts a word of name, brand or SKU
+    word_prefix = Q()
+    for term in terms:
+        pattern = rf"\m{term}"
+        word_prefix &= (
+            Q(name__iregex=pattern) | Q(brand__iregex=pattern) | Q(sku__iregex=pattern)
+        )
+    # Trigram and regex operators only, so each branch can use its GIN index
+    matches = Medication.objects.filter(is_active=True).filter(
+        word_prefix
+        | Q(name__trigram_word_similar=normalized)
+        | Q(brand__trigram_word_similar=normalized)
+        | Q(sku__trigram_word_similar=normalized)
+    )
+    ranked = matches.annotate(
+        score=Case(
+            When(name__istartswith=normalized, then=Value(NAME_PREFIX_SCORE)),
+            When(word_prefix, then=Value(WORD_PREFIX_SCORE)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        + Greatest(
+            TrigramWordSimilarity(normalized, "name"),
+            TrigramWordSimilarity(normalized, "brand"),
+            TrigramWordSimilarity(normalized, "sku"),
+        )
+    ).order_by("-score", "name")[:limit]
+    return [
+        SearchResult(
+            id=medication.id,
+            name=medication.name,
+            brand=medication.brand,
+            sku=medication.sku,
+            score=round(medication.score, 3),
+        )
+        for medication in ranked
+    ]
+
+
+def search_medications(query: str, limit: int = 10) -> list[SearchResult]:
+    """Typeahead search of active medications with the configured backend."""
+    if settings.MEDICATION_SEARCH_BACKEND == "postgres":
+        return search_postgres(query, limit)
+    return get_index().search(query, limit)
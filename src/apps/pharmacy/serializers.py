@@ -16,14 +16,31 @@ class MedicationSerializer(serializers.ModelSerializer[Medication]):
             "id",
             "name",
             "brand",
+            "drug_class",
             "sku",
             "description",
             "batch_number",
             "expiry_date",
             "stock_quantity",
+            "reorder_level",
+            "critical_level",
+            "stock_status",
             "is_active",
         ]
-        read_only_fields = ["id", "is_active"]
+        read_only_fields = ["id", "stock_status", "is_active"]
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        # Model defaults when creating
+        current = (
+            self.instance if isinstance(self.instance, Medication) else Medication()
+        )
+        reorder = attrs.get("reorder_level", current.reorder_level)
+        critical = attrs.get("critical_level", current.critical_level)
+        if critical > reorder:
+            raise serializers.ValidationError(
+                {"critical_level": "Must not exceed reorder_level."}
+            )
+        return attrs
 
 
 class DispensationSerializer(serializers.ModelSerializer[Dispensation]):
@@ -36,9 +53,10 @@ class DispensationSerializer(serializers.ModelSerializer[Dispensation]):
             "practitioner",
             "quantity",
             "notes",
+            "interaction_warnings",
             "dispensed_at",
         ]
-        read_only_fields = ["id", "dispensed_at"]
+        read_only_fields = ["id", "interaction_warnings", "dispensed_at"]
 
 
 class CreateDispensationSerializer(serializers.Serializer[Any]):
@@ -47,3 +65,77 @@ class CreateDispensationSerializer(serializers.Serializer[Any]):
     practitioner_id = serializers.IntegerField()
     quantity = serializers.IntegerField(min_value=1)
     notes = serializers.CharField(required=False, allow_blank=True)
+
+
+class FefoDispensationSerializer(serializers.Serializer[Any]):
+    medication_name = serializers.CharField(max_length=255)
+    brand = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    patient_id = serializers.IntegerField()
+    practitioner_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+    notes = serializers.CharField(required=False, allow_blank=True)
+
+
+class LotDispensationSerializer(serializers.ModelSerializer[Dispensation]):
+    """A FEFO dispensation with the lot it was drawn from."""
+
+    sku = serializers.CharField(source="medication.sku", read_only=True)
+    batch_number = serializers.CharField(
+        source="medication.batch_number", read_only=True
+    )
+    expiry_date = serializers.DateField(source="medication.expiry_date", read_only=True)
+
+    class Meta:
+        model = Dispensation
+        fields = [
+            "id",
+            "medication",
+            "sku",
+            "batch_number",
+            "expiry_date",
+            "quantity",
+            "interaction_warnings",
+            "dispensed_at",
+        ]
+        read_only_fields = fields
+
+
+class LowStockSerializer(serializers.ModelSerializer[Medication]):
+    class Meta:
+        model = Medication
+        fields = [
+            "id",
+            "name",
+            "brand",
+            "sku",
+            "batch_number",
+            "stock_quantity",
+            "reorder_level",
+            "critical_level",
+            "stock_status",
+        ]
+        read_only_fields = fields
+
+
+class MedicationForecastSerializer(serializers.Serializer[Any]):
+    medication_id = serializers.IntegerField()
+    name = serializers.CharField()
+    sku = serializers.CharField()
+    stock_quantity = serializers.IntegerField()
+    daily_rate = serializers.FloatField()
+    days_of_cover = serializers.IntegerField(allow_null=True)
+    stockout_date = serializers.DateField(allow_null=True)
+    reorder_date = serializers.DateField(allow_null=True)
+
+
+class ConsumptionForecastSerializer(serializers.Serializer[Any]):
+    generated_at = serializers.DateTimeField()
+    medications = MedicationForecastSerializer(many=True)
+
+
+class MedicationSearchResultSerializer(serializers.Serializer[Any]):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    brand = serializers.CharField()
+    sku = serializers.CharField()
+    score = serializers.FloatField()
@@ -3,22 +3,43 @@ Service layer for Pharmacy. Handles stock logic and alerts.
 """
 
 import logging
+from dataclasses import dataclass
+from datetime import timedelta
 
+from django.conf import settings
 from django.db import transaction
+from django.utils import timezone
+from prometheus_client import Counter
 
+from src.apps.core.kafka import KafkaProducer
 from src.apps.patients.repositories import get_patient_by_id
 from src.apps.practitioners.repositories import get_practitioner_by_id
 
-from . import repositories
-from .models import Dispensation
+from . import interactions, repositories
+from .events import StockAlertEvent
+from .models import Dispensation, Medication
 
 logger = logging.getLogger(__name__)
 
+STOCK_ALERTS = Counter(
+    "healthcore_pharmacy_stock_alerts_total",
+    "Medications crossing below their reorder (LOW) or critical level.",
+    ["level"],
+)
+
 
 class PharmacyError(Exception):
     pass
 
 
+@dataclass
+class LotAllocation:
+    """Quantity drawn from one medication lot."""
+
+    medication: Medication
+    quantity: int
+
+
 @transaction.atomic
 def dispense_medication(
     medication_id: int,
@@ -41,11 +62,6 @@ def dispense_medication(
             f"Medication {medication.sku} is expired (Expiry: {medication.expiry_date}). Cannot dispense."
         )
 
-    if medication.stock_quantity < quantity:
-        raise PharmacyError(
-            f"Insufficient stock. Available: {medication.stock_quantity}, Requested: {quantity}"
-        )
-
     patient = get_patient_by_id(patient_id)
     if not patient:
         raise PharmacyError("Patient not found.")
@@ -54,28 +70,168 @@ def dispense_medication(
     if not practitioner:
         raise PharmacyError("Practitioner not found.")
 
-    # 2. Update Stock
-    medication = repositories.update_stock(medication, quantity)
+    # 2. Update Stock (conditional UPDATE; safe under concurrent dispensing)
+    if not repositories.decrement_stock(medication, quantity):
+        raise PharmacyError(
+            f"Insufficient stock. Available: {medication.stock_quantity}, Requested: {quantity}"
+        )
 
-    # 3. Create Audit Record
+    # 3. Create Audit Record, with interactions found against recent medications
     dispensation = repositories.create_dispensation(
         medication=medication,
         patient=patient,
         practitioner=practitioner,
         quantity=quantity,
         notes=notes,
+        interaction_warnings=check_interactions(medication, patient.id),
+    )
+
+    # 4. Alert if this dispensation crossed a stock level
+    alert_on_level_crossing(medication, quantity)
+
+    return dispensation
+
+
+def allocate_fefo(
+    medication_name: str, quantity: int, brand: str = ""
+) -> list[LotAllocation]:
+    """
+    Draw a quantity of a drug from its lots, first expiry first out.
+
+    Lots come from one indexed query in expiry order and are drawn with the
+    conditional stock decrement, which row-locks only the lots it touches.
+    A lot that lost stock to a concurrent dispensation is retried with what
+    it has left. Must run in a transaction: nothing is kept if the lots
+    together cannot cover the quantity.
+
+    Raises:
+        PharmacyError: If non-expired stock is insufficient
+    """
+    remaining = quantity
+    allocation: list[LotAllocation] = []
+    lots = repositories.get_fefo_lots(medication_name, timezone.now().date(), brand)
+    for lot in lots:
+        while remaining and lot.stock_quantity > 0:
+            take = min(remaining, lot.stock_quantity)
+            if repositories.decrement_stock(lot, take):
+                allocation.append(LotAllocation(lot, take))
+                remaining -= take
+            elif lot.stock_quantity >= take:
+                break  # Lot deactivated meanwhile
+        if not remaining:
+            return allocation
+
+    available = quantity - remaining
+    raise PharmacyError(
+        f"Insufficient non-expired stock of {medication_name}. "
+        f"Available: {available}, Requested: {quantity}"
+    )
+
+
+@transaction.atomic
+def dispense_fefo(
+    medication_name: str,
+    patient_id: int,
+    practitioner_id: int,
+    quantity: int,
+    brand: str = "",
+    notes: str = "",
+) -> list[Dispensation]:
+    """
+    Dispenses a drug across its lots (FEFO), one audit record per lot.
+    """
+    patient = get_patient_by_id(patient_id)
+    if not patient:
+        raise PharmacyError("Patient not found.")
+
+    practitioner = get_practitioner_by_id(practitioner_id)
+    if not practitioner:
+        raise PharmacyError("Practitioner not found.")
+
+    dispensations = []
+    allocation = allocate_fefo(medication_name, quantity, brand)
+    warnings = check_interactions(allocation[0].medication, patient.id)
+    for lot in allocation:
+        dispensations.append(
+            repositories.create_dispensation(
+                medication=lot.medication,
+                patient=patient,
+                practitioner=practitioner,
+                quantity=lot.quantity,
+                notes=notes,
+                interaction_warnings=warnings,
+            )
+        )
+        alert_on_level_crossing(lot.medication, lot.quantity)
+    return dispensations
+
+
+def check_interactions(medication: Medication, patient_id: int) -> list[dict[str, str]]:
+    """
+    Interactions of a medication with the patient's recent medications.
+
+    Medications dispensed within ``DRUG_INTERACTION_LOOKBACK_DAYS`` count as
+    current. Warnings are returned (and recorded), not enforced: the
+    dispensing practitioner decides.
+    """
+    since = timezone.now() - timedelta(days=settings.DRUG_INTERACTION_LOOKBACK_DAYS)
+    recent = repositories.get_recent_medications(patient_id, since)
+    warnings = interactions.check_interactions(
+        (medication.name, medication.drug_class), recent
     )
+    if warnings:
+        logger.warning(
+            f"Interaction warnings dispensing {medication.name} to patient "
+            f"{patient_id}: {', '.join(w['severity'] for w in warnings)}"
+        )
+    return warnings
+
+
+def alert_on_level_crossing(medication: Medication, dispensed: int) -> None:
+    """
+    Alert once when a dispensation takes stock below a level.
 
-    # 4. Check Thresholds & Alert
-    # In a real app, this would send an email/slack via Celery tasks.
-    # For MVP, we log WARNINGs which Sentry would pick up.
-    if medication.stock_quantity < 25:
+    ``medication`` holds the stock just after ``dispensed`` units were
+    deducted. Each decrement is a row-locked UPDATE, so exactly one
+    dispensation sees a given level crossed; later ones below it stay quiet.
+    The event is published after the transaction commits.
+    """
+    before = medication.status_for(medication.stock_quantity + dispensed)
+    after = medication.stock_quantity
+    level = medication.status_for(after)
+    if level in (before, "OK"):
+        return
+
+    STOCK_ALERTS.labels(level).inc()
+    if level == "CRITICAL":
         logger.critical(
-            f"STOCK CRITICAL ALERT: {medication.name} (SKU: {medication.sku}) is below 25 units! Current: {medication.stock_quantity}"
+            f"STOCK CRITICAL ALERT: {medication.name} (SKU: {medication.sku}) is below {medication.critical_level} units! Current: {after}"
         )
-    elif medication.stock_quantity < 50:
+    else:
         logger.warning(
-            f"STOCK LOW ALERT: {medication.name} (SKU: {medication.sku}) is below 50 units. Current: {medication.stock_quantity}"
+            f"STOCK LOW ALERT: {medication.name} (SKU: {medication.sku}) is below {medication.reorder_level} units. Current: {after}"
         )
 
-    return dispensation
+    event = StockAlertEvent(
+        medication_id=medication.id,
+        stock_data={
+            "level": level,
+            "name": medication.name,
+            "sku": medication.sku,
+            "stock_quantity": after,
+            "reorder_level": medication.reorder_level,
+            "critical_level": medication.critical_level,
+        },
+    )
+    transaction.on_commit(lambda: _publish_stock_alert(event))
+
+
+def _publish_stock_alert(event: StockAlertEvent) -> None:
+    try:
+        KafkaProducer.get_instance().publish(
+            event_type=event.event_type,
+            data=event.to_dict(),
+            key=str(event.data["medication_id"]),
+        )
+    except Exception as e:
+        logger.error(f"Failed to publish stock alert event: {e}")
@@ -0,0 +1,51 @@
+"""
+Celery tasks for the pharmacy app.
+
+``prewarm_drug_information`` runs nightly on the AI queue and keeps drug
+information for every formulary medication in the cache (see
+``ai_service.prewarm_drug_information``). ``forecast_consumption`` refreshes
+the stored consumption forecast (see ``forecasting``).
+"""
+
+import logging
+from dataclasses import asdict
+
+from celery import shared_task
+
+from src.apps.core.ai_client import AIConfigurationError
+
+from . import ai_service, forecasting
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(  # type: ignore[misc]
+    acks_late=True,
+    soft_time_limit=3 * 3600,
+    time_limit=3 * 3600 + 300,
+)
+def prewarm_drug_information(force: bool = False) -> dict[str, int]:
+    """Pre-generate drug information for the formulary."""
+    try:
+        report = ai_service.prewarm_drug_information(force=force)
+    except AIConfigurationError as e:
+        logger.warning(f"Drug info pre-warm skipped: {e}")
+        return {}
+    logger.info(
+        f"Drug info pre-warm: {report.refreshed} refreshed, {report.fresh} fresh, "
+        f"{report.failed} failed, {report.deferred} deferred to the next run"
+    )
+    return asdict(report)
+
+
+@shared_task(acks_late=True)  # type: ignore[misc]
+def forecast_consumption() -> dict[str, int]:
+    """Recompute the medication consumption forecast."""
+    result = forecasting.refresh_forecast()
+    medications = result["medications"]
+    running_out = sum(1 for m in medications if m["stockout_date"] is not None)
+    logger.info(
+        f"Consumption forecast: {len(medications)} medications, "
+        f"{running_out} projected to run out within the horizon"
+    )
+    return {"medications": len(medications), "running_out": running_out}
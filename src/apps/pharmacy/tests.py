@@ -1,17 +1,34 @@
-from datetime import timedelta
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from unittest.mock import patch
 
+import numpy as np
 import pytest
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.utils import timezone
 from model_bakery import baker
 from rest_framework.test import APIClient
 
+from src.apps.core.ai_client import AIServiceUnavailableError
 from src.apps.patients.models import Patient
 from src.apps.practitioners.models import Practitioner
 
-from . import services
-from .models import Medication
+from . import (
+    ai_service,
+    forecasting,
+    interactions,
+    repositories,
+    search,
+    services,
+    tasks,
+)
+from .models import Dispensation, DrugInteraction, Medication
 
 User = get_user_model()
 
@@ -72,6 +89,15 @@ class TestPharmacyService:
                 quantity=101,
             )
 
+    def test_decrement_checks_database_stock(self, medication):
+        # Another pharmacist dispensed since this instance was loaded
+        Medication.objects.filter(id=medication.id).update(stock_quantity=5)
+
+        assert not repositories.decrement_stock(medication, 10)
+        assert medication.stock_quantity == 5
+        assert repositories.decrement_stock(medication, 5)
+        assert medication.stock_quantity == 0
+
     def test_dispense_expired(self, medication, patient, practitioner):
         medication.expiry_date = timezone.now().date() - timedelta(days=1)
         medication.save()
@@ -84,6 +110,43 @@ class TestPharmacyService:
             )
 
 
+@pytest.mark.postgres
+@pytest.mark.skipif(
+    connection.vendor != "postgresql",
+    reason="Concurrent writers need row-level locking; see settings.postgres_test",
+)
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_dispensing_never_oversells(medication, patient, practitioner):
+    """Parallel dispensations of one SKU: no lost updates, no negative stock."""
+    medication.stock_quantity = 50
+    medication.save()
+    threads = 20
+    start = threading.Barrier(threads)
+
+    def dispense(_):
+        start.wait()
+        try:
+            services.dispense_medication(
+                medication_id=medication.id,
+                patient_id=patient.id,
+                practitioner_id=practitioner.id,
+                quantity=3,
+            )
+            return True
+        except services.PharmacyError:
+            return False
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(dispense, range(threads)))
+
+    medication.refresh_from_db()
+    assert results.count(True) == 16
+    assert medication.stock_quantity == 2
+    assert Dispensation.objects.filter(medication=medication).count() == 16
+
+
 @pytest.mark.django_db
 class TestPharmacyAPI:
     def test_create_dispensation_api(
@@ -101,3 +164,839 @@ class TestPharmacyAPI:
         assert response.status_code == 201
         medication.refresh_from_db()
         assert medication.stock_quantity == 95
+
+
+def _lot(days, stock, **kwargs):
+    kwargs.setdefault("brand", "Generic")
+    return baker.make(
+        Medication,
+        name="Amoxicillin",
+        stock_quantity=stock,
+        expiry_date=timezone.now().date() + timedelta(days=days),
+        **kwargs,
+    )
+
+
+@pytest.mark.django_db
+class TestFefoDispensing:
+    def _dispense(self, patient, practitioner, quantity, **kwargs):
+        return services.dispense_fefo(
+            medication_name="Amoxicillin",
+            patient_id=patient.id,
+            practitioner_id=practitioner.id,
+            quantity=quantity,
+            **kwargs,
+        )
+
+    def test_first_expiry_lot_is_used_first(self, patient, practitioner):
+        late, early = _lot(300, 50), _lot(30, 50)
+
+        [dispensation] = self._dispense(patient, practitioner, 20)
+
+        assert dispensation.medication == early
+        early.refresh_from_db()
+        late.refresh_from_db()
+        assert (early.stock_quantity, late.stock_quantity) == (30, 50)
+
+    def test_quantity_split_across_lots(self, patient, practitioner):
+        first, second, third = _lot(10, 5), _lot(20, 8), _lot(30, 100)
+
+        dispensations = self._dispense(patient, practitioner, 20)
+
+        assert [(d.medication, d.quantity) for d in dispensations] == [
+            (first, 5),
+            (second, 8),
+            (third, 7),
+        ]
+        third.refresh_from_db()
+        assert third.stock_quantity == 93
+
+    def test_expired_inactive_and_empty_lots_skipped(self, patient, practitioner):
+        _lot(-1, 100)
+        _lot(5, 100, is_active=False)
+        _lot(6, 0)
+        usable = _lot(60, 100)
+
+        [dispensation] = self._dispense(patient, practitioner, 10)
+        assert dispensation.medication == usable
+
+    def test_brand_filter(self, patient, practitioner):
+        _lot(10, 100)
+        branded = _lot(90, 100, brand="Amoxil")
+
+        [dispensation] = self._dispense(patient, practitioner, 10, brand="Amoxil")
+        assert dispensation.medication == branded
+
+    def test_insufficient_stock_rolls_back(self, patient, practitioner):
+        lots = [_lot(10, 5), _lot(20, 5), _lot(-5, 50)]
+
+        with pytest.raises(services.PharmacyError, match="Available: 10"):
+            self._dispense(patient, practitioner, 11)
+
+        assert [Medication.objects.get(pk=lot.pk).stock_quantity for lot in lots] == [
+            5,
+            5,
+            50,
+        ]
+        assert not Dispensation.objects.exists()
+
+    def test_lots_selected_with_one_query(self, django_assert_num_queries):
+        _lot(10, 5)
+        _lot(20, 5)
+        with django_assert_num_queries(1):
+            lots = repositories.get_fefo_lots("Amoxicillin", timezone.now().date())
+        assert [lot.stock_quantity for lot in lots] == [5, 5]
+
+    def test_fefo_api(self, auth_client, patient, practitioner):
+        early, late = _lot(10, 4), _lot(20, 10)
+        url = "/api/v1/pharmacy/dispensations/fefo/"
+        data = {
+            "medication_name": "Amoxicillin",
+            "patient_id": patient.id,
+            "practitioner_id": practitioner.id,
+            "quantity": 6,
+        }
+
+        response = auth_client.post(url, data=data, format="json")
+
+        assert response.status_code == 201
+        assert [(row["sku"], row["quantity"]) for row in response.data] == [
+            (early.sku, 4),
+            (late.sku, 2),
+        ]
+        assert response.data[0]["batch_number"] == early.batch_number
+
+        data["quantity"] = 100
+        response = auth_client.post(url, data=data, format="json")
+        assert response.status_code == 400
+        assert "Insufficient" in response.data["detail"]
+
+
+@pytest.mark.django_db
+class TestStockLevels:
+    @pytest.fixture
+    def producer(self):
+        with patch("src.apps.pharmacy.services.KafkaProducer") as kafka:
+            yield kafka.get_instance.return_value
+
+    def _dispense(self, medication, patient, practitioner, quantity):
+        services.dispense_medication(
+            medication_id=medication.id,
+            patient_id=patient.id,
+            practitioner_id=practitioner.id,
+            quantity=quantity,
+        )
+        medication.refresh_from_db()
+
+    def test_status_follows_saves_and_dispensing(
+        self, medication, patient, practitioner
+    ):
+        assert medication.stock_status == "OK"
+
+        self._dispense(medication, patient, practitioner, 60)
+        assert medication.stock_status == "LOW"
+
+        self._dispense(medication, patient, practitioner, 20)
+        assert medication.stock_status == "CRITICAL"
+
+        medication.stock_quantity = 200
+        medication.save(update_fields=["stock_quantity"])
+        medication.refresh_from_db()
+        assert medication.stock_status == "OK"
+
+    def test_alert_published_once_per_crossing(
+        self,
+        medication,
+        patient,
+        practitioner,
+        producer,
+        django_capture_on_commit_callbacks,
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            for quantity in (40, 15, 5, 20, 10):  # 60, 45, 40, 20, 10
+                self._dispense(medication, patient, practitioner, quantity)
+
+        published = [
+            call.kwargs["data"]["data"] for call in producer.publish.mock_calls
+        ]
+        assert [(event["level"], event["stock_quantity"]) for event in published] == [
+            ("LOW", 45),
+            ("CRITICAL", 20),
+        ]
+        assert {call.kwargs["event_type"] for call in producer.publish.mock_calls} == {
+            "medication.stock_alert"
+        }
+
+    def test_per_medication_levels(self, patient, practitioner, producer):
+        medication = baker.make(
+            Medication,
+            stock_quantity=12,
+            reorder_level=10,
+            critical_level=3,
+            expiry_date=timezone.now().date() + timedelta(days=30),
+        )
+        self._dispense(medication, patient, practitioner, 3)
+        assert medication.stock_status == "LOW"
+        self._dispense(medication, patient, practitioner, 7)
+        assert medication.stock_status == "CRITICAL"
+
+    def test_rolled_back_dispensation_publishes_nothing(
+        self, patient, practitioner, producer, django_capture_on_commit_callbacks
+    ):
+        _lot(10, 30)
+        with django_capture_on_commit_callbacks(execute=True):
+            with pytest.raises(services.PharmacyError):
+                services.dispense_fefo(
+                    medication_name="Amoxicillin",
+                    patient_id=patient.id,
+                    practitioner_id=practitioner.id,
+                    quantity=31,
+                )
+        producer.publish.assert_not_called()
+
+    def test_low_stock_endpoint(self, auth_client, django_assert_num_queries):
+        critical = baker.make(Medication, stock_quantity=5, expiry_date="2030-01-01")
+        low = baker.make(Medication, stock_quantity=30, expiry_date="2030-01-01")
+        baker.make(Medication, stock_quantity=500, expiry_date="2030-01-01")
+        baker.make(
+            Medication, stock_quantity=1, is_active=False, expiry_date="2030-01-01"
+        )
+        url = "/api/v1/pharmacy/low-stock/"
+
+        with django_assert_num_queries(1):
+            medications = repositories.get_low_stock_medications()
+        assert medications == [critical, low]
+
+        response = auth_client.get(url)
+        assert response.status_code == 200
+        assert [(row["id"], row["stock_status"]) for row in response.data] == [
+            (critical.id, "CRITICAL"),
+            (low.id, "LOW"),
+        ]
+        response = auth_client.get(url, {"status": "low"})
+        assert [row["id"] for row in response.data] == [low.id]
+        assert auth_client.get(url, {"status": "gone"}).status_code == 400
+
+    def test_critical_level_cannot_exceed_reorder_level(self, auth_client):
+        data = {
+            "name": "Heparin",
+            "brand": "Generic",
+            "sku": "HEP-1",
+            "batch_number": "B1",
+            "expiry_date": "2030-01-01",
+            "stock_quantity": 10,
+            "critical_level": 60,
+        }
+        response = auth_client.post(
+            "/api/v1/pharmacy/medications/", data, format="json"
+        )
+        assert response.status_code == 400
+        assert "critical_level" in response.data
+
+
+class TestForecastProjection:
+    @pytest.fixture(autouse=True)
+    def forecast_settings(self, settings):
+        settings.PHARMACY_FORECAST_WINDOW_DAYS = 28
+        settings.PHARMACY_FORECAST_HORIZON_DAYS = 60
+        settings.PHARMACY_REORDER_LEAD_DAYS = 2
+
+    def test_weekday_factors(self):
+        monday = date(2026, 1, 5)
+        consumption = np.tile([7.0, 0, 0, 0, 0, 0, 0], 4)[None, :]
+
+        factors = forecasting.weekday_factors(
+            np.vstack([consumption, 0 * consumption]), monday
+        )
+
+        assert factors[0].tolist() == [7.0, 0, 0, 0, 0, 0, 0]
+        assert factors[1].tolist() == [1.0] * 7
+
+    def test_days_of_cover_and_reorder(self):
+        consumption = np.full((2, 28), 10.0)
+        consumption[1] = 0
+
+        projection = forecasting.project(
+            consumption,
+            date(2026, 1, 5),
+            stock=np.array([100.0, 100.0]),
+            reorder_level=np.array([50.0, 50.0]),
+            today=date(2026, 2, 2),
+        )
+
+        assert projection["daily_rate"].tolist() == [10.0, 0.0]
+        # 10 full days covered; below the reorder level on day 5, minus lead
+        assert projection["days_of_cover"].tolist() == [10, -1]
+        assert projection["days_to_reorder"].tolist() == [3, -1]
+
+    def test_empty_stock_is_out_today_without_demand(self):
+        projection = forecasting.project(
+            np.zeros((2, 28)),
+            date(2026, 1, 5),
+            stock=np.array([0.0, 20.0]),
+            reorder_level=np.array([10.0, 30.0]),
+            today=date(2026, 2, 2),
+        )
+
+        assert projection["days_of_cover"].tolist() == [0, -1]
+        assert projection["days_to_reorder"].tolist() == [0, 0]
+
+    def test_seasonality_shifts_stockout(self):
+        # Everything dispensed on Mondays, 70 a week
+        consumption = np.tile([70.0, 0, 0, 0, 0, 0, 0], 4)[None, :]
+        stock, level = np.array([100.0]), np.array([0.0])
+
+        from_monday = forecasting.project(
+            consumption, date(2026, 1, 5), stock, level, date(2026, 2, 2)
+        )
+        from_tuesday = forecasting.project(
+            consumption, date(2026, 1, 5), stock, level, date(2026, 2, 3)
+        )
+
+        assert from_monday["days_of_cover"].tolist() == [7]
+        assert from_tuesday["days_of_cover"].tolist() == [13]
+
+    def test_consumption_matrix(self):
+        start = date(2026, 1, 1)
+        rows = [(7, date(2026, 1, 3), 5), (3, date(2026, 1, 1), 2), (7, start, 1)]
+
+        ids, consumption = forecasting.consumption_matrix(rows, start, 4)
+
+        assert ids.tolist() == [3, 7]
+        assert consumption.tolist() == [[2, 0, 0, 0], [1, 0, 5, 0]]
+
+
+@pytest.mark.django_db
+class TestConsumptionForecast:
+    @pytest.fixture(autouse=True)
+    def forecast_settings(self, settings):
+        settings.PHARMACY_FORECAST_HISTORY_DAYS = 56
+        settings.PHARMACY_FORECAST_WINDOW_DAYS = 28
+        settings.PHARMACY_FORECAST_HORIZON_DAYS = 90
+        settings.PHARMACY_REORDER_LEAD_DAYS = 0
+        cache.delete(forecasting.FORECAST_CACHE_KEY)
+
+    def _history(self, medication, patient, practitioner, per_day, days=28):
+        dispensations = baker.make(
+            Dispensation,
+            medication=medication,
+            patient=patient,
+            practitioner=practitioner,
+            quantity=per_day,
+            _quantity=days,
+        )
+        now = timezone.now()
+        for age, dispensation in enumerate(dispensations, start=1):
+            Dispensation.objects.filter(pk=dispensation.pk).update(
+                dispensed_at=now - timedelta(days=age)
+            )
+
+    def test_forecast_orders_by_stockout(
+        self, patient, practitioner, django_assert_num_queries
+    ):
+        fast = _lot(300, 100, sku="FAST")
+        slow = _lot(300, 100, sku="SLOW")
+        idle = _lot(300, 100, sku="IDLE")
+        self._history(fast, patient, practitioner, 10)
+        self._history(slow, patient, practitioner, 2)
+
+        with django_assert_num_queries(2):
+            forecasts = forecasting.forecast_consumption()
+
+        assert [f.sku for f in forecasts] == ["FAST", "SLOW", "IDLE"]
+        fast_forecast = forecasts[0]
+        assert fast_forecast.daily_rate == 10.0
+        assert fast_forecast.days_of_cover == 10
+        assert fast_forecast.stockout_date == (
+            timezone.now().date() + timedelta(days=10)
+        )
+        assert fast_forecast.reorder_date == timezone.now().date() + timedelta(days=5)
+        assert forecasts[1].days_of_cover == 50
+        assert forecasts[2].medication_id == idle.id
+        assert forecasts[2].stockout_date is None
+
+    def test_api_and_nightly_task(self, auth_client, patient, practitioner):
+        self._history(_lot(300, 100, sku="FAST"), patient, practitioner, 10)
+        _lot(300, 100, sku="IDLE")
+
+        assert tasks.forecast_consumption() == {"medications": 2, "running_out": 1}
+
+        with patch.object(forecasting, "forecast_consumption") as recompute:
+            response = auth_client.get("/api/v1/pharmacy/forecast/")
+            recompute.assert_not_called()  # served from the stored forecast
+        assert response.status_code == 200
+        assert [m["sku"] for m in response.data["medications"]] == ["FAST", "IDLE"]
+
+        response = auth_client.get("/api/v1/pharmacy/forecast/?within_days=30")
+        assert [m["sku"] for m in response.data["medications"]] == ["FAST"]
+        assert response.data["medications"][0]["days_of_cover"] == 10
+        response = auth_client.get("/api/v1/pharmacy/forecast/?within_days=soon")
+        assert response.status_code == 400
+
+
+INTERACTIONS_CSV = """drug_a,drug_b,severity,description
+Warfarin,NSAID,MAJOR,Bleeding risk
+warfarin ,Aspirin,major,Bleeding risk
+Simvastatin,Clarithromycin,CONTRAINDICATED,Myopathy
+Lisinopril,Potassium,MODERATE,Hyperkalemia
+"""
+
+
+class TestInteractionIndex:
+    @pytest.fixture
+    def index(self):
+        return interactions.InteractionIndex(
+            [
+                ("Warfarin", "NSAID", "MAJOR", "Bleeding risk"),
+                ("Simvastatin", "Clarithromycin", "CONTRAINDICATED", "Myopathy"),
+                ("Lisinopril", "Potassium", "MODERATE", "Hyperkalemia"),
+            ]
+        )
+
+    def test_matches_by_name_and_class_both_ways(self, index):
+        [warning] = index.check(("Ibuprofen", "NSAID"), [("  WARFARIN ", "")])
+        assert (warning.medication, warning.matched, warning.interacts_with) == (
+            "  WARFARIN ",
+            "nsaid",
+            "warfarin",
+        )
+        [warning] = index.check(("Warfarin", ""), [("Naproxen", "nsaid")])
+        assert warning.severity == "MAJOR"
+
+    def test_most_severe_first_and_no_false_positives(self, index):
+        recent = [("Potassium", ""), ("Clarithromycin", "Macrolide"), ("Metformin", "")]
+        severities = [
+            w.severity
+            for w in index.check(("Simvastatin", ""), recent)
+            + index.check(("Lisinopril", ""), recent)
+        ]
+        assert severities == ["CONTRAINDICATED", "MODERATE"]
+        assert index.check(("Metformin", ""), recent) == []
+        assert len(index) == 3
+
+    def test_same_drug_is_not_an_interaction(self, index):
+        assert index.check(("Warfarin", "Anticoagulant"), [("Warfarin", "")]) == []
+
+    def test_same_class_pair(self, index):
+        index.add("NSAID", "nsaid", "MODERATE", "Duplicate NSAID therapy")
+
+        [warning] = index.check(("Ibuprofen", "NSAID"), [("Naproxen", "NSAID")])
+        assert (warning.matched, warning.interacts_with) == ("nsaid", "nsaid")
+        assert index.check(("Ibuprofen", "NSAID"), [("Ibuprofen", "NSAID")]) == []
+        assert len(index) == 4
+
+
+@pytest.mark.django_db
+class TestInteractionChecks:
+    @pytest.fixture(autouse=True)
+    def interaction_table(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            interactions.import_csv(io.StringIO(INTERACTIONS_CSV))
+        yield
+        interactions.invalidate_index()
+
+    def _dispense(self, name, patient, practitioner, drug_class=""):
+        medication = baker.make(
+            Medication,
+            name=name,
+            drug_class=drug_class,
+            stock_quantity=100,
+            expiry_date=timezone.now().date() + timedelta(days=365),
+        )
+        return services.dispense_medication(
+            medication_id=medication.id,
+            patient_id=patient.id,
+            practitioner_id=practitioner.id,
+            quantity=1,
+        )
+
+    def test_import_normalizes_and_merges_pairs(self):
+        assert list(
+            DrugInteraction.objects.values_list("drug_a", "drug_b", "severity")
+        ) == [
+            ("aspirin", "warfarin", "MAJOR"),
+            ("clarithromycin", "simvastatin", "CONTRAINDICATED"),
+            ("lisinopril", "potassium", "MODERATE"),
+            ("nsaid", "warfarin", "MAJOR"),
+        ]
+
+        csv_file = io.StringIO("drug_a,drug_b,severity\nAspirin,Warfarin,MODERATE\n")
+        assert interactions.import_csv(csv_file, replace=True) == 1
+        assert list(DrugInteraction.objects.values_list("severity", flat=True)) == [
+            "MODERATE"
+        ]
+
+    def test_import_allows_same_class_pairs(
+        self, patient, practitioner, django_capture_on_commit_callbacks
+    ):
+        csv_file = io.StringIO(
+            "drug_a,drug_b,severity,description\nNSAID,nsaid,MODERATE,Duplicate\n"
+        )
+        with django_capture_on_commit_callbacks(execute=True):
+            interactions.import_csv(csv_file)
+
+        assert DrugInteraction.objects.filter(drug_a="nsaid", drug_b="nsaid").exists()
+        self._dispense("Naproxen", patient, practitioner, "NSAID")
+        dispensation = self._dispense("Ibuprofen", patient, practitioner, "NSAID")
+        assert [w["severity"] for w in dispensation.interaction_warnings] == [
+            "MODERATE"
+        ]
+
+    def test_import_rejects_bad_rows(self):
+        with pytest.raises(ValueError, match="unknown severity"):
+            interactions.import_csv(io.StringIO("drug_a,drug_b,severity\na,b,BAD\n"))
+        with pytest.raises(ValueError, match="Missing CSV columns: severity"):
+            interactions.import_csv(io.StringIO("drug_a,drug_b\na,b\n"))
+
+    def test_dispensing_records_warnings(self, patient, practitioner):
+        self._dispense("Warfarin", patient, practitioner, "Anticoagulant")
+
+        dispensation = self._dispense("Ibuprofen", patient, practitioner, "NSAID")
+
+        assert dispensation.interaction_warnings == [
+            {
+                "medication": "Warfarin",
+                "matched": "nsaid",
+                "interacts_with": "warfarin",
+                "severity": "MAJOR",
+                "description": "Bleeding risk",
+            }
+        ]
+        dispensation.refresh_from_db()
+        assert dispensation.interaction_warnings[0]["severity"] == "MAJOR"
+
+    def test_only_recent_medications_of_this_patient(self, patient, practitioner):
+        old = self._dispense("Warfarin", patient, practitioner)
+        Dispensation.objects.filter(pk=old.pk).update(
+            dispensed_at=timezone.now() - timedelta(days=91)
+        )
+        self._dispense("Clarithromycin", baker.make(Patient), practitioner)
+
+        assert (
+            self._dispense("Aspirin", patient, practitioner).interaction_warnings == []
+        )
+        assert (
+            self._dispense("Simvastatin", patient, practitioner).interaction_warnings
+            == []
+        )
+
+    def test_recent_medications_in_one_query(
+        self, patient, practitioner, django_assert_num_queries
+    ):
+        for name in ("Warfarin", "Warfarin", "Potassium"):
+            self._dispense(name, patient, practitioner)
+        since = timezone.now() - timedelta(days=1)
+
+        with django_assert_num_queries(1):
+            recent = repositories.get_recent_medications(patient.id, since)
+        assert sorted(recent) == [("Potassium", ""), ("Warfarin", "")]
+
+    def test_index_reloads_when_interactions_change(
+        self, patient, practitioner, django_capture_on_commit_callbacks
+    ):
+        self._dispense("Metformin", patient, practitioner)
+        interactions.get_index()
+        with django_capture_on_commit_callbacks(execute=True):
+            DrugInteraction.objects.create(
+                drug_a="Metformin", drug_b="Iodinated Contrast", severity="MAJOR"
+            )
+
+        dispensation = self._dispense("Iodinated  contrast", patient, practitioner)
+        assert [w["medication"] for w in dispensation.interaction_warnings] == [
+            "Metformin"
+        ]
+
+    def test_api_returns_warnings(self, auth_client, patient, practitioner):
+        self._dispense("Lisinopril", patient, practitioner)
+        medication = baker.make(
+            Medication, name="Potassium", stock_quantity=10, expiry_date="2030-01-01"
+        )
+
+        response = auth_client.post(
+            "/api/v1/pharmacy/dispensations/",
+            {
+                "medication_id": medication.id,
+                "patient_id": patient.id,
+                "practitioner_id": practitioner.id,
+                "quantity": 1,
+            },
+            format="json",
+        )
+
+        assert response.status_code == 201
+        assert response.data["interaction_warnings"][0]["severity"] == "MODERATE"
+
+    def test_import_command(self, tmp_path):
+        path = tmp_path / "interactions.csv"
+        path.write_text(INTERACTIONS_CSV)
+        out = io.StringIO()
+
+        call_command("import_drug_interactions", str(path), "--replace", stdout=out)
+
+        assert "Imported 4 drug interactions" in out.getvalue()
+        with pytest.raises(CommandError):
+            call_command("import_drug_interactions", str(tmp_path / "missing.csv"))
+
+
+class TestMedicationSearchIndex:
+    @pytest.fixture
+    def index(self):
+        return search.MedicationSearchIndex(
+            [
+                (1, "Amoxicillin", "Amoxil", "AMX-500"),
+                (2, "Amoxicillin Clavulanate", "Augmentin", "AUG-875"),
+                (3, "Ibuprofen", "Advil", "IBU-200"),
+                (4, "Acetaminophen", "Tylenol", "APAP-500"),
+            ]
+        )
+
+    def test_prefix_ranking(self, index):
+        results = index.search("amox")
+        assert [r.id for r in results] == [1, 2]
+        assert results[0].score >= search.NAME_PREFIX_SCORE
+
+        # Brand and SKU prefixes; a prefix match needs every word
+        assert [r.id for r in index.search("tyl")] == [4]
+        assert [r.id for r in index.search("ibu-2")] == [3]
+        both, similar = index.search("amox clav")
+        assert (both.id, similar.id) == (2, 1)
+        assert similar.score < search.WORD_PREFIX_SCORE
+
+    def test_misspelling_found_by_trigrams(self, index):
+        [result] = index.search("ibuprofin")
+        assert result.id == 3
+        assert result.score < search.WORD_PREFIX_SCORE
+        assert index.search("zzz") == []
+
+    def test_incremental_updates(self, index):
+        index.upsert(3, "Ibuprofen Lysine", "NeoProfen", "IBU-LYS")
+        index.remove(1)
+
+        assert [r.id for r in index.search("neopro")] == [3]
+        assert [r.id for r in index.search("advil")] == []
+        assert [r.id for r in index.search("amox")] == [2]
+        assert len(index) == 3
+
+    def test_limit(self, index):
+        assert len(index.search("a", limit=2)) == 2
+
+
+@pytest.mark.django_db
+class TestMedicationSearch:
+    @pytest.fixture(autouse=True)
+    def fresh_index(self):
+        search.reset_index()
+        yield
+        search.reset_index()
+
+    def test_signals_update_built_index(self, django_capture_on_commit_callbacks):
+        medication = _lot(100, 10)
+        assert [r.id for r in search.search_medications("amoxi")] == [medication.id]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            renamed = _lot(100, 10, sku="CEF-1")
+            renamed.name = "Cefalexin"
+            renamed.save()
+            medication.soft_delete()
+
+        assert search.search_medications("amoxi") == []
+        assert [r.id for r in search.search_medications("cefa")] == [renamed.id]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_rebuilds_in_background_when_due(self, settings):
+        settings.MEDICATION_SEARCH_REBUILD_SECONDS = 0
+        medication = _lot(100, 10)
+        assert search.search_medications("cefa") == []  # Built on first use
+        # A queryset update sends no signal: only a rebuild sees it
+        Medication.objects.filter(id=medication.id).update(name="Cefalexin")
+
+        # The old index answers while the new one is built
+        assert search.search_medications("cefa") == []
+        with search._rebuild_lock:
+            pass
+        settings.MEDICATION_SEARCH_REBUILD_SECONDS = 600
+
+        assert [r.id for r in search.search_medications("cefa")] == [medication.id]
+
+    def test_changes_during_rebuild_are_kept(self, monkeypatch):
+        medication = _lot(100, 10)
+        build = search.MedicationSearchIndex
+
+        def build_while_renamed(rows):
+            index = build(rows)
+            medication.name = "Cefalexin"
+            search._apply(medication.id, medication)  # Committed meanwhile
+            return index
+
+        monkeypatch.setattr(search, "MedicationSearchIndex", build_while_renamed)
+
+        assert search.search_medications("amoxi") == []
+        assert [r.id for r in search.search_medications("cefa")] == [medication.id]
+
+    @pytest.mark.postgres
+    @pytest.mark.skipif(
+        connection.vendor != "postgresql", reason="pg_trgm search backend"
+    )
+    def test_postgres_backend_ranks_like_index(self):
+        amoxicillin = _lot(100, 10, sku="AMX-500")
+        combination = _lot(100, 10, sku="AUG-875")
+        Medication.objects.filter(id=combination.id).update(
+            name="Amoxicillin Clavulanate", brand="Augmentin"
+        )
+
+        both = search.search_postgres("amox clav")[0]
+        assert both.id == combination.id
+        assert search.WORD_PREFIX_SCORE <= both.score < search.NAME_PREFIX_SCORE
+        assert [r.id for r in search.search_postgres("aug")] == [combination.id]
+        # Too short for trigrams: found by its word prefix
+        assert {r.id for r in search.search_postgres("a")} == {
+            amoxicillin.id,
+            combination.id,
+        }
+
+    def test_typeahead_endpoint(self, auth_client):
+        medication = _lot(100, 10, brand="Amoxil")
+        url = "/api/v1/pharmacy/medications/search/"
+
+        response = auth_client.get(url, {"q": "amoxil"})
+
+        assert response.status_code == 200
+        assert response.data[0]["id"] == medication.id
+        assert response.data[0]["sku"] == medication.sku
+        assert auth_client.get(url, {"q": "amo", "limit": 0}).status_code == 400
+
+
+class FakeDrugClient:
+    """Answers drug information queries and records them."""
+
+    model_name = "test-model"
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.queries = []
+
+    def is_configured(self):
+        return True
+
+    def generate_response(self, user_query, context="", system_prompt=""):
+        self.queries.append(user_query)
+        name = user_query.rsplit(": ", 1)[-1]
+        if name in self.fail:
+            raise AIServiceUnavailableError("503 overloaded")
+        return f"Information about {name}"
+
+    def stream_response(self, user_query, context="", system_prompt=""):
+        return iter([self.generate_response(user_query, context, system_prompt)])
+
+
+@pytest.fixture
+def drug_client():
+    cache.clear()
+    client = FakeDrugClient()
+    with patch.object(ai_service, "get_ai_client", return_value=client):
+        yield client
+    cache.clear()
+
+
+@pytest.fixture
+def formulary():
+    for name in ("Metformin", "metformin", "Warfarin"):
+        baker.make(Medication, name=name, expiry_date=timezone.now().date())
+    baker.make(Medication, name="Retired", is_active=False, expiry_date="2030-01-01")
+
+
+@pytest.mark.django_db
+class TestDrugInfoPrewarm:
+    def test_prewarm_generates_each_formulary_name_once(self, drug_client, formulary):
+        report = ai_service.prewarm_drug_information()
+
+        assert (report.refreshed, report.fresh, report.failed) == (2, 0, 0)
+        assert sorted(drug_client.queries) == [
+            "Provide comprehensive drug information for: Metformin",
+            "Provide comprehensive drug information for: Warfarin",
+        ]
+        entry = ai_service.get_formulary_entry("METFORMIN ")
+        assert entry["information"] == "Information about Metformin"
+        assert entry["model_used"] == "test-model"
+
+    def test_second_run_skips_fresh_entries(self, drug_client, formulary):
+        ai_service.prewarm_drug_information()
+        drug_client.queries.clear()
+
+        report = ai_service.prewarm_drug_information()
+
+        assert (report.refreshed, report.fresh) == (0, 2)
+        assert drug_client.queries == []
+
+    def test_entries_near_expiry_are_refreshed(self, drug_client, formulary, settings):
+        ai_service.prewarm_drug_information()
+        drug_client.queries.clear()
+        settings.DRUG_INFO_REFRESH_BEFORE_SECONDS = settings.DRUG_INFO_CACHE_TTL_SECONDS
+
+        report = ai_service.prewarm_drug_information()
+
+        assert report.refreshed == 2
+        assert len(drug_client.queries) == 2
+
+    def test_failures_and_run_limit(self, drug_client, formulary, settings):
+        settings.DRUG_INFO_PREWARM_MAX_PER_RUN = 1
+        drug_client.fail = {"Metformin"}
+
+        report = ai_service.prewarm_drug_information()
+
+        assert (report.refreshed, report.failed, report.deferred) == (0, 1, 1)
+        assert ai_service.get_formulary_entry("Metformin") is None
+
+    def test_task_reports_counts(self, drug_client, formulary):
+        assert tasks.prewarm_drug_information() == {
+            "refreshed": 2,
+            "fresh": 0,
+            "failed": 0,
+            "deferred": 0,
+        }
+
+
+@pytest.mark.django_db
+class TestFormularyLookups:
+    def test_formulary_drug_served_from_cache(self, drug_client, formulary):
+        ai_service.prewarm_drug_information()
+        drug_client.queries.clear()
+
+        result = ai_service.get_drug_information("Warfarin")
+
+        assert result.success
+        assert result.information == "Information about Warfarin"
+        assert result.generated_at is not None
+        assert drug_client.queries == []
+
+    def test_live_formulary_answer_is_stored(self, drug_client, formulary):
+        first = ai_service.get_drug_information("Warfarin")
+        second = ai_service.get_drug_information("Warfarin")
+
+        assert len(drug_client.queries) == 1
+        assert second.generated_at == first.generated_at
+
+    def test_non_formulary_and_patient_context_go_live(self, drug_client, formulary):
+        ai_service.prewarm_drug_information()
+        drug_client.queries.clear()
+
+        other = ai_service.get_drug_information("Ibuprofen")
+        ai_service.get_drug_information("Ibuprofen")
+        tailored = ai_service.get_drug_information("Warfarin", "Pregnant")
+
+        assert other.generated_at is None
+        assert tailored.generated_at is None
+        assert len(drug_client.queries) == 3
+
+    def test_api_returns_generated_at(self, drug_client, formulary, auth_client):
+        ai_service.prewarm_drug_information()
+
+        response = auth_client.post(
+            "/api/v1/pharmacy/ai/drug-info/",
+            {"medication_name": "Metformin"},
+            format="json",
+        )
+
+        assert response.status_code == 200
+        assert response.json()["generated_at"]
+        assert response.json()["information"] == "Information about Metformin"
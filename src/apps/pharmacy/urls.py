@@ -1,7 +1,13 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import DispensationViewSet, MedicationViewSet, drug_info_view
+from .views import (
+    DispensationViewSet,
+    MedicationViewSet,
+    consumption_forecast_view,
+    drug_info_view,
+    low_stock_view,
+)
 
 app_name = "pharmacy"
 router = DefaultRouter()
@@ -10,5 +16,7 @@ router.register(r"dispensations", DispensationViewSet, basename="dispensation")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("low-stock/", low_stock_view, name="low-stock"),
+    path("forecast/", consumption_forecast_view, name="consumption-forecast"),
     path("ai/drug-info/", drug_info_view, name="ai-drug-info"),
 ]
@@ -4,19 +4,33 @@ API Views for Pharmacy.
 
 from typing import Any
 
-from drf_spectacular.utils import extend_schema
+from django.http import HttpResponseBase
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import permissions, status, viewsets
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import (
+    action,
+    api_view,
+    permission_classes,
+    renderer_classes,
+)
 from rest_framework.request import Request
 from rest_framework.response import Response
 
+from src.apps.core import ai_jobs, sse
+from src.apps.core.ai_client import AIClientError
 from src.apps.core.permissions import IsMedicalStaff
 
-from . import ai_service, services
+from . import ai_service, forecasting, repositories, services
 from .models import Dispensation, Medication
+from .search import search_medications
 from .serializers import (
+    ConsumptionForecastSerializer,
     CreateDispensationSerializer,
     DispensationSerializer,
+    FefoDispensationSerializer,
+    LotDispensationSerializer,
+    LowStockSerializer,
+    MedicationSearchResultSerializer,
     MedicationSerializer,
 )
 
@@ -32,6 +46,25 @@ class MedicationViewSet(viewsets.ModelViewSet[Medication]):
             return [IsMedicalStaff()]
         return list(super().get_permissions())
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("q", str, required=True, description="Typed text"),
+            OpenApiParameter("limit", int, description="At most 50 (default 10)"),
+        ],
+        responses=MedicationSearchResultSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"])
+    def search(self, request: Request) -> Response:
+        """Typeahead: active medications ranked by name, brand and SKU match."""
+        limit = request.query_params.get("limit", "10")
+        if not limit.isdigit() or not 1 <= int(limit) <= 50:
+            return Response(
+                {"detail": "limit must be between 1 and 50."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        results = search_medications(request.query_params.get("q", ""), int(limit))
+        return Response(MedicationSearchResultSerializer(results, many=True).data)
+
 
 @extend_schema(tags=["Pharmacy"])
 class DispensationViewSet(viewsets.ModelViewSet[Dispensation]):
@@ -54,6 +87,90 @@ class DispensationViewSet(viewsets.ModelViewSet[Dispensation]):
         except services.PharmacyError as e:
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(
+        request=FefoDispensationSerializer,
+        responses={201: LotDispensationSerializer(many=True)},
+    )
+    @action(detail=False, methods=["post"])
+    def fefo(self, request: Request) -> Response:
+        """Dispense a drug by name across its lots, first expiry first out."""
+        serializer = FefoDispensationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            dispensations = services.dispense_fefo(**serializer.validated_data)
+        except services.PharmacyError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            LotDispensationSerializer(dispensations, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+
+@extend_schema(
+    tags=["Pharmacy"],
+    parameters=[
+        OpenApiParameter(
+            "status", str, enum=["LOW", "CRITICAL"], description="Only this level"
+        )
+    ],
+    responses=LowStockSerializer(many=True),
+)
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def low_stock_view(request: Request) -> Response:
+    """
+    Active medications below their reorder level, lowest stock first.
+    """
+    stock_status = request.query_params.get("status", "").upper()
+    if stock_status not in ("", "LOW", "CRITICAL"):
+        return Response(
+            {"detail": "status must be LOW or CRITICAL."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    medications = repositories.get_low_stock_medications(stock_status)
+    return Response(LowStockSerializer(medications, many=True).data)
+
+
+@extend_schema(
+    tags=["Pharmacy"],
+    parameters=[
+        OpenApiParameter(
+            "within_days",
+            int,
+            description="Only medications projected to run out within this many days",
+        )
+    ],
+    responses=ConsumptionForecastSerializer,
+)
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def consumption_forecast_view(request: Request) -> Response:
+    """
+    Projected days of cover, stock-out and reorder dates, soonest first.
+
+    Served from the nightly forecast.
+    """
+    within_days = request.query_params.get("within_days")
+    forecast = forecasting.get_forecast()
+    medications = forecast["medications"]
+    if within_days is not None:
+        if not within_days.isdigit():
+            return Response(
+                {"detail": "within_days must be a non-negative integer."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        medications = [
+            m
+            for m in medications
+            if m["days_of_cover"] is not None and m["days_of_cover"] <= int(within_days)
+        ]
+    return Response(
+        ConsumptionForecastSerializer(
+            {"generated_at": forecast["generated_at"], "medications": medications}
+        ).data
+    )
+
 
 @extend_schema(
     tags=["Pharmacy AI"],
@@ -70,18 +187,24 @@ class DispensationViewSet(viewsets.ModelViewSet[Dispensation]):
             "required": ["medication_name"],
         }
     },
-    responses={200: {"description": "Drug information response"}},
+    responses={
+        200: {"description": "Drug information response"},
+        202: {"description": "Job accepted (Prefer: respond-async)"},
+    },
 )
 @api_view(["POST"])
 @permission_classes([IsMedicalStaff])
-def drug_info_view(request: Request) -> Response:
+@renderer_classes(sse.AI_RENDERER_CLASSES)
+def drug_info_view(request: Request) -> HttpResponseBase:
     """
     AI-powered drug information assistant.
 
     Provides comprehensive drug information including interactions,
     dosages, side effects, and contraindications.
 
-    Requires IsMedicalStaff permission.
+    Requires IsMedicalStaff permission. Send ``Prefer: respond-async`` to
+    get 202 with a job id instead of waiting for the AI provider, or
+    ``Accept: text/event-stream`` to stream the answer as it is generated.
     """
     medication_name = request.data.get("medication_name")
     patient_context = request.data.get("patient_context", "")
@@ -92,6 +215,27 @@ def drug_info_view(request: Request) -> Response:
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    if ai_jobs.wants_async(request):
+        return ai_jobs.accepted_response(
+            request,
+            "drug_info",
+            {"medication_name": medication_name, "patient_context": patient_context},
+        )
+
+    if sse.wants_stream(request):
+        try:
+            chunks, model_used = ai_service.stream_drug_information(
+                medication_name=medication_name,
+                patient_context=patient_context,
+            )
+        except AIClientError as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        return sse.stream_response(
+            chunks, {"medication_name": medication_name, "model_used": model_used}
+        )
+
     result = ai_service.get_drug_information(
         medication_name=medication_name,
         patient_context=patient_context,
@@ -108,6 +252,7 @@ def drug_info_view(request: Request) -> Response:
             "medication_name": result.medication_name,
             "information": result.information,
             "model_used": result.model_used,
+            "generated_at": result.generated_at,
         },
         status=status.HTTP_200_OK,
     )
@@ -2,8 +2,18 @@
 Service layer for the Results & Imaging bounded context.
 """
 
+from collections.abc import Iterator
+from typing import Any
+
 from django.db import transaction
 
+from src.apps.core import ai_cache
+from src.apps.core.ai_client import (
+    AIConfigurationError,
+    AIServiceUnavailableError,
+    get_ai_client,
+)
+from src.apps.core.ai_jobs import AIJobError
 from src.apps.patients.repositories import get_patient_by_id
 from src.apps.practitioners.repositories import get_practitioner_by_id
 
@@ -48,3 +58,40 @@ def create_diagnostic_report(
 
     report = repositories.create_report(**report_data)
     return report
+
+
+def lifestyle_advice_job(params: dict[str, Any]) -> dict[str, Any]:
+    """
+    Async job handler generating lifestyle advice (see core.ai_jobs).
+    Access to the report is checked by the view before the job is queued.
+    """
+    client = get_ai_client()
+    if not client.is_configured():
+        raise AIJobError("AI service is not configured.")
+    try:
+        with ai_cache.use_case("report_advice"):
+            advice = client.generate_lifestyle_advice(
+                diagnostic_report_text=params["diagnostic_report_text"],
+                patient_context=params.get("patient_context", ""),
+            )
+    except AIServiceUnavailableError as e:
+        raise AIJobError(str(e)) from None
+    return {"advice": advice, "model_used": client.model_name}
+
+
+def stream_lifestyle_advice(
+    diagnostic_report_text: str, patient_context: str = ""
+) -> tuple[Iterator[str], str]:
+    """
+    Stream AI lifestyle advice; completed streams populate the advice cache.
+    Returns (text chunk iterator, model name).
+    """
+    client = get_ai_client()
+    if not client.is_configured():
+        raise AIConfigurationError("AI service is not configured.")
+    with ai_cache.use_case("report_advice"):
+        chunks = client.stream_lifestyle_advice(
+            diagnostic_report_text=diagnostic_report_text,
+            patient_context=patient_context,
+        )
+    return chunks, client.model_name
@@ -5,13 +5,19 @@ API Views for the Results & Imaging bounded context.
 from typing import Any
 
 from django.db import models
+from django.http import HttpResponseBase
 from drf_spectacular.utils import extend_schema
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from src.apps.core.ai_client import AIServiceUnavailableError, get_ai_client
+from src.apps.core import ai_cache, ai_jobs, sse
+from src.apps.core.ai_client import (
+    AIClientError,
+    AIServiceUnavailableError,
+    get_ai_client,
+)
 from src.apps.core.permissions import IsMedicalStaff
 
 from . import services
@@ -107,10 +113,17 @@ class DiagnosticReportViewSet(viewsets.ModelViewSet[DiagnosticReport]):
     @extend_schema(
         summary="Get AI Lifestyle Advice",
         description="Generates lifestyle and diet suggestions based on the diagnostic report using AI.",
-        responses={200: LifestyleAdviceSerializer},
+        responses={200: LifestyleAdviceSerializer, 202: None},
+    )
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="lifestyle-advice",
+        renderer_classes=sse.AI_RENDERER_CLASSES,
     )
-    @action(detail=True, methods=["post"], url_path="lifestyle-advice")
-    def lifestyle_advice(self, request: Any, pk: int | str | None = None) -> Response:
+    def lifestyle_advice(
+        self, request: Any, pk: int | str | None = None
+    ) -> HttpResponseBase:
         """Generate AI lifestyle advice for a specific report."""
         report = self.get_object()
 
@@ -134,6 +147,22 @@ class DiagnosticReportViewSet(viewsets.ModelViewSet[DiagnosticReport]):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
+        # Prepare context
+        patient = report.patient
+        patient_context = f"{patient.sex}, born {patient.birth_date}."
+
+        if ai_jobs.wants_async(request):
+            return ai_jobs.accepted_response(
+                request,
+                "lifestyle_advice",
+                {
+                    "diagnostic_report_text": report.conclusion,
+                    "patient_context": patient_context,
+                },
+            )
+        if sse.wants_stream(request):
+            return self._stream_advice(report.conclusion, patient_context)
+
         try:
             client = get_ai_client()
             if not client.is_configured():
@@ -142,15 +171,12 @@ class DiagnosticReportViewSet(viewsets.ModelViewSet[DiagnosticReport]):
                     status=status.HTTP_503_SERVICE_UNAVAILABLE,
                 )
 
-            # Prepare context
-            patient = report.patient
-            patient_context = f"{patient.sex}, born {patient.birth_date}."
-
-            # Generate advice
-            advice = client.generate_lifestyle_advice(
-                diagnostic_report_text=report.conclusion,
-                patient_context=patient_context,
-            )
+            # Generate advice (re-opening a report reuses the cached answer)
+            with ai_cache.use_case("report_advice"):
+                advice = client.generate_lifestyle_advice(
+                    diagnostic_report_text=report.conclusion,
+                    patient_context=patient_context,
+                )
 
             return Response({"advice": advice, "model_used": client.model_name})
 
@@ -168,10 +194,15 @@ class DiagnosticReportViewSet(viewsets.ModelViewSet[DiagnosticReport]):
         summary="Analyze Diagnosis (Ad-Hoc)",
         description="Generates lifestyle advice based on a manually entered diagnosis.",
         request={"application/json": {"diagnosis": "string"}},
-        responses={200: LifestyleAdviceSerializer},
+        responses={200: LifestyleAdviceSerializer, 202: None},
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="analyze-diagnosis",
+        renderer_classes=sse.AI_RENDERER_CLASSES,
     )
-    @action(detail=False, methods=["post"], url_path="analyze-diagnosis")
-    def analyze_diagnosis(self, request: Any) -> Response:
+    def analyze_diagnosis(self, request: Any) -> HttpResponseBase:
         """Generate advice for a manually entered diagnosis."""
         # Strict typing: cast to string
         diagnosis = str(request.data.get("diagnosis", "")).strip()
@@ -180,6 +211,25 @@ class DiagnosticReportViewSet(viewsets.ModelViewSet[DiagnosticReport]):
                 {"detail": "Diagnosis is required."}, status=status.HTTP_400_BAD_REQUEST
             )
 
+        # Prepare context
+        patient_context = ""
+        if hasattr(request.user, "patient_profile"):
+            # Use getattr to satisfy mypy since 'patient_profile' is dynamically added by OneToOneField
+            p = request.user.patient_profile
+            patient_context = f"{p.sex}, born {p.birth_date}."
+
+        if ai_jobs.wants_async(request):
+            return ai_jobs.accepted_response(
+                request,
+                "lifestyle_advice",
+                {
+                    "diagnostic_report_text": diagnosis,
+                    "patient_context": patient_context,
+                },
+            )
+        if sse.wants_stream(request):
+            return self._stream_advice(diagnosis, patient_context)
+
         try:
             client = get_ai_client()
             if not client.is_configured():
@@ -188,17 +238,11 @@ class DiagnosticReportViewSet(viewsets.ModelViewSet[DiagnosticReport]):
                     status=status.HTTP_503_SERVICE_UNAVAILABLE,
                 )
 
-            # Prepare context
-            patient_context = ""
-            if hasattr(request.user, "patient_profile"):
-                # Use getattr to satisfy mypy since 'patient_profile' is dynamically added by OneToOneField
-                p = request.user.patient_profile
-                patient_context = f"{p.sex}, born {p.birth_date}."
-
             # Generate advice
-            advice = client.generate_lifestyle_advice(
-                diagnostic_report_text=diagnosis, patient_context=patient_context
-            )
+            with ai_cache.use_case("report_advice"):
+                advice = client.generate_lifestyle_advice(
+                    diagnostic_report_text=diagnosis, patient_context=patient_context
+                )
 
             return Response({"advice": advice, "model_used": client.model_name})
 
@@ -211,3 +255,17 @@ class DiagnosticReportViewSet(viewsets.ModelViewSet[DiagnosticReport]):
                 {"detail": "An unexpected error occurred."},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+    def _stream_advice(
+        self, report_text: str, patient_context: str
+    ) -> HttpResponseBase:
+        """Stream lifestyle advice as Server-Sent Events."""
+        try:
+            chunks, model_used = services.stream_lifestyle_advice(
+                report_text, patient_context
+            )
+        except AIClientError as e:
+            return Response(
+                {"detail": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        return sse.stream_response(chunks, {"model_used": model_used})
@@ -87,6 +87,15 @@ def admin_api_client(api_client, admin_user):
     return api_client
 
 
+@pytest.fixture(autouse=True)
+def clear_user_caches():
+    """Drop per-process user and role caches; user ids are reused across tests."""
+    from src.apps.core import authentication, metrics
+
+    authentication.clear_user_cache()
+    metrics.role_resolver.clear()
+
+
 @pytest.fixture(autouse=True)
 def enable_db_access_for_all_tests(db):
     """Enable database access for all tests by default."""
@@ -1,6 +1,7 @@
 import os
 
 from celery import Celery
+from celery.signals import worker_process_shutdown
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "healthcoreapi.settings.development")
 
@@ -9,3 +10,13 @@ app = Celery("healthcoreapi")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 
 app.autodiscover_tasks()
+
+
+def _flush_log_queues(**kwargs: object) -> None:
+    """Flush queued log records: pool processes exit without atexit hooks."""
+    from src.apps.core.logging import stop_listeners
+
+    stop_listeners()
+
+
+worker_process_shutdown.connect(_flush_log_queues, weak=False)
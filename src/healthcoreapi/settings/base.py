@@ -21,6 +21,7 @@ from pathlib import Path  # noqa: E402
 from typing import Any  # noqa: E402
 
 import dj_database_url  # noqa: E402
+from celery.schedules import crontab  # noqa: E402
 from decouple import Csv, config  # noqa: E402
 
 # Imports for optional features
@@ -58,6 +59,7 @@ DJANGO_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",  # pg_trgm lookups (medication search)
 ]
 
 THIRD_PARTY_APPS = [
@@ -103,6 +105,9 @@ INSTALLED_APPS += ["django_prometheus"]
 
 MIDDLEWARE = [
     "django_prometheus.middleware.PrometheusBeforeMiddleware",
+    "src.apps.core.middleware.RouteMetricsMiddleware",
+    "src.apps.core.middleware.TracingMiddleware",
+    "src.apps.core.middleware.ConcurrencyLimitMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -313,6 +318,24 @@ CELERY_BEAT_SCHEDULE: dict[str, Any] = {
         "schedule": timedelta(days=7),  # Weekly
         "options": {"expires": 7200},  # Task expires after 2 hours
     },
+    # Nightly drug information pre-warm for the formulary at 02:00 UTC
+    "prewarm-drug-information": {
+        "task": "src.apps.pharmacy.tasks.prewarm_drug_information",
+        "schedule": crontab(hour=2, minute=0),
+        "options": {"expires": 4 * 3600},
+    },
+    # Nightly medication consumption forecast at 03:00 UTC
+    "forecast-medication-consumption": {
+        "task": "src.apps.pharmacy.tasks.forecast_consumption",
+        "schedule": crontab(hour=3, minute=0),
+        "options": {"expires": 4 * 3600},
+    },
+    # Nightly equipment utilization rollups at 02:30 UTC
+    "rollup-equipment-utilization": {
+        "task": "src.apps.equipment.tasks.rollup_utilization",
+        "schedule": crontab(hour=2, minute=30),
+        "options": {"expires": 4 * 3600},
+    },
 }
 
 # KAFKA CONFIGURATION
@@ -321,6 +344,22 @@ KAFKA_BOOTSTRAP_SERVERS = config("KAFKA_BOOTSTRAP_SERVERS", default="kafka:9092"
 KAFKA_ENABLED = config("KAFKA_ENABLED", default=True, cast=bool)
 KAFKA_TOPIC_PREFIX = config("KAFKA_TOPIC_PREFIX", default="healthcore")
 
+# TRACING (OpenTelemetry)
+# ------------------------------------------------------------------------------
+# Spans cover requests, ORM queries, Kafka, gRPC, Celery and AI calls. Context
+# travels in HTTP/Kafka/Celery headers and gRPC metadata (W3C traceparent).
+OTEL_TRACING_ENABLED = config("OTEL_TRACING_ENABLED", default=False, cast=bool)
+OTEL_SERVICE_NAME = config("OTEL_SERVICE_NAME", default="healthcoreapi")
+# "otlp" (HTTP collector), "file" (JSON lines), "console" or "none"
+OTEL_TRACES_EXPORTER = config("OTEL_TRACES_EXPORTER", default="otlp")
+OTEL_EXPORTER_OTLP_ENDPOINT = config(
+    "OTEL_EXPORTER_OTLP_ENDPOINT", default="http://otel-collector:4318/v1/traces"
+)
+OTEL_TRACES_FILE = config("OTEL_TRACES_FILE", default="logs/traces.jsonl")
+# Fraction of new traces sampled; downstream services follow the parent decision
+OTEL_TRACES_SAMPLER_RATIO = config("OTEL_TRACES_SAMPLER_RATIO", default=0.1, cast=float)
+OTEL_TRACE_DB_QUERIES = config("OTEL_TRACE_DB_QUERIES", default=True, cast=bool)
+
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 
 CELERY_TASK_ALWAYS_EAGER = config("CELERY_TASK_ALWAYS_EAGER", default=DEBUG, cast=bool)
@@ -350,13 +389,22 @@ if not DEBUG:
     SECURE_REFERRER_POLICY = "strict-origin-when-cross-origin"
 
 # ------------------------------------------------------------------------------
+# Request threads only enqueue log records; a QueueListener thread formats them
+# (orjson) and performs the I/O. Disable to log synchronously from each thread.
+LOG_QUEUE_ENABLED = config("LOG_QUEUE_ENABLED", default=True, cast=bool)
+LOG_QUEUE_SIZE = config("LOG_QUEUE_SIZE", default=10000, cast=int)
+# Fraction of successful (< 400) requests logged by RequestLoggingMiddleware.
+# 4xx/5xx responses are always logged.
+REQUEST_LOG_SAMPLE_RATE = config("REQUEST_LOG_SAMPLE_RATE", default=1.0, cast=float)
+
+LOG_HANDLER = "queue" if LOG_QUEUE_ENABLED else "console"
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
     "formatters": {
         "json": {
-            "()": "pythonjsonlogger.json.JsonFormatter",
-            "format": "%(asctime)s %(name)s %(levelname)s %(module)s %(funcName)s %(lineno)d %(process)d %(thread)d %(message)s",
+            "()": "src.apps.core.logging.OrjsonFormatter",
         },
         "verbose": {
             "format": "{levelname} {asctime} {name} {module} {funcName} {lineno} {process:d} {thread:d} [correlation_id={correlation_id}] {message}",
@@ -375,45 +423,166 @@ LOGGING = {
             "formatter": "json" if not DEBUG else "verbose",
             "filters": ["correlation_id"],
         },
+        # Configured after "console" (dictConfig sorts handler names)
+        "queue": {
+            "()": "src.apps.core.logging.QueueListenerHandler",
+            "handlers": ["cfg://handlers.console"],
+            "queue_size": LOG_QUEUE_SIZE,
+            "filters": ["correlation_id"],
+        },
     },
     "root": {
         "level": "INFO",
-        "handlers": ["console"],
+        "handlers": [LOG_HANDLER],
     },
     "loggers": {
         "django": {
-            "handlers": ["console"],
+            "handlers": [LOG_HANDLER],
             "level": "INFO",
             "propagate": False,
         },
         "django.security": {
-            "handlers": ["console"],
+            "handlers": [LOG_HANDLER],
             "level": "WARNING",
             "propagate": False,
         },
         "django.request": {
-            "handlers": ["console"],
+            "handlers": [LOG_HANDLER],
             "level": "ERROR",
             "propagate": False,
         },
         "django.db.backends": {
             "level": "ERROR",
-            "handlers": ["console"],
+            "handlers": [LOG_HANDLER],
             "propagate": False,
         },
         "celery": {
-            "handlers": ["console"],
+            "handlers": [LOG_HANDLER],
             "level": "INFO",
             "propagate": False,
         },
         "src": {  # Your local apps
-            "handlers": ["console"],
+            "handlers": [LOG_HANDLER],
             "level": "DEBUG" if DEBUG else "INFO",
             "propagate": False,
         },
     },
 }
 
+if not LOG_QUEUE_ENABLED:
+    del LOGGING["handlers"]["queue"]  # type: ignore[attr-defined]
+
+# ------------------------------------------------------------------------------
+# Adaptive concurrency limit (per worker process) enforced by
+# ConcurrencyLimitMiddleware. The limit moves between MIN and MAX with AIMD on
+# observed latency; requests over their class share queue briefly, then get 503.
+CONCURRENCY_LIMIT_ENABLED = config("CONCURRENCY_LIMIT_ENABLED", default=True, cast=bool)
+# Start at the Gunicorn thread count: a worker cannot run more requests at once
+CONCURRENCY_LIMIT_INITIAL = config(
+    "CONCURRENCY_LIMIT_INITIAL",
+    default=config("GUNICORN_THREADS", default=8, cast=int),
+    cast=int,
+)
+CONCURRENCY_LIMIT_MIN = config("CONCURRENCY_LIMIT_MIN", default=2, cast=int)
+CONCURRENCY_LIMIT_MAX = config("CONCURRENCY_LIMIT_MAX", default=200, cast=int)
+CONCURRENCY_LIMIT_BACKOFF = 0.9
+# A sample slower than TOLERANCE x the recent minimum latency (and above the
+# floor) counts as congestion.
+CONCURRENCY_LATENCY_TOLERANCE = 2.0
+CONCURRENCY_LATENCY_FLOOR_MS = 50
+CONCURRENCY_MAX_QUEUE = config("CONCURRENCY_MAX_QUEUE", default=50, cast=int)
+CONCURRENCY_PRIORITIES = {
+    "critical": {"share": 1.0, "queue_timeout_ms": 2000, "retry_after": 1},
+    "normal": {"share": 0.8, "queue_timeout_ms": 250, "retry_after": 2},
+    "low": {"share": 0.4, "queue_timeout_ms": 0, "retry_after": 10},
+}
+# First matching rule wins; unmatched requests are "normal"
+CONCURRENCY_PRIORITY_ROUTES: list[dict[str, Any]] = [
+    {
+        "prefix": "/api/v1/scheduling/appointments/",
+        "methods": ["POST", "PUT", "PATCH"],
+        "priority": "critical",
+    },
+    {
+        "prefix": "/api/v1/pharmacy/dispensations/",
+        "methods": ["POST", "PUT", "PATCH"],
+        "priority": "critical",
+    },
+    {
+        "prefix": "/api/v1/admissions/",
+        "methods": ["POST", "PUT", "PATCH"],
+        "priority": "critical",
+    },
+    {"prefix": "/api/v1/pharmacy/ai/", "priority": "low"},
+    {"prefix": "/api/v1/experience/ai/", "priority": "low"},
+    {"prefix": "/api/v1/ai/jobs/", "priority": "low"},
+    {"prefix": "/api/v1/results/reports/analyze-diagnosis/", "priority": "low"},
+]
+CONCURRENCY_EXEMPT_PATHS = [
+    "/health",
+    "/healthz",
+    "/readyz",
+    "/livez",
+    "/metrics",
+    "/static/",
+]
+
+# ------------------------------------------------------------------------------
+# Per-request deadline budgets (seconds) enforced by TimeoutMiddleware. Keep
+# them below Gunicorn's --timeout (60s) so overruns return 504 instead of
+# killing the worker. Longest matching path prefix wins; clients may shorten
+# the budget with an X-Request-Deadline header.
+REQUEST_DEADLINE_DEFAULT_SECONDS = config(
+    "REQUEST_DEADLINE_DEFAULT_SECONDS", default=30.0, cast=float
+)
+REQUEST_DEADLINE_ROUTES = {
+    "/api/v1/scheduling/appointments/": 5.0,
+    "/api/v1/pharmacy/dispensations/": 5.0,
+    "/api/v1/admissions/admissions/": 10.0,
+    "/api/v1/pharmacy/ai/": 50.0,
+    "/api/v1/experience/ai/": 50.0,
+    "/api/v1/results/reports/analyze-diagnosis/": 50.0,
+}
+# Re-issue PostgreSQL statement_timeout only when it drifts this far (ms)
+# above the remaining budget, to avoid a SET before every query.
+REQUEST_DEADLINE_DB_SLACK_MS = config(
+    "REQUEST_DEADLINE_DB_SLACK_MS", default=250, cast=int
+)
+
+# ------------------------------------------------------------------------------
+# Per-route latency histogram buckets (seconds) used by RouteMetricsMiddleware.
+REQUEST_LATENCY_BUCKETS = config(
+    "REQUEST_LATENCY_BUCKETS",
+    default="0.01,0.025,0.05,0.1,0.2,0.3,0.5,0.75,1,2.5,5,10",
+    cast=Csv(cast=float),
+)
+
+# Per-endpoint SLOs. ``route`` is a route-template prefix; a request is a good
+# event when it finishes under ``threshold_ms`` without a 5xx response. Burn
+# rates per window are Prometheus recording rules (prometheus/rules/slo.yml).
+SLO_DEFINITIONS = [
+    {
+        "name": "booking",
+        "route": "/api/v1/scheduling/appointments/",
+        "methods": ["POST"],
+        "threshold_ms": 300,
+        "objective": 0.99,
+    },
+    {
+        "name": "dispensing",
+        "route": "/api/v1/pharmacy/dispensations/",
+        "methods": ["POST"],
+        "threshold_ms": 500,
+        "objective": 0.99,
+    },
+    {
+        "name": "admission",
+        "route": "/api/v1/admissions/admissions/",
+        "methods": ["POST"],
+        "threshold_ms": 500,
+        "objective": 0.99,
+    },
+]
 HEALTH_CHECK_ENABLED = config("HEALTH_CHECK_ENABLED", default=True, cast=bool)
 
 ADMIN_URL = config("ADMIN_URL", default="admin/")
@@ -542,6 +711,11 @@ SENTRY_DSN = config("SENTRY_DSN", default=None)
 
 # AI Integration Configuration
 # ------------------------------------------------------------------------------
+# Upper bound for AI HTTP calls; the request deadline may lower it further
+AI_REQUEST_TIMEOUT_SECONDS = config(
+    "AI_REQUEST_TIMEOUT_SECONDS", default=45.0, cast=float
+)
+
 # Gemini (Default - Free Tier Available)
 GEMINI_API_KEY = config("GEMINI_API_KEY", default=None)
 GEMINI_MODEL = config("GEMINI_MODEL", default="models/gemini-2.5-flash")
@@ -559,3 +733,149 @@ AZURE_OPENAI_DEPLOYMENT_NAME = config(
 AZURE_OPENAI_API_VERSION = config(
     "AZURE_OPENAI_API_VERSION", default="2024-02-15-preview"
 )
+
+# AI response cache (process-local LRU in front of the Redis cache)
+AI_CACHE_ENABLED = config("AI_CACHE_ENABLED", default=True, cast=bool)
+AI_CACHE_LOCAL_MAX_ENTRIES = config("AI_CACHE_LOCAL_MAX_ENTRIES", default=512, cast=int)
+AI_CACHE_LOCAL_TTL_SECONDS = 300
+# Untagged calls are cached only at or below this temperature
+AI_CACHE_MAX_TEMPERATURE = 0.3
+# TTL in seconds per use case; 0 disables caching for it
+AI_CACHE_TTLS = {
+    "default": 3600,
+    "drug_info": 7 * 24 * 3600,
+    # The formulary pre-warm stores its own entries (DRUG_INFO_CACHE_*)
+    "drug_info_prewarm": 0,
+    "report_advice": 24 * 3600,
+}
+
+# Prompt budgets in estimated tokens (system prompt included), per cache use
+# case; lower-priority prompt sections are trimmed to fit (core.ai_budget)
+AI_PROMPT_BUDGET_ENABLED = config("AI_PROMPT_BUDGET_ENABLED", default=True, cast=bool)
+AI_PROMPT_BUDGETS = {
+    "default": 4000,
+    "drug_info": 1000,
+    "drug_info_prewarm": 1000,
+    "report_advice": 2000,
+}
+AI_CHARS_PER_TOKEN = 4.0
+
+# Asynchronous AI jobs (Prefer: respond-async -> 202 + job id)
+# Consumed by the dedicated celery_ai_worker (CELERY_QUEUES=ai)
+AI_JOB_QUEUE = config("AI_JOB_QUEUE", default="ai")
+AI_JOB_TTL_SECONDS = 3600
+AI_JOB_MAX_WAIT_SECONDS = 25  # long-poll cap, below the request deadline
+AI_JOB_POLL_INTERVAL_SECONDS = 0.1
+AI_JOB_HANDLERS = {
+    "drug_info": "src.apps.pharmacy.ai_service.drug_info_job",
+    "feedback_analysis": "src.apps.experience.ai_service.feedback_analysis_job",
+    "lifestyle_advice": "src.apps.results.services.lifestyle_advice_job",
+}
+
+# Formulary drug information, pre-generated nightly (pharmacy.tasks) and served
+# to pharmacists from the cache with its generation time
+DRUG_INFO_CACHE_TTL_SECONDS = 7 * 24 * 3600
+# Entries live up to this share less, spreading refreshes over several nights
+DRUG_INFO_CACHE_TTL_JITTER = 0.2
+# The nightly run regenerates entries expiring within this window
+DRUG_INFO_REFRESH_BEFORE_SECONDS = 2 * 24 * 3600
+DRUG_INFO_PREWARM_MAX_PER_RUN = config(
+    "DRUG_INFO_PREWARM_MAX_PER_RUN", default=500, cast=int
+)
+CELERY_TASK_ROUTES["src.apps.pharmacy.tasks.prewarm_drug_information"] = {
+    "queue": AI_JOB_QUEUE
+}
+
+# Medication consumption forecast (pharmacy.forecasting), computed nightly
+PHARMACY_FORECAST_HISTORY_DAYS = 730
+# Recent days averaged for the consumption rate (whole weeks)
+PHARMACY_FORECAST_WINDOW_DAYS = 28
+PHARMACY_FORECAST_HORIZON_DAYS = 365
+# Supplier lead time: reorder this many days before stock reaches reorder_level
+PHARMACY_REORDER_LEAD_DAYS = config("PHARMACY_REORDER_LEAD_DAYS", default=7, cast=int)
+PHARMACY_FORECAST_CACHE_SECONDS = 36 * 3600
+
+# Medication typeahead search (pharmacy.search): "memory" keeps a trie and
+# trigram index per process; "postgres" queries pg_trgm indexes instead
+MEDICATION_SEARCH_BACKEND = config("MEDICATION_SEARCH_BACKEND", default="memory")
+# The in-memory index is rebuilt from the database this often
+MEDICATION_SEARCH_REBUILD_SECONDS = 600
+
+# Drug interaction checks on dispensing (pharmacy.interactions)
+# Medications dispensed within this many days count as current
+DRUG_INTERACTION_LOOKBACK_DAYS = 90
+# Each process reloads its interaction index this often
+DRUG_INTERACTION_INDEX_TTL_SECONDS = 300
+
+# Batched QR scans synced by handheld scanners (equipment.services.record_scans)
+EQUIPMENT_SCAN_BATCH_MAX = 1000
+# Cached QR code -> equipment records for scanner lookups (equipment.lookup)
+EQUIPMENT_QR_CACHE_SECONDS = 600
+
+# Equipment utilization rollups (equipment.analytics), rebuilt nightly for the
+# last this many days so late scans and incident updates are counted
+EQUIPMENT_UTILIZATION_RECOMPUTE_DAYS = 7
+
+# Provider rate limits (token bucket shared through Redis). Keys are the client
+# class name, optionally with ":<model>"; "default" covers the rest.
+AI_RATE_LIMIT_ENABLED = config("AI_RATE_LIMIT_ENABLED", default=True, cast=bool)
+AI_RATE_LIMITS = {
+    "default": {"rpm": 60, "burst": 10},
+    "GeminiClient": {"rpm": 15, "burst": 3},  # free tier
+}
+# Longest a call queues for a token (also bounded by the request deadline)
+AI_RATE_LIMIT_MAX_WAIT_SECONDS = 10
+# Concurrent identical requests share one provider call
+AI_SINGLE_FLIGHT_ENABLED = config("AI_SINGLE_FLIGHT_ENABLED", default=True, cast=bool)
+AI_SINGLE_FLIGHT_LOCK_SECONDS = 60
+
+# Provider failover: client class names in priority order. With more than one,
+# calls go through a per-provider circuit breaker and are hedged to the next
+# provider once the primary exceeds its observed p95 latency.
+AI_PROVIDERS = config(
+    "AI_PROVIDERS", cast=Csv(), default="AzureClient,GeminiClient,OpenAIClient"
+)
+AI_BREAKER_FAIL_MAX = 5
+AI_BREAKER_RESET_SECONDS = 30
+AI_HEDGE_ENABLED = config("AI_HEDGE_ENABLED", default=True, cast=bool)
+# Hedge delay: the primary's p95, never below the minimum; the default is used
+# until enough latency samples have been collected
+AI_HEDGE_MIN_DELAY_SECONDS = 0.5
+AI_HEDGE_DEFAULT_DELAY_SECONDS = 5.0
+AI_HEDGE_MIN_SAMPLES = 20
+AI_HEDGE_MAX_WORKERS = config("AI_HEDGE_MAX_WORKERS", default=16, cast=int)
+
+# Local stand-in provider (AI_PROVIDERS=LocalAIClient) for benchmarks and load
+# tests: deterministic output with injected latency, errors and 429s.
+# Latency distributions: fixed (median), uniform (0..2x median) or lognormal.
+AI_LOCAL_MODEL = "local-stub"
+AI_LOCAL_LATENCY_DISTRIBUTION = config(
+    "AI_LOCAL_LATENCY_DISTRIBUTION", default="lognormal"
+)
+AI_LOCAL_LATENCY_MEDIAN_SECONDS = config(
+    "AI_LOCAL_LATENCY_MEDIAN_SECONDS", default=0.8, cast=float
+)
+AI_LOCAL_LATENCY_SIGMA = config("AI_LOCAL_LATENCY_SIGMA", default=0.5, cast=float)
+AI_LOCAL_ERROR_RATE = config("AI_LOCAL_ERROR_RATE", default=0.0, cast=float)
+AI_LOCAL_RATE_LIMIT_RATE = config("AI_LOCAL_RATE_LIMIT_RATE", default=0.0, cast=float)
+AI_LOCAL_RESPONSE_WORDS = 120
+AI_LOCAL_SEED = config("AI_LOCAL_SEED", default=0, cast=int)
+
+# Batch feedback analysis (manage.py analyze_feedback). Pack sizes are items
+# per prompt, keyed by client class name; output is capped at ~1000 tokens,
+# so keep packs small enough for one-sentence summaries of every item.
+AI_FEEDBACK_BATCH_WORKERS = config("AI_FEEDBACK_BATCH_WORKERS", default=4, cast=int)
+AI_FEEDBACK_BATCH_PACK_SIZES = {"default": 10}
+AI_FEEDBACK_BATCH_MAX_PROMPT_CHARS = 12000
+AI_FEEDBACK_BATCH_RETRIES = 2
+
+# Local feedback triage (experience.sentiment): clear-cut comments are analyzed
+# with a lexicon on submission; only escalated ones are left for the LLM.
+FEEDBACK_TRIAGE_ENABLED = config("FEEDBACK_TRIAGE_ENABLED", default=True, cast=bool)
+FEEDBACK_TRIAGE_ESCALATE_RATING = 2  # ratings at or below always escalate
+FEEDBACK_TRIAGE_SCORE_THRESHOLD = 0.3  # |score| needed for POSITIVE/NEGATIVE
+FEEDBACK_TRIAGE_MAX_UNMATCHED_CHARS = 160  # longer weak-signal text escalates
+# Share of local decisions still sent to the LLM to measure agreement
+FEEDBACK_TRIAGE_AUDIT_RATE = config(
+    "FEEDBACK_TRIAGE_AUDIT_RATE", default=0.05, cast=float
+)
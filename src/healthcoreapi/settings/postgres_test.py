@@ -0,0 +1,20 @@
+"""
+Test settings for tests that need PostgreSQL.
+
+Row-level locking under concurrent writers and exclusion constraints only
+exist on PostgreSQL, so tests marked ``postgres`` are skipped with the
+default SQLite settings. CI runs them against its postgres service:
+
+    pytest -m postgres --ds=src.healthcoreapi.settings.postgres_test \
+        --migrations --create-db --no-cov
+
+Migrations must run: some constraints are only created by them.
+"""
+
+import dj_database_url
+from decouple import config
+
+from .test import *  # noqa: F401,F403
+
+DATABASES = {"default": dj_database_url.parse(config("DATABASE_URL"))}
+DATABASES["default"]["ATOMIC_REQUESTS"] = True
@@ -20,6 +20,7 @@ from .base import (
     CACHES,
     DATABASES,
     INSTALLED_APPS,
+    LOG_QUEUE_ENABLED,
     LOGGING,
     # MIDDLEWARE,
     REST_FRAMEWORK,
@@ -104,9 +105,13 @@ LOGGING["handlers"]["file"] = {
     "formatter": "json",
 }
 
-# Add file handler to root logger
-root_handlers = LOGGING["root"]["handlers"]  # type: ignore[index]
-root_handlers.append("file")
+# Add file handler to root logger (behind the async queue when enabled)
+if LOG_QUEUE_ENABLED:
+    queue_targets = LOGGING["handlers"]["queue"]["handlers"]  # type: ignore[index]
+    queue_targets.append("cfg://handlers.file")
+else:
+    root_handlers = LOGGING["root"]["handlers"]  # type: ignore[index]
+    root_handlers.append("file")
 
 # Error Monitoring with Sentry (Senior-level integration)
 # ------------------------------------------------------------------------------
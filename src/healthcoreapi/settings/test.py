@@ -119,3 +119,12 @@ MEDIA_ROOT = tempfile.mkdtemp()
 # File upload: Allow all file types in tests
 FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024 * 100  # 100MB for tests
 DATA_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024 * 100  # 100MB for tests
+
+# AI response cache, rate limiting and coalescing: off so provider mocks
+# see every call without waiting
+AI_CACHE_ENABLED = False
+AI_RATE_LIMIT_ENABLED = False
+AI_SINGLE_FLIGHT_ENABLED = False
+
+# Deterministic feedback triage (no random audit escalations)
+FEEDBACK_TRIAGE_AUDIT_RATE = 0.0